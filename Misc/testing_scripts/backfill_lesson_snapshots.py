@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Script to (re)build the stored content snapshots of existing lessons.
+
+Lessons created since the content_snapshot column was added get their snapshot
+when they are saved; older lessons are served from the content tables until
+this has been run. Lessons are rendered page by page in primary-key order with
+crud.refresh_lesson_snapshots and each page is committed on its own, so the
+script can be interrupted and rerun.
+
+Usage:
+    python Misc/testing_scripts/backfill_lesson_snapshots.py
+    python Misc/testing_scripts/backfill_lesson_snapshots.py --all --batch-size 200
+"""
+
+import argparse
+import os
+import sys
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from app.api import crud
+from app.models.models import DesiLesson
+from app.utils.database import SessionLocal
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Backfill lesson content snapshots")
+    parser.add_argument("--all", action="store_true", help="Re-render every lesson, not only those without a snapshot")
+    parser.add_argument("--batch-size", type=int, default=100, help="Lessons rendered per transaction")
+    return parser.parse_args()
+
+
+def backfill_lesson_snapshots(args):
+    db = SessionLocal()
+    started = time.monotonic()
+    processed = changed = 0
+    last_id = 0
+    try:
+        while True:
+            query = db.query(DesiLesson.id).filter(DesiLesson.id > last_id)
+            if not args.all:
+                query = query.filter(DesiLesson.content_snapshot.is_(None))
+            lesson_ids = [row[0] for row in query.order_by(DesiLesson.id).limit(args.batch_size)]
+            if not lesson_ids:
+                break
+
+            changed += crud.refresh_lesson_snapshots(db, lesson_ids)
+            db.commit()
+            # Drop the rendered lessons before loading the next page
+            db.expunge_all()
+
+            processed += len(lesson_ids)
+            last_id = lesson_ids[-1]
+            print(f"  up to lesson id {last_id}: {processed} lessons, {changed} snapshots written")
+    finally:
+        db.close()
+
+    print(f"\nCompleted in {time.monotonic() - started:.1f}s: {processed} lessons, {changed} snapshots written")
+
+
+if __name__ == "__main__":
+    print("Backfilling lesson content snapshots...")
+    backfill_lesson_snapshots(parse_args())
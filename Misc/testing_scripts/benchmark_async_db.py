@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Script to compare sync and async database sessions in async routes under mixed traffic.
+
+Serves the same lesson list query (crud.get_lesson_metadata_by_language) from
+an async route two ways: with a sync Session (queries block the event loop,
+as the async routes used to) and with an AsyncSession from get_async_db
+(queries are awaited on asyncpg). Alongside the database clients, "Gemini"
+clients call a route that awaits a slow upstream request, simulated with
+asyncio.sleep since awaiting the Gemini HTTP call behaves the same on the loop.
+
+Requests go through the ASGI app in-process, on one event loop like a single
+uvicorn worker. --db-latency-ms adds pg_sleep to every database request to
+model a remote database or a slower query.
+
+Usage:
+    python Misc/testing_scripts/benchmark_async_db.py
+    python Misc/testing_scripts/benchmark_async_db.py --db-clients 20 --gemini-clients 20 --db-latency-ms 10
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+import httpx
+from fastapi import Depends, FastAPI
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.api import crud
+from app.utils.database import async_engine, engine, get_async_db, get_db
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Compare sync and async database sessions in async routes")
+    parser.add_argument("--language", default="Hindi", help="Language whose lessons are listed")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds each variant runs")
+    parser.add_argument("--db-clients", type=int, default=10, help="Concurrent clients listing lessons")
+    parser.add_argument("--gemini-clients", type=int, default=10, help="Concurrent clients of the slow upstream route")
+    parser.add_argument("--db-latency-ms", type=float, default=5.0, help="pg_sleep added to every database request")
+    parser.add_argument("--gemini-latency-ms", type=float, default=500.0, help="Simulated Gemini response time")
+    return parser.parse_args()
+
+
+def build_app(args) -> FastAPI:
+    app = FastAPI()
+    delay = args.db_latency_ms / 1000
+
+    @app.get("/sync/lessons/{language}")
+    async def list_lessons_sync(language: str, db: Session = Depends(get_db)):
+        db.execute(text("SELECT pg_sleep(:delay)"), {"delay": delay})
+        return len(crud.get_lesson_metadata_by_language(db, language))
+
+    @app.get("/async/lessons/{language}")
+    async def list_lessons_async(language: str, db: AsyncSession = Depends(get_async_db)):
+        await db.execute(text("SELECT pg_sleep(:delay)"), {"delay": delay})
+        return len(await db.run_sync(crud.get_lesson_metadata_by_language, language))
+
+    @app.get("/gemini")
+    async def slow_upstream():
+        await asyncio.sleep(args.gemini_latency_ms / 1000)
+        return {"ok": True}
+
+    return app
+
+
+async def client_loop(client: httpx.AsyncClient, url: str, deadline: float, durations: list):
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        response = await client.get(url)
+        response.raise_for_status()
+        durations.append(time.perf_counter() - started)
+
+
+def summarize(durations: list, elapsed: float) -> dict:
+    if not durations:
+        return {"requests": 0, "rps": 0.0, "p50_ms": 0.0, "p95_ms": 0.0}
+    return {
+        "requests": len(durations),
+        "rps": len(durations) / elapsed,
+        "p50_ms": statistics.median(durations) * 1000,
+        "p95_ms": sorted(durations)[int(len(durations) * 0.95)] * 1000
+    }
+
+
+async def run_variant(app: FastAPI, variant: str, args) -> dict:
+    db_durations, gemini_durations = [], []
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://benchmark", limits=limits, timeout=120) as client:
+        # Warm both connection pools before timing
+        await client.get(f"/{variant}/lessons/{args.language}")
+
+        started = time.perf_counter()
+        deadline = started + args.duration
+        await asyncio.gather(
+            *(client_loop(client, f"/{variant}/lessons/{args.language}", deadline, db_durations) for _ in range(args.db_clients)),
+            *(client_loop(client, "/gemini", deadline, gemini_durations) for _ in range(args.gemini_clients))
+        )
+        elapsed = time.perf_counter() - started
+    return {"db": summarize(db_durations, elapsed), "gemini": summarize(gemini_durations, elapsed)}
+
+
+async def main():
+    args = parse_args()
+    app = build_app(args)
+
+    print(
+        f"{args.db_clients} database clients ({args.db_latency_ms:.0f}ms pg_sleep) and {args.gemini_clients} "
+        f"Gemini clients ({args.gemini_latency_ms:.0f}ms) for {args.duration:.0f}s per variant\n"
+    )
+    print(f"{'session':<14} {'db req/s':>9} {'db p50':>9} {'db p95':>9} {'gemini req/s':>13} {'gemini p50':>11} {'gemini p95':>11}")
+    try:
+        for label, variant in (("sync Session", "sync"), ("AsyncSession", "async")):
+            result = await run_variant(app, variant, args)
+            db, gemini = result["db"], result["gemini"]
+            print(
+                f"{label:<14} {db['rps']:>9.1f} {db['p50_ms']:>7.1f}ms {db['p95_ms']:>7.1f}ms "
+                f"{gemini['rps']:>13.1f} {gemini['p50_ms']:>9.1f}ms {gemini['p95_ms']:>9.1f}ms"
+            )
+    finally:
+        await async_engine.dispose()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+Script to compare query plans of the hot query paths before and after the
+index migration (alembic/versions/8e3b6c0d2a17_add_hot_path_indexes.py).
+
+Builds a throwaway schema in the configured PostgreSQL database, fills it with
+a large synthetic dataset (generate_series, so it takes seconds rather than
+minutes), and runs EXPLAIN (ANALYZE, BUFFERS) for each query without the
+migration's indexes and then with them. The schema is dropped afterwards
+unless --keep-schema is given. Nothing outside the schema is touched.
+
+Usage:
+    python Misc/testing_scripts/benchmark_indexes.py
+    python Misc/testing_scripts/benchmark_indexes.py --lessons 50000 --users 20000 --plans
+"""
+
+import argparse
+import importlib.util
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from sqlalchemy import text
+
+from app.models import models
+from app.utils.database import engine
+
+MIGRATION_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    "alembic", "versions", "8e3b6c0d2a17_add_hot_path_indexes.py"
+)
+LANGUAGES = ["Hindi", "Telugu", "Tamil", "Kannada", "Bengali", "Marathi", "Gujarati", "Punjabi", "Malayalam", "Urdu"]
+CEFR_LEVELS = ["A1", "A2", "B1", "B2", "C1"]
+
+# (label, SQL); parameters are filled in from the generated data
+QUERIES = [
+    ("lesson vocabulary", "SELECT * FROM desi_vocabulary WHERE lesson_id = :lesson_id"),
+    ("lesson example sentences", "SELECT * FROM desi_example_sentences WHERE lesson_id = :lesson_id"),
+    ("lesson short story", "SELECT * FROM desi_short_stories WHERE lesson_id = :lesson_id"),
+    ("story dialogue in order", "SELECT * FROM desi_dialogue WHERE short_story_id = :story_id ORDER BY order_num"),
+    ("lesson quiz", "SELECT * FROM desi_quiz_questions WHERE lesson_id = :lesson_id"),
+    ("admin lessons, newest first", "SELECT * FROM desi_lessons ORDER BY created_at DESC LIMIT 15"),
+    ("user progress for a language", "SELECT * FROM user_progress WHERE user_id = :user_id AND language = :language"),
+    (
+        "recent completions",
+        "SELECT * FROM lesson_completions WHERE user_id = :user_id ORDER BY completed_at DESC LIMIT 5"
+    ),
+    (
+        "existing completion check",
+        "SELECT * FROM lesson_completions WHERE user_id = :user_id AND lesson_id = :lesson_id AND language = :language LIMIT 1"
+    ),
+    (
+        "translation history page",
+        "SELECT * FROM user_translations WHERE user_id = :user_id ORDER BY created_at DESC LIMIT 20"
+    ),
+    (
+        "similar story check",
+        "SELECT * FROM desi_stories WHERE target_language = :language AND cefr_level = 'B1' AND scenario = :scenario LIMIT 1"
+    ),
+    (
+        "stories for a language, newest first",
+        "SELECT * FROM desi_stories WHERE target_language = :language ORDER BY generated_at DESC LIMIT 50"
+    ),
+    ("story list, newest first", "SELECT * FROM desi_stories ORDER BY generated_at DESC LIMIT 50"),
+    ("delete a lesson (cascades)", "DELETE FROM desi_lessons WHERE id = :lesson_id"),
+]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Query plans of the hot paths before and after the index migration")
+    parser.add_argument("--lessons", type=int, default=20000, help="Synthetic lessons (each with 12 words, 7 sentences, 9 lines, 5 questions)")
+    parser.add_argument("--users", type=int, default=10000, help="Synthetic users (3 languages, 40 completions and 50 translations each)")
+    parser.add_argument("--stories", type=int, default=50000, help="Synthetic stories (8 vocabulary words each)")
+    parser.add_argument("--runs", type=int, default=5, help="Executions per query; the fastest is reported")
+    parser.add_argument("--plans", action="store_true", help="Print the full query plans")
+    parser.add_argument("--keep-schema", action="store_true", help="Keep the benchmark schema for manual inspection")
+    return parser.parse_args()
+
+
+def load_migration_indexes():
+    spec = importlib.util.spec_from_file_location("hot_path_indexes", MIGRATION_PATH)
+    migration = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(migration)
+    return migration.INDEXES
+
+
+def populate(conn, args):
+    languages = "ARRAY[" + ", ".join(f"'{language}'" for language in LANGUAGES) + "]"
+    levels = "ARRAY[" + ", ".join(f"'{level}'" for level in CEFR_LEVELS) + "]"
+    steps = [
+        ("users", f"""
+            INSERT INTO users (email, username, hashed_password, is_active, is_verified, role, created_at)
+            SELECT 'user' || n || '@example.com', 'user' || n, 'x', true, true, 'USER', now() - n * interval '1 minute'
+            FROM generate_series(1, {args.users}) AS n
+        """),
+        ("desi_lessons", f"""
+            INSERT INTO desi_lessons (title, target_language, difficulty, lesson_number, created_at)
+            SELECT 'Lesson ' || n, ({languages})[1 + n % {len(LANGUAGES)}], 'beginner', 1 + n / {len(LANGUAGES)},
+                   now() - n * interval '1 minute'
+            FROM generate_series(0, {args.lessons} - 1) AS n
+        """),
+        ("desi_vocabulary", """
+            INSERT INTO desi_vocabulary (lesson_id, english, target_language_script, transliteration, pronunciation)
+            SELECT l.id, 'word ' || i, 'शब्द ' || i, 'shabd ' || i, 'shubd ' || i
+            FROM desi_lessons l CROSS JOIN generate_series(1, 12) AS i
+        """),
+        ("desi_example_sentences", """
+            INSERT INTO desi_example_sentences (lesson_id, english, target_language_script, transliteration, pronunciation)
+            SELECT l.id, 'sentence ' || i, 'वाक्य ' || i, 'vakya ' || i, 'vaakya ' || i
+            FROM desi_lessons l CROSS JOIN generate_series(1, 7) AS i
+        """),
+        ("desi_short_stories", """
+            INSERT INTO desi_short_stories (lesson_id, title) SELECT id, 'Story ' || id FROM desi_lessons
+        """),
+        ("desi_dialogue", """
+            INSERT INTO desi_dialogue (short_story_id, speaker, target_language_script, transliteration, english, order_num)
+            SELECT s.id, CASE WHEN i % 2 = 0 THEN 'Priya' ELSE 'Arjun' END, 'पंक्ति ' || i, 'pankti ' || i, 'line ' || i, i
+            FROM desi_short_stories s CROSS JOIN generate_series(0, 8) AS i
+        """),
+        ("desi_quiz_questions", """
+            INSERT INTO desi_quiz_questions (lesson_id, question, options, answer)
+            SELECT l.id, 'question ' || i, '["a", "b", "c", "d"]'::jsonb, 'a'
+            FROM desi_lessons l CROSS JOIN generate_series(1, 5) AS i
+        """),
+        ("user_progress", f"""
+            INSERT INTO user_progress (user_id, language, total_lessons_completed, created_at)
+            SELECT u.id, ({languages})[1 + (u.id + i) % {len(LANGUAGES)}], i, now()
+            FROM users u CROSS JOIN generate_series(0, 2) AS i
+        """),
+        ("lesson_completions", f"""
+            INSERT INTO lesson_completions (user_id, lesson_id, language, completed_at, time_spent_minutes)
+            SELECT u.id, 1 + (u.id * 37 + i * 101) % {args.lessons}, ({languages})[1 + i % {len(LANGUAGES)}],
+                   now() - (u.id + i * 7) * interval '1 hour', 10
+            FROM users u CROSS JOIN generate_series(1, 40) AS i
+        """),
+        ("user_translations", """
+            INSERT INTO user_translations (user_id, from_text, to_text, from_language, to_language,
+                                           from_language_name, to_language_name, created_at)
+            SELECT u.id, 'hello ' || i, 'नमस्ते ' || i, 'en', 'hi', 'English', 'Hindi', now() - (u.id + i) * interval '1 minute'
+            FROM users u CROSS JOIN generate_series(1, 50) AS i
+        """),
+        ("desi_stories", f"""
+            INSERT INTO desi_stories (title, target_language, cefr_level, scenario, english_text, translated_text,
+                                      generated_at, is_custom)
+            SELECT 'Story ' || n, ({languages})[1 + n % {len(LANGUAGES)}], ({levels})[1 + n / 7 % {len(CEFR_LEVELS)}],
+                   CASE WHEN n % 3 = 0 THEN NULL ELSE 'scenario ' || n % 500 END,
+                   repeat('English text. ', 40), repeat('अनुवादित पाठ। ', 40), now() - n * interval '1 minute', n % 3 <> 0
+            FROM generate_series(1, {args.stories}) AS n
+        """),
+        ("desi_story_vocabulary", """
+            INSERT INTO desi_story_vocabulary (story_id, word, definition, order_index)
+            SELECT s.id, 'word ' || i, 'definition ' || i, i
+            FROM desi_stories s CROSS JOIN generate_series(0, 7) AS i
+        """),
+    ]
+    for table, sql in steps:
+        conn.execute(text(sql))
+        count = conn.execute(text(f"SELECT count(*) FROM {table}")).scalar()
+        print(f"  {table:<24} {count:>10,} rows")
+    conn.execute(text("ANALYZE"))
+
+
+def query_parameters(conn):
+    lesson_id = conn.execute(text("SELECT id FROM desi_lessons ORDER BY id OFFSET (SELECT count(*) / 2 FROM desi_lessons) LIMIT 1")).scalar()
+    user_id, language = conn.execute(text(
+        "SELECT user_id, language FROM user_progress ORDER BY id OFFSET (SELECT count(*) / 2 FROM user_progress) LIMIT 1"
+    )).one()
+    completion_lesson_id = conn.execute(
+        text("SELECT lesson_id FROM lesson_completions WHERE user_id = :user_id LIMIT 1"), {"user_id": user_id}
+    ).scalar()
+    return {
+        "lesson_id": lesson_id,
+        "story_id": conn.execute(text("SELECT id FROM desi_short_stories WHERE lesson_id = :lesson_id"), {"lesson_id": lesson_id}).scalar(),
+        "user_id": user_id,
+        "language": language,
+        "completion_lesson_id": completion_lesson_id,
+        "scenario": "scenario 250"
+    }
+
+
+def explain(conn, sql, params, runs):
+    """Fastest of runs EXPLAIN ANALYZE executions: (ms, buffers, top plan node, plan text)"""
+    best = None
+    for _ in range(runs):
+        # Every run happens in a rolled back savepoint, so DELETE leaves the data in place
+        savepoint = conn.begin_nested()
+        try:
+            plan = conn.execute(text(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql}"), params).scalar()[0]
+            plan_text = "\n".join(
+                row[0] for row in conn.execute(text(f"EXPLAIN (ANALYZE, BUFFERS) {sql}"), params)
+            ) if best is None else None
+        finally:
+            savepoint.rollback()
+        total_ms = plan["Execution Time"] + sum(trigger["Time"] for trigger in plan.get("Triggers", []))
+        node = plan["Plan"]
+        buffers = node.get("Shared Hit Blocks", 0) + node.get("Shared Read Blocks", 0)
+        if best is None or total_ms < best[0]:
+            best = (total_ms, buffers, describe(node), plan_text or best[3])
+    return best
+
+
+def describe(node):
+    """Most telling node of a plan: the first scan below sorts, limits and modify nodes"""
+    while node["Node Type"] in ("Limit", "Sort", "Incremental Sort", "ModifyTable", "Gather", "Gather Merge") and node.get("Plans"):
+        node = node["Plans"][0]
+    name = node["Node Type"]
+    if node.get("Index Name"):
+        name += f" ({node['Index Name']})"
+    return name
+
+
+def run_queries(conn, params, runs, show_plans):
+    results = {}
+    for label, sql in QUERIES:
+        query_params = dict(params)
+        if label == "existing completion check":
+            query_params["lesson_id"] = params["completion_lesson_id"]
+        results[label] = explain(conn, sql, query_params, runs)
+        if show_plans:
+            print(f"\n--- {label}\n{results[label][3]}")
+    return results
+
+
+def main():
+    args = parse_args()
+    indexes = load_migration_indexes()
+    schema = f"index_benchmark_{os.getpid()}"
+
+    with engine.connect() as conn:
+        conn.execute(text(f"CREATE SCHEMA {schema}"))
+        conn.execute(text(f"SET search_path TO {schema}"))
+        try:
+            print(f"Building synthetic dataset in schema {schema}...")
+            models.Base.metadata.create_all(conn)
+            for name, _, _ in indexes:
+                conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+            populate(conn, args)
+            conn.commit()
+            params = query_parameters(conn)
+
+            print("\nWithout the migration's indexes...")
+            before = run_queries(conn, params, args.runs, args.plans)
+
+            print(f"\nCreating {len(indexes)} indexes...")
+            for name, table, columns in indexes:
+                conn.execute(text(f"CREATE INDEX {name} ON {table} ({', '.join(columns)})"))
+            conn.execute(text("ANALYZE"))
+            conn.commit()
+            after = run_queries(conn, params, args.runs, args.plans)
+
+            print(f"\n{'query':<38} {'before':>10} {'after':>10} {'speedup':>8}  {'buffers':>15}  plan after")
+            for label, _ in QUERIES:
+                before_ms, before_buffers, _, _ = before[label]
+                after_ms, after_buffers, after_node, _ = after[label]
+                print(
+                    f"{label:<38} {before_ms:8.2f}ms {after_ms:8.2f}ms {before_ms / max(after_ms, 0.001):7.1f}x  "
+                    f"{before_buffers:>6} -> {after_buffers:<6}  {after_node}"
+                )
+                if before[label][2] != after_node:
+                    print(f"{'':<38} (before: {before[label][2]})")
+        finally:
+            conn.rollback()
+            if args.keep_schema:
+                print(f"\nKept schema {schema}; drop it with DROP SCHEMA {schema} CASCADE")
+            else:
+                conn.execute(text(f"DROP SCHEMA {schema} CASCADE"))
+            conn.execute(text("RESET search_path"))
+            conn.commit()
+
+
+if __name__ == "__main__":
+    main()
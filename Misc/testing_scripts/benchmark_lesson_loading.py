@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Script to compare full-lesson loading strategies.
+
+Loads every lesson of a synthetic set the way crud.get_desi_lesson_with_content
+does (one selectinload query per collection) and the way it used to (joinedload
+of all four collections in one query, which returns their cartesian product),
+and reports rows transferred, statements and latency per lesson fetch.
+
+Synthetic lessons have the generated size (12 words, 7 sentences, 9 dialogue
+lines, 5 quiz questions) and live in a throwaway schema of the configured
+PostgreSQL database, which is dropped afterwards.
+
+Usage:
+    python Misc/testing_scripts/benchmark_lesson_loading.py
+    python Misc/testing_scripts/benchmark_lesson_loading.py --lessons 200 --runs 10
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session, joinedload
+
+from app.api import crud
+from app.models import models, schemas
+from app.utils.database import engine
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Compare full-lesson loading strategies")
+    parser.add_argument("--lessons", type=int, default=50, help="Synthetic lessons to load")
+    parser.add_argument("--runs", type=int, default=5, help="Times each lesson is loaded per strategy")
+    return parser.parse_args()
+
+
+def make_lesson(index: int) -> schemas.DesiLessonResponse:
+    return schemas.DesiLessonResponse(desi_lesson=schemas.DesiLessonContent(
+        title=f"Lesson {index}",
+        target_language="Hindi",
+        difficulty="beginner",
+        vocabulary=[
+            schemas.DesiVocabularyItem(english=f"word {i}", target_language_script=f"शब्द {i}", transliteration=f"shabd {i}", pronunciation=f"shubd {i}")
+            for i in range(12)
+        ],
+        example_sentences=[
+            schemas.DesiExampleSentence(english=f"sentence {i}", target_language_script=f"वाक्य {i}", transliteration=f"vakya {i}", pronunciation=f"vaakya {i}")
+            for i in range(7)
+        ],
+        short_story=schemas.DesiShortStory(title=f"Story {index}", dialogue=[
+            schemas.DesiDialogueItem(speaker="Priya" if i % 2 else "Arjun", target_language_script=f"पंक्ति {i}", transliteration=f"pankti {i}", english=f"line {i}")
+            for i in range(9)
+        ]),
+        quiz=[schemas.DesiQuizQuestion(question=f"question {i}", options=["a", "b", "c", "d"], answer="a") for i in range(5)]
+    ))
+
+
+def load_with_joinedload(db: Session, lesson_id: int) -> models.DesiLesson:
+    """The previous strategy"""
+    return db.query(models.DesiLesson).filter(
+        models.DesiLesson.id == lesson_id
+    ).options(
+        joinedload(models.DesiLesson.vocabulary),
+        joinedload(models.DesiLesson.example_sentences),
+        joinedload(models.DesiLesson.short_story).joinedload(models.DesiShortStory.dialogue),
+        joinedload(models.DesiLesson.quiz_questions)
+    ).first()
+
+
+class QueryCounter:
+    def __init__(self):
+        self.statements = 0
+        self.rows = 0
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements += 1
+        if cursor.description is not None:
+            self.rows += cursor.rowcount
+
+
+def benchmark(connection, lesson_ids, loader, runs):
+    counter = QueryCounter()
+    event.listen(connection, "after_cursor_execute", counter)
+    durations = []
+    try:
+        for _ in range(runs):
+            for lesson_id in lesson_ids:
+                # A fresh session per fetch, like a request
+                with Session(bind=connection) as db:
+                    started = time.perf_counter()
+                    lesson = loader(db, lesson_id)
+                    crud.convert_db_lesson_to_response_format(lesson)
+                    durations.append(time.perf_counter() - started)
+    finally:
+        event.remove(connection, "after_cursor_execute", counter)
+    fetches = len(lesson_ids) * runs
+    return {
+        "rows": counter.rows / fetches,
+        "statements": counter.statements / fetches,
+        "p50_ms": statistics.median(durations) * 1000,
+        "p95_ms": sorted(durations)[int(len(durations) * 0.95)] * 1000
+    }
+
+
+def main():
+    args = parse_args()
+    schema = f"lesson_loading_benchmark_{os.getpid()}"
+
+    with engine.connect() as connection:
+        connection.execute(text(f"CREATE SCHEMA {schema}"))
+        connection.execute(text(f"SET search_path TO {schema}"))
+        try:
+            models.Base.metadata.create_all(connection)
+            connection.commit()
+            with Session(bind=connection) as db:
+                lesson_ids = [lesson.id for lesson in crud.create_desi_lessons(
+                    db, [(make_lesson(index), None) for index in range(args.lessons)]
+                )]
+            connection.execute(text("ANALYZE"))
+            connection.commit()
+
+            # Both strategies must produce the same lesson, dialogue in order_num order
+            with Session(bind=connection) as db:
+                expected = make_lesson(0).desi_lesson
+                for loader in (load_with_joinedload, crud.get_desi_lesson_with_content):
+                    loaded = crud.convert_db_lesson_to_response_format(loader(db, lesson_ids[0])).desi_lesson
+                    assert loaded == expected, f"{loader.__name__} returned a different lesson"
+
+            print(f"Loading {args.lessons} lessons x {args.runs} runs (12 words, 7 sentences, 9 lines, 5 questions each)\n")
+            print(f"{'strategy':<32} {'rows/fetch':>11} {'queries/fetch':>14} {'p50':>9} {'p95':>9}")
+            for label, loader in (
+                ("joinedload (cartesian product)", load_with_joinedload),
+                ("selectinload per collection", crud.get_desi_lesson_with_content)
+            ):
+                result = benchmark(connection, lesson_ids, loader, args.runs)
+                print(
+                    f"{label:<32} {result['rows']:>11.0f} {result['statements']:>14.0f} "
+                    f"{result['p50_ms']:>7.2f}ms {result['p95_ms']:>7.2f}ms"
+                )
+        finally:
+            connection.rollback()
+            connection.execute(text(f"DROP SCHEMA {schema} CASCADE"))
+            connection.execute(text("RESET search_path"))
+            connection.commit()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+Script to benchmark the TTS paths offline.
+
+Runs lesson audio synthesis and the audio endpoints end to end against the
+local stand-in backend (TTS_BACKEND=local): no Google credentials or network
+access needed, and every run starts with an empty audio cache. The stand-in
+waits --latency-ms per request and returns silent audio of realistic size, so
+results reflect our own overhead plus request fan-out, batching and caching.
+
+Lesson endpoints (--lesson-id) read the lesson from the configured database;
+everything else uses generated lessons.
+
+Usage:
+    python Misc/testing_scripts/benchmark_tts.py
+    python Misc/testing_scripts/benchmark_tts.py --latency-ms 300 --lessons 10 --no-batching
+    python Misc/testing_scripts/benchmark_tts.py --lesson-id 11
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark TTS synthesis and audio endpoints offline")
+    parser.add_argument("--latency-ms", type=int, default=150, help="Simulated TTS request latency")
+    parser.add_argument("--concurrency", type=int, default=8, help="TTS_CONCURRENCY and concurrent HTTP clients")
+    parser.add_argument("--lessons", type=int, default=5, help="Generated lessons to synthesize")
+    parser.add_argument("--requests", type=int, default=100, help="Requests per endpoint scenario")
+    parser.add_argument("--language", default="Hindi", help="Language for generated text")
+    parser.add_argument("--no-batching", action="store_true", help="Disable SSML batching")
+    parser.add_argument("--lesson-id", type=int, help="Also benchmark the lesson audio endpoints for this stored lesson")
+    return parser.parse_args()
+
+
+args = parse_args()
+work_dir = tempfile.mkdtemp(prefix="tts_benchmark_")
+# Settings are read at import time, so configure before importing the app
+os.environ["TTS_BACKEND"] = "local"
+os.environ["TTS_LOCAL_LATENCY_MS"] = str(args.latency_ms)
+os.environ["TTS_CONCURRENCY"] = str(args.concurrency)
+os.environ["TTS_SSML_BATCHING"] = "false" if args.no_batching else "true"
+os.environ["TTS_CACHE_DIR"] = os.path.join(work_dir, "tts")
+os.environ["LESSON_AUDIO_DIR"] = os.path.join(work_dir, "lessons")
+
+import httpx
+
+from app.main import app
+from app.services.tts_cache import tts_cache
+from app.services.tts_service import tts_service
+
+SYLLABLES = ["क", "ख", "ग", "न", "म", "र", "ल", "स", "त", "द", "प", "ब", "का", "की", "कु", "ने", "मा", "री", "लो", "सु"]
+SPEAKERS = ["Priya", "Arjun"]
+
+backend_calls = {"synthesize": 0, "synthesize_marked": 0}
+
+
+def count_backend_calls():
+    """Wrap the backend so the report can show how many TTS requests were made"""
+    for method_name in backend_calls:
+        method = getattr(tts_service.backend, method_name)
+
+        def counted(*method_args, _method=method, _name=method_name, **kwargs):
+            backend_calls[_name] += 1
+            return _method(*method_args, **kwargs)
+
+        setattr(tts_service.backend, method_name, counted)
+
+
+def make_text(rng: random.Random, words: int) -> str:
+    return " ".join("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))) for _ in range(words))
+
+
+def make_lesson(rng: random.Random) -> dict:
+    """Lesson with the shape Gemini generates: 12 words, 7 sentences, 9 dialogue lines"""
+    return {
+        "vocabulary": [{"english": f"word {i}", "target_language_script": make_text(rng, 1)} for i in range(12)],
+        "example_sentences": [{"english": f"sentence {i}", "target_language_script": make_text(rng, 5)} for i in range(7)],
+        "short_story": {"dialogue": [
+            {"speaker": SPEAKERS[i % 2], "english": f"line {i}", "target_language_script": make_text(rng, 7)}
+            for i in range(9)
+        ]}
+    }
+
+
+def summarize(label: str, durations: list, total_seconds: float, total_bytes: int = 0):
+    durations = sorted(durations)
+    p95 = durations[min(len(durations) - 1, int(len(durations) * 0.95))]
+    line = (
+        f"  {label:<38} n={len(durations):<4} p50={statistics.median(durations) * 1000:7.1f}ms "
+        f"p95={p95 * 1000:7.1f}ms  {len(durations) / total_seconds:7.1f}/s"
+    )
+    if total_bytes:
+        line += f"  {total_bytes / len(durations) / 1024:7.1f} KiB avg"
+    print(line)
+
+
+def reset_counters():
+    for name in backend_calls:
+        backend_calls[name] = 0
+
+
+def report_backend_calls():
+    print(f"  {'':<38} TTS requests: {backend_calls['synthesize']} single, {backend_calls['synthesize_marked']} batched")
+    reset_counters()
+
+
+def bench_lesson_synthesis(lessons: list):
+    print(f"\nsynthesize_lesson_audio ({len(lessons)} lessons, {len(tts_service.get_lesson_audio_items(lessons[0]))} clips each)")
+    for label in ("cold cache", "warm cache"):
+        durations, total_bytes = [], 0
+        started = time.monotonic()
+        for lesson in lessons:
+            lesson_started = time.monotonic()
+            result = tts_service.synthesize_lesson_audio(lesson, args.language)
+            durations.append(time.monotonic() - lesson_started)
+            if not result["success"]:
+                print(f"  errors: {result['errors'][:3]}")
+            total_bytes += sum(
+                len(entry["audio"]) * 3 // 4
+                for section in ("vocabulary", "example_sentences", "story_dialogue")
+                for entry in result[section]
+            )
+        summarize(label, durations, time.monotonic() - started, total_bytes)
+        report_backend_calls()
+
+
+async def run_requests(client: httpx.AsyncClient, make_request, count: int):
+    """Issue count requests with at most --concurrency in flight; returns (durations, bytes, statuses, seconds)"""
+    semaphore = asyncio.Semaphore(args.concurrency)
+    durations, statuses = [], {}
+    total_bytes = 0
+
+    async def one(index: int):
+        nonlocal total_bytes
+        async with semaphore:
+            started = time.monotonic()
+            response = await make_request(client, index)
+            durations.append(time.monotonic() - started)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+            total_bytes += len(response.content)
+            return response
+
+    started = time.monotonic()
+    responses = await asyncio.gather(*(one(index) for index in range(count)))
+    return responses, durations, total_bytes, statuses, time.monotonic() - started
+
+
+async def bench_endpoints(rng: random.Random):
+    texts = [make_text(rng, rng.randint(1, 3)) for _ in range(args.requests)]
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=None) as client:
+        print("\nGET /api/tts/synthesize-audio")
+        etags = {}
+        for label, headers_for in (
+            ("cold cache", lambda index: {}),
+            ("warm cache", lambda index: {}),
+            ("If-None-Match (304)", lambda index: {"If-None-Match": etags[index]}),
+            ("Range bytes=0-1023 (206)", lambda index: {"Range": "bytes=0-1023"}),
+            ("Accept: audio/ogg (cold)", lambda index: {"Accept": "audio/ogg"})
+        ):
+            async def request(client, index, headers_for=headers_for):
+                return await client.get(
+                    "/api/tts/synthesize-audio",
+                    params={"text": texts[index], "language": args.language},
+                    headers=headers_for(index)
+                )
+            responses, durations, total_bytes, statuses, seconds = await run_requests(client, request, len(texts))
+            for index, response in enumerate(responses):
+                etags.setdefault(index, response.headers.get("etag"))
+            summarize(f"{label} {statuses}", durations, seconds, total_bytes)
+            report_backend_calls()
+
+        print("\nPOST /api/tts/synthesize (JSON, base64)")
+        json_texts = [make_text(rng, 2) for _ in range(args.requests)]
+        for label in ("cold cache", "warm cache"):
+            async def request(client, index):
+                return await client.post("/api/tts/synthesize", json={"text": json_texts[index], "language": args.language})
+            _, durations, total_bytes, statuses, seconds = await run_requests(client, request, len(json_texts))
+            summarize(f"{label} {statuses}", durations, seconds, total_bytes)
+            report_backend_calls()
+
+        print("\nPOST /api/tts/vocabulary-audio/batch (12 words per request)")
+        batches = [[make_text(rng, 1) for _ in range(12)] for _ in range(max(1, args.requests // 10))]
+        for label in ("cold cache", "warm cache"):
+            async def request(client, index):
+                return await client.post(
+                    "/api/tts/vocabulary-audio/batch", json={"words": batches[index], "language": args.language}
+                )
+            _, durations, total_bytes, statuses, seconds = await run_requests(client, request, len(batches))
+            summarize(f"{label} {statuses}", durations, seconds, total_bytes)
+            report_backend_calls()
+
+        print("\nPOST /api/tts/batch (20 mixed items per request)")
+        item_lists = [
+            [{"text": make_text(rng, rng.randint(1, 6)), "language": args.language, "speaker_name": rng.choice(SPEAKERS)}
+             for _ in range(20)]
+            for _ in range(max(1, args.requests // 10))
+        ]
+        for label, response_format in (("cold cache", "multipart"), ("warm cache", "multipart"), ("sprite (warm)", "sprite")):
+            async def request(client, index, response_format=response_format):
+                return await client.post(
+                    "/api/tts/batch", json={"items": item_lists[index], "response_format": response_format}
+                )
+            _, durations, total_bytes, statuses, seconds = await run_requests(client, request, len(item_lists))
+            summarize(f"{label} {statuses}", durations, seconds, total_bytes)
+            report_backend_calls()
+
+        if args.lesson_id:
+            await bench_lesson_endpoints(client)
+
+
+async def bench_lesson_endpoints(client: httpx.AsyncClient):
+    lesson_id = args.lesson_id
+    print(f"\nLesson {lesson_id} endpoints (the first request synthesizes, the rest hit the caches)")
+    for label, method, url in (
+        ("GET /lesson-audio/{id}/stream", "GET", f"/api/tts/lesson-audio/{lesson_id}/stream"),
+        ("GET /lesson-audio/{id}/bundle", "GET", f"/api/tts/lesson-audio/{lesson_id}/bundle"),
+        ("GET /lesson-audio/{id}/bundle.mp3", "GET", f"/api/tts/lesson-audio/{lesson_id}/bundle.mp3")
+    ):
+        durations, total_bytes = [], 0
+        started = time.monotonic()
+        for _ in range(10):
+            request_started = time.monotonic()
+            response = await client.request(method, url)
+            durations.append(time.monotonic() - request_started)
+            total_bytes += len(response.content)
+            if response.status_code != 200:
+                print(f"  {label}: HTTP {response.status_code} {response.text[:200]}")
+                break
+        summarize(label, durations, time.monotonic() - started, total_bytes)
+        report_backend_calls()
+
+
+def main():
+    print(
+        f"TTS benchmark: local backend, {args.latency_ms} ms latency, concurrency {args.concurrency}, "
+        f"SSML batching {'off' if args.no_batching else 'on'}"
+    )
+    print(f"Audio cache: {work_dir}")
+    count_backend_calls()
+    rng = random.Random(42)
+
+    bench_lesson_synthesis([make_lesson(rng) for _ in range(args.lessons)])
+    asyncio.run(bench_endpoints(rng))
+
+    stats = tts_cache.get_stats()
+    print(
+        f"\nCache: {stats['entries']} clips, {stats['size_bytes'] / 1024:.0f} KiB, "
+        f"hit rate {stats['hit_rate']:.0%} ({stats['hits']} hits, {stats['misses']} misses, {stats['coalesced']} coalesced)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,11 @@
 #!/usr/bin/env python3
 """
 Script to load lesson JSON files from Lessons_upload folder into the database
+
+Usage:
+    python Misc/testing_scripts/load_lessons_from_folder.py [folder] [--single-transaction]
 """
+import argparse
 import json
 import sys
 import os
@@ -32,6 +36,7 @@ def transform_lesson_json(lesson_json):
             "title": lesson_data["title"],
             "target_language": lesson_data["target_language"],
             "theme": lesson_data["theme"],
+            "difficulty": lesson_data.get("difficulty") or lesson_data["theme"],
             "vocabulary": lesson_data["vocabulary"],
             "example_sentences": lesson_data["example_sentences"],
             "short_story": lesson_data["short_story"],
@@ -64,9 +69,11 @@ def move_file_to_folder(file_path, destination_folder):
     shutil.move(file_path, destination_path)
     return destination_path
 
-def load_lesson_from_file(file_path, loaded_folder="Lessons_upload/loaded", failed_folder="Lessons_upload/failed"):
+def read_lesson_file(file_path, failed_folder="Lessons_upload/failed"):
     """
-    Load lesson from a single JSON file into database
+    Read and validate a lesson JSON file
+    
+    Returns (lesson response, theme), or None after moving an invalid file to failed_folder
     """
     filename = os.path.basename(file_path)
     print(f"\n📁 Processing file: {filename}")
@@ -87,7 +94,7 @@ def load_lesson_from_file(file_path, loaded_folder="Lessons_upload/loaded", fail
         except Exception as e:
             print(f"⚠️  Could not move file to failed folder: {e}")
         
-        return False
+        return None
     except json.JSONDecodeError as e:
         print(f"❌ Invalid JSON format in {filename}: {e}")
         
@@ -98,7 +105,7 @@ def load_lesson_from_file(file_path, loaded_folder="Lessons_upload/loaded", fail
         except Exception as e:
             print(f"⚠️  Could not move file to failed folder: {e}")
         
-        return False
+        return None
     
     # Validate structure
     lesson_data = lesson_data_raw.get("lesson", {})
@@ -142,26 +149,38 @@ def load_lesson_from_file(file_path, loaded_folder="Lessons_upload/loaded", fail
         except Exception as e:
             print(f"⚠️  Could not move file to failed folder: {e}")
         
+        return None
+    
+    return lesson_response, lesson_data["theme"]
+
+def load_lesson_from_file(file_path, loaded_folder="Lessons_upload/loaded", failed_folder="Lessons_upload/failed"):
+    """
+    Load lesson from a single JSON file into database
+    """
+    filename = os.path.basename(file_path)
+    lesson = read_lesson_file(file_path, failed_folder)
+    if lesson is None:
         return False
+    lesson_response, theme = lesson
     
     # Save to database
     print("💾 Saving to database...")
     db = SessionLocal()
     try:
         # Get target language from lesson data
-        target_language = lesson_data.get("target_language", "Unknown")
+        target_language = lesson_response.desi_lesson.target_language
         
         # Check if lesson already exists
         existing_lessons = crud.get_desi_lessons_by_language(db, target_language)
         print(f"📊 Existing {target_language} lessons in DB: {len(existing_lessons)}")
         
         # Save lesson
-        db_lesson = crud.create_desi_lesson(db, lesson_response, lesson_data["theme"])
+        db_lesson = crud.create_desi_lesson(db, lesson_response, theme)
         
         print(f"✅ Successfully saved lesson to database with ID: {db_lesson.id}")
         print(f"📝 Lesson title: {db_lesson.title}")
         print(f"🌍 Language: {db_lesson.target_language}")
-        print(f"🎯 Theme: {db_lesson.theme}")
+        print(f"🎯 Difficulty: {db_lesson.difficulty}")
         print(f"📊 Lesson number: {db_lesson.lesson_number}")
         
         # Verify final state
@@ -194,7 +213,46 @@ def load_lesson_from_file(file_path, loaded_folder="Lessons_upload/loaded", fail
     
     return True
 
-def load_lessons_from_folder(folder_path="Lessons_upload"):
+def load_lesson_files_in_one_transaction(json_files, loaded_folder, failed_folder):
+    """
+    Validate every file, then insert all valid lessons with one crud.create_desi_lessons call
+    
+    Either every valid lesson is saved or none is; on a database error the
+    valid files stay in place so the run can be repeated.
+    
+    Returns (successful loads, failed loads)
+    """
+    lessons = []
+    lesson_files = []
+    for file_path in json_files:
+        lesson = read_lesson_file(file_path, failed_folder)
+        if lesson is not None:
+            lessons.append(lesson)
+            lesson_files.append(file_path)
+    failed_loads = len(json_files) - len(lessons)
+    
+    if not lessons:
+        return 0, failed_loads
+    
+    print(f"\n💾 Saving {len(lessons)} lesson(s) in one transaction...")
+    db = SessionLocal()
+    try:
+        db_lessons = crud.create_desi_lessons(db, lessons)
+    except Exception as e:
+        print(f"❌ Database save failed, no lessons were saved: {e}")
+        return 0, failed_loads + len(lessons)
+    finally:
+        db.close()
+    
+    for file_path, db_lesson in zip(lesson_files, db_lessons):
+        print(f"✅ {os.path.basename(file_path)} -> ID {db_lesson.id}, {db_lesson.target_language} lesson {db_lesson.lesson_number}")
+        try:
+            move_file_to_folder(file_path, loaded_folder)
+        except Exception as e:
+            print(f"⚠️  Could not move file to loaded folder: {e}")
+    return len(db_lessons), failed_loads
+
+def load_lessons_from_folder(folder_path="Lessons_upload", single_transaction=False):
     """
     Load all lesson JSON files from the specified folder
     """
@@ -227,12 +285,15 @@ def load_lessons_from_folder(folder_path="Lessons_upload"):
     loaded_folder = os.path.join(folder_path, "loaded")
     failed_folder = os.path.join(folder_path, "failed")
     
-    for file_path in json_files:
-        success = load_lesson_from_file(file_path, loaded_folder, failed_folder)
-        if success:
-            successful_loads += 1
-        else:
-            failed_loads += 1
+    if single_transaction:
+        successful_loads, failed_loads = load_lesson_files_in_one_transaction(json_files, loaded_folder, failed_folder)
+    else:
+        for file_path in json_files:
+            success = load_lesson_from_file(file_path, loaded_folder, failed_folder)
+            if success:
+                successful_loads += 1
+            else:
+                failed_loads += 1
     
     # Final summary
     print("\n" + "=" * 60)
@@ -252,7 +313,15 @@ def load_lessons_from_folder(folder_path="Lessons_upload"):
 
 def main():
     """Main function"""
-    load_lessons_from_folder()
+    parser = argparse.ArgumentParser(description="Load lesson JSON files into the database")
+    parser.add_argument("folder", nargs="?", default="Lessons_upload", help="Folder with lesson JSON files")
+    parser.add_argument(
+        "--single-transaction",
+        action="store_true",
+        help="Insert all valid lessons in one transaction (all or nothing) instead of one by one"
+    )
+    args = parser.parse_args()
+    load_lessons_from_folder(args.folder, single_transaction=args.single_transaction)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Script to pre-render audio for existing lessons.
+
+New lessons get their audio rendered by the generation worker right after they
+are created; this backfills lessons created before that (or loaded by scripts).
+Lessons that already have a complete manifest are skipped unless --force is given.
+
+Usage:
+    python Misc/testing_scripts/prerender_lesson_audio.py
+    python Misc/testing_scripts/prerender_lesson_audio.py --language Hindi
+    python Misc/testing_scripts/prerender_lesson_audio.py --enqueue   # let the workers do it
+"""
+
+import argparse
+import os
+import sys
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from app.utils.database import SessionLocal
+from app.models.models import DesiLesson
+from app.services.job_queue import job_queue
+from app.services.lesson_audio import LESSON_AUDIO_JOB, lesson_audio_store, prerender_lesson_audio
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Pre-render lesson audio")
+    parser.add_argument("--language", help="Only lessons in this language")
+    parser.add_argument("--lesson-ids", nargs="+", type=int, help="Only these lessons")
+    parser.add_argument("--force", action="store_true", help="Re-render lessons that already have audio")
+    parser.add_argument("--enqueue", action="store_true", help="Queue lesson_audio jobs instead of rendering here")
+    return parser.parse_args()
+
+
+def has_complete_audio(lesson_id: int) -> bool:
+    return lesson_audio_store.load_complete_manifest(lesson_id) is not None
+
+
+def main(args):
+    db = SessionLocal()
+    try:
+        query = db.query(DesiLesson.id)
+        if args.language:
+            query = query.filter(DesiLesson.target_language == args.language)
+        if args.lesson_ids:
+            query = query.filter(DesiLesson.id.in_(args.lesson_ids))
+        lesson_ids = [lesson_id for lesson_id, in query.order_by(DesiLesson.id).all()]
+
+        if not args.force:
+            lesson_ids = [lesson_id for lesson_id in lesson_ids if not has_complete_audio(lesson_id)]
+        print(f"{len(lesson_ids)} lessons need audio")
+
+        rendered, failed = 0, 0
+        for position, lesson_id in enumerate(lesson_ids, 1):
+            if args.enqueue:
+                job_queue.enqueue(db, LESSON_AUDIO_JOB, {"lesson_id": lesson_id})
+                continue
+
+            started = time.monotonic()
+            try:
+                manifest = prerender_lesson_audio(db, lesson_id)
+                db.commit()
+            except Exception as e:
+                db.rollback()
+                failed += 1
+                print(f"[{position}/{len(lesson_ids)}] Lesson {lesson_id}: failed - {str(e)}")
+                continue
+
+            if manifest["errors"]:
+                failed += 1
+            else:
+                rendered += 1
+            print(
+                f"[{position}/{len(lesson_ids)}] Lesson {lesson_id}: {len(manifest['items'])} clips, "
+                f"{len(manifest['errors'])} errors in {time.monotonic() - started:.1f}s"
+            )
+
+        if args.enqueue:
+            print(f"Queued {len(lesson_ids)} lesson_audio jobs")
+        else:
+            print(f"\nCompleted! Rendered {rendered} lessons, {failed} with errors")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main(parse_args())
@@ -1,134 +1,70 @@
 #!/usr/bin/env python3
 """
-Script to regenerate missing transliterations for existing stories.
-This script finds stories that have vocabulary without transliterations
-and uses the Gemini AI service to generate them.
+Script to regenerate missing transliterations for existing stories and lessons.
+
+Uses the batched backfill in app/services/transliteration_backfill.py: many items
+per Gemini prompt, several prompts in flight under a rate limit, bulk UPDATEs,
+and a checkpoint file so an interrupted run picks up where it left off.
+
+Usage:
+    python Misc/testing_scripts/regenerate_transliterations.py
+    python Misc/testing_scripts/regenerate_transliterations.py --targets story_vocabulary stories
+    python Misc/testing_scripts/regenerate_transliterations.py --concurrency 8 --rpm 120 --reset
 """
 
+import argparse
 import asyncio
-import sys
 import os
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-
-from sqlalchemy.orm import Session, joinedload
-from app.utils.database import get_db
-from app.models.models import DesiStory, DesiStoryVocabulary
-from app.services.gemini_service import gemini_service
-from app.utils.logger import api_logger
-import json
+import sys
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
-# Languages that need transliteration (non-Latin scripts)
-NON_LATIN_LANGUAGES = {
-    'Arabic', 'Assamese', 'Bengali', 'Gujarati', 'Hindi', 'Japanese', 
-    'Kannada', 'Korean', 'Malayalam', 'Mandarin', 'Marathi', 'Odia', 
-    'Punjabi', 'Russian', 'Tamil', 'Telugu', 'Thai', 'Urdu'
-}
+from app.utils.database import SessionLocal
+from app.services.transliteration_backfill import TransliterationBackfill, TARGETS
 
-async def generate_vocabulary_transliterations(vocabulary_items, target_language):
-    """Generate transliterations for vocabulary items using Gemini AI"""
-    
-    if target_language not in NON_LATIN_LANGUAGES:
-        return {}  # No transliterations needed for Latin script languages
-    
-    # Prepare vocabulary for AI
-    vocab_list = [{"word": vocab.word, "definition": vocab.definition} for vocab in vocabulary_items]
-    
-    prompt = f"""You are an expert linguist. For each English word and its {target_language} translation below, provide the phonetic transliteration in the Latin alphabet.
 
-Vocabulary items:
-{json.dumps(vocab_list, indent=2, ensure_ascii=False)}
+def parse_args():
+    parser = argparse.ArgumentParser(description="Backfill missing transliterations")
+    parser.add_argument("--targets", nargs="+", choices=sorted(TARGETS), help="Tables to backfill (default: all)")
+    parser.add_argument("--batch-size", type=int, default=40, help="Items per Gemini prompt")
+    parser.add_argument("--concurrency", type=int, default=4, help="Prompts in flight at once")
+    parser.add_argument("--rpm", type=int, default=60, help="Maximum Gemini requests per minute")
+    parser.add_argument("--checkpoint", default="transliteration_backfill.checkpoint.json", help="Checkpoint file")
+    parser.add_argument("--reset", action="store_true", help="Ignore the checkpoint and start from the first row")
+    parser.add_argument("--dry-run", action="store_true", help="Call Gemini but don't write results or checkpoints")
+    return parser.parse_args()
 
-IMPORTANT: Respond with ONLY valid JSON in this EXACT format:
-{{
-  "word1": "transliteration1",
-  "word2": "transliteration2"
-}}
 
-The keys should be the English words, and the values should be the phonetic transliterations of the {target_language} translations."""
+async def regenerate_missing_transliterations(args):
+    """Find rows with missing transliterations and regenerate them"""
+    if args.reset and os.path.exists(args.checkpoint):
+        os.remove(args.checkpoint)
 
-    try:
-        response = await gemini_service.generate_completion(prompt)
-        
-        # Parse the JSON response
-        response_text = response.strip()
-        
-        # Remove markdown code blocks if present
-        if response_text.startswith('```json'):
-            response_text = response_text.replace('```json', '').replace('```', '').strip()
-        elif response_text.startswith('```'):
-            response_text = response_text.replace('```', '').strip()
-        
-        # Find JSON content between braces
-        start_idx = response_text.find('{')
-        end_idx = response_text.rfind('}')
-        
-        if start_idx == -1 or end_idx == -1:
-            api_logger.error(f"No valid JSON found in response: {response_text[:200]}")
-            return {}
-        
-        json_content = response_text[start_idx:end_idx + 1]
-        transliterations = json.loads(json_content)
-        
-        return transliterations
-        
-    except Exception as e:
-        api_logger.error(f"Error generating transliterations: {str(e)}")
-        return {}
+    backfill = TransliterationBackfill(
+        batch_size=args.batch_size,
+        max_concurrency=args.concurrency,
+        requests_per_minute=args.rpm,
+        checkpoint_path=args.checkpoint,
+        dry_run=args.dry_run
+    )
 
-async def regenerate_missing_transliterations():
-    """Find stories with missing transliterations and regenerate them"""
-    
-    db = next(get_db())
+    db = SessionLocal()
+    started = time.monotonic()
     try:
-        # Find stories that have vocabulary items without transliterations
-        stories_with_missing_transliterations = db.query(DesiStory).options(
-            joinedload(DesiStory.vocabulary)
-        ).join(DesiStoryVocabulary).filter(
-            DesiStoryVocabulary.transliteration.is_(None)
-        ).distinct().all()
-        
-        print(f"Found {len(stories_with_missing_transliterations)} stories with missing transliterations")
-        
-        updated_count = 0
-        for story in stories_with_missing_transliterations:
-            print(f"\nProcessing Story ID {story.id} ({story.target_language})")
-            
-            # Get vocabulary items without transliterations
-            missing_vocab = [vocab for vocab in story.vocabulary if not vocab.transliteration]
-            
-            if not missing_vocab:
-                continue
-                
-            print(f"  - Missing transliterations for {len(missing_vocab)} vocabulary items")
-            
-            # Generate transliterations
-            transliterations = await generate_vocabulary_transliterations(missing_vocab, story.target_language)
-            
-            if not transliterations:
-                print(f"  - Failed to generate transliterations for story {story.id}")
-                continue
-            
-            # Update vocabulary items
-            updated_vocab_count = 0
-            for vocab in missing_vocab:
-                if vocab.word in transliterations:
-                    vocab.transliteration = transliterations[vocab.word]
-                    updated_vocab_count += 1
-                    print(f"    * {vocab.word} -> {vocab.transliteration}")
-            
-            if updated_vocab_count > 0:
-                db.commit()
-                updated_count += 1
-                print(f"  - Updated {updated_vocab_count} vocabulary items")
-            
-        print(f"\nCompleted! Updated {updated_count} stories with missing transliterations")
-        
-    except Exception as e:
-        print(f"Error: {str(e)}")
-        db.rollback()
+        results = await backfill.run(db, args.targets)
     finally:
         db.close()
 
+    print(f"\nCompleted in {time.monotonic() - started:.1f}s")
+    for stats in results:
+        print(
+            f"  {stats['target']}: {stats['processed']} missing, {stats['updated']} updated, "
+            f"{stats['failed']} failed, {stats['batches']} Gemini requests"
+        )
+    if any(stats["failed"] for stats in results):
+        print("Rows that failed are still missing; rerun with --reset to retry them.")
+
+
 if __name__ == "__main__":
-    print("Regenerating missing transliterations for existing stories...")
-    asyncio.run(regenerate_missing_transliterations())
\ No newline at end of file
+    print("Regenerating missing transliterations...")
+    asyncio.run(regenerate_missing_transliterations(parse_args()))
@@ -0,0 +1,63 @@
+"""Unique lesson numbers per language and lesson_number_counters
+
+Revision ID: 5d2f9a1c7e44
+Revises: c4a8e2f71d3b
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5d2f9a1c7e44'
+down_revision = 'c4a8e2f71d3b'
+branch_labels = None
+depends_on = None
+
+
+# Concurrent generation could give two lessons the same number; the oldest keeps
+# it and later copies are moved past the language's highest number. {table} is
+# desi_lessons here (tests run the statement against a temporary copy)
+RENUMBER_DUPLICATE_LESSONS = """
+    WITH copies AS (
+        SELECT id, target_language,
+               ROW_NUMBER() OVER (PARTITION BY target_language, lesson_number ORDER BY id) AS copy
+        FROM {table}
+    ), duplicates AS (
+        SELECT id, target_language,
+               ROW_NUMBER() OVER (PARTITION BY target_language ORDER BY id) AS offset_number
+        FROM copies
+        WHERE copy > 1
+    ), highest AS (
+        SELECT target_language, MAX(lesson_number) AS max_number
+        FROM {table}
+        GROUP BY target_language
+    )
+    UPDATE {table}
+    SET lesson_number = highest.max_number + duplicates.offset_number
+    FROM duplicates JOIN highest USING (target_language)
+    WHERE {table}.id = duplicates.id
+"""
+
+
+def upgrade() -> None:
+    op.execute(RENUMBER_DUPLICATE_LESSONS.format(table="desi_lessons"))
+    op.create_unique_constraint('uq_desi_lessons_language_number', 'desi_lessons', ['target_language', 'lesson_number'])
+
+    op.create_table('lesson_number_counters',
+    sa.Column('target_language', sa.String(length=100), nullable=False),
+    sa.Column('last_number', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('target_language')
+    )
+    op.execute("""
+        INSERT INTO lesson_number_counters (target_language, last_number)
+        SELECT target_language, MAX(lesson_number)
+        FROM desi_lessons
+        GROUP BY target_language
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table('lesson_number_counters')
+    op.drop_constraint('uq_desi_lessons_language_number', 'desi_lessons', type_='unique')
@@ -0,0 +1,64 @@
+"""Add indexes for the hot query paths
+
+Foreign keys of lesson content, progress, translation and story tables had no
+indexes, so loading a lesson's content, a user's history or checking for a
+duplicate story scanned the whole table. Each index matches a filter (and,
+where there is one, the sort order) used in crud.py, progress.py,
+translations.py, story_crud.py or admin.py.
+
+Indexes are built with CREATE INDEX CONCURRENTLY so the tables stay writable
+while the migration runs.
+
+Revision ID: 8e3b6c0d2a17
+Revises: 5d2f9a1c7e44
+Create Date: 2026-10-19 13:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '8e3b6c0d2a17'
+down_revision = '5d2f9a1c7e44'
+branch_labels = None
+depends_on = None
+
+
+INDEXES = [
+    # Lesson content, loaded per lesson (and deleted with it)
+    ('idx_desi_vocabulary_lesson_id', 'desi_vocabulary', ['lesson_id']),
+    ('idx_desi_example_sentences_lesson_id', 'desi_example_sentences', ['lesson_id']),
+    ('idx_desi_short_stories_lesson_id', 'desi_short_stories', ['lesson_id']),
+    ('idx_desi_dialogue_story_order', 'desi_dialogue', ['short_story_id', 'order_num']),
+    ('idx_desi_quiz_questions_lesson_id', 'desi_quiz_questions', ['lesson_id']),
+    # Admin lesson list, newest first
+    ('idx_desi_lessons_created_at', 'desi_lessons', ['created_at']),
+    # Progress: WHERE user_id = ? AND language = ?
+    ('idx_user_progress_user_language', 'user_progress', ['user_id', 'language']),
+    # Recent completions: WHERE user_id = ? ORDER BY completed_at DESC LIMIT n
+    ('idx_lesson_completions_user_completed_at', 'lesson_completions', ['user_id', 'completed_at']),
+    # Existing completion check: WHERE user_id = ? AND lesson_id = ? (and lesson delete cascades)
+    ('idx_lesson_completions_lesson_user', 'lesson_completions', ['lesson_id', 'user_id']),
+    ('idx_quiz_attempts_lesson_id', 'quiz_attempts', ['lesson_id']),
+    # Translation history: WHERE user_id = ? ORDER BY created_at DESC
+    ('idx_user_translations_user_created_at', 'user_translations', ['user_id', 'created_at']),
+    # Similar story check: language, level and scenario equality
+    ('idx_desi_stories_language_level_scenario', 'desi_stories', ['target_language', 'cefr_level', 'scenario']),
+    # Story lists, newest first, optionally per language
+    ('idx_desi_stories_language_generated_at', 'desi_stories', ['target_language', 'generated_at']),
+    ('idx_desi_stories_generated_at', 'desi_stories', ['generated_at']),
+    ('idx_desi_story_vocabulary_story_order', 'desi_story_vocabulary', ['story_id', 'order_index']),
+]
+
+
+def upgrade() -> None:
+    # CONCURRENTLY can't run inside a transaction
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, unique=False, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
@@ -0,0 +1,34 @@
+"""Add content snapshots to desi lessons
+
+content_snapshot holds the rendered lesson (the DesiLessonResponse JSON) so
+the lesson read endpoints can serve it without joining the content tables;
+content_hash is the sha256 of its canonical JSON.
+
+Existing lessons start without a snapshot and are served from the content
+tables until Misc/testing_scripts/backfill_lesson_snapshots.py has been run.
+
+Revision ID: a3c71e5f9b02
+Revises: 8e3b6c0d2a17
+Create Date: 2026-10-19 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'a3c71e5f9b02'
+down_revision = '8e3b6c0d2a17'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('desi_lessons', sa.Column('content_snapshot', postgresql.JSONB(astext_type=sa.Text()), nullable=True))
+    op.add_column('desi_lessons', sa.Column('content_hash', sa.String(length=64), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('desi_lessons', 'content_hash')
+    op.drop_column('desi_lessons', 'content_snapshot')
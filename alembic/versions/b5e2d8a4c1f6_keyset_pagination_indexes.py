@@ -0,0 +1,53 @@
+"""Extend list sort indexes with the primary key for keyset pagination
+
+List endpoints page with WHERE (sort key, id) < (:key, :id) ORDER BY sort key,
+id, so their indexes need the id as the last column to answer a page by
+seeking to the cursor. The new indexes replace the single-key ones they cover,
+and users get one for the admin user list (newest first).
+
+Built and dropped with CONCURRENTLY so the tables stay writable.
+
+Revision ID: b5e2d8a4c1f6
+Revises: a3c71e5f9b02
+Create Date: 2026-10-19 17:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'b5e2d8a4c1f6'
+down_revision = 'a3c71e5f9b02'
+branch_labels = None
+depends_on = None
+
+
+# (new index, table, columns, index it replaces, that index's columns)
+INDEXES = [
+    ('idx_desi_lessons_created_at_id', 'desi_lessons', ['created_at', 'id'],
+     'idx_desi_lessons_created_at', ['created_at']),
+    ('idx_user_translations_user_created_at_id', 'user_translations', ['user_id', 'created_at', 'id'],
+     'idx_user_translations_user_created_at', ['user_id', 'created_at']),
+    ('idx_desi_stories_language_generated_at_id', 'desi_stories', ['target_language', 'generated_at', 'id'],
+     'idx_desi_stories_language_generated_at', ['target_language', 'generated_at']),
+    ('idx_desi_stories_generated_at_id', 'desi_stories', ['generated_at', 'id'],
+     'idx_desi_stories_generated_at', ['generated_at']),
+    ('idx_users_created_at_id', 'users', ['created_at', 'id'], None, None),
+]
+
+
+def upgrade() -> None:
+    # CONCURRENTLY can't run inside a transaction
+    with op.get_context().autocommit_block():
+        for name, table, columns, replaced, _ in INDEXES:
+            op.create_index(name, table, columns, unique=False, postgresql_concurrently=True)
+            if replaced:
+                op.drop_index(replaced, table_name=table, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _, replaced, replaced_columns in reversed(INDEXES):
+            if replaced:
+                op.create_index(replaced, table, replaced_columns, unique=False, postgresql_concurrently=True)
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
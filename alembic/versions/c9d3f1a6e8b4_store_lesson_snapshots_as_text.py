@@ -0,0 +1,58 @@
+"""Store lesson content snapshots as their canonical JSON text
+
+PostgreSQL renders JSONB as text with its own key order and spacing, so a
+snapshot read back with ::text wasn't the JSON content_hash was computed from,
+nor what a lesson without a snapshot is rendered as. content_snapshot now holds
+the canonical JSON (sorted keys, no whitespace) that the read endpoints send
+as-is; existing snapshots are rewritten in that form and their hashes
+recomputed.
+
+Revision ID: c9d3f1a6e8b4
+Revises: b5e2d8a4c1f6
+Create Date: 2026-10-19 19:00:00.000000
+
+"""
+import hashlib
+import json
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'c9d3f1a6e8b4'
+down_revision = 'b5e2d8a4c1f6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.alter_column(
+        'desi_lessons', 'content_snapshot',
+        type_=sa.Text(),
+        existing_type=postgresql.JSONB(astext_type=sa.Text()),
+        existing_nullable=True,
+        postgresql_using='content_snapshot::text'
+    )
+
+    connection = op.get_bind()
+    rows = connection.execute(sa.text(
+        "SELECT id, content_snapshot FROM desi_lessons WHERE content_snapshot IS NOT NULL"
+    )).fetchall()
+    for lesson_id, snapshot_json in rows:
+        canonical = json.dumps(json.loads(snapshot_json), ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+        connection.execute(
+            sa.text("UPDATE desi_lessons SET content_snapshot = :snapshot, content_hash = :hash WHERE id = :id"),
+            {"snapshot": canonical, "hash": hashlib.sha256(canonical.encode("utf-8")).hexdigest(), "id": lesson_id}
+        )
+
+
+def downgrade() -> None:
+    op.alter_column(
+        'desi_lessons', 'content_snapshot',
+        type_=postgresql.JSONB(astext_type=sa.Text()),
+        existing_type=sa.Text(),
+        existing_nullable=True,
+        postgresql_using='content_snapshot::jsonb'
+    )
@@ -1,9 +1,10 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from datetime import datetime, timedelta
 
-from app.utils.database import get_db
+from app.api import crud
+from app.utils.database import get_async_db
 from app.models.models import User, UserProfile, UserSubscription, UserProgress, DesiLesson
 from app.models.user_schemas import (
     UserResponse, 
@@ -12,50 +13,64 @@ from app.models.user_schemas import (
     SubscriptionTier,
     CompleteUserProfile
 )
-from app.auth.dependencies import get_admin_user
-from sqlalchemy import func, desc
+from app.auth.dependencies import get_admin_user_async
+from app.services.lesson_audio import lesson_audio_store
+from app.services.lesson_cache import lesson_cache
+from app.services.lesson_catalog import lesson_catalog
+from app.utils.pagination import KeysetPaginator
+from sqlalchemy import func, desc, select
 from sqlalchemy.orm import joinedload, selectinload
 
 router = APIRouter(prefix="/admin", tags=["admin"])
 
+# Admin lists; sort keys end with the id so keyset pages are unique
+USER_LIST_PAGINATOR = KeysetPaginator("admin_users", User.created_at, User.id, descending=True)
+LESSON_LIST_PAGINATORS = {
+    "newest": KeysetPaginator("admin_lessons:newest", DesiLesson.created_at, DesiLesson.id, descending=True),
+    "oldest": KeysetPaginator("admin_lessons:oldest", DesiLesson.created_at, DesiLesson.id),
+    "title": KeysetPaginator("admin_lessons:title", DesiLesson.title, DesiLesson.id),
+    "language": KeysetPaginator("admin_lessons:language", DesiLesson.target_language, DesiLesson.id),
+    "lesson_number": KeysetPaginator("admin_lessons:lesson_number", DesiLesson.lesson_number, DesiLesson.id),
+}
+
 @router.get("/dashboard/stats", response_model=DashboardStats)
 async def get_admin_dashboard_stats(
-    db: Session = Depends(get_db),
-    admin_user: User = Depends(get_admin_user)
+    db: AsyncSession = Depends(get_async_db),
+    admin_user: User = Depends(get_admin_user_async)
 ):
     """Get admin dashboard statistics."""
     
     # Total users
-    total_users = db.query(User).count()
+    total_users = await db.scalar(select(func.count()).select_from(User))
     
     # Active users today
     today = datetime.utcnow().date()
     today_start = datetime.combine(today, datetime.min.time())
     today_end = datetime.combine(today, datetime.max.time())
-    active_users_today = db.query(User).filter(
+    active_users_today = await db.scalar(select(func.count()).select_from(User).filter(
         User.last_login >= today_start,
         User.last_login <= today_end
-    ).count()
+    ))
     
     # Active users this week
     week_ago = datetime.utcnow() - timedelta(days=7)
-    active_users_week = db.query(User).filter(
+    active_users_week = await db.scalar(select(func.count()).select_from(User).filter(
         User.last_login >= week_ago
-    ).count()
+    ))
     
     # Total lessons completed
-    total_lessons_completed = db.query(func.sum(UserProgress.total_lessons_completed)).scalar() or 0
+    total_lessons_completed = await db.scalar(select(func.sum(UserProgress.total_lessons_completed))) or 0
     
     # Total study time
-    total_study_minutes = db.query(func.sum(UserProgress.total_study_time_minutes)).scalar() or 0
+    total_study_minutes = await db.scalar(select(func.sum(UserProgress.total_study_time_minutes))) or 0
     total_study_time_hours = round(total_study_minutes / 60, 2) if total_study_minutes else 0
     
     # Top languages
-    top_languages = db.query(
+    top_languages = (await db.execute(select(
         UserProgress.language,
         func.count(UserProgress.id).label('user_count'),
         func.sum(UserProgress.total_lessons_completed).label('total_lessons')
-    ).group_by(UserProgress.language).order_by(desc('user_count')).limit(5).all()
+    ).group_by(UserProgress.language).order_by(desc('user_count')).limit(5))).all()
     
     top_languages_list = [
         {
@@ -67,10 +82,10 @@ async def get_admin_dashboard_stats(
     ]
     
     # Subscription breakdown
-    subscription_counts = db.query(
+    subscription_counts = (await db.execute(select(
         UserSubscription.tier,
         func.count(UserSubscription.id).label('count')
-    ).group_by(UserSubscription.tier).all()
+    ).group_by(UserSubscription.tier))).all()
     
     subscription_breakdown = {tier.value: 0 for tier in SubscriptionTier}
     for tier, count in subscription_counts:
@@ -97,12 +112,14 @@ async def get_all_users(
     search: Optional[str] = Query(None, description="Search by email, username, or full name"),
     role: Optional[str] = Query(None, description="Filter by user role"),
     status: Optional[str] = Query(None, description="Filter by status (active/inactive)"),
-    db: Session = Depends(get_db),
-    admin_user: User = Depends(get_admin_user)
+    cursor: Optional[str] = Query(None, description="pagination.next_cursor or prev_cursor of a previous page (instead of page)"),
+    include_total: bool = Query(False, description="Also count total_count and total_pages on cursor pages"),
+    db: AsyncSession = Depends(get_async_db),
+    admin_user: User = Depends(get_admin_user_async)
 ):
     """Get all users with filtering and pagination."""
     
-    query = db.query(User)
+    query = select(User)
     
     # Apply filters
     if search:
@@ -126,22 +143,34 @@ async def get_all_users(
         elif status == 'inactive':
             query = query.filter(User.is_active == False)
     
-    # Get total count for pagination
-    total_count = query.count()
-    
-    # Calculate pagination
-    offset = (page - 1) * page_size
-    total_pages = (total_count + page_size - 1) // page_size
-    has_next = page < total_pages
-    has_previous = page > 1
+    # Get total count for pagination; cursor pages skip the COUNT(*) unless asked for it
+    total_count = total_pages = None
+    if not cursor or include_total:
+        total_count = await db.scalar(select(func.count()).select_from(query.subquery()))
+        total_pages = (total_count + page_size - 1) // page_size
     
     # Apply pagination and get results with optimized loading
     # Use selectinload for one-to-many relationships to avoid N+1 queries
-    users = query.options(
+    query = query.options(
         selectinload(User.profile),
         selectinload(User.subscription),
         selectinload(User.progress)
-    ).order_by(desc(User.created_at)).offset(offset).limit(page_size).all()
+    )
+    if cursor:
+        # Keyset page: no OFFSET, and stable while users sign up
+        result = await USER_LIST_PAGINATOR.page_async(db, query, page_size, cursor)
+        users, next_cursor, prev_cursor = result.items, result.next_cursor, result.prev_cursor
+        current_page = None
+        has_next = next_cursor is not None
+        has_previous = prev_cursor is not None
+    else:
+        offset = (page - 1) * page_size
+        users = (await db.scalars(query.order_by(*USER_LIST_PAGINATOR.order_by()).offset(offset).limit(page_size))).all()
+        current_page = page
+        has_next = page < total_pages
+        has_previous = page > 1
+        # Cursors let a client continue from here without OFFSET
+        next_cursor, prev_cursor = USER_LIST_PAGINATOR.cursors(users, has_next, has_previous)
     
     # Convert users to UserResponse format
     user_responses = [UserResponse.from_orm(user) for user in users]
@@ -149,30 +178,32 @@ async def get_all_users(
     return {
         "users": user_responses,
         "pagination": {
-            "current_page": page,
+            "current_page": current_page,
             "page_size": page_size,
             "total_count": total_count,
             "total_pages": total_pages,
             "has_next": has_next,
-            "has_previous": has_previous
+            "has_previous": has_previous,
+            "next_cursor": next_cursor,
+            "prev_cursor": prev_cursor
         }
     }
 
 @router.get("/users/{user_id}", response_model=CompleteUserProfile)
 async def get_user_details(
     user_id: int,
-    db: Session = Depends(get_db),
-    admin_user: User = Depends(get_admin_user)
+    db: AsyncSession = Depends(get_async_db),
+    admin_user: User = Depends(get_admin_user_async)
 ):
     """Get complete user profile details."""
     
-    user = db.query(User).options(
+    user = await db.scalar(select(User).options(
         selectinload(User.profile),
         selectinload(User.subscription), 
         selectinload(User.progress),
         selectinload(User.achievements),
         selectinload(User.settings)
-    ).filter(User.id == user_id).first()
+    ).filter(User.id == user_id))
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -180,9 +211,9 @@ async def get_user_details(
         )
     
     # Get related data
-    profile = db.query(UserProfile).filter(UserProfile.user_id == user_id).first()
-    subscription = db.query(UserSubscription).filter(UserSubscription.user_id == user_id).first()
-    progress = db.query(UserProgress).filter(UserProgress.user_id == user_id).all()
+    profile = await db.scalar(select(UserProfile).filter(UserProfile.user_id == user_id))
+    subscription = await db.scalar(select(UserSubscription).filter(UserSubscription.user_id == user_id))
+    progress = (await db.scalars(select(UserProgress).filter(UserProgress.user_id == user_id))).all()
     
     # Note: These would need to be implemented if the models exist
     recent_achievements = []  # db.query(UserAchievement).filter(...).limit(5).all()
@@ -203,12 +234,12 @@ async def get_user_details(
 async def update_user_role(
     user_id: int,
     new_role: UserRole,
-    db: Session = Depends(get_db),
-    admin_user: User = Depends(get_admin_user)
+    db: AsyncSession = Depends(get_async_db),
+    admin_user: User = Depends(get_admin_user_async)
 ):
     """Update a user's role."""
     
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.scalar(select(User).filter(User.id == user_id))
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -224,8 +255,8 @@ async def update_user_role(
     
     user.role = new_role
     user.updated_at = datetime.utcnow()
-    db.commit()
-    db.refresh(user)
+    await db.commit()
+    await db.refresh(user)
     
     return {"message": f"User role updated to {new_role.value}", "user": user}
 
@@ -233,12 +264,12 @@ async def update_user_role(
 async def update_user_status(
     user_id: int,
     is_active: bool,
-    db: Session = Depends(get_db),
-    admin_user: User = Depends(get_admin_user)
+    db: AsyncSession = Depends(get_async_db),
+    admin_user: User = Depends(get_admin_user_async)
 ):
     """Activate or deactivate a user."""
     
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.scalar(select(User).filter(User.id == user_id))
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -254,8 +285,8 @@ async def update_user_status(
     
     user.is_active = is_active
     user.updated_at = datetime.utcnow()
-    db.commit()
-    db.refresh(user)
+    await db.commit()
+    await db.refresh(user)
     
     status_text = "activated" if is_active else "deactivated"
     return {"message": f"User {status_text} successfully", "user": user}
@@ -263,12 +294,12 @@ async def update_user_status(
 @router.delete("/users/{user_id}")
 async def delete_user(
     user_id: int,
-    db: Session = Depends(get_db),
-    admin_user: User = Depends(get_admin_user)
+    db: AsyncSession = Depends(get_async_db),
+    admin_user: User = Depends(get_admin_user_async)
 ):
     """Delete a user account."""
     
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.scalar(select(User).filter(User.id == user_id))
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -282,8 +313,8 @@ async def delete_user(
             detail="Cannot delete your own account"
         )
     
-    db.delete(user)
-    db.commit()
+    await db.delete(user)
+    await db.commit()
     
     return {"message": "User deleted successfully"}
 
@@ -294,12 +325,14 @@ async def get_lessons_admin(
     language: Optional[str] = Query(None, description="Filter by target language"),
     search: Optional[str] = Query(None, description="Search in title, language, or difficulty"),
     sort_by: Optional[str] = Query("newest", description="Sort by: newest, oldest, title, language, lesson_number"),
-    db: Session = Depends(get_db),
-    admin_user: User = Depends(get_admin_user)
+    cursor: Optional[str] = Query(None, description="pagination.next_cursor or prev_cursor of a previous page (instead of page)"),
+    include_total: bool = Query(False, description="Also count total_count and total_pages on cursor pages"),
+    db: AsyncSession = Depends(get_async_db),
+    admin_user: User = Depends(get_admin_user_async)
 ):
     """Get paginated lessons with admin details."""
     
-    query = db.query(DesiLesson)
+    query = select(DesiLesson)
     
     # Apply filters
     if language:
@@ -313,34 +346,37 @@ async def get_lessons_admin(
             (DesiLesson.difficulty.ilike(search_filter))
         )
     
-    # Apply sorting
-    if sort_by == "newest":
-        query = query.order_by(desc(DesiLesson.created_at))
-    elif sort_by == "oldest":
-        query = query.order_by(DesiLesson.created_at)
-    elif sort_by == "title":
-        query = query.order_by(DesiLesson.title)
-    elif sort_by == "language":
-        query = query.order_by(DesiLesson.target_language)
-    elif sort_by == "lesson_number":
-        query = query.order_by(DesiLesson.lesson_number)
-    else:
-        query = query.order_by(desc(DesiLesson.created_at))
+    # Sorting (unknown values sort newest first)
+    paginator = LESSON_LIST_PAGINATORS.get(sort_by, LESSON_LIST_PAGINATORS["newest"])
     
-    # Get total count for pagination
-    total_count = query.count()
-    
-    # Calculate pagination
-    skip = (page - 1) * page_size
-    total_pages = (total_count + page_size - 1) // page_size
+    # Get total count for pagination; cursor pages skip the COUNT(*) unless asked for it
+    total_count = total_pages = None
+    if not cursor or include_total:
+        total_count = await db.scalar(select(func.count()).select_from(query.subquery()))
+        total_pages = (total_count + page_size - 1) // page_size
     
     # Get paginated results with optimized loading
-    lessons = query.options(
+    query = query.options(
         selectinload(DesiLesson.vocabulary),
         selectinload(DesiLesson.example_sentences),
         selectinload(DesiLesson.quiz_questions),
         selectinload(DesiLesson.short_story)
-    ).offset(skip).limit(page_size).all()
+    )
+    if cursor:
+        # Keyset page: no OFFSET, and stable while lessons are added
+        result = await paginator.page_async(db, query, page_size, cursor)
+        lessons, next_cursor, prev_cursor = result.items, result.next_cursor, result.prev_cursor
+        current_page = None
+        has_next = next_cursor is not None
+        has_previous = prev_cursor is not None
+    else:
+        skip = (page - 1) * page_size
+        lessons = (await db.scalars(query.order_by(*paginator.order_by()).offset(skip).limit(page_size))).all()
+        current_page = page
+        has_next = page < total_pages
+        has_previous = page > 1
+        # Cursors let a client continue from here without OFFSET
+        next_cursor, prev_cursor = paginator.cursors(lessons, has_next, has_previous)
     
     # Add admin-specific information
     lesson_data = []
@@ -362,51 +398,57 @@ async def get_lessons_admin(
     return {
         "lessons": lesson_data,
         "pagination": {
-            "current_page": page,
+            "current_page": current_page,
             "page_size": page_size,
             "total_count": total_count,
             "total_pages": total_pages,
-            "has_next": page < total_pages,
-            "has_previous": page > 1
+            "has_next": has_next,
+            "has_previous": has_previous,
+            "next_cursor": next_cursor,
+            "prev_cursor": prev_cursor
         }
     }
 
 @router.delete("/lessons/{lesson_id}")
 async def delete_lesson(
     lesson_id: int,
-    db: Session = Depends(get_db),
-    admin_user: User = Depends(get_admin_user)
+    db: AsyncSession = Depends(get_async_db),
+    admin_user: User = Depends(get_admin_user_async)
 ):
     """Delete a lesson."""
     
-    lesson = db.query(DesiLesson).filter(DesiLesson.id == lesson_id).first()
+    lesson = await db.scalar(select(DesiLesson).filter(DesiLesson.id == lesson_id))
     if not lesson:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Lesson not found"
         )
     
-    db.delete(lesson)
-    db.commit()
+    await db.delete(lesson)
+    await db.run_sync(crud.notify_lessons_changed, [lesson_id], [lesson.target_language])
+    await db.commit()
+    lesson_audio_store.delete(lesson_id)
+    lesson_cache.invalidate(lesson_id)
+    lesson_catalog.invalidate(lesson.target_language)
     
     return {"message": "Lesson deleted successfully"}
 
 @router.get("/users/{user_id}/progress")
 async def get_user_progress(
     user_id: int,
-    db: Session = Depends(get_db),
-    admin_user: User = Depends(get_admin_user)
+    db: AsyncSession = Depends(get_async_db),
+    admin_user: User = Depends(get_admin_user_async)
 ):
     """Get detailed progress for a specific user."""
     
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.scalar(select(User).filter(User.id == user_id))
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
         )
     
-    progress = db.query(UserProgress).filter(UserProgress.user_id == user_id).all()
+    progress = (await db.scalars(select(UserProgress).filter(UserProgress.user_id == user_id))).all()
     
     return {
         "user": user,
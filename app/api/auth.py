@@ -1,9 +1,9 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Request
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status, Request
 from fastapi.security import HTTPBearer
 from fastapi.responses import RedirectResponse
 from sqlalchemy.orm import Session
 from datetime import datetime, timedelta
-from typing import List
+from typing import List, Optional
 import logging
 
 from app.utils.database import get_db
@@ -18,6 +18,7 @@ from app.auth.dependencies import (
     get_current_user, get_current_active_user
 )
 from app.utils.config import settings
+from app.utils.pagination import KeysetPaginator
 from app.services.google_oauth import google_oauth_service
 
 logger = logging.getLogger(__name__)
@@ -25,6 +26,9 @@ logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 security = HTTPBearer()
 
+# User list, in id order
+USER_PAGINATOR = KeysetPaginator("users", User.id)
+
 @router.post("/register", response_model=TokenResponse)
 def register_user(user_data: UserCreate, db: Session = Depends(get_db)):
     """Register a new user."""
@@ -288,19 +292,31 @@ def logout_user(current_user: User = Depends(get_current_active_user)):
 
 @router.get("/users", response_model=List[UserResponse])
 def get_all_users(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor or X-Prev-Cursor of a previous page"),
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
-    """Get all users (admin only)."""
+    """
+    Get all users (admin only).
+    
+    Pages are linked by the X-Next-Cursor / X-Prev-Cursor response headers;
+    skip still pages with OFFSET (without cursors).
+    """
     if current_user.role.value != "admin":
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Admin access required"
         )
     
-    users = db.query(User).offset(skip).limit(limit).all()
+    if skip and not cursor:
+        users = db.query(User).order_by(*USER_PAGINATOR.order_by()).offset(skip).limit(limit).all()
+    else:
+        page = USER_PAGINATOR.page(db.query(User), limit, cursor)
+        users = page.items
+        response.headers.update(page.headers())
     return [UserResponse.from_orm(user) for user in users]
 
 # Google OAuth Authorization Code Flow Endpoints
@@ -1,128 +1,373 @@
-from sqlalchemy.orm import Session, joinedload
+import hashlib
+import json
+from sqlalchemy import bindparam, func, insert, select, update
+from sqlalchemy.dialects.postgresql import aggregate_order_by, insert as pg_insert
+from sqlalchemy.orm import Session, selectinload
 from app.models import models, schemas
-from typing import List, Optional
+from app.utils.pagination import CursorPage, KeysetPaginator
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 
-def create_desi_lesson(db: Session, lesson_data: schemas.DesiLessonResponse, difficulty: str = None) -> models.DesiLesson:
-    lesson_content = lesson_data.desi_lesson
-    
-    # Calculate the next lesson number for this language
-    max_lesson = db.query(models.DesiLesson).filter(
-        models.DesiLesson.target_language == lesson_content.target_language
-    ).order_by(models.DesiLesson.lesson_number.desc()).first()
-    
-    lesson_number = (max_lesson.lesson_number + 1) if max_lesson else 1
-    
-    # Use the original title from the lesson content
-    lesson_title = lesson_content.title
+# Load every content collection of a lesson with its own query (WHERE lesson_id IN (...),
+# served by the lesson_id indexes). Joining the sibling collections in one query instead
+# returns their cartesian product: 12 x 7 x 9 x 5 = 3,780 rows for a single lesson.
+LESSON_CONTENT_OPTIONS = (
+    selectinload(models.DesiLesson.vocabulary),
+    selectinload(models.DesiLesson.example_sentences),
+    selectinload(models.DesiLesson.short_story).selectinload(models.DesiShortStory.dialogue),
+    selectinload(models.DesiLesson.quiz_questions)
+)
+
+def build_lesson_snapshot(lesson_response: schemas.DesiLessonResponse) -> Tuple[str, str]:
+    """
+    Snapshot of a rendered lesson for DesiLesson.content_snapshot, and its content hash
     
-    # Use provided difficulty or fall back to lesson difficulty
-    final_difficulty = difficulty or lesson_content.difficulty
+    The snapshot is the lesson's canonical JSON (sorted keys, no whitespace),
+    the exact body the read endpoints send, whether it comes from the stored
+    snapshot or is rendered from the content tables. The hash is its sha256, so
+    it only changes when the lesson content does.
+    """
+    snapshot = json.dumps(
+        lesson_response.model_dump(mode="json"), ensure_ascii=False, sort_keys=True, separators=(",", ":")
+    )
+    return snapshot, hashlib.sha256(snapshot.encode("utf-8")).hexdigest()
+
+# /desi-lessons lists lessons in id order
+LESSON_LIST_PAGINATOR = KeysetPaginator("desi_lessons", models.DesiLesson.id)
+# /lessons/{language} lists a language's lessons in lesson_number order (unique per language)
+LANGUAGE_LESSON_PAGINATOR = KeysetPaginator("language_lessons", models.DesiLesson.lesson_number)
+
+# Columns of schemas.DesiLessonDB, for listings that don't need the content
+LESSON_METADATA_COLUMNS = (
+    models.DesiLesson.id,
+    models.DesiLesson.title,
+    models.DesiLesson.target_language,
+    models.DesiLesson.difficulty,
+    models.DesiLesson.lesson_number,
+    models.DesiLesson.created_at
+)
+
+def allocate_lesson_numbers(db: Session, target_language: str, count: int = 1) -> int:
+    """
+    Reserve count consecutive lesson numbers for a language and return the first
     
-    db_lesson = models.DesiLesson(
-        title=lesson_title,
-        target_language=lesson_content.target_language,
-        difficulty=final_difficulty,
-        lesson_number=lesson_number
+    A single INSERT ... ON CONFLICT DO UPDATE ... RETURNING on the language's
+    counter row: concurrent generations for the same language queue on that row
+    until the allocating transaction ends, instead of reading the same max() and
+    producing duplicate numbers. The counter starts from the highest existing
+    lesson number. Numbers of deleted lessons are not handed out again.
+    """
+    existing_max = select(func.coalesce(func.max(models.DesiLesson.lesson_number), 0)).where(
+        models.DesiLesson.target_language == target_language
+    ).scalar_subquery()
+    statement = pg_insert(models.LessonNumberCounter).values(
+        target_language=target_language,
+        last_number=existing_max + count
     )
-    db.add(db_lesson)
-    db.flush()
-    
-    for vocab_item in lesson_content.vocabulary:
-        db_vocab = models.DesiVocabulary(
-            lesson_id=db_lesson.id,
-            english=vocab_item.english,
-            target_language_script=vocab_item.target_language_script,
-            transliteration=vocab_item.transliteration,
-            pronunciation=vocab_item.pronunciation
-        )
-        db.add(db_vocab)
+    statement = statement.on_conflict_do_update(
+        index_elements=[models.LessonNumberCounter.target_language],
+        set_={"last_number": models.LessonNumberCounter.last_number + count}
+    ).returning(models.LessonNumberCounter.last_number)
+    last_number = db.execute(statement).scalar_one()
+    return last_number - count + 1
+
+def get_last_allocated_lesson_number(db: Session, target_language: str) -> Optional[int]:
+    counter = db.get(models.LessonNumberCounter, target_language)
+    return counter.last_number if counter else None
+
+def create_desi_lessons(
+    db: Session,
+    lessons: List[Tuple[schemas.DesiLessonResponse, Optional[str]]]
+) -> List[models.DesiLesson]:
+    """
+    Insert many lessons with all their content in one transaction
     
-    for sentence in lesson_content.example_sentences:
-        db_sentence = models.DesiExampleSentence(
-            lesson_id=db_lesson.id,
-            english=sentence.english,
-            target_language_script=sentence.target_language_script,
-            transliteration=sentence.transliteration,
-            pronunciation=sentence.pronunciation
-        )
-        db.add(db_sentence)
+    Every table gets a single multi-row INSERT (lessons and short stories with
+    RETURNING id) no matter how many lessons or items there are. Either all
+    lessons are saved or, on error, none are.
     
-    db_story = models.DesiShortStory(
-        lesson_id=db_lesson.id,
-        title=lesson_content.short_story.title
-    )
-    db.add(db_story)
-    db.flush()
-    
-    for i, dialogue_item in enumerate(lesson_content.short_story.dialogue):
-        db_dialogue = models.DesiDialogue(
-            short_story_id=db_story.id,
-            speaker=dialogue_item.speaker,
-            target_language_script=dialogue_item.target_language_script,
-            transliteration=dialogue_item.transliteration,
-            english=dialogue_item.english,
-            order_num=i
-        )
-        db.add(db_dialogue)
-    
-    for quiz_item in lesson_content.quiz:
-        # PostgreSQL JSONB handles Python objects natively - no need for json.dumps
-        db_quiz = models.DesiQuizQuestion(
-            lesson_id=db_lesson.id,
-            question=quiz_item.question,
-            options=quiz_item.options,  # PostgreSQL JSONB handles list objects directly
-            answer=quiz_item.answer
-        )
-        db.add(db_quiz)
+    Args:
+        lessons: (lesson, difficulty) pairs; difficulty None keeps the lesson's own
+        
+    Returns:
+        The saved lessons, in input order
+    """
+    if not lessons:
+        return []
+    
+    try:
+        # Number each language's lessons from one allocation, in input order
+        language_counts: Dict[str, int] = {}
+        for lesson_data, _ in lessons:
+            language = lesson_data.desi_lesson.target_language
+            language_counts[language] = language_counts.get(language, 0) + 1
+        next_numbers = {
+            language: allocate_lesson_numbers(db, language, count)
+            for language, count in sorted(language_counts.items())  # Fixed lock order across languages
+        }
+        
+        lesson_rows = []
+        for lesson_data, difficulty in lessons:
+            lesson_content = lesson_data.desi_lesson
+            lesson_number = next_numbers[lesson_content.target_language]
+            next_numbers[lesson_content.target_language] += 1
+            # Use provided difficulty or fall back to lesson difficulty
+            lesson_difficulty = difficulty or lesson_content.difficulty
+            # The lesson as the read endpoints render it from the rows inserted below
+            snapshot, content_hash = build_lesson_snapshot(schemas.DesiLessonResponse(
+                desi_lesson=lesson_content.model_copy(update={"difficulty": lesson_difficulty})
+            ))
+            lesson_rows.append({
+                "title": lesson_content.title,
+                "target_language": lesson_content.target_language,
+                "difficulty": lesson_difficulty,
+                "lesson_number": lesson_number,
+                "content_snapshot": snapshot,
+                "content_hash": content_hash
+            })
+        lesson_ids = db.scalars(
+            insert(models.DesiLesson).returning(models.DesiLesson.id, sort_by_parameter_order=True),
+            lesson_rows
+        ).all()
+        
+        story_ids = db.scalars(
+            insert(models.DesiShortStory).returning(models.DesiShortStory.id, sort_by_parameter_order=True),
+            [
+                {"lesson_id": lesson_id, "title": lesson_data.desi_lesson.short_story.title}
+                for lesson_id, (lesson_data, _) in zip(lesson_ids, lessons)
+            ]
+        ).all()
+        
+        vocabulary_rows, sentence_rows, dialogue_rows, quiz_rows = [], [], [], []
+        for lesson_id, story_id, (lesson_data, _) in zip(lesson_ids, story_ids, lessons):
+            lesson_content = lesson_data.desi_lesson
+            vocabulary_rows.extend({
+                "lesson_id": lesson_id,
+                "english": vocab_item.english,
+                "target_language_script": vocab_item.target_language_script,
+                "transliteration": vocab_item.transliteration,
+                "pronunciation": vocab_item.pronunciation
+            } for vocab_item in lesson_content.vocabulary)
+            sentence_rows.extend({
+                "lesson_id": lesson_id,
+                "english": sentence.english,
+                "target_language_script": sentence.target_language_script,
+                "transliteration": sentence.transliteration,
+                "pronunciation": sentence.pronunciation
+            } for sentence in lesson_content.example_sentences)
+            dialogue_rows.extend({
+                "short_story_id": story_id,
+                "speaker": dialogue_item.speaker,
+                "target_language_script": dialogue_item.target_language_script,
+                "transliteration": dialogue_item.transliteration,
+                "english": dialogue_item.english,
+                "order_num": i
+            } for i, dialogue_item in enumerate(lesson_content.short_story.dialogue))
+            # PostgreSQL JSONB handles list objects directly - no need for json.dumps
+            quiz_rows.extend({
+                "lesson_id": lesson_id,
+                "question": quiz_item.question,
+                "options": quiz_item.options,
+                "answer": quiz_item.answer
+            } for quiz_item in lesson_content.quiz)
+        
+        for model, rows in (
+            (models.DesiVocabulary, vocabulary_rows),
+            (models.DesiExampleSentence, sentence_rows),
+            (models.DesiDialogue, dialogue_rows),
+            (models.DesiQuizQuestion, quiz_rows)
+        ):
+            if rows:
+                db.execute(insert(model), rows)
+        
+        # Other workers refresh these languages' catalogs and quiz pools on commit
+        notify_lessons_changed(db, [], language_counts)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
     
-    db.commit()
-    db.refresh(db_lesson)
-    return db_lesson
+    saved = {
+        lesson.id: lesson
+        for lesson in db.query(models.DesiLesson).filter(models.DesiLesson.id.in_(lesson_ids)).all()
+    }
+    return [saved[lesson_id] for lesson_id in lesson_ids]
+
+def create_desi_lesson(db: Session, lesson_data: schemas.DesiLessonResponse, difficulty: str = None) -> models.DesiLesson:
+    return create_desi_lessons(db, [(lesson_data, difficulty)])[0]
 
 def get_desi_lesson(db: Session, lesson_id: int) -> Optional[models.DesiLesson]:
     return db.query(models.DesiLesson).filter(models.DesiLesson.id == lesson_id).first()
 
 def get_desi_lessons(db: Session, skip: int = 0, limit: int = 100) -> List[models.DesiLesson]:
-    return db.query(models.DesiLesson).offset(skip).limit(limit).all()
+    return db.query(models.DesiLesson).order_by(*LESSON_LIST_PAGINATOR.order_by()).offset(skip).limit(limit).all()
+
+def get_desi_lessons_page(db: Session, limit: int = 100, cursor: Optional[str] = None) -> CursorPage:
+    """Keyset counterpart of get_desi_lessons"""
+    return LESSON_LIST_PAGINATOR.page(db.query(models.DesiLesson), limit, cursor)
 
 def get_desi_lessons_by_language(db: Session, target_language: str) -> List[models.DesiLesson]:
     return db.query(models.DesiLesson).filter(models.DesiLesson.target_language == target_language).all()
 
+def get_lesson_catalog_summary(db: Session, target_language: str):
+    """
+    (total_lessons, max_lesson_number, lesson_numbers) of a language in one aggregate row
+
+    Answered from the (target_language, lesson_number) unique index; max_lesson_number
+    is None and lesson_numbers empty when the language has no lessons.
+    """
+    total_lessons, max_lesson_number, lesson_numbers = db.execute(
+        select(
+            func.count(),
+            func.max(models.DesiLesson.lesson_number),
+            func.array_agg(aggregate_order_by(models.DesiLesson.lesson_number, models.DesiLesson.lesson_number))
+        ).where(models.DesiLesson.target_language == target_language)
+    ).one()
+    return total_lessons, max_lesson_number, lesson_numbers or []
+
+def _language_lesson_metadata_query(db: Session, target_language: str):
+    return db.query(*LESSON_METADATA_COLUMNS).filter(models.DesiLesson.target_language == target_language)
+
+def get_lesson_metadata_by_language(db: Session, target_language: str, skip: int = 0, limit: int = 100):
+    """Metadata rows (the DesiLessonDB columns) of a language's lessons in lesson_number order"""
+    return _language_lesson_metadata_query(db, target_language).order_by(
+        *LANGUAGE_LESSON_PAGINATOR.order_by()
+    ).offset(skip).limit(limit).all()
+
+def get_lesson_metadata_page_by_language(
+    db: Session, target_language: str, limit: int = 100, cursor: Optional[str] = None
+) -> CursorPage:
+    """Keyset counterpart of get_lesson_metadata_by_language"""
+    return LANGUAGE_LESSON_PAGINATOR.page(_language_lesson_metadata_query(db, target_language), limit, cursor)
+
 def get_desi_lesson_by_language_and_number(db: Session, target_language: str, lesson_number: int) -> Optional[models.DesiLesson]:
     """Get lesson by language and lesson number with all related content"""
     return db.query(models.DesiLesson).filter(
         models.DesiLesson.target_language == target_language,
         models.DesiLesson.lesson_number == lesson_number
-    ).options(
-        joinedload(models.DesiLesson.vocabulary),
-        joinedload(models.DesiLesson.example_sentences),
-        joinedload(models.DesiLesson.short_story).joinedload(models.DesiShortStory.dialogue),
-        joinedload(models.DesiLesson.quiz_questions)
-    ).first()
+    ).options(*LESSON_CONTENT_OPTIONS).first()
 
 def get_desi_lesson_with_content(db: Session, lesson_id: int) -> Optional[models.DesiLesson]:
     """Get lesson with all related content (vocabulary, examples, story, quiz)"""
     return db.query(models.DesiLesson).filter(
         models.DesiLesson.id == lesson_id
-    ).options(
-        joinedload(models.DesiLesson.vocabulary),
-        joinedload(models.DesiLesson.example_sentences),
-        joinedload(models.DesiLesson.short_story).joinedload(models.DesiShortStory.dialogue),
-        joinedload(models.DesiLesson.quiz_questions)
-    ).first()
+    ).options(*LESSON_CONTENT_OPTIONS).first()
 
 def find_desi_lesson_by_title_and_language(db: Session, title: str, target_language: str) -> Optional[models.DesiLesson]:
     """Find lesson by title and language, with full content"""
     return db.query(models.DesiLesson).filter(
         models.DesiLesson.target_language == target_language,
         models.DesiLesson.title.contains(title)
-    ).options(
-        joinedload(models.DesiLesson.vocabulary),
-        joinedload(models.DesiLesson.example_sentences),
-        joinedload(models.DesiLesson.short_story).joinedload(models.DesiShortStory.dialogue),
-        joinedload(models.DesiLesson.quiz_questions)
+    ).order_by(models.DesiLesson.id).options(*LESSON_CONTENT_OPTIONS).first()
+
+def _lesson_snapshot(db: Session, *criteria):
+    # The stored JSON text as-is: no ORM objects, no json.loads
+    return db.execute(
+        select(
+            models.DesiLesson.id,
+            models.DesiLesson.content_snapshot.label("snapshot_json"),
+            models.DesiLesson.content_hash
+        ).where(*criteria).order_by(models.DesiLesson.id).limit(1)
     ).first()
 
+def get_lesson_snapshot_by_language_and_number(db: Session, target_language: str, lesson_number: int):
+    """
+    (id, snapshot_json, content_hash) of a lesson, its stored snapshot as JSON text, in one single-row query
+    
+    None if there is no such lesson; snapshot_json is None if it has no snapshot
+    yet, and callers then load it with get_desi_lesson_by_language_and_number.
+    """
+    return _lesson_snapshot(
+        db,
+        models.DesiLesson.target_language == target_language,
+        models.DesiLesson.lesson_number == lesson_number
+    )
+
+def find_lesson_snapshot_by_title_and_language(db: Session, title: str, target_language: str):
+    """Snapshot counterpart of find_desi_lesson_by_title_and_language"""
+    return _lesson_snapshot(
+        db,
+        models.DesiLesson.target_language == target_language,
+        models.DesiLesson.title.contains(title)
+    )
+
+def get_first_lesson_snapshots(db: Session, per_language: int):
+    """(id, target_language, lesson_number, snapshot_json, content_hash) of the first lessons of every language"""
+    lesson_rank = func.row_number().over(
+        partition_by=models.DesiLesson.target_language,
+        order_by=models.DesiLesson.lesson_number
+    ).label("lesson_rank")
+    ranked = select(
+        models.DesiLesson.id,
+        models.DesiLesson.target_language,
+        models.DesiLesson.lesson_number,
+        models.DesiLesson.content_snapshot.label("snapshot_json"),
+        models.DesiLesson.content_hash,
+        lesson_rank
+    ).where(models.DesiLesson.content_snapshot.isnot(None)).subquery()
+    return db.execute(
+        select(
+            ranked.c.id, ranked.c.target_language, ranked.c.lesson_number,
+            ranked.c.snapshot_json, ranked.c.content_hash
+        ).where(
+            ranked.c.lesson_rank <= per_language
+        ).order_by(ranked.c.target_language, ranked.c.lesson_number)
+    ).all()
+
+# Channel changed, added or deleted lessons are announced on, for the workers' in-memory caches
+LESSON_CHANGES_CHANNEL = "lesson_content_changed"
+
+def notify_lessons_changed(db: Session, lesson_ids: Iterable[int], target_languages: Iterable[str] = ()):
+    """
+    Tell every worker listening on LESSON_CHANGES_CHANNEL about changed lessons
+    
+    Workers drop the lesson ids from their lesson caches and the languages'
+    catalog summaries and quiz distractor pools. The payload is JSON:
+    {"ids": [...], "languages": [...]}. NOTIFY is transactional: workers hear
+    about it when the caller commits.
+    """
+    lesson_ids = list(lesson_ids)
+    target_languages = sorted(set(target_languages))
+    # Payloads are capped at 8000 bytes
+    for start in range(0, max(len(lesson_ids), 1), 500):
+        payload = json.dumps({"ids": lesson_ids[start:start + 500], "languages": target_languages}, separators=(",", ":"))
+        db.execute(select(func.pg_notify(LESSON_CHANGES_CHANNEL, payload)))
+
+def refresh_lesson_snapshots(db: Session, lesson_ids: Iterable[int]) -> int:
+    """
+    Re-render the snapshots of the given lessons from their content tables
+    
+    Run after lesson content changes outside create_desi_lessons. One bulk
+    UPDATE plus a notification for the lessons that changed; the caller
+    commits. Returns the number of snapshots that changed.
+    """
+    lesson_ids = list(lesson_ids)
+    if not lesson_ids:
+        return 0
+    # populate_existing: content already loaded in this session may predate the change
+    lessons = db.query(models.DesiLesson).filter(
+        models.DesiLesson.id.in_(lesson_ids)
+    ).options(*LESSON_CONTENT_OPTIONS).populate_existing().all()
+    
+    rows = []
+    for lesson in lessons:
+        snapshot, content_hash = build_lesson_snapshot(convert_db_lesson_to_response_format(lesson))
+        if content_hash != lesson.content_hash:
+            rows.append({"row_id": lesson.id, "snapshot": snapshot, "hash": content_hash})
+    if rows:
+        table = models.DesiLesson.__table__
+        db.execute(
+            update(table).where(table.c.id == bindparam("row_id")).values(
+                content_snapshot=bindparam("snapshot"),
+                content_hash=bindparam("hash")
+            ),
+            rows
+        )
+        changed = {row["row_id"] for row in rows}
+        notify_lessons_changed(
+            db, sorted(changed), {lesson.target_language for lesson in lessons if lesson.id in changed}
+        )
+    return len(rows)
+
 def convert_db_lesson_to_response_format(db_lesson: models.DesiLesson) -> schemas.DesiLessonResponse:
     """Convert database lesson to the response format expected by frontend"""
     
@@ -158,7 +403,7 @@ def convert_db_lesson_to_response_format(db_lesson: models.DesiLesson) -> schema
                 transliteration=d.transliteration,
                 english=d.english
             )
-            for d in sorted(db_lesson.short_story.dialogue, key=lambda x: x.order_num)
+            for d in db_lesson.short_story.dialogue  # Loaded in order_num order
         ]
     
     short_story = schemas.DesiShortStory(
@@ -1,25 +1,12 @@
-from fastapi import APIRouter, HTTPException, Depends
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, HTTPException, Depends, Header, Query, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
-from app.utils.database import get_db
+from app.utils.database import get_async_db
 from app.services.enhanced_gemini_service import enhanced_gemini_service, EnhancedLearningData
-from app.api import crud
-from app.models.schemas import DesiLessonDB
-from pydantic import BaseModel
-
-
-class EnhancedLessonRequest(BaseModel):
-    topic: str
-    language: str
-    difficulty: Optional[str] = "beginner"
-    save_to_database: Optional[bool] = True
-
-
-class EnhancedLessonResponse(BaseModel):
-    success: bool
-    data: Optional[EnhancedLearningData] = None
-    lesson_db_info: Optional[DesiLessonDB] = None
-    message: str
+from app.services.lesson_generation import EnhancedLessonRequest, EnhancedLessonResponse, generate_enhanced_lesson as run_enhanced_lesson_generation
+from app.services.job_queue import job_queue
+from app.api.jobs import accepted_job_response
+from app.utils.idempotency import idempotency_store, IDEMPOTENCY_HEADER
 
 
 router = APIRouter()
@@ -28,7 +15,10 @@ router = APIRouter()
 @router.post("/enhanced-lesson", response_model=EnhancedLessonResponse)
 async def generate_enhanced_lesson(
     request: EnhancedLessonRequest,
-    db: Session = Depends(get_db)
+    response: Response,
+    async_job: bool = Query(False, description="Queue the generation and return 202 with a job id"),
+    idempotency_key: Optional[str] = Header(None, alias=IDEMPOTENCY_HEADER),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Generate enhanced language learning materials equivalent to TypeScript desi_lesson_generate_GeminiService
@@ -39,79 +29,34 @@ async def generate_enhanced_lesson(
     - 9 conversation lines between two speakers
     - 5 multiple-choice quiz questions
     
-    Optionally saves transformed data to database using existing schema
+    Optionally saves transformed data to database using existing schema.
+    With async_job=true the lesson is generated by a background worker; poll /api/jobs/{job_id} for the result.
+    Retries carrying the same Idempotency-Key get the first response instead of a new lesson.
     """
-    try:
-        # Validate inputs
-        if not request.topic.strip():
-            raise HTTPException(status_code=400, detail="Topic cannot be empty")
-        
-        if not request.language.strip():
-            raise HTTPException(status_code=400, detail="Language cannot be empty")
-        
-        # Generate enhanced learning data
-        learning_data = await enhanced_gemini_service.fetch_learning_data(
-            topic=request.topic.strip(),
-            language=request.language.strip()
-        )
+    async def generate():
+        try:
+            if async_job:
+                job = await db.run_sync(job_queue.enqueue, "enhanced_lesson", request.model_dump())
+                return accepted_job_response(job)
+            
+            return await run_enhanced_lesson_generation(db, request)
+            
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
         
-        
-        lesson_db_info = None
-        
-        # Save to database if requested (default: True)
-        if request.save_to_database:
-            try:
-                # Transform enhanced data to existing database format
-                transformed_lesson = enhanced_gemini_service.transform_to_desi_lesson_format(
-                    enhanced_data=learning_data,
-                    topic=request.topic.strip(),
-                    language=request.language.strip(),
-                    difficulty=request.difficulty or "beginner"
-                )
-                
-                # Save using existing CRUD function
-                db_lesson = crud.create_desi_lesson(
-                    db=db,
-                    lesson_data=transformed_lesson,
-                    difficulty=request.difficulty or "beginner"
-                )
-                
-                lesson_db_info = DesiLessonDB(
-                    id=db_lesson.id,
-                    title=db_lesson.title,
-                    target_language=db_lesson.target_language,
-                    difficulty=db_lesson.difficulty,
-                    lesson_number=db_lesson.lesson_number,
-                    created_at=db_lesson.created_at
-                )
-                
-                
-            except Exception as db_error:
-                # Log the database error for debugging
-                print(f"Database insertion error: {str(db_error)}")
-                import traceback
-                traceback.print_exc()
-                # Continue without failing the entire request
-        
-        success_message = f"Successfully generated enhanced lesson for '{request.topic}' in {request.language}"
-        if lesson_db_info:
-            success_message += f" and saved to database (ID: {lesson_db_info.id})"
-        
-        return EnhancedLessonResponse(
-            success=True,
-            data=learning_data,
-            lesson_db_info=lesson_db_info,
-            message=success_message
-        )
-        
-    except ValueError as e:
-        raise HTTPException(status_code=400, detail=str(e))
+        except Exception as e:
+            raise HTTPException(
+                status_code=500, 
+                detail=f"Failed to generate enhanced lesson: {str(e)}"
+            )
     
-    except Exception as e:
-        raise HTTPException(
-            status_code=500, 
-            detail=f"Failed to generate enhanced lesson: {str(e)}"
-        )
+    return await idempotency_store.run(
+        key=idempotency_key,
+        scope="enhanced-lesson",
+        payload={"request": request, "async_job": async_job},
+        producer=generate,
+        response=response
+    )
 
 
 @router.get("/enhanced-lesson/test")
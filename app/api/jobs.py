@@ -0,0 +1,94 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+import asyncio
+import json
+import time
+
+from app.utils.database import get_async_db, AsyncSessionLocal
+from app.utils.config import settings
+from app.models.models import GenerationJob
+from app.models.schemas import GenerationJobAccepted, GenerationJobResponse
+from app.services.job_queue import job_queue, TERMINAL_STATUSES
+
+router = APIRouter(prefix="/jobs", tags=["Generation Jobs"])
+
+
+def accepted_job_response(job: GenerationJob) -> JSONResponse:
+    """202 Accepted response pointing the client at the job status endpoints"""
+    status_url = f"/api/jobs/{job.id}"
+    accepted = GenerationJobAccepted(
+        job_id=job.id,
+        job_type=job.job_type,
+        status=job.status,
+        status_url=status_url,
+        events_url=f"{status_url}/events"
+    )
+    return JSONResponse(
+        status_code=202,
+        content=jsonable_encoder(accepted),
+        headers={"Location": status_url}
+    )
+
+
+async def _read_job(db: AsyncSession, job_id: int) -> GenerationJob:
+    job = await db.run_sync(job_queue.get_job, job_id)
+    # End the read transaction so the pooled connection isn't held while we wait
+    # (the session doesn't expire on commit, so the loaded job stays readable)
+    await db.commit()
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@router.get("/{job_id}", response_model=GenerationJobResponse)
+async def get_job(
+    job_id: int,
+    wait: int = Query(0, ge=0, description="Seconds to wait for the job to finish (long polling)"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Get the status of a generation job.
+    With wait > 0 the request is held until the job finishes or the wait runs out.
+    """
+    wait = min(wait, settings.JOB_WAIT_MAX_SECONDS)
+    deadline = time.monotonic() + wait
+
+    job = await _read_job(db, job_id)
+    while job.status not in TERMINAL_STATUSES and time.monotonic() < deadline:
+        await asyncio.sleep(settings.JOB_POLL_INTERVAL_SECONDS)
+        job = await _read_job(db, job_id)
+
+    return GenerationJobResponse.model_validate(job)
+
+
+@router.get("/{job_id}/events")
+async def stream_job_events(job_id: int, db: AsyncSession = Depends(get_async_db)):
+    """
+    Subscribe to a generation job with Server-Sent Events.
+    A 'status' event is sent whenever the status changes; the stream closes once the job finishes.
+    """
+    job = await _read_job(db, job_id)
+
+    async def event_stream():
+        # The stream outlives the request dependencies, so it polls with its own session
+        async with AsyncSessionLocal() as stream_db:
+            current = job
+            last_status = None
+            deadline = time.monotonic() + settings.JOB_EVENTS_MAX_SECONDS
+            while True:
+                if current.status != last_status:
+                    last_status = current.status
+                    data = jsonable_encoder(GenerationJobResponse.model_validate(current))
+                    yield f"event: status\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+                if current.status in TERMINAL_STATUSES or time.monotonic() >= deadline:
+                    break
+                await asyncio.sleep(settings.JOB_POLL_INTERVAL_SECONDS)
+                current = await _read_job(stream_db, job_id)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"}
+    )
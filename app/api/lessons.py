@@ -1,17 +1,27 @@
-from fastapi import APIRouter, HTTPException, Depends, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, HTTPException, Depends, Query, Request
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional, Union
-from app.utils.database import get_db
+from app.utils.database import get_async_db
 from app.api import crud
-from app.models.schemas import DesiLessonResponse, DesiLessonDB, DesiLessonFromDB
+from app.models.schemas import DesiLessonResponse, DesiLessonDB, DesiLessonFromDB, DesiQuizQuestion
+from app.services.lesson_cache import lesson_cache, lesson_content_etag
+from app.services.lesson_catalog import lesson_catalog
+from app.services.quiz_generator import quiz_generator
+from app.utils.http_cache import encode_json, json_response
 
 router = APIRouter()
 
 
+@router.get("/lessons/cache/stats")
+async def get_lesson_cache_stats():
+    """Rendered-lesson cache size and hit rate for this worker"""
+    return lesson_cache.get_stats()
+
+
 @router.get("/lessons/{language}/count")
 async def get_lesson_count_by_language(
     language: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get the total number of lessons available for a language.
@@ -21,13 +31,12 @@ async def get_lesson_count_by_language(
     - Admin statistics
     """
     try:
-        lessons = crud.get_desi_lessons_by_language(db=db, target_language=language)
-        count = len(lessons)
+        summary = await lesson_catalog.get(db, language)
         
         return {
             "language": language,
-            "total_lessons": count,
-            "available_numbers": [lesson.lesson_number for lesson in lessons]
+            "total_lessons": summary.total_lessons,
+            "available_numbers": summary.lesson_numbers
         }
         
     except Exception as e:
@@ -37,12 +46,46 @@ async def get_lesson_count_by_language(
         )
 
 
+@router.get("/lessons/{language}/next")
+async def get_next_lesson_number(
+    language: str,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Get the next available lesson number for a language.
+    Used for:
+    - Creating new lessons
+    - Admin lesson management
+    """
+    try:
+        summary = await lesson_catalog.get(db, language)
+        next_number = (summary.max_lesson_number or 0) + 1
+        
+        # Numbers of deleted lessons are not handed out again
+        last_allocated = await db.run_sync(crud.get_last_allocated_lesson_number, language)
+        if last_allocated is not None:
+            next_number = max(next_number, last_allocated + 1)
+        
+        return {
+            "language": language,
+            "next_lesson_number": next_number,
+            "existing_lessons": summary.total_lessons
+        }
+        
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to get next lesson number: {str(e)}"
+        )
+
+
 @router.get("/lessons/{language}/{lesson_number}")
 async def get_lesson_by_language_and_number(
     language: str,
     lesson_number: int,
+    request: Request,
     include_content: bool = Query(True, description="Include full lesson content (vocabulary, sentences, etc.)"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get a specific lesson by language and lesson number.
@@ -58,12 +101,31 @@ async def get_lesson_by_language_and_number(
         
     Returns:
         Full lesson data with vocabulary, sentences, story, and quiz
+        (with an ETag; 304 for If-None-Match with the current one)
     """
     try:
+        if include_content:
+            # Cached lessons are served and revalidated without touching the database
+            cached = lesson_cache.get_by_number(language, lesson_number)
+            if cached is not None:
+                body, etag = cached
+                return json_response(request, body, etag)
+            
+            # Serve the stored snapshot as-is when the lesson has one
+            snapshot = await db.run_sync(
+                crud.get_lesson_snapshot_by_language_and_number,
+                target_language=language,
+                lesson_number=lesson_number
+            )
+            if snapshot is not None and snapshot.snapshot_json is not None:
+                body = snapshot.snapshot_json.encode("utf-8")
+                etag = lesson_content_etag(snapshot.id, snapshot.content_hash)
+                lesson_cache.put(snapshot.id, language, lesson_number, body, etag)
+                return json_response(request, body, etag)
         
         # Get lesson from database
-        lesson = crud.get_desi_lesson_by_language_and_number(
-            db=db,
+        lesson = await db.run_sync(
+            crud.get_desi_lesson_by_language_and_number,
             target_language=language,
             lesson_number=lesson_number
         )
@@ -75,9 +137,12 @@ async def get_lesson_by_language_and_number(
             )
         
         if include_content:
-            # Return full lesson content using existing conversion function
-            lesson_response = crud.convert_db_lesson_to_response_format(lesson)
-            return lesson_response
+            # Not snapshotted yet: render from the content tables, as the snapshot would be
+            snapshot_json, content_hash = crud.build_lesson_snapshot(crud.convert_db_lesson_to_response_format(lesson))
+            body = snapshot_json.encode("utf-8")
+            etag = lesson_content_etag(lesson.id, content_hash)
+            lesson_cache.put(lesson.id, language, lesson_number, body, etag)
+            return json_response(request, body, etag)
         else:
             # Return just metadata
             lesson_db = DesiLessonDB(
@@ -88,7 +153,7 @@ async def get_lesson_by_language_and_number(
                 lesson_number=lesson.lesson_number,
                 created_at=lesson.created_at
             )
-            return lesson_db
+            return json_response(request, encode_json(lesson_db))
             
     except HTTPException:
         raise
@@ -99,15 +164,54 @@ async def get_lesson_by_language_and_number(
         )
 
 
+@router.get("/lessons/{language}/{lesson_number}/practice-quiz", response_model=List[DesiQuizQuestion])
+async def get_practice_quiz(
+    language: str,
+    lesson_number: int,
+    num_questions: int = Query(5, ge=1, le=20, description="Number of questions (fewer if the lesson is small)"),
+    seed: Optional[int] = Query(None, description="Seed to reproduce a quiz; a new quiz is drawn when omitted"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Get a fresh practice quiz for a lesson.
+    Built locally from the lesson's stored vocabulary and example sentences,
+    with distractors from other lessons in the same language - no Gemini call.
+    """
+    try:
+        lesson = await db.run_sync(
+            crud.get_desi_lesson_by_language_and_number,
+            target_language=language,
+            lesson_number=lesson_number
+        )
+
+        if not lesson:
+            raise HTTPException(
+                status_code=404,
+                detail=f"Lesson {lesson_number} for {language} not found"
+            )
+
+        return await db.run_sync(quiz_generator.build_quiz_for_lesson, lesson, num_questions=num_questions, seed=seed)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to build practice quiz: {str(e)}"
+        )
+
+
 @router.get("/lessons/{language}")
 async def get_lessons_by_language(
     language: str,
+    request: Request,
     skip: int = Query(0, ge=0, description="Number of lessons to skip"),
     limit: int = Query(100, ge=1, le=100, description="Maximum number of lessons to return"),
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor or X-Prev-Cursor of a previous page"),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
-    Get all lessons for a specific language.
+    Get all lessons for a specific language, in lesson number order.
     Used for:
     - Lesson selection page
     - Progress tracking
@@ -115,77 +219,31 @@ async def get_lessons_by_language(
     
     Args:
         language: Target language
-        skip: Pagination offset  
+        skip: Pagination offset (without cursors)
         limit: Maximum results
+        cursor: Keyset cursor from the X-Next-Cursor / X-Prev-Cursor headers
         
     Returns:
         List of lesson metadata (without full content for performance)
     """
     try:
-        
-        # Get lessons by language
-        lessons = crud.get_desi_lessons_by_language(db=db, target_language=language)
-        
-        if not lessons:
-            return []
-        
-        # Apply pagination
-        paginated_lessons = lessons[skip:skip + limit]
-        
-        # Convert to response format
-        lesson_list = []
-        for lesson in paginated_lessons:
-            lesson_db = DesiLessonDB(
-                id=lesson.id,
-                title=lesson.title,
-                target_language=lesson.target_language,
-                difficulty=lesson.difficulty,
-                lesson_number=lesson.lesson_number,
-                created_at=lesson.created_at
-            )
-            lesson_list.append(lesson_db)
-        
-        return lesson_list
-        
-    except Exception as e:
-        raise HTTPException(
-            status_code=500,
-            detail=f"Failed to fetch lessons: {str(e)}"
-        )
-
-
-
-@router.get("/lessons/{language}/next")
-async def get_next_lesson_number(
-    language: str,
-    db: Session = Depends(get_db)
-):
-    """
-    Get the next available lesson number for a language.
-    Used for:
-    - Creating new lessons
-    - Admin lesson management
-    """
-    try:
-        # Get existing lessons for the language
-        lessons = crud.get_desi_lessons_by_language(db=db, target_language=language)
-        
-        if not lessons:
-            next_number = 1
+        if skip and not cursor:
+            lessons = await db.run_sync(crud.get_lesson_metadata_by_language, target_language=language, skip=skip, limit=limit)
+            headers = {}
         else:
-            # Find the highest lesson number and add 1
-            max_number = max(lesson.lesson_number for lesson in lessons)
-            next_number = max_number + 1
-        
+            page = await db.run_sync(crud.get_lesson_metadata_page_by_language, target_language=language, limit=limit, cursor=cursor)
+            lessons, headers = page.items, page.headers()
         
-        return {
-            "language": language,
-            "next_lesson_number": next_number,
-            "existing_lessons": len(lessons)
-        }
+        return json_response(
+            request,
+            encode_json([DesiLessonDB.model_validate(lesson) for lesson in lessons]),
+            headers=headers
+        )
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500,
-            detail=f"Failed to get next lesson number: {str(e)}"
+            detail=f"Failed to fetch lessons: {str(e)}"
         )
\ No newline at end of file
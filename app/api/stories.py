@@ -1,6 +1,9 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Header, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
+from urllib.parse import urlencode
 from app.models.schemas import (
     StoryGenerationRequest, 
     StoryResponse, 
@@ -9,56 +12,92 @@ from app.models.schemas import (
     StoryData,
     DesiStoryDB
 )
+from app.models.tts_schemas import StoryAudioResponse
 from app.services.story_service import story_service
-from app.api.story_crud import get_desi_stories, get_story_statistics, convert_db_story_to_response_format
-from app.utils.database import get_db
+from app.services.story_audio import StoryNarration, story_audio_store
+from app.api.story_crud import (
+    get_desi_story, get_desi_stories, get_desi_stories_page, get_story_statistics, convert_db_story_to_response_format
+)
+from app.utils.database import get_async_db, get_db
+from app.utils.idempotency import idempotency_store, IDEMPOTENCY_HEADER
+from app.utils.http_cache import (
+    IMMUTABLE_CACHE_CONTROL, REVALIDATE_CACHE_CONTROL, cached_content_response, encode_json, json_response, make_etag
+)
 
 router = APIRouter()
 
 @router.post("/stories/generate", response_model=StoryResponse)
-async def generate_story(request: StoryGenerationRequest, db: Session = Depends(get_db)):
+async def generate_story(
+    request: StoryGenerationRequest,
+    response: Response,
+    idempotency_key: Optional[str] = Header(None, alias=IDEMPOTENCY_HEADER),
+    db: AsyncSession = Depends(get_async_db)
+):
     """Generate a story based on CEFR level and language"""
-    try:
-        
-        story_data = await story_service.generate_story(
-            request=request, 
-            db=db, 
-            user_id=None,  # TODO: Get from authentication when available
-            save_to_db=True
-        )
-        
-        return StoryResponse(
-            story_data=story_data,
-            target_language=request.language,
-            level=request.level
-        )
-        
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    async def generate():
+        try:
+            
+            story_data = await story_service.generate_story(
+                request=request, 
+                db=db, 
+                user_id=None,  # TODO: Get from authentication when available
+                save_to_db=True
+            )
+            
+            return StoryResponse(
+                story_data=story_data,
+                target_language=request.language,
+                level=request.level
+            )
+            
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+    
+    return await idempotency_store.run(
+        key=idempotency_key,
+        scope="stories-generate",
+        payload=request,
+        producer=generate,
+        response=response
+    )
 
 @router.post("/stories/generate-custom", response_model=StoryResponse)
-async def generate_custom_story(request: StoryGenerationRequest, db: Session = Depends(get_db)):
+async def generate_custom_story(
+    request: StoryGenerationRequest,
+    response: Response,
+    idempotency_key: Optional[str] = Header(None, alias=IDEMPOTENCY_HEADER),
+    db: AsyncSession = Depends(get_async_db)
+):
     """Generate a custom story with a specific scenario"""
-    try:
-        if not request.scenario:
-            raise HTTPException(status_code=400, detail="Scenario is required for custom story generation")
-        
-        
-        story_data = await story_service.generate_custom_story(
-            request=request, 
-            db=db, 
-            user_id=None,  # TODO: Get from authentication when available
-            save_to_db=True
-        )
-        
-        return StoryResponse(
-            story_data=story_data,
-            target_language=request.language,
-            level=request.level
-        )
-        
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    async def generate():
+        try:
+            if not request.scenario:
+                raise HTTPException(status_code=400, detail="Scenario is required for custom story generation")
+            
+            
+            story_data = await story_service.generate_custom_story(
+                request=request, 
+                db=db, 
+                user_id=None,  # TODO: Get from authentication when available
+                save_to_db=True
+            )
+            
+            return StoryResponse(
+                story_data=story_data,
+                target_language=request.language,
+                level=request.level
+            )
+            
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+    
+    return await idempotency_store.run(
+        key=idempotency_key,
+        scope="stories-generate-custom",
+        payload=request,
+        producer=generate,
+        response=response
+    )
 
 @router.get("/stories/languages", response_model=List[str])
 def get_supported_languages():
@@ -98,24 +137,37 @@ def get_level_descriptions():
 
 @router.get("/stories", response_model=List[DesiStoryDB])
 def get_stories(
+    request: Request,
     skip: int = 0,
     limit: int = 50,
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor or X-Prev-Cursor of a previous page"),
     target_language: str = None,
     cefr_level: str = None,
     is_custom: bool = None,
     db: Session = Depends(get_db)
 ):
-    """Get stories from database with optional filters"""
+    """
+    Get stories from database with optional filters, newest first
+    
+    Pages are linked by the X-Next-Cursor / X-Prev-Cursor response headers
+    (a cursor only works with the filters it was issued for); skip still
+    pages with OFFSET (without cursors).
+    """
     try:
-        stories = get_desi_stories(
-            db=db,
-            skip=skip,
-            limit=limit,
-            target_language=target_language,
-            cefr_level=cefr_level,
-            is_custom=is_custom
+        filters = {"target_language": target_language, "cefr_level": cefr_level, "is_custom": is_custom}
+        if skip and not cursor:
+            stories = get_desi_stories(db=db, skip=skip, limit=limit, **filters)
+            headers = {}
+        else:
+            page = get_desi_stories_page(db=db, limit=limit, cursor=cursor, **filters)
+            stories, headers = page.items, page.headers()
+        return json_response(
+            request,
+            encode_json([DesiStoryDB.model_validate(story) for story in stories]),
+            headers=headers
         )
-        return stories
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -129,16 +181,105 @@ def get_stories_statistics(db: Session = Depends(get_db)):
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/stories/{story_id}", response_model=StoryResponse)
-def get_story_by_id(story_id: int, db: Session = Depends(get_db)):
-    """Get a specific story by ID"""
+def get_story_by_id(story_id: int, request: Request, db: Session = Depends(get_db)):
+    """
+    Get a specific story by ID
+    
+    The ETag is a hash of the response: a story's transliteration can still be
+    filled in after it was generated, so its creation time doesn't identify it.
+    """
     try:
         from app.api.story_crud import get_desi_story
         story = get_desi_story(db, story_id)
         if not story:
             raise HTTPException(status_code=404, detail="Story not found")
         
-        return convert_db_story_to_response_format(story)
+        return json_response(request, encode_json(convert_db_story_to_response_format(story)))
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+def _story_narration(db: Session, story_id: int, voice_name: Optional[str], speaker_name: Optional[str], speaking_rate: float) -> StoryNarration:
+    story = get_desi_story(db, story_id)
+    if not story:
+        raise HTTPException(status_code=404, detail="Story not found")
+    try:
+        return StoryNarration(story, voice_name=voice_name, speaker_name=speaker_name, speaking_rate=speaking_rate)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/stories/{story_id}/audio")
+def get_story_audio(
+    story_id: int,
+    request: Request,
+    voice_name: Optional[str] = None,
+    speaker_name: Optional[str] = None,
+    speaking_rate: float = Query(0.9, ge=0.25, le=4.0),
+    db: Session = Depends(get_db)
+):
+    """
+    Narration of the story's translated text as one MP3
+    
+    The first request synthesizes the story sentence by sentence (concurrently)
+    and streams the audio in story order as it becomes ready; the finished track
+    is stored per story and voice. Later requests are served from the stored file
+    with ETag and Range support; the versioned audio_url from
+    /stories/{story_id}/audio/manifest (?v=<etag>) is cached forever.
+    
+    - **voice_name**: Optional voice, one of the language's voices from /tts/supported-languages (defaults to the language's voice)
+    - **speaker_name**: Optional narrator name, used to pick a gendered voice
+    - **speaking_rate**: Narration speed (default: 0.9)
+    """
+    try:
+        narration = _story_narration(db, story_id, voice_name, speaker_name, speaking_rate)
+        manifest = narration.stored_manifest()
+        if manifest is not None:
+            is_current_version = request.query_params.get("v") == manifest["etag"]
+            return cached_content_response(
+                request,
+                make_etag(manifest["etag"]),
+                media_type=manifest["content_type"],
+                cache_control=IMMUTABLE_CACHE_CONTROL if is_current_version else REVALIDATE_CACHE_CONTROL,
+                path=story_audio_store.audio_path(story_id, narration.track)
+            )
+        
+        return StreamingResponse(
+            narration.iter_audio(),
+            media_type="audio/mpeg",
+            # Keep proxies from buffering the stream
+            headers={"Cache-Control": "no-store", "X-Accel-Buffering": "no"}
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error generating story audio: {str(e)}")
+
+@router.get("/stories/{story_id}/audio/manifest", response_model=StoryAudioResponse)
+def get_story_audio_manifest(
+    story_id: int,
+    voice_name: Optional[str] = None,
+    speaker_name: Optional[str] = None,
+    speaking_rate: float = Query(0.9, ge=0.25, le=4.0),
+    db: Session = Depends(get_db)
+):
+    """
+    Sentence timings of the story narration, for highlight-as-you-listen
+    
+    Synthesizes and stores the narration first if it isn't stored yet. Each
+    sentence lists its start_ms/end_ms within the MP3 at audio_url.
+    """
+    try:
+        narration = _story_narration(db, story_id, voice_name, speaker_name, speaking_rate)
+        manifest = narration.render()
+        
+        query = {"voice_name": manifest["voice_name"], "speaking_rate": manifest["speaking_rate"], "v": manifest["etag"]}
+        return StoryAudioResponse(
+            audio_url=f"/api/stories/{story_id}/audio?{urlencode(query)}",
+            **manifest
+        )
     except HTTPException:
         raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Error generating story audio: {str(e)}")
@@ -1,8 +1,14 @@
 from sqlalchemy.orm import Session, joinedload
 from app.models import models, schemas
+from app.utils.pagination import CursorPage, KeysetPaginator
 from typing import List, Optional
 from datetime import datetime
 
+# Story lists, newest first
+STORY_LIST_PAGINATOR = KeysetPaginator(
+    "desi_stories", models.DesiStory.generated_at, models.DesiStory.id, descending=True
+)
+
 def create_desi_story(
     db: Session, 
     story_data: schemas.StoryData, 
@@ -53,17 +59,13 @@ def get_desi_story(db: Session, story_id: int) -> Optional[models.DesiStory]:
         joinedload(models.DesiStory.vocabulary)
     ).filter(models.DesiStory.id == story_id).first()
 
-def get_desi_stories(
-    db: Session, 
-    skip: int = 0, 
-    limit: int = 100,
+def _desi_stories_query(
+    db: Session,
     user_id: Optional[int] = None,
     target_language: Optional[str] = None,
     cefr_level: Optional[str] = None,
     is_custom: Optional[bool] = None
-) -> List[models.DesiStory]:
-    """Get stories with optional filters"""
-    
+):
     query = db.query(models.DesiStory).options(
         joinedload(models.DesiStory.vocabulary)
     )
@@ -80,7 +82,33 @@ def get_desi_stories(
     if is_custom is not None:
         query = query.filter(models.DesiStory.is_custom == is_custom)
     
-    return query.order_by(models.DesiStory.generated_at.desc()).offset(skip).limit(limit).all()
+    return query
+
+def get_desi_stories(
+    db: Session, 
+    skip: int = 0, 
+    limit: int = 100,
+    user_id: Optional[int] = None,
+    target_language: Optional[str] = None,
+    cefr_level: Optional[str] = None,
+    is_custom: Optional[bool] = None
+) -> List[models.DesiStory]:
+    """Get stories with optional filters"""
+    query = _desi_stories_query(db, user_id, target_language, cefr_level, is_custom)
+    return query.order_by(*STORY_LIST_PAGINATOR.order_by()).offset(skip).limit(limit).all()
+
+def get_desi_stories_page(
+    db: Session,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    user_id: Optional[int] = None,
+    target_language: Optional[str] = None,
+    cefr_level: Optional[str] = None,
+    is_custom: Optional[bool] = None
+) -> CursorPage:
+    """Keyset counterpart of get_desi_stories"""
+    query = _desi_stories_query(db, user_id, target_language, cefr_level, is_custom)
+    return STORY_LIST_PAGINATOR.page(query, limit, cursor)
 
 def get_stories_by_language(db: Session, target_language: str) -> List[models.DesiStory]:
     """Get all stories for a specific language"""
@@ -1,19 +1,26 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from sqlalchemy import delete, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from datetime import datetime
 
-from app.utils.database import get_db
-from app.auth.dependencies import get_current_user
+from app.utils.database import get_async_db
+from app.auth.dependencies import get_current_user_async
 from app.models import models, schemas
+from app.utils.pagination import KeysetPaginator
 
 router = APIRouter(prefix="/translations", tags=["translations"])
 
+# Translation history, newest first
+TRANSLATION_PAGINATOR = KeysetPaginator(
+    "user_translations", models.UserTranslation.created_at, models.UserTranslation.id, descending=True
+)
+
 @router.post("/", response_model=schemas.UserTranslationResponse)
 async def save_translation(
     translation: schemas.UserTranslationCreate,
-    current_user: models.User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: models.User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Save a translation to user's history
@@ -33,8 +40,8 @@ async def save_translation(
         )
         
         db.add(db_translation)
-        db.commit()
-        db.refresh(db_translation)
+        await db.commit()
+        await db.refresh(db_translation)
         
         
         return schemas.UserTranslationResponse(
@@ -50,26 +57,38 @@ async def save_translation(
         )
         
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail="Failed to save translation")
 
 @router.get("/", response_model=List[schemas.UserTranslationResponse])
 async def get_user_translations(
+    response: Response,
     skip: int = 0,
     limit: int = 50,
-    current_user: models.User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor or X-Prev-Cursor of a previous page"),
+    current_user: models.User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get user's translation history with pagination
+    
+    Pages are linked by the X-Next-Cursor / X-Prev-Cursor response headers;
+    skip still pages with OFFSET (without cursors).
     """
     try:
-        translations = db.query(models.UserTranslation)\
-            .filter(models.UserTranslation.user_id == current_user.id)\
-            .order_by(models.UserTranslation.created_at.desc())\
-            .offset(skip)\
-            .limit(limit)\
-            .all()
+        query = select(models.UserTranslation)\
+            .where(models.UserTranslation.user_id == current_user.id)
+        if skip and not cursor:
+            translations = (await db.scalars(
+                query
+                .order_by(*TRANSLATION_PAGINATOR.order_by())
+                .offset(skip)
+                .limit(limit)
+            )).all()
+        else:
+            page = await TRANSLATION_PAGINATOR.page_async(db, query, limit, cursor)
+            translations = page.items
+            response.headers.update(page.headers())
         
         return [
             schemas.UserTranslationResponse(
@@ -86,90 +105,100 @@ async def get_user_translations(
             for t in translations
         ]
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail="Failed to retrieve translations")
 
 @router.delete("/{translation_id}")
 async def delete_translation(
     translation_id: int,
-    current_user: models.User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: models.User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Delete a specific translation from user's history
     """
     try:
-        translation = db.query(models.UserTranslation)\
-            .filter(
+        translation = await db.scalar(
+            select(models.UserTranslation)
+            .where(
                 models.UserTranslation.id == translation_id,
                 models.UserTranslation.user_id == current_user.id
-            )\
-            .first()
+            )
+        )
         
         if not translation:
             raise HTTPException(status_code=404, detail="Translation not found")
         
-        db.delete(translation)
-        db.commit()
+        await db.delete(translation)
+        await db.commit()
         
         return {"message": "Translation deleted successfully"}
         
     except HTTPException:
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail="Failed to delete translation")
 
 @router.delete("/")
 async def clear_translation_history(
-    current_user: models.User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: models.User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Clear all translations for the current user
     """
     try:
-        deleted_count = db.query(models.UserTranslation)\
-            .filter(models.UserTranslation.user_id == current_user.id)\
-            .delete()
+        result = await db.execute(
+            delete(models.UserTranslation)
+            .where(models.UserTranslation.user_id == current_user.id)
+        )
+        deleted_count = result.rowcount
         
-        db.commit()
+        await db.commit()
         
         return {"message": f"Cleared {deleted_count} translations from history"}
         
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail="Failed to clear translation history")
 
 @router.get("/stats")
 async def get_translation_stats(
-    current_user: models.User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: models.User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get translation statistics for the current user
     """
     try:
-        total_translations = db.query(models.UserTranslation)\
-            .filter(models.UserTranslation.user_id == current_user.id)\
-            .count()
+        total_translations = await db.scalar(
+            select(func.count())
+            .select_from(models.UserTranslation)
+            .where(models.UserTranslation.user_id == current_user.id)
+        )
         
         # Get unique language pairs
-        language_pairs = db.query(
-            models.UserTranslation.from_language,
-            models.UserTranslation.to_language
-        )\
-            .filter(models.UserTranslation.user_id == current_user.id)\
-            .distinct()\
-            .all()
+        language_pairs = (await db.execute(
+            select(
+                models.UserTranslation.from_language,
+                models.UserTranslation.to_language
+            )
+            .where(models.UserTranslation.user_id == current_user.id)
+            .distinct()
+        )).all()
         
         unique_pairs = len(language_pairs)
         
         # Get most recent translation
-        recent_translation = db.query(models.UserTranslation)\
-            .filter(models.UserTranslation.user_id == current_user.id)\
-            .order_by(models.UserTranslation.created_at.desc())\
-            .first()
+        recent_translation = await db.scalar(
+            select(models.UserTranslation)
+            .where(models.UserTranslation.user_id == current_user.id)
+            .order_by(models.UserTranslation.created_at.desc())
+            .limit(1)
+        )
         
         return {
             "total_translations": total_translations,
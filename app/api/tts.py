@@ -1,17 +1,42 @@
-from fastapi import APIRouter, Depends, HTTPException, Response
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from typing import Dict, Any
+from typing import Dict, Any, List, Tuple
+import base64
+import json
+import uuid
 
 from app.utils.database import get_db
 from app.models.tts_schemas import (
     TTSRequest, 
     TTSResponse, 
+    TTSBatchRequest,
+    VocabularyBatchAudioRequest,
+    VocabularyBatchAudioResponse,
     LessonAudioRequest, 
     LessonAudioResponse,
+    LessonAudioBundleResponse,
     SupportedLanguagesResponse
 )
 from app.services.tts_service import tts_service
+from app.services.tts_cache import tts_cache
+from app.services.lesson_audio import (
+    lesson_audio_store,
+    prerender_lesson_audio,
+    get_lesson_bundle,
+    stream_lesson_audio
+)
 from app.api import crud
+from app.utils.audio import concatenate_mp3
+from app.utils.http_cache import (
+    IMMUTABLE_CACHE_CONTROL,
+    REVALIDATE_CACHE_CONTROL,
+    cached_content_response,
+    etag_matches,
+    make_etag,
+    not_modified_response
+)
 
 router = APIRouter(prefix="/tts", tags=["Text-to-Speech"])
 
@@ -24,6 +49,11 @@ async def get_supported_languages():
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching supported languages: {str(e)}")
 
+@router.get("/cache/stats")
+async def get_tts_cache_stats():
+    """Audio cache size and hit rate for this worker"""
+    return tts_cache.get_stats()
+
 @router.post("/synthesize", response_model=TTSResponse)
 async def synthesize_text(request: TTSRequest):
     """
@@ -35,17 +65,22 @@ async def synthesize_text(request: TTSRequest):
     - **speaking_rate**: Speech rate from 0.25 to 4.0 (default: 1.0)
     - **pitch**: Voice pitch from -20.0 to 20.0 (default: 0.0)
     - **volume_gain_db**: Volume gain from -96.0 to 16.0 (default: 0.0)
-    - **audio_format**: Audio format "MP3" or "WAV" (default: "MP3")
+    - **audio_format**: Audio format "MP3", "OGG_OPUS" or "WAV" (default: "MP3")
+    - **quality**: "low", "standard" or "high" output sample rate (default: the voice's own)
+    - **sample_rate_hertz**: Explicit output sample rate, overrides quality
     """
     try:
-        result = tts_service.synthesize_speech(
+        result = await run_in_threadpool(
+            tts_service.synthesize_speech,
             text=request.text,
             language=request.language,
             voice_name=request.voice_name,
             speaking_rate=request.speaking_rate,
             pitch=request.pitch,
             volume_gain_db=request.volume_gain_db,
-            audio_format=request.audio_format
+            audio_format=request.audio_format,
+            quality=request.quality,
+            sample_rate_hertz=request.sample_rate_hertz
         )
         
         return TTSResponse(**result)
@@ -53,8 +88,39 @@ async def synthesize_text(request: TTSRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error synthesizing speech: {str(e)}")
 
+# Audio MIME types clients may ask for in Accept, mapped to our format names
+ACCEPT_AUDIO_FORMATS = {
+    "audio/ogg": "OGG_OPUS",
+    "audio/opus": "OGG_OPUS",
+    "audio/mpeg": "MP3",
+    "audio/mp3": "MP3",
+    "audio/wav": "WAV",
+    "audio/x-wav": "WAV",
+    "audio/wave": "WAV"
+}
+
+def _negotiate_audio_format(accept: str) -> str:
+    """Audio format the Accept header prefers (highest q, then header order); MP3 if none is named"""
+    best_format, best_quality = "MP3", 0.0
+    for part in (accept or "").split(","):
+        media_type, *params = [piece.strip() for piece in part.split(";")]
+        audio_format = ACCEPT_AUDIO_FORMATS.get(media_type.lower())
+        if audio_format is None:
+            continue
+        quality = 1.0
+        for param in params:
+            if param.startswith("q="):
+                try:
+                    quality = float(param[2:])
+                except ValueError:
+                    quality = 0.0
+        if quality > best_quality:
+            best_format, best_quality = audio_format, quality
+    return best_format
+
 @router.get("/synthesize-audio")
 async def synthesize_text_to_audio(
+    request: Request,
     text: str,
     language: str,
     voice_name: str = None,
@@ -62,7 +128,9 @@ async def synthesize_text_to_audio(
     speaking_rate: float = 1.0,
     pitch: float = 0.0,
     volume_gain_db: float = 0.0,
-    audio_format: str = "MP3"
+    audio_format: str = None,
+    quality: str = None,
+    sample_rate_hertz: int = Query(None, ge=8000, le=48000)
 ):
     """
     Convert text to speech and return raw audio file
@@ -74,57 +142,192 @@ async def synthesize_text_to_audio(
     - **speaking_rate**: Speech rate (default: 1.0)
     - **pitch**: Voice pitch (default: 0.0)
     - **volume_gain_db**: Volume gain (default: 0.0)
-    - **audio_format**: Audio format "MP3" or "WAV" (default: "MP3")
+    - **audio_format**: Audio format "MP3", "OGG_OPUS" or "WAV" (default: negotiated from
+      the Accept header, e.g. `Accept: audio/ogg` for Opus; MP3 if it names none)
+    - **quality**: "low", "standard" or "high" output sample rate (default: the voice's own)
+    - **sample_rate_hertz**: Explicit output sample rate, overrides quality
     
-    This endpoint returns the audio file directly instead of base64 encoded JSON
+    This endpoint returns the audio file directly instead of base64 encoded JSON.
+    The same parameters always produce the same clip, so responses carry an ETag
+    derived from them and may be cached forever; If-None-Match gets a 304 without
+    any synthesis, and Range requests get 206 partial content.
     """
+    negotiated = audio_format is None
+    if negotiated:
+        audio_format = _negotiate_audio_format(request.headers.get("accept"))
+    synthesis_args = {
+        "text": text,
+        "language": language,
+        "voice_name": voice_name,
+        "speaker_name": speaker_name,
+        "speaking_rate": speaking_rate,
+        "pitch": pitch,
+        "volume_gain_db": volume_gain_db,
+        "audio_format": audio_format,
+        "quality": quality,
+        "sample_rate_hertz": sample_rate_hertz
+    }
+    # The same URL returns different formats depending on Accept
+    headers = {"Vary": "Accept"} if negotiated else {}
     try:
-        result = tts_service.synthesize_speech(
-            text=text,
-            language=language,
-            voice_name=voice_name,
-            speaker_name=speaker_name,
-            speaking_rate=speaking_rate,
-            pitch=pitch,
-            volume_gain_db=volume_gain_db,
-            audio_format=audio_format
-        )
+        try:
+            etag = make_etag(tts_service.get_synthesis_key(**synthesis_args))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        
+        # Repeat plays are answered from the parameters alone, without touching TTS or the cache
+        if etag_matches(request, etag):
+            response = not_modified_response(etag, IMMUTABLE_CACHE_CONTROL)
+            response.headers.update(headers)
+            return response
+        
+        result = await run_in_threadpool(tts_service.synthesize_speech_bytes, as_file=True, **synthesis_args)
         
         if not result["success"]:
             raise HTTPException(status_code=400, detail=result.get("error", "TTS synthesis failed"))
         
-        # Decode base64 audio content
-        import base64
-        audio_content = base64.b64decode(result["audio_content"])
-        
-        # Return audio file with proper headers
-        return Response(
-            content=audio_content,
+        # Cached clips are sent straight from disk; otherwise send the raw bytes as they are
+        return cached_content_response(
+            request,
+            etag,
             media_type=result["content_type"],
-            headers={
-                "Content-Disposition": f"attachment; filename=tts_audio.{audio_format.lower()}",
-                "Content-Length": str(len(audio_content))
-            }
+            cache_control=IMMUTABLE_CACHE_CONTROL,
+            path=result["audio_path"],
+            content=result["audio_bytes"] if result["audio_path"] is None else None,
+            headers={**headers, "X-TTS-Cache": "HIT" if result.get("cache_hit") else "MISS"},
+            filename=f"tts_audio.{result['file_extension']}"
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating audio: {str(e)}")
 
+def _multipart_response(parts: List[Tuple[Dict[str, str], bytes]]) -> Response:
+    """multipart/mixed response from (part headers, part body) pairs"""
+    boundary = uuid.uuid4().hex
+    body = bytearray()
+    for headers, content in parts:
+        body += f"--{boundary}\r\n".encode()
+        for name, value in {**headers, "Content-Length": str(len(content))}.items():
+            body += f"{name}: {value}\r\n".encode()
+        body += b"\r\n" + content + b"\r\n"
+    body += f"--{boundary}--\r\n".encode()
+    return Response(content=bytes(body), media_type=f"multipart/mixed; boundary={boundary}")
+
+@router.post("/batch")
+async def synthesize_batch(request: TTSBatchRequest):
+    """
+    Synthesize a list of items in one request
+    
+    Replaces one /vocabulary-audio, /sentence-audio or /dialogue-audio call per
+    item. Cached clips are answered from the cache; the rest are synthesized
+    concurrently (short same-voice items in shared SSML requests).
+    
+    The response is multipart/mixed. Its first part is a JSON manifest with one
+    entry per item in input order (index, success, content_type, size, voice_name,
+    cache_hit, error). Then:
+    
+    - **multipart**: one audio part per successful item, in input order (Content-ID: item-<index>)
+    - **sprite**: a single MP3 part with every successful item joined; manifest
+      entries carry start_ms/end_ms within it
+    """
+    if request.response_format not in ("multipart", "sprite"):
+        raise HTTPException(status_code=400, detail="response_format must be 'multipart' or 'sprite'")
+    audio_format = "MP3" if request.response_format == "sprite" else request.audio_format
+    
+    try:
+        jobs = [
+            (item.text, item.language, {
+                "voice_name": item.voice_name,
+                "speaker_name": item.speaker_name,
+                "speaking_rate": item.speaking_rate,
+                "pitch": item.pitch,
+                "volume_gain_db": item.volume_gain_db,
+                "audio_format": audio_format,
+                "quality": request.quality
+            })
+            for item in request.items
+        ]
+        results = await run_in_threadpool(tts_service.synthesize_many, jobs)
+        
+        manifest = []
+        clips = []
+        for index, result in enumerate(results):
+            if result["success"]:
+                manifest.append({
+                    "index": index,
+                    "success": True,
+                    "content_type": result["content_type"],
+                    "size": len(result["audio_bytes"]),
+                    "voice_name": result["voice_name"],
+                    "detected_gender": result["detected_gender"],
+                    "cache_hit": result["cache_hit"]
+                })
+                clips.append((index, result))
+            else:
+                manifest.append({"index": index, "success": False, "error": result.get("error", "TTS synthesis failed")})
+        
+        audio_parts = []
+        if request.response_format == "sprite":
+            if clips:
+                try:
+                    sprite, timings = await run_in_threadpool(concatenate_mp3, [result["audio_bytes"] for _, result in clips])
+                except ValueError as e:
+                    raise HTTPException(status_code=422, detail=f"Items can't be joined into one sprite: {str(e)}")
+                for (index, _), (start_ms, end_ms) in zip(clips, timings):
+                    manifest[index]["start_ms"] = int(round(start_ms))
+                    manifest[index]["end_ms"] = int(round(end_ms))
+                audio_parts.append(({"Content-Type": "audio/mpeg", "Content-ID": "<sprite>"}, sprite))
+        else:
+            for index, result in clips:
+                audio_parts.append(({
+                    "Content-Type": result["content_type"],
+                    "Content-ID": f"<item-{index}>",
+                    "X-TTS-Cache": "HIT" if result["cache_hit"] else "MISS"
+                }, result["audio_bytes"]))
+        
+        manifest_part = json.dumps({
+            "response_format": request.response_format,
+            "success": all(entry["success"] for entry in manifest),
+            "items": manifest
+        }, ensure_ascii=False).encode('utf-8')
+        return _multipart_response(
+            [({"Content-Type": "application/json; charset=utf-8", "Content-ID": "<manifest>"}, manifest_part)] + audio_parts
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error synthesizing batch: {str(e)}")
+
 @router.post("/lesson-audio", response_model=LessonAudioResponse)
-async def generate_lesson_audio(request: LessonAudioRequest, db: Session = Depends(get_db)):
+def generate_lesson_audio(request: LessonAudioRequest, db: Session = Depends(get_db)):
     """
     Generate audio for all components of a lesson (vocabulary, sentences, story)
     
+    Lessons in their own language are served from pre-rendered audio, rendered on first request if needed
+    
     - **lesson_id**: ID of the lesson to generate audio for
     - **language**: Target language
     - **speaking_rate**: Speech rate for all audio (default: 1.0)
     """
     try:
-        # Get lesson from database
-        lesson = crud.get_desi_lesson(db, lesson_id=request.lesson_id)
+        # Pre-rendered audio (see app/services/lesson_audio.py) is served without touching TTS
+        manifest = lesson_audio_store.load_complete_manifest(request.lesson_id)
+        if manifest and manifest["language"] == request.language:
+            return LessonAudioResponse(**lesson_audio_store.to_lesson_audio_response(manifest))
+        
+        # Get lesson from database, with its content so nothing is lazy-loaded
+        lesson = crud.get_desi_lesson_with_content(db, request.lesson_id)
         if not lesson:
             raise HTTPException(status_code=404, detail="Lesson not found")
         
+        if lesson.target_language == request.language:
+            # Not rendered yet (or the last render had failures): render and store it now
+            manifest = prerender_lesson_audio(db, lesson.id)
+            return LessonAudioResponse(**lesson_audio_store.to_lesson_audio_response(manifest))
+        
         # Convert lesson to format expected by TTS service
         lesson_data = crud.convert_db_lesson_to_response_format(lesson)
         lesson_dict = lesson_data.dict()["desi_lesson"]
@@ -143,7 +346,7 @@ async def generate_lesson_audio(request: LessonAudioRequest, db: Session = Depen
         raise HTTPException(status_code=500, detail=f"Error generating lesson audio: {str(e)}")
 
 @router.get("/lesson-audio/{lesson_id}")
-async def generate_lesson_audio_get(
+def generate_lesson_audio_get(
     lesson_id: int,
     language: str,
     speaking_rate: float = 1.0,
@@ -160,11 +363,107 @@ async def generate_lesson_audio_get(
             language=language,
             speaking_rate=speaking_rate
         )
-        return await generate_lesson_audio(request, db)
+        return generate_lesson_audio(request, db)
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating lesson audio: {str(e)}")
 
+@router.get("/lesson-audio/{lesson_id}/stream")
+def stream_lesson_audio_records(
+    lesson_id: int,
+    language: str = None,
+    db: Session = Depends(get_db)
+):
+    """
+    Stream lesson audio as NDJSON, one record per clip as soon as it is ready
+    
+    Unlike /lesson-audio, which returns once every clip is synthesized, clients can
+    start playing the first vocabulary word right away. Records arrive in lesson
+    order: a "lesson" header with the item count, then a "clip" (same fields as a
+    /lesson-audio entry plus section and index) or "error" record per item, and a
+    final "done" record.
+    
+    - **language**: Target language (default: the lesson's own language)
+    """
+    try:
+        # Pre-rendered audio is streamed from disk; anything else is synthesized as it streams
+        lesson_data = None
+        manifest = lesson_audio_store.load_complete_manifest(lesson_id)
+        if manifest and language in (None, manifest["language"]):
+            language = manifest["language"]
+        else:
+            manifest = None
+            lesson = crud.get_desi_lesson_with_content(db, lesson_id)
+            if not lesson:
+                raise HTTPException(status_code=404, detail="Lesson not found")
+            language = language or lesson.target_language
+            lesson_data = crud.convert_db_lesson_to_response_format(lesson).dict()["desi_lesson"]
+        
+        records = stream_lesson_audio(lesson_id, language, lesson_data, manifest)
+        return StreamingResponse(
+            (json.dumps(record, ensure_ascii=False) + "\n" for record in records),
+            media_type="application/x-ndjson",
+            # Keep proxies from buffering the stream
+            headers={"Cache-Control": "no-store", "X-Accel-Buffering": "no"}
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error streaming lesson audio: {str(e)}")
+
+def _load_lesson_bundle(lesson_id: int, db: Session) -> dict:
+    try:
+        bundle = get_lesson_bundle(db, lesson_id)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=f"Lesson audio can't be bundled: {str(e)}")
+    if bundle is None:
+        raise HTTPException(status_code=404, detail="Lesson not found")
+    return bundle
+
+@router.get("/lesson-audio/{lesson_id}/bundle", response_model=LessonAudioBundleResponse)
+def get_lesson_audio_bundle(lesson_id: int, db: Session = Depends(get_db)):
+    """
+    Timing manifest for the lesson's audio bundle
+    
+    All clips of the lesson are joined into one MP3 (see audio_url); each item
+    lists its start_ms/end_ms, speaker and voice within that file.
+    """
+    try:
+        bundle = _load_lesson_bundle(lesson_id, db)
+        return LessonAudioBundleResponse(
+            audio_url=f"/api/tts/lesson-audio/{lesson_id}/bundle.mp3?v={bundle['etag']}",
+            **bundle
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error loading lesson audio bundle: {str(e)}")
+
+@router.get("/lesson-audio/{lesson_id}/bundle.mp3")
+def get_lesson_audio_bundle_file(lesson_id: int, request: Request, db: Session = Depends(get_db)):
+    """
+    The lesson's audio bundle as a single MP3 file
+    
+    The versioned audio_url from the bundle manifest (?v=<etag>) is cached
+    forever; unversioned requests are revalidated with If-None-Match.
+    Supports Range requests for seeking.
+    """
+    try:
+        bundle = _load_lesson_bundle(lesson_id, db)
+        is_current_version = request.query_params.get("v") == bundle["etag"]
+        return cached_content_response(
+            request,
+            make_etag(bundle["etag"]),
+            media_type=bundle["content_type"],
+            cache_control=IMMUTABLE_CACHE_CONTROL if is_current_version else REVALIDATE_CACHE_CONTROL,
+            path=lesson_audio_store.bundle_path(lesson_id)
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error loading lesson audio bundle: {str(e)}")
+
 @router.post("/vocabulary-audio")
 async def generate_vocabulary_audio(
     word: str,
@@ -181,7 +480,8 @@ async def generate_vocabulary_audio(
     - **speaking_rate**: Slower rate for vocabulary learning (default: 0.8)
     """
     try:
-        result = tts_service.synthesize_speech(
+        result = await run_in_threadpool(
+            tts_service.synthesize_speech,
             text=word,
             language=language,
             voice_name=voice_name,
@@ -195,6 +495,41 @@ async def generate_vocabulary_audio(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating vocabulary audio: {str(e)}")
 
+@router.post("/vocabulary-audio/batch", response_model=VocabularyBatchAudioResponse)
+async def generate_vocabulary_audio_batch(request: VocabularyBatchAudioRequest):
+    """
+    Generate audio for a list of vocabulary words with the vocabulary settings
+    
+    Short words are synthesized together in batched SSML requests (see
+    TTS_SSML_BATCHING) and split into one clip per word.
+    """
+    try:
+        options = {
+            "voice_name": request.voice_name,
+            "speaking_rate": request.speaking_rate,
+            "pitch": 0.0,
+            "volume_gain_db": 2.0  # Same as /vocabulary-audio, so both share cached clips
+        }
+        results = await run_in_threadpool(
+            tts_service.synthesize_speech_batch, request.words, request.language, **options
+        )
+        
+        items = []
+        for result in results:
+            if result["success"]:
+                result["audio_content"] = base64.b64encode(result.pop("audio_bytes")).decode('utf-8')
+                del result["audio_path"]
+            items.append(TTSResponse(**result))
+        
+        return VocabularyBatchAudioResponse(
+            success=all(item.success for item in items),
+            language=request.language,
+            items=items
+        )
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error generating vocabulary audio: {str(e)}")
+
 @router.post("/sentence-audio")
 async def generate_sentence_audio(
     sentence: str,
@@ -211,7 +546,8 @@ async def generate_sentence_audio(
     - **speaking_rate**: Slightly slower rate for sentence learning (default: 0.9)
     """
     try:
-        result = tts_service.synthesize_speech(
+        result = await run_in_threadpool(
+            tts_service.synthesize_speech,
             text=sentence,
             language=language,
             voice_name=voice_name,
@@ -241,7 +577,8 @@ async def generate_dialogue_audio(
     - **speaking_rate**: Speech rate (default: 1.0)
     """
     try:
-        result = tts_service.synthesize_speech(
+        result = await run_in_threadpool(
+            tts_service.synthesize_speech,
             text=text,
             language=language,
             speaker_name=speaker_name,
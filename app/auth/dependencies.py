@@ -1,12 +1,14 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from jose import JWTError, jwt
 from datetime import datetime, timedelta
 from typing import Optional
 import bcrypt
 
-from app.utils.database import get_db
+from app.utils.database import get_async_db, get_db
 from app.models.models import User
 from app.models.user_schemas import UserResponse
 from app.utils.config import settings
@@ -55,15 +57,7 @@ def verify_token(token: str) -> dict:
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
-) -> User:
-    """Get the current authenticated user."""
-    token = credentials.credentials
-    token_data = verify_token(token)
-    
-    user = db.query(User).filter(User.username == token_data["username"]).first()
+def _require_active_user(user: Optional[User]) -> User:
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -79,6 +73,35 @@ def get_current_user(
     
     return user
 
+def _require_admin(user: User) -> User:
+    if user.role.value != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin access required"
+        )
+    return user
+
+def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db)
+) -> User:
+    """Get the current authenticated user."""
+    token = credentials.credentials
+    token_data = verify_token(token)
+    
+    user = db.query(User).filter(User.username == token_data["username"]).first()
+    return _require_active_user(user)
+
+async def get_current_user_async(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_async_db)
+) -> User:
+    """get_current_user for async def routes: looks the user up on the route's own AsyncSession."""
+    token_data = verify_token(credentials.credentials)
+    
+    user = await db.scalar(select(User).filter(User.username == token_data["username"]))
+    return _require_active_user(user)
+
 def get_current_active_user(current_user: User = Depends(get_current_user)) -> User:
     """Get the current active user."""
     if not current_user.is_active:
@@ -87,12 +110,11 @@ def get_current_active_user(current_user: User = Depends(get_current_user)) -> U
 
 def get_admin_user(current_user: User = Depends(get_current_user)) -> User:
     """Get current user but require admin role."""
-    if current_user.role.value != "admin":
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Admin access required"
-        )
-    return current_user
+    return _require_admin(current_user)
+
+async def get_admin_user_async(current_user: User = Depends(get_current_user_async)) -> User:
+    """get_admin_user for async def routes."""
+    return _require_admin(current_user)
 
 def authenticate_user(db: Session, email: str, password: str) -> Optional[User]:
     """Authenticate a user by email and password."""
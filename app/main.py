@@ -1,12 +1,16 @@
-from fastapi import FastAPI, Depends, HTTPException
+from fastapi import FastAPI, Depends, HTTPException, Header, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from starlette.middleware.sessions import SessionMiddleware
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 import random
 
-from app.utils.database import get_db, get_pool_status, init_db, close_db, check_db_health
+from app.utils.database import SessionLocal, get_db, get_async_db, get_pool_status, init_db, close_db, close_async_db, check_db_health
 from app.utils.config import settings
+from app.utils.idempotency import idempotency_store, IDEMPOTENCY_HEADER
+from app.utils.http_cache import body_etag, encode_json, json_response
+from app.utils.pagination import NEXT_CURSOR_HEADER, PREV_CURSOR_HEADER
 from app.models import models, schemas
 from app.api import crud
 from app.api.auth import router as auth_router
@@ -17,8 +21,12 @@ from app.api.stories import router as stories_router
 from app.api.translations import router as translations_router
 from app.api.enhanced_lessons import router as enhanced_lessons_router
 from app.api.lessons import router as lessons_router
+from app.api.jobs import router as jobs_router, accepted_job_response
 from app.services.gemini_service import gemini_service
+from app.services.lesson_cache import RECORD, lesson_cache, lesson_change_listener
 from app.services.lesson_parser import lesson_parser
+from app.services.lesson_generation import generate_desi_lesson as run_desi_lesson_generation
+from app.services.job_queue import job_queue
 
 app = FastAPI(title="DesiLanguage API", description="Language Learning Lesson Generator")
 
@@ -53,6 +61,9 @@ app.include_router(enhanced_lessons_router, prefix="/api")
 # Include lessons routes
 app.include_router(lessons_router, prefix="/api")
 
+# Include background generation job routes
+app.include_router(jobs_router, prefix="/api")
+
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -71,6 +82,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, PREV_CURSOR_HEADER],
 )
 
 @app.on_event("startup")
@@ -84,12 +96,26 @@ def startup_event():
     except Exception as e:
         print(f"❌ Database initialization failed: {str(e)}")
         raise
+    
+    # A cold lesson cache only costs latency, so a failed warm-up doesn't stop startup
+    try:
+        db = SessionLocal()
+        try:
+            warmed = lesson_cache.warm(db, settings.LESSON_CACHE_WARM_COUNT)
+        finally:
+            db.close()
+        print(f"✅ Lesson cache warmed with {warmed} lessons")
+    except Exception as e:
+        print(f"⚠️ Lesson cache warm-up failed: {str(e)}")
+    lesson_change_listener.start()
 
 @app.on_event("shutdown")
-def shutdown_event():
+async def shutdown_event():
     """Clean up PostgreSQL database connections on application shutdown"""
+    lesson_change_listener.stop()
     try:
         close_db()
+        await close_async_db()
         print("✅ PostgreSQL database connections closed successfully")
     except Exception as e:
         print(f"❌ Error closing database connections: {str(e)}")
@@ -139,28 +165,44 @@ def health_check():
 @app.post("/generate-desi-lesson", response_model=schemas.DesiLessonResponse)
 async def generate_desi_lesson(
     request: schemas.DesiLessonRequest,
+    response: Response,
     save_to_db: bool = True,
-    db: Session = Depends(get_db)
+    async_job: bool = Query(False, description="Queue the generation and return 202 with a job id"),
+    idempotency_key: Optional[str] = Header(None, alias=IDEMPOTENCY_HEADER),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    try:
-        
-        # Get lesson details from Lessons_title.txt
-        lesson_info = lesson_parser.get_lesson_by_title(request.lesson_topic)
-        difficulty = "beginner"  # Default difficulty level
-        
-        lesson_response = await gemini_service.generate_desi_lesson(
-            target_language=request.target_language,
-            lesson_topic=request.lesson_topic,
-            theme=request.lesson_topic  # Use topic as theme for Gemini
-        )
-        
-        if save_to_db:
-            crud.create_desi_lesson(db, lesson_response, difficulty)
-        
-        return lesson_response
-        
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    """
+    Generate a new lesson with Gemini.
+    With async_job=true the lesson is generated by a background worker; poll /api/jobs/{job_id} for the result.
+    Retries carrying the same Idempotency-Key get the first response instead of a new lesson.
+    """
+    async def generate():
+        try:
+            if async_job:
+                job = await db.run_sync(job_queue.enqueue, "desi_lesson", {
+                    "target_language": request.target_language,
+                    "lesson_topic": request.lesson_topic,
+                    "save_to_db": save_to_db
+                })
+                return accepted_job_response(job)
+            
+            return await run_desi_lesson_generation(
+                db=db,
+                target_language=request.target_language,
+                lesson_topic=request.lesson_topic,
+                save_to_db=save_to_db
+            )
+            
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+    
+    return await idempotency_store.run(
+        key=idempotency_key,
+        scope="generate-desi-lesson",
+        payload={"request": request, "save_to_db": save_to_db, "async_job": async_job},
+        producer=generate,
+        response=response
+    )
 
 @app.get("/desi-lesson-topics", response_model=List[str])
 def get_desi_lesson_topics():
@@ -169,61 +211,89 @@ def get_desi_lesson_topics():
 
 
 @app.get("/desi-lessons", response_model=List[schemas.DesiLessonDB])
-def get_desi_lessons(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    lessons = crud.get_desi_lessons(db, skip=skip, limit=limit)
-    return lessons
+def get_desi_lessons(
+    request: Request,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor or X-Prev-Cursor of a previous page"),
+    db: Session = Depends(get_db)
+):
+    """
+    Lessons in id order. Pages are linked by the X-Next-Cursor / X-Prev-Cursor
+    response headers; skip still pages with OFFSET (without cursors).
+    """
+    if skip and not cursor:
+        lessons = crud.get_desi_lessons(db, skip=skip, limit=limit)
+        headers = {}
+    else:
+        page = crud.get_desi_lessons_page(db, limit=limit, cursor=cursor)
+        lessons, headers = page.items, page.headers()
+    return json_response(
+        request,
+        encode_json([schemas.DesiLessonDB.model_validate(lesson) for lesson in lessons]),
+        headers=headers
+    )
 
 @app.get("/desi-lessons/{lesson_id}")
-def get_desi_lesson(lesson_id: int, include_content: bool = False, db: Session = Depends(get_db)):
+def get_desi_lesson(request: Request, lesson_id: int, include_content: bool = False, db: Session = Depends(get_db)):
     if include_content:
+        # Cached lessons are served and revalidated without touching the database
+        cached = lesson_cache.get(lesson_id, view=RECORD)
+        if cached is not None:
+            body, etag = cached
+            return json_response(request, body, etag)
         lesson = crud.get_desi_lesson_with_content(db, lesson_id=lesson_id)
     else:
         lesson = crud.get_desi_lesson(db, lesson_id=lesson_id)
     
     if lesson is None:
         raise HTTPException(status_code=404, detail="Desi lesson not found")
-    return lesson
+    body = encode_json(lesson)
+    etag = body_etag(body)
+    if include_content:
+        lesson_cache.put(lesson.id, lesson.target_language, lesson.lesson_number, body, etag, view=RECORD)
+    return json_response(request, body, etag)
 
 @app.get("/desi-lessons/language/{target_language}", response_model=List[schemas.DesiLessonDB])
-def get_desi_lessons_by_language(target_language: str, db: Session = Depends(get_db)):
+def get_desi_lessons_by_language(request: Request, target_language: str, db: Session = Depends(get_db)):
     lessons = crud.get_desi_lessons_by_language(db, target_language=target_language)
-    return lessons
+    return json_response(request, encode_json([schemas.DesiLessonDB.model_validate(lesson) for lesson in lessons]))
 
 @app.get("/get-or-generate-desi-lesson", response_model=schemas.DesiLessonResponse)
 async def get_or_generate_desi_lesson(
     target_language: str,
     lesson_topic: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     First tries to find an existing lesson in the database.
     If not found, generates a new lesson and saves it to the database.
     """
     try:
-        # First, try to find existing lesson in database
-        existing_lesson = crud.find_desi_lesson_by_title_and_language(
-            db, lesson_topic, target_language
+        # First, try to find existing lesson in database, served from its snapshot if it has one
+        snapshot = await db.run_sync(
+            crud.find_lesson_snapshot_by_title_and_language, lesson_topic, target_language
         )
+        if snapshot is not None and snapshot.snapshot_json is not None:
+            return Response(content=snapshot.snapshot_json, media_type="application/json")
         
-        if existing_lesson:
-            # Convert database lesson to response format
-            return crud.convert_db_lesson_to_response_format(existing_lesson)
+        existing_lesson = await db.run_sync(
+            crud.find_desi_lesson_by_title_and_language, lesson_topic, target_language
+        )
         
-        # If not found, generate new lesson
-        lesson_info = lesson_parser.get_lesson_by_title(lesson_topic)
-        difficulty = "beginner"  # Default difficulty level
+        if existing_lesson:
+            # Not snapshotted yet: render it as the snapshot would be
+            snapshot_json, _ = crud.build_lesson_snapshot(crud.convert_db_lesson_to_response_format(existing_lesson))
+            return Response(content=snapshot_json, media_type="application/json")
         
-        lesson_response = await gemini_service.generate_desi_lesson(
+        # If not found, generate new lesson and save it to the database
+        return await run_desi_lesson_generation(
+            db=db,
             target_language=target_language,
             lesson_topic=lesson_topic,
-            theme=lesson_topic  # Use topic as theme for Gemini
+            save_to_db=True
         )
         
-        # Save to database
-        crud.create_desi_lesson(db, lesson_response, difficulty)
-        
-        return lesson_response
-        
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
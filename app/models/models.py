@@ -1,12 +1,16 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Boolean, Float, Enum, Index
+from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Boolean, Float, Enum, Index, UniqueConstraint
 from sqlalchemy.dialects.postgresql import JSON, JSONB
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import deferred, relationship
 from datetime import datetime, timezone
 from enum import Enum as PyEnum
 
 Base = declarative_base()
 
+def utc_now() -> datetime:
+    """Current UTC time as a naive datetime, for TIMESTAMP WITHOUT TIME ZONE columns"""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
 # Enhanced JSON column type optimized for PostgreSQL performance
 def get_json_column_type():
     """Return optimized JSON column type for PostgreSQL"""
@@ -21,12 +25,31 @@ class DesiLesson(Base):
     target_language = Column(String(100), nullable=False)
     difficulty = Column(String(50), nullable=False)
     lesson_number = Column(Integer, nullable=False)
-    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
-    
-    vocabulary = relationship("DesiVocabulary", back_populates="lesson", cascade="all, delete-orphan")
-    example_sentences = relationship("DesiExampleSentence", back_populates="lesson", cascade="all, delete-orphan")
+    created_at = Column(DateTime, default=utc_now)
+    # Rendered DesiLessonResponse as canonical JSON text, served as-is by the lesson
+    # read endpoints. Deferred so lesson lists don't load it; see crud.build_lesson_snapshot
+    content_snapshot = deferred(Column(Text, nullable=True))
+    content_hash = Column(String(64), nullable=True)  # sha256 of the canonical snapshot JSON
+    
+    # Collections keep insertion order (ids are assigned in lesson order)
+    vocabulary = relationship("DesiVocabulary", back_populates="lesson", cascade="all, delete-orphan", order_by="DesiVocabulary.id")
+    example_sentences = relationship("DesiExampleSentence", back_populates="lesson", cascade="all, delete-orphan", order_by="DesiExampleSentence.id")
     short_story = relationship("DesiShortStory", back_populates="lesson", uselist=False, cascade="all, delete-orphan")
-    quiz_questions = relationship("DesiQuizQuestion", back_populates="lesson", cascade="all, delete-orphan")
+    quiz_questions = relationship("DesiQuizQuestion", back_populates="lesson", cascade="all, delete-orphan", order_by="DesiQuizQuestion.id")
+    
+    __table_args__ = (
+        # Lessons are addressed as /lessons/{language}/{lesson_number}
+        UniqueConstraint('target_language', 'lesson_number', name='uq_desi_lessons_language_number'),
+        # Admin lesson list, newest first (id last for keyset pagination)
+        Index('idx_desi_lessons_created_at_id', 'created_at', 'id'),
+    )
+
+class LessonNumberCounter(Base):
+    """Last lesson number handed out per language (see crud.allocate_lesson_numbers)"""
+    __tablename__ = "lesson_number_counters"
+    
+    target_language = Column(String(100), primary_key=True)
+    last_number = Column(Integer, nullable=False)
 
 class DesiVocabulary(Base):
     __tablename__ = "desi_vocabulary"
@@ -39,6 +62,10 @@ class DesiVocabulary(Base):
     pronunciation = Column(String(200), nullable=False)
     
     lesson = relationship("DesiLesson", back_populates="vocabulary")
+    
+    __table_args__ = (
+        Index('idx_desi_vocabulary_lesson_id', 'lesson_id'),
+    )
 
 class DesiExampleSentence(Base):
     __tablename__ = "desi_example_sentences"
@@ -51,6 +78,10 @@ class DesiExampleSentence(Base):
     pronunciation = Column(Text, nullable=False)
     
     lesson = relationship("DesiLesson", back_populates="example_sentences")
+    
+    __table_args__ = (
+        Index('idx_desi_example_sentences_lesson_id', 'lesson_id'),
+    )
 
 class DesiShortStory(Base):
     __tablename__ = "desi_short_stories"
@@ -60,7 +91,11 @@ class DesiShortStory(Base):
     title = Column(String(500), nullable=False)
     
     lesson = relationship("DesiLesson", back_populates="short_story")
-    dialogue = relationship("DesiDialogue", back_populates="short_story", cascade="all, delete-orphan")
+    dialogue = relationship("DesiDialogue", back_populates="short_story", cascade="all, delete-orphan", order_by="DesiDialogue.order_num")
+    
+    __table_args__ = (
+        Index('idx_desi_short_stories_lesson_id', 'lesson_id'),
+    )
 
 class DesiDialogue(Base):
     __tablename__ = "desi_dialogue"
@@ -74,6 +109,11 @@ class DesiDialogue(Base):
     order_num = Column(Integer, nullable=False)  # 'order' is reserved in Oracle
     
     short_story = relationship("DesiShortStory", back_populates="dialogue")
+    
+    __table_args__ = (
+        # Dialogue is read per story in order_num order
+        Index('idx_desi_dialogue_story_order', 'short_story_id', 'order_num'),
+    )
 
 class DesiQuizQuestion(Base):
     __tablename__ = "desi_quiz_questions"
@@ -85,6 +125,10 @@ class DesiQuizQuestion(Base):
     answer = Column(String(500), nullable=False)
     
     lesson = relationship("DesiLesson", back_populates="quiz_questions")
+    
+    __table_args__ = (
+        Index('idx_desi_quiz_questions_lesson_id', 'lesson_id'),
+    )
 
 # User Management Models
 
@@ -110,8 +154,8 @@ class User(Base):
     is_verified = Column(Boolean, default=False)
     role = Column(Enum(UserRole), default=UserRole.USER)
     google_id = Column(String(255), unique=True, nullable=True, index=True)  # Google OAuth ID
-    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
-    updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
+    created_at = Column(DateTime, default=utc_now)
+    updated_at = Column(DateTime, default=utc_now, onupdate=utc_now)
     last_login = Column(DateTime, nullable=True)
     
     # Relationships
@@ -123,6 +167,11 @@ class User(Base):
     achievements = relationship("UserAchievement", back_populates="user", cascade="all, delete-orphan")
     settings = relationship("UserSettings", back_populates="user", uselist=False, cascade="all, delete-orphan")
     translations = relationship("UserTranslation", back_populates="user", cascade="all, delete-orphan")
+    
+    __table_args__ = (
+        # Admin user list, newest first (id last for keyset pagination)
+        Index('idx_users_created_at_id', 'created_at', 'id'),
+    )
 
 class UserProfile(Base):
     __tablename__ = "user_profiles"
@@ -139,8 +188,8 @@ class UserProfile(Base):
     primary_learning_language = Column(String(100), nullable=True)
     learning_goal = Column(String(100), nullable=True)  # e.g., "travel", "business", "family"
     daily_goal_minutes = Column(Integer, default=15)
-    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
-    updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
+    created_at = Column(DateTime, default=utc_now)
+    updated_at = Column(DateTime, default=utc_now, onupdate=utc_now)
     
     user = relationship("User", back_populates="profile")
 
@@ -151,14 +200,14 @@ class UserSubscription(Base):
     user_id = Column(Integer, ForeignKey("users.id"), unique=True)
     tier = Column(Enum(SubscriptionTier), default=SubscriptionTier.FREE)
     status = Column(String(20), default="active")  # active, cancelled, expired, suspended
-    start_date = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    start_date = Column(DateTime, default=utc_now)
     end_date = Column(DateTime, nullable=True)
     trial_end_date = Column(DateTime, nullable=True)
     auto_renew = Column(Boolean, default=True)
     stripe_subscription_id = Column(String(100), nullable=True)
     stripe_customer_id = Column(String(100), nullable=True)
-    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
-    updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
+    created_at = Column(DateTime, default=utc_now)
+    updated_at = Column(DateTime, default=utc_now, onupdate=utc_now)
     
     user = relationship("User", back_populates="subscription")
 
@@ -177,10 +226,14 @@ class UserProgress(Base):
     level = Column("user_level", Integer, default=1)
     experience_points = Column(Integer, default=0)
     last_activity_date = Column(DateTime(timezone=True), nullable=True)
-    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
-    updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
+    created_at = Column(DateTime, default=utc_now)
+    updated_at = Column(DateTime, default=utc_now, onupdate=utc_now)
     
     user = relationship("User", back_populates="progress")
+    
+    __table_args__ = (
+        Index('idx_user_progress_user_language', 'user_id', 'language'),
+    )
 
 class LessonCompletion(Base):
     __tablename__ = "lesson_completions"
@@ -189,13 +242,20 @@ class LessonCompletion(Base):
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"))
     lesson_id = Column(Integer, ForeignKey("desi_lessons.id", ondelete="CASCADE"))
     language = Column(String(100), nullable=False)
-    completed_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    completed_at = Column(DateTime, default=utc_now)
     time_spent_minutes = Column(Integer, default=0)
     sections_completed = Column(get_json_column_type(), default=list)  # ["vocabulary", "sentences", "conversations", "quiz"]
     overall_score = Column(Float, nullable=True)
     
     user = relationship("User", back_populates="lesson_completions")
     lesson = relationship("DesiLesson")
+    
+    __table_args__ = (
+        # Recent completions: WHERE user_id = ? [AND language = ?] ORDER BY completed_at DESC LIMIT n
+        Index('idx_lesson_completions_user_completed_at', 'user_id', 'completed_at'),
+        # Existing completion lookup on record; also serves lesson deletes (ON DELETE CASCADE)
+        Index('idx_lesson_completions_lesson_user', 'lesson_id', 'user_id'),
+    )
 
 class QuizAttempt(Base):
     __tablename__ = "quiz_attempts"
@@ -207,11 +267,16 @@ class QuizAttempt(Base):
     user_answer = Column(String(500), nullable=False)
     is_correct = Column(Boolean, nullable=False)
     time_taken_seconds = Column(Integer, nullable=True)
-    attempt_date = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    attempt_date = Column(DateTime, default=utc_now)
     
     user = relationship("User", back_populates="quiz_attempts")
     lesson = relationship("DesiLesson")
     question = relationship("DesiQuizQuestion")
+    
+    __table_args__ = (
+        # Lesson deletes cascade here
+        Index('idx_quiz_attempts_lesson_id', 'lesson_id'),
+    )
 
 class Achievement(Base):
     __tablename__ = "achievements"
@@ -225,7 +290,7 @@ class Achievement(Base):
     criteria = Column(get_json_column_type(), nullable=False)  # Conditions to unlock
     points_reward = Column(Integer, default=0)
     is_active = Column(Boolean, default=True)
-    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    created_at = Column(DateTime, default=utc_now)
     
     user_achievements = relationship("UserAchievement", back_populates="achievement")
 
@@ -235,7 +300,7 @@ class UserAchievement(Base):
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"))
     achievement_id = Column(Integer, ForeignKey("achievements.id", ondelete="CASCADE"))
-    earned_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    earned_at = Column(DateTime, default=utc_now)
     progress_data = Column(get_json_column_type(), nullable=True)  # Track progress towards achievement
     
     user = relationship("User", back_populates="achievements")
@@ -268,8 +333,8 @@ class UserSettings(Base):
     theme = Column(String(10), default="light")  # light, dark, auto
     language_display_script = Column(Boolean, default=True)  # Show native script or transliteration
     
-    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
-    updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
+    created_at = Column(DateTime, default=utc_now)
+    updated_at = Column(DateTime, default=utc_now, onupdate=utc_now)
     
     user = relationship("User", back_populates="settings")
 
@@ -279,7 +344,7 @@ class StudySession(Base):
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"))
     language = Column(String(100), nullable=False)
-    start_time = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    start_time = Column(DateTime, default=utc_now)
     end_time = Column(DateTime, nullable=True)
     duration_minutes = Column(Integer, nullable=True)
     lessons_completed = Column(Integer, default=0)
@@ -301,10 +366,15 @@ class UserTranslation(Base):
     to_language = Column(String(10), nullable=False)    # Language code (e.g., "en", "hi")
     from_language_name = Column(String(50), nullable=False)  # Full language name (e.g., "English", "Hindi")
     to_language_name = Column(String(50), nullable=False)    # Full language name (e.g., "English", "Hindi")
-    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    created_at = Column(DateTime, default=utc_now)
     
     # Relationship
     user = relationship("User", back_populates="translations")
+    
+    __table_args__ = (
+        # Translation history: WHERE user_id = ? ORDER BY created_at DESC, id DESC
+        Index('idx_user_translations_user_created_at_id', 'user_id', 'created_at', 'id'),
+    )
 
 # Generated Stories Models
 
@@ -319,7 +389,7 @@ class DesiStory(Base):
     english_text = Column(Text, nullable=False)
     translated_text = Column(Text, nullable=False)
     transliteration = Column(Text, nullable=True)  # For non-Latin scripts
-    generated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    generated_at = Column(DateTime, default=utc_now)
     user_id = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True)  # Track who generated it
     is_custom = Column(Boolean, default=False)  # True if generated with custom scenario
     generation_prompt = Column(Text, nullable=True)  # Store the prompt used for generation
@@ -327,6 +397,14 @@ class DesiStory(Base):
     # Relationships
     vocabulary = relationship("DesiStoryVocabulary", back_populates="story", cascade="all, delete-orphan")
     user = relationship("User")
+    
+    __table_args__ = (
+        # Duplicate check before generating: language, level and scenario equality
+        Index('idx_desi_stories_language_level_scenario', 'target_language', 'cefr_level', 'scenario'),
+        # Story lists, newest first, optionally per language (id last for keyset pagination)
+        Index('idx_desi_stories_language_generated_at_id', 'target_language', 'generated_at', 'id'),
+        Index('idx_desi_stories_generated_at_id', 'generated_at', 'id'),
+    )
 
 class DesiStoryVocabulary(Base):
     __tablename__ = "desi_story_vocabulary"
@@ -338,4 +416,33 @@ class DesiStoryVocabulary(Base):
     transliteration = Column(Text, nullable=True)
     order_index = Column(Integer, default=0)  # To maintain vocabulary order
     
-    story = relationship("DesiStory", back_populates="vocabulary")
\ No newline at end of file
+    story = relationship("DesiStory", back_populates="vocabulary")
+    
+    __table_args__ = (
+        Index('idx_desi_story_vocabulary_story_order', 'story_id', 'order_index'),
+    )
+
+# Background Job Models
+
+class GenerationJob(Base):
+    __tablename__ = "generation_jobs"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    job_type = Column(String(50), nullable=False)  # desi_lesson, enhanced_lesson
+    status = Column(String(20), nullable=False, default="queued")  # queued, running, succeeded, failed
+    payload = Column(get_json_column_type(), nullable=False)  # Request data the worker needs
+    result = Column(get_json_column_type(), nullable=True)  # Response body once succeeded
+    error = Column(Text, nullable=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=3)
+    locked_by = Column(String(200), nullable=True)  # Worker currently holding the job
+    locked_until = Column(DateTime(timezone=True), nullable=True)  # Lease; expired leases are reclaimed
+    run_after = Column(DateTime(timezone=True), nullable=False, default=lambda: datetime.now(timezone.utc))
+    created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+    
+    __table_args__ = (
+        # Workers claim the oldest runnable job: WHERE status ... AND run_after <= now() ORDER BY id
+        Index('idx_generation_jobs_status_run_after', 'status', 'run_after'),
+    )
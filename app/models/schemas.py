@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import Any, List, Optional
 from datetime import datetime
 from enum import Enum
 
@@ -208,4 +208,26 @@ class UserTranslationResponse(BaseModel):
     created_at: datetime
     
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+# Generation job schemas
+class GenerationJobAccepted(BaseModel):
+    job_id: int
+    job_type: str
+    status: str
+    status_url: str
+    events_url: str
+
+class GenerationJobResponse(BaseModel):
+    id: int
+    job_type: str
+    status: str
+    attempts: int
+    result: Optional[Any] = None
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
@@ -10,7 +10,9 @@ class TTSRequest(BaseModel):
     speaking_rate: float = Field(1.0, ge=0.25, le=4.0, description="Speech rate (0.25 to 4.0)")
     pitch: float = Field(0.0, ge=-20.0, le=20.0, description="Voice pitch (-20.0 to 20.0)")
     volume_gain_db: float = Field(0.0, ge=-96.0, le=16.0, description="Volume gain (-96.0 to 16.0)")
-    audio_format: str = Field("MP3", description="Audio format (MP3 or WAV)")
+    audio_format: str = Field("MP3", description="Audio format (MP3, OGG_OPUS or WAV); OGG_OPUS is by far the smallest")
+    quality: Optional[str] = Field(None, description="Output quality preset: low (16 kHz), standard (voice default) or high (48 kHz)")
+    sample_rate_hertz: Optional[int] = Field(None, ge=8000, le=48000, description="Output sample rate, overrides quality")
 
 class TTSResponse(BaseModel):
     success: bool
@@ -24,8 +26,38 @@ class TTSResponse(BaseModel):
     parameters: Optional[Dict[str, float]] = None
     speaker_name: Optional[str] = None
     detected_gender: Optional[str] = None
+    cache_hit: Optional[bool] = Field(None, description="Served from the audio cache without calling Google TTS")
     error: Optional[str] = None
 
+class VocabularyBatchAudioRequest(BaseModel):
+    words: List[str] = Field(..., min_items=1, max_items=200, description="Vocabulary words in target script")
+    language: str = Field(..., description="Target language")
+    voice_name: Optional[str] = Field(None, description="Specific voice to use (uses default if not provided)")
+    speaking_rate: float = Field(0.8, ge=0.25, le=4.0, description="Slower rate for vocabulary learning")
+
+class VocabularyBatchAudioResponse(BaseModel):
+    success: bool
+    language: str
+    items: List[TTSResponse] = Field(..., description="One result per word, in request order")
+
+class TTSBatchItem(BaseModel):
+    text: str = Field(..., description="Text to convert to speech")
+    language: str = Field(..., description="Target language (e.g., 'Telugu', 'Hindi')")
+    voice_name: Optional[str] = Field(None, description="Specific voice to use (uses default if not provided)")
+    speaker_name: Optional[str] = Field(None, description="Speaker name for gender-based voice selection")
+    speaking_rate: float = Field(1.0, ge=0.25, le=4.0, description="Speech rate (0.25 to 4.0)")
+    pitch: float = Field(0.0, ge=-20.0, le=20.0, description="Voice pitch (-20.0 to 20.0)")
+    volume_gain_db: float = Field(0.0, ge=-96.0, le=16.0, description="Volume gain (-96.0 to 16.0)")
+
+class TTSBatchRequest(BaseModel):
+    items: List[TTSBatchItem] = Field(..., min_items=1, max_items=200, description="Items to synthesize, in response order")
+    response_format: str = Field(
+        "multipart",
+        description="multipart: one audio part per item; sprite: all items joined into one MP3 with their offsets"
+    )
+    audio_format: str = Field("MP3", description="Audio format for multipart responses (MP3, OGG_OPUS or WAV); sprites are MP3")
+    quality: Optional[str] = Field(None, description="Output quality preset: low, standard or high")
+
 class LessonAudioRequest(BaseModel):
     lesson_id: int = Field(..., description="ID of the lesson to generate audio for")
     language: str = Field(..., description="Target language")
@@ -59,5 +91,42 @@ class LessonAudioResponse(BaseModel):
     story_dialogue: List[DialogueAudio] = []
     errors: List[str] = []
 
+class LessonAudioBundleItem(BaseModel):
+    section: str = Field(..., description="vocabulary, example_sentences or story_dialogue")
+    index: int = Field(..., description="Position of the item within its section")
+    english: str
+    target_script: str
+    speaker: Optional[str] = None
+    voice: Optional[str] = None
+    start_ms: int
+    end_ms: int
+
+class LessonAudioBundleResponse(BaseModel):
+    lesson_id: int
+    language: str
+    audio_url: str = Field(..., description="Single MP3 with every clip; play an item by seeking to start_ms")
+    content_type: str
+    size: int
+    duration_ms: int
+    items: List[LessonAudioBundleItem] = []
+    errors: List[str] = Field([], description="Items that couldn't be rendered; the next request renders them again")
+
+class StoryAudioSentence(BaseModel):
+    index: int = Field(..., description="Position of the sentence in the story")
+    text: str
+    start_ms: int
+    end_ms: int
+
+class StoryAudioResponse(BaseModel):
+    story_id: int
+    language: str
+    voice_name: str
+    speaking_rate: float
+    audio_url: str = Field(..., description="The narration as one MP3; highlight a sentence while playback is between its start_ms and end_ms")
+    content_type: str
+    size: int
+    duration_ms: int
+    sentences: List[StoryAudioSentence] = []
+
 class SupportedLanguagesResponse(BaseModel):
     languages: Dict[str, Dict[str, Any]]
\ No newline at end of file
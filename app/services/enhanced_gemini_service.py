@@ -1,9 +1,9 @@
 import google.generativeai as genai
+import asyncio
 import json
-import time
 import random
 import hashlib
-from typing import Dict, List, Optional, Any
+from typing import Callable, Dict, List, Optional, Any, Tuple
 from app.utils.config import settings
 from app.models.schemas import DesiLessonResponse, DesiLessonContent, DesiVocabularyItem, DesiExampleSentence, DesiShortStory, DesiDialogueItem, DesiQuizQuestion
 from pydantic import BaseModel, Field
@@ -136,10 +136,18 @@ class EnhancedGeminiService:
             "required": ["vocabulary", "sentences", "conversations", "quiz"]
         }
 
-    async def fetch_learning_data(self, topic: str, language: str) -> EnhancedLearningData:
+    async def fetch_learning_data(
+        self,
+        topic: str,
+        language: str,
+        quiz_builder: Optional[Callable[[List[Tuple[str, str]], List[Tuple[str, str]]], List[DesiQuizQuestion]]] = None
+    ) -> EnhancedLearningData:
         """
         Generate enhanced learning data for a topic in the target language
         Equivalent to the TypeScript fetchLearningData function
+
+        With a quiz_builder the quiz is left out of the prompt and built locally
+        from the generated vocabulary and sentences
         """
         # Randomly select names for variety
         male_names = ["Arjun", "Rohan", "Vikram", "Raj", "Amit", "Arun", "Karthik", "Nikhil", "Suresh", "Ravi"]
@@ -149,18 +157,25 @@ class EnhancedGeminiService:
         selected_female = random.choice(female_names)
 
         # Check cache with names included for uniqueness
-        cache_key = self._get_cache_key(f"{topic}_{selected_male}_{selected_female}", language)
+        cache_key = self._get_cache_key(f"{topic}_{selected_male}_{selected_female}_{'local' if quiz_builder else 'llm'}_quiz", language)
         if cache_key in self.learning_cache:
             return self.learning_cache[cache_key]
 
+        quiz_requirement = "" if quiz_builder else """
+4. A quiz with exactly 5 multiple-choice questions to test comprehension. IMPORTANT: The learner can only read English and transliterations, not the native script of the target language. Therefore, all quiz questions must be in English. Any words from the target language used in questions or options MUST be the transliteration. Do not use the native script of the target language in the quiz at all. Each question must have 4 options."""
+        quiz_format = "" if quiz_builder else """,
+  "quiz": [
+    {"question": "question_text_in_english", "options": ["option1", "option2", "option3", "option4"], "answer": "correct_option"},
+    ...5 items total
+  ]"""
+
         prompt = f"""
 Generate language learning materials for the topic "{topic}" in the language "{language}".
 The output must be a JSON object that strictly follows the provided schema.
 The materials must include:
 1. Exactly 12 vocabulary words with English translations and transliterations.
 2. Exactly 7 sample sentences using the vocabulary, with English translations and transliterations.
-3. A conversation sample with exactly 9 turns/lines between two people with these specific Indian names: {selected_male} (male speaker) and {selected_female} (female speaker). The conversation should be related to the vocabulary, including English translations and transliterations. The sentences should be conversational and not just a list of examples.
-4. A quiz with exactly 5 multiple-choice questions to test comprehension. IMPORTANT: The learner can only read English and transliterations, not the native script of the target language. Therefore, all quiz questions must be in English. Any words from the target language used in questions or options MUST be the transliteration. Do not use the native script of the target language in the quiz at all. Each question must have 4 options.
+3. A conversation sample with exactly 9 turns/lines between two people with these specific Indian names: {selected_male} (male speaker) and {selected_female} (female speaker). The conversation should be related to the vocabulary, including English translations and transliterations. The sentences should be conversational and not just a list of examples.{quiz_requirement}
 
 IMPORTANT FORMATTING RULES:
 - "word" field must contain ONLY the word in native {language} script, no parentheses or transliterations mixed in
@@ -182,11 +197,7 @@ Respond with ONLY valid JSON that follows this exact structure:
   "conversations": [
     {{"speaker": "name", "line": "dialogue_in_target_language_only", "translation": "english_translation", "transliteration": "phonetic_pronunciation_only"}},
     ...9 items total
-  ],
-  "quiz": [
-    {{"question": "question_text_in_english", "options": ["option1", "option2", "option3", "option4"], "answer": "correct_option"}},
-    ...5 items total
-  ]
+  ]{quiz_format}
 }}
 """
 
@@ -212,6 +223,12 @@ Respond with ONLY valid JSON that follows this exact structure:
             
             # Parse and validate JSON
             parsed_data = json.loads(json_content)
+            if quiz_builder:
+                quiz = quiz_builder(
+                    [(item.get("translation"), item.get("transliteration")) for item in parsed_data.get("vocabulary", [])],
+                    [(item.get("translation"), item.get("transliteration")) for item in parsed_data.get("sentences", [])]
+                )
+                parsed_data["quiz"] = [question.model_dump() for question in quiz]
             learning_data = EnhancedLearningData(**parsed_data)
             
             # Cache the result
@@ -233,7 +250,8 @@ Respond with ONLY valid JSON that follows this exact structure:
         
         for attempt in range(self.max_retries):
             try:
-                response = self.model.generate_content(prompt)
+                # The client is blocking, so run it in a thread to keep the event loop free
+                response = await asyncio.to_thread(self.model.generate_content, prompt)
                 return response
             except Exception as e:
                 last_exception = e
@@ -244,7 +262,7 @@ Respond with ONLY valid JSON that follows this exact structure:
                     if attempt < self.max_retries - 1:
                         delay = self.base_delay * (2 ** attempt) + random.uniform(0, 1)
                         print(f"Gemini API {operation_name} failed (attempt {attempt + 1}/{self.max_retries}): retrying in {delay:.1f}s")
-                        time.sleep(delay)
+                        await asyncio.sleep(delay)
                         continue
                 else:
                     # Non-retryable error, fail immediately
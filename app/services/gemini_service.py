@@ -1,11 +1,14 @@
 import google.generativeai as genai
+import asyncio
 import json
-import time
 import random
 import hashlib
-from typing import Dict, Optional
+from typing import Callable, Dict, List, Optional, Tuple
 from app.utils.config import settings
-from app.models.schemas import DesiLessonResponse
+from app.models.schemas import DesiLessonResponse, DesiQuizQuestion
+
+# Builds quiz questions from (english, transliteration) vocabulary and sentence pairs
+QuizBuilder = Callable[[List[Tuple[str, str]], List[Tuple[str, str]]], List[DesiQuizQuestion]]
 
 class GeminiService:
     def __init__(self):
@@ -135,7 +138,17 @@ class GeminiService:
             "additionalProperties": false
         }
     
-    async def generate_desi_lesson(self, target_language: str, lesson_topic: str, theme: str = None) -> DesiLessonResponse:
+    async def generate_desi_lesson(
+        self,
+        target_language: str,
+        lesson_topic: str,
+        theme: str = None,
+        quiz_builder: Optional[QuizBuilder] = None
+    ) -> DesiLessonResponse:
+        """
+        Generate a lesson with Gemini.
+        With a quiz_builder the quiz is left out of the prompt and built locally from the generated content.
+        """
         # Use provided theme or default to lesson topic
         lesson_theme = theme or lesson_topic
         
@@ -146,14 +159,23 @@ class GeminiService:
         selected_male = random.choice(male_names)
         selected_female = random.choice(female_names)
         
+        quiz_requirement = "" if quiz_builder else "\n- 4 quiz questions"
+        quiz_format = "" if quiz_builder else """,
+    "quiz": [
+      {
+        "question": "question text",
+        "options": ["option1", "option2", "option3"],
+        "answer": "correct_option"
+      }
+    ]"""
+
         # Create a concise, structured prompt for lesson generation
         prompt = f"""Create a {target_language} lesson on "{lesson_topic}".
 
 Requirements:
 - 10 vocabulary items
 - 5 example sentences  
-- 1 short story with dialogue between two people with these specific Indian names: {selected_male} (male speaker) and {selected_female} (female speaker)
-- 4 quiz questions
+- 1 short story with dialogue between two people with these specific Indian names: {selected_male} (male speaker) and {selected_female} (female speaker){quiz_requirement}
 - Include transliteration for all {target_language} text
 - Use English phonetics for pronunciation
 
@@ -189,14 +211,7 @@ Respond with ONLY valid JSON in this exact format:
           "english": "translation"
         }}
       ]
-    }},
-    "quiz": [
-      {{
-        "question": "question text",
-        "options": ["option1", "option2", "option3"],
-        "answer": "correct_option"
-      }}
-    ]
+    }}{quiz_format}
   }}
 }}"""
         
@@ -222,6 +237,14 @@ Respond with ONLY valid JSON in this exact format:
             
             # Parse JSON
             lesson_data = json.loads(json_content)
+
+            if quiz_builder:
+                lesson = lesson_data["desi_lesson"]
+                quiz = quiz_builder(
+                    [(item["english"], item["transliteration"]) for item in lesson.get("vocabulary", [])],
+                    [(item["english"], item["transliteration"]) for item in lesson.get("example_sentences", [])]
+                )
+                lesson["quiz"] = [question.model_dump() for question in quiz]
             
             return DesiLessonResponse(**lesson_data)
             
@@ -234,21 +257,30 @@ Respond with ONLY valid JSON in this exact format:
         except Exception as e:
             raise ValueError(f"Error generating desi lesson: {e}")
     
-    async def generate_completion(self, prompt: str) -> str:
-        """Generate a completion for any prompt"""
+    async def generate_completion(self, prompt: str, max_output_tokens: Optional[int] = None) -> str:
+        """Generate a completion for any prompt (max_output_tokens overrides the model default)"""
+        generation_config = None
+        if max_output_tokens:
+            generation_config = genai.types.GenerationConfig(
+                temperature=0.1,
+                max_output_tokens=max_output_tokens,
+                top_p=0.8,
+                top_k=40
+            )
         try:
-            response = await self._make_request_with_retry(prompt, "completion")
+            response = await self._make_request_with_retry(prompt, "completion", generation_config=generation_config)
             return response.text.strip()
         except Exception as e:
             raise ValueError(f"Error generating completion: {e}")
     
-    async def _make_request_with_retry(self, prompt: str, operation_name: str = "request"):
+    async def _make_request_with_retry(self, prompt: str, operation_name: str = "request", generation_config=None):
         """Make a request to Gemini with retry logic for handling rate limits and overload"""
         last_exception = None
         
         for attempt in range(self.max_retries):
             try:
-                response = self.model.generate_content(prompt)
+                # The client is blocking, so run it in a thread to keep the event loop free
+                response = await asyncio.to_thread(self.model.generate_content, prompt, generation_config=generation_config)
                 return response
             except Exception as e:
                 last_exception = e
@@ -260,7 +292,7 @@ Respond with ONLY valid JSON in this exact format:
                         # Faster retry with minimal jitter
                         delay = self.base_delay * (1.5 ** attempt) + random.uniform(0, 0.5)
                         print(f"Gemini API {operation_name} failed (attempt {attempt + 1}/{self.max_retries}): retrying in {delay:.1f}s")
-                        time.sleep(delay)
+                        await asyncio.sleep(delay)
                         continue
                 else:
                     # Non-retryable error, fail immediately
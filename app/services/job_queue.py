@@ -0,0 +1,197 @@
+"""
+Database-backed queue for long-running generation jobs.
+
+API workers enqueue a row and return immediately; dedicated worker processes
+(see app/workers/generation_worker.py) claim rows with
+SELECT ... FOR UPDATE SKIP LOCKED, so any number of workers can drain the
+queue concurrently without handing the same job out twice.
+"""
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Session
+
+from app.models.models import GenerationJob
+from app.utils.config import settings
+from app.utils.logger import api_logger
+
+JobHandler = Callable[[Session, Dict[str, Any]], Awaitable[Any]]
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+TERMINAL_STATUSES = {SUCCEEDED, FAILED}
+
+
+class JobQueue:
+    def __init__(self, lease_seconds: int = 300, max_attempts: int = 3, retry_delay_seconds: int = 10):
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.retry_delay_seconds = retry_delay_seconds
+        self.handlers: Dict[str, JobHandler] = {}
+
+    def handler(self, job_type: str):
+        """Decorator registering the coroutine that runs jobs of the given type"""
+        def decorator(func: JobHandler) -> JobHandler:
+            self.handlers[job_type] = func
+            return func
+        return decorator
+
+    def enqueue(self, db: Session, job_type: str, payload: Dict[str, Any]) -> GenerationJob:
+        """Add a job to the queue and commit so workers can see it right away"""
+        job = GenerationJob(
+            job_type=job_type,
+            status=QUEUED,
+            payload=payload,
+            max_attempts=self.max_attempts,
+            run_after=datetime.now(timezone.utc)
+        )
+        db.add(job)
+        db.commit()
+        db.refresh(job)
+        return job
+
+    def get_job(self, db: Session, job_id: int) -> Optional[GenerationJob]:
+        """Read the current state of a job, bypassing the session identity map"""
+        return db.query(GenerationJob).populate_existing().filter(GenerationJob.id == job_id).first()
+
+    def claim_next(self, db: Session, worker_id: str) -> Optional[GenerationJob]:
+        """
+        Lock the oldest runnable job for this worker.
+
+        Runnable means queued and due, or running with an expired lease (its worker died).
+        SKIP LOCKED lets concurrent workers pass over rows another worker is claiming.
+        Abandoned jobs that have already used all their attempts are marked failed
+        instead of being run again.
+        """
+        while True:
+            now = datetime.now(timezone.utc)
+            job = db.query(GenerationJob).filter(
+                or_(
+                    and_(GenerationJob.status == QUEUED, GenerationJob.run_after <= now),
+                    and_(GenerationJob.status == RUNNING, GenerationJob.locked_until < now)
+                )
+            ).order_by(GenerationJob.id).with_for_update(skip_locked=True).first()
+
+            if job is None:
+                db.rollback()
+                return None
+
+            if job.status == RUNNING and job.attempts >= job.max_attempts:
+                job.status = FAILED
+                job.error = f"Lease expired on attempt {job.attempts} of {job.max_attempts}"
+                job.locked_by = None
+                job.locked_until = None
+                job.finished_at = now
+                db.commit()
+                api_logger.error(f"Job {job.id} ({job.job_type}) abandoned after {job.attempts} attempts")
+                continue
+
+            job.status = RUNNING
+            job.attempts += 1
+            job.locked_by = worker_id
+            job.locked_until = now + timedelta(seconds=self.lease_seconds)
+            job.started_at = now
+            db.commit()
+            return job
+
+    def _update_owned(self, db: Session, job: GenerationJob, worker_id: str, values: Dict[str, Any]) -> bool:
+        """
+        Update the job only if this worker still holds its lease
+
+        Returns False (and changes nothing) when the lease expired and the job was
+        reclaimed by another worker, so a late result can't overwrite the new attempt.
+        """
+        updated = db.query(GenerationJob).filter(
+            GenerationJob.id == job.id,
+            GenerationJob.status == RUNNING,
+            GenerationJob.locked_by == worker_id
+        ).update(values, synchronize_session=False)
+        db.commit()
+        db.refresh(job)
+        if not updated:
+            api_logger.warning(f"Job {job.id} ({job.job_type}) is no longer leased by {worker_id}; outcome dropped")
+        return bool(updated)
+
+    def renew_lease(self, db: Session, job: GenerationJob, worker_id: str) -> bool:
+        """Extend the lease of a job this worker is running; False if it was lost"""
+        updated = db.query(GenerationJob).filter(
+            GenerationJob.id == job.id,
+            GenerationJob.status == RUNNING,
+            GenerationJob.locked_by == worker_id
+        ).update(
+            {"locked_until": datetime.now(timezone.utc) + timedelta(seconds=self.lease_seconds)},
+            synchronize_session=False
+        )
+        db.commit()
+        return bool(updated)
+
+    def complete(self, db: Session, job: GenerationJob, worker_id: str, result: Any) -> bool:
+        """Store the job result and release the lease"""
+        return self._update_owned(db, job, worker_id, {
+            "status": SUCCEEDED,
+            "result": result,
+            "error": None,
+            "locked_by": None,
+            "locked_until": None,
+            "finished_at": datetime.now(timezone.utc)
+        })
+
+    def fail(self, db: Session, job: GenerationJob, worker_id: str, error: str, permanent: bool = False) -> bool:
+        """Requeue the job with a delay, or mark it failed once attempts are exhausted (or retrying won't help)"""
+        now = datetime.now(timezone.utc)
+        values = {"error": error, "locked_by": None, "locked_until": None}
+        if not permanent and job.attempts < job.max_attempts:
+            values["status"] = QUEUED
+            values["run_after"] = now + timedelta(seconds=self.retry_delay_seconds * job.attempts)
+        else:
+            values["status"] = FAILED
+            values["finished_at"] = now
+        return self._update_owned(db, job, worker_id, values)
+
+    async def _keep_lease(self, db: Session, job: GenerationJob, worker_id: str):
+        """Renew the lease every third of its length while the handler runs"""
+        # Own session: the handler's session may be mid-transaction
+        with Session(bind=db.get_bind()) as lease_db:
+            while True:
+                await asyncio.sleep(self.lease_seconds / 3)
+                try:
+                    if not self.renew_lease(lease_db, job, worker_id):
+                        api_logger.warning(f"Job {job.id} ({job.job_type}) lease lost by {worker_id}")
+                        return
+                except Exception as e:
+                    lease_db.rollback()
+                    api_logger.error(f"Job {job.id} lease renewal failed: {str(e)}")
+
+    async def run_job(self, db: Session, job: GenerationJob):
+        """Run a claimed job through its registered handler and record the outcome"""
+        # Read before the handler runs: a rollback in the handler expires the job
+        worker_id = job.locked_by
+        handler = self.handlers.get(job.job_type)
+        if handler is None:
+            self.fail(db, job, worker_id, f"No handler registered for job type '{job.job_type}'", permanent=True)
+            return
+
+        heartbeat = asyncio.create_task(self._keep_lease(db, job, worker_id))
+        try:
+            result = await handler(db, job.payload)
+        except Exception as e:
+            db.rollback()
+            api_logger.exception(f"Job {job.id} ({job.job_type}) attempt {job.attempts} failed: {str(e)}")
+            self.fail(db, job, worker_id, str(e))
+            return
+        finally:
+            heartbeat.cancel()
+
+        self.complete(db, job, worker_id, result)
+
+
+# Global job queue instance
+job_queue = JobQueue(
+    lease_seconds=settings.JOB_LEASE_SECONDS,
+    max_attempts=settings.JOB_MAX_ATTEMPTS,
+    retry_delay_seconds=settings.JOB_RETRY_DELAY_SECONDS
+)
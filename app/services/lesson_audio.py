@@ -0,0 +1,352 @@
+"""
+Pre-rendered lesson audio.
+
+Audio for a lesson is synthesized once, right after the lesson is created (as a
+background job) or by the backfill script, and stored on disk next to a
+per-lesson manifest. The lesson audio endpoints then only read files.
+
+Jobs run on the generation workers, so LESSON_AUDIO_DIR must be a volume shared
+with the API processes for them to see the result. Without one (or when a clip
+is missing) the API renders the lesson again on first request and stores it on
+its own disk.
+
+Layout under LESSON_AUDIO_DIR:
+
+    <lesson_id>/manifest.json
+    <lesson_id>/vocabulary_000.mp3, example_sentences_000.mp3, story_dialogue_000.mp3, ...
+    <lesson_id>/bundle.mp3, bundle.json   all clips joined into one file plus their timings
+"""
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.api import crud
+from app.services.job_queue import job_queue
+from app.services.tts_service import tts_service
+from app.utils.audio import concatenate_mp3
+from app.utils.config import settings
+from app.utils.logger import api_logger
+
+LESSON_AUDIO_JOB = "lesson_audio"
+MANIFEST_VERSION = 1
+
+
+def _replace_file(path: Path, data: bytes):
+    """Write through a uniquely named temp file and rename, so concurrent renders never tear a file"""
+    with tempfile.NamedTemporaryFile(dir=path.parent, prefix=f"{path.name}.", suffix=".tmp", delete=False) as f:
+        f.write(data)
+    try:
+        os.replace(f.name, path)
+    except OSError:
+        os.unlink(f.name)
+        raise
+
+
+class LessonAudioStore:
+    def __init__(self, root_dir: str):
+        self.root_dir = Path(root_dir)
+
+    def lesson_dir(self, lesson_id: int) -> Path:
+        return self.root_dir / str(lesson_id)
+
+    def clip_path(self, lesson_id: int, file_name: str) -> Path:
+        return self.lesson_dir(lesson_id) / file_name
+
+    def load_manifest(self, lesson_id: int) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self.lesson_dir(lesson_id) / "manifest.json", 'r') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            api_logger.error(f"Unreadable audio manifest for lesson {lesson_id}: {str(e)}")
+            return None
+
+    def load_complete_manifest(self, lesson_id: int) -> Optional[Dict[str, Any]]:
+        """
+        The lesson's manifest if every item rendered and all its clips are on this disk
+
+        Returns None otherwise, and callers render the lesson again. That covers a
+        failed render, and a manifest whose clips are missing (a partly copied or
+        cleaned up LESSON_AUDIO_DIR).
+        """
+        manifest = self.load_manifest(lesson_id)
+        if manifest is None or manifest["errors"]:
+            return None
+        missing = [entry["file"] for entry in manifest["items"] if not self.clip_path(lesson_id, entry["file"]).is_file()]
+        if missing:
+            api_logger.warning(f"Audio manifest for lesson {lesson_id} lists {len(missing)} missing clips; rendering again")
+            return None
+        return manifest
+
+    def save(self, lesson_id: int, manifest: Dict[str, Any], clips: Dict[str, bytes]):
+        """Write the clips, then the manifest, so a manifest never points at missing files"""
+        lesson_dir = self.lesson_dir(lesson_id)
+        lesson_dir.mkdir(parents=True, exist_ok=True)
+        for file_name, data in clips.items():
+            _replace_file(lesson_dir / file_name, data)
+
+        _replace_file(lesson_dir / "manifest.json", json.dumps(manifest, ensure_ascii=False, indent=2).encode('utf-8'))
+
+    def load_bundle_manifest(self, lesson_id: int) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self.lesson_dir(lesson_id) / "bundle.json", 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def bundle_path(self, lesson_id: int) -> Path:
+        return self.lesson_dir(lesson_id) / "bundle.mp3"
+
+    def build_bundle(self, manifest: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Join the lesson's clips into one MP3 and store it with a timing manifest
+
+        Clients load one file and play items by seeking to start_ms, instead of
+        decoding dozens of base64 clips from a JSON document.
+        """
+        lesson_id = manifest["lesson_id"]
+        entries = [entry for entry in manifest["items"] if entry["content_type"] == "audio/mpeg"]
+        clips = [self.clip_path(lesson_id, entry["file"]).read_bytes() for entry in entries]
+        audio, timings = concatenate_mp3(clips)
+
+        items = []
+        section_counts: Dict[str, int] = {}
+        for entry, (start_ms, end_ms) in zip(entries, timings):
+            index = section_counts.get(entry["section"], 0)
+            section_counts[entry["section"]] = index + 1
+            items.append({
+                "section": entry["section"],
+                "index": index,
+                "english": entry["english"],
+                "target_script": entry["target_script"],
+                "speaker": entry["speaker"],
+                "voice": entry["voice"],
+                "start_ms": int(round(start_ms)),
+                "end_ms": int(round(end_ms))
+            })
+
+        bundle = {
+            "lesson_id": lesson_id,
+            "language": manifest["language"],
+            "content_type": "audio/mpeg",
+            "size": len(audio),
+            "duration_ms": int(round(timings[-1][1])) if timings else 0,
+            "etag": hashlib.sha256(audio).hexdigest()[:32],
+            "items": items,
+            "errors": list(manifest["errors"])
+        }
+
+        lesson_dir = self.lesson_dir(lesson_id)
+        _replace_file(self.bundle_path(lesson_id), audio)
+        _replace_file(lesson_dir / "bundle.json", json.dumps(bundle, ensure_ascii=False, separators=(",", ":")).encode('utf-8'))
+        return bundle
+
+    def delete(self, lesson_id: int):
+        shutil.rmtree(self.lesson_dir(lesson_id), ignore_errors=True)
+
+    def to_lesson_audio_response(self, manifest: Dict[str, Any]) -> Dict[str, Any]:
+        """Build the LessonAudioResponse payload from stored clips"""
+        audio_content = {
+            "vocabulary": [],
+            "example_sentences": [],
+            "story_dialogue": [],
+            "success": not manifest["errors"],
+            "errors": list(manifest["errors"])
+        }
+        for entry in manifest["items"]:
+            data = self.clip_path(manifest["lesson_id"], entry["file"]).read_bytes()
+            audio_content[entry["section"]].append(tts_service.lesson_audio_entry(
+                entry["section"],
+                {"english": entry["english"], "speaker": entry["speaker"]},
+                entry["target_script"],
+                audio=base64.b64encode(data).decode('utf-8'),
+                content_type=entry["content_type"],
+                voice_name=entry["voice"],
+                detected_gender=entry["detected_gender"]
+            ))
+        return audio_content
+
+
+def prerender_lesson_audio(db: Session, lesson_id: int) -> Dict[str, Any]:
+    """
+    Synthesize and store audio for every item of a lesson in its target language
+
+    Raises:
+        ValueError: If the lesson doesn't exist
+    """
+    lesson = crud.get_desi_lesson_with_content(db, lesson_id)
+    if not lesson:
+        raise ValueError(f"Lesson {lesson_id} not found")
+
+    language = lesson.target_language
+    lesson_dict = crud.convert_db_lesson_to_response_format(lesson).dict()["desi_lesson"]
+
+    items = []
+    clips = {}
+    errors = []
+    section_counts: Dict[str, int] = {}
+    for section, item, text, result in tts_service.synthesize_lesson_clips(lesson_dict, language):
+        if not result["success"]:
+            errors.append(tts_service.lesson_audio_error(section, item))
+            continue
+
+        index = section_counts.get(section, 0)
+        section_counts[section] = index + 1
+        file_name = f"{section}_{index:03d}.{result['audio_format'].lower()}"
+        clips[file_name] = result["audio_bytes"]
+        items.append({
+            "section": section,
+            "english": item.get("english", ""),
+            "target_script": text,
+            "speaker": item.get("speaker"),
+            "voice": result["voice_name"],
+            "detected_gender": result.get("detected_gender"),
+            "content_type": result["content_type"],
+            "size": len(result["audio_bytes"]),
+            "file": file_name
+        })
+
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "lesson_id": lesson_id,
+        "language": language,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "items": items,
+        "errors": errors
+    }
+    lesson_audio_store.save(lesson_id, manifest, clips)
+    try:
+        lesson_audio_store.build_bundle(manifest)
+    except ValueError as e:
+        # Individual clips are still usable; the bundle endpoint will report it
+        api_logger.error(f"Could not bundle audio for lesson {lesson_id}: {str(e)}")
+    return manifest
+
+
+def get_lesson_bundle(db: Session, lesson_id: int) -> Optional[Dict[str, Any]]:
+    """
+    Bundle manifest for a lesson, rendering audio and bundling as needed
+
+    A stored bundle is reused only when every clip rendered and its file is on
+    this disk; otherwise the lesson is rendered again so items that failed
+    before get another try.
+    Returns None if the lesson doesn't exist.
+    """
+    bundle = lesson_audio_store.load_bundle_manifest(lesson_id)
+    if bundle is not None and not bundle.get("errors") and lesson_audio_store.bundle_path(lesson_id).is_file():
+        return bundle
+
+    manifest = lesson_audio_store.load_complete_manifest(lesson_id)
+    if manifest is None:
+        if crud.get_desi_lesson(db, lesson_id=lesson_id) is None:
+            return None
+        manifest = prerender_lesson_audio(db, lesson_id)
+        bundle = lesson_audio_store.load_bundle_manifest(lesson_id)
+        if bundle is not None:
+            return bundle
+    return lesson_audio_store.build_bundle(manifest)
+
+
+def _stored_clips(manifest: Dict[str, Any]) -> Iterator[Tuple[str, Dict[str, Any], str, Dict[str, Any]]]:
+    """Pre-rendered clips in the same shape as TTSService.iter_lesson_clips"""
+    for entry in manifest["items"]:
+        yield entry["section"], {"english": entry["english"], "speaker": entry["speaker"]}, entry["target_script"], {
+            "success": True,
+            "audio_bytes": lesson_audio_store.clip_path(manifest["lesson_id"], entry["file"]).read_bytes(),
+            "content_type": entry["content_type"],
+            "voice_name": entry["voice"],
+            "detected_gender": entry["detected_gender"]
+        }
+
+
+def stream_lesson_audio(
+    lesson_id: int,
+    language: str,
+    lesson_data: Optional[Dict[str, Any]] = None,
+    manifest: Optional[Dict[str, Any]] = None
+) -> Iterator[Dict[str, Any]]:
+    """
+    Lesson audio as a sequence of records, each clip as soon as it's available
+
+    Clips come from the manifest when given, otherwise they are synthesized from
+    lesson_data (concurrently, cache hits first in line). Records are:
+
+        {"type": "lesson", "lesson_id", "language", "total", "source"}
+        {"type": "clip", "position", "section", "index", ...LessonAudioResponse entry fields}
+        {"type": "error", "position", "section", "index", "error"}
+        {"type": "done", "success", "errors"}
+    """
+    if manifest is not None:
+        total, source, clips = len(manifest["items"]), "prerendered", _stored_clips(manifest)
+    else:
+        total = len(tts_service.get_lesson_audio_items(lesson_data))
+        source, clips = "synthesized", tts_service.iter_lesson_clips(lesson_data, language)
+    yield {"type": "lesson", "lesson_id": lesson_id, "language": language, "total": total, "source": source}
+
+    errors = []
+    section_counts: Dict[str, int] = {}
+    try:
+        for position, (section, item, text, result) in enumerate(clips):
+            index = section_counts.get(section, 0)
+            section_counts[section] = index + 1
+            record = {"position": position, "section": section, "index": index}
+            if result["success"]:
+                record["type"] = "clip"
+                record.update(tts_service.lesson_audio_entry(
+                    section, item, text,
+                    audio=base64.b64encode(result["audio_bytes"]).decode('utf-8'),
+                    content_type=result["content_type"],
+                    voice_name=result["voice_name"],
+                    detected_gender=result.get("detected_gender")
+                ))
+            else:
+                record["type"] = "error"
+                record["error"] = tts_service.lesson_audio_error(section, item)
+                errors.append(record["error"])
+            yield record
+    except Exception as e:
+        # Headers are already sent, so report it in-band
+        api_logger.error(f"Lesson audio stream failed for lesson {lesson_id}: {str(e)}")
+        errors.append(f"Error generating lesson audio: {str(e)}")
+
+    yield {"type": "done", "success": not errors, "errors": errors}
+
+
+def schedule_lesson_audio(db: Session, lesson_id: int):
+    """Queue audio pre-rendering for a new lesson (no-op when LESSON_AUDIO_PRERENDER is off)"""
+    if not settings.LESSON_AUDIO_PRERENDER:
+        return
+    try:
+        job_queue.enqueue(db, LESSON_AUDIO_JOB, {"lesson_id": lesson_id})
+    except Exception as e:
+        # The lesson is already saved; audio will be rendered on first request instead
+        db.rollback()
+        api_logger.error(f"Could not queue audio pre-rendering for lesson {lesson_id}: {str(e)}")
+
+
+@job_queue.handler(LESSON_AUDIO_JOB)
+async def run_lesson_audio_job(db: Session, payload: dict) -> dict:
+    # TTS calls are blocking; render in a thread so other jobs on this loop keep running
+    manifest = await asyncio.to_thread(prerender_lesson_audio, db, payload["lesson_id"])
+    if manifest["errors"]:
+        # Fail the attempt so the queue retries the missing clips later
+        raise RuntimeError("; ".join(manifest["errors"]))
+    return {
+        "lesson_id": manifest["lesson_id"],
+        "items": len(manifest["items"]),
+        "errors": manifest["errors"]
+    }
+
+
+# Global lesson audio store
+lesson_audio_store = LessonAudioStore(settings.LESSON_AUDIO_DIR)
@@ -0,0 +1,272 @@
+"""
+Per-worker cache of rendered lesson responses.
+
+The serialized JSON of a lesson read is kept in memory and served without
+touching the database. Entries are keyed by lesson id and view (the rendered
+lesson of /api/lessons/{language}/{number}, or the stored record of
+/desi-lessons/{id}?include_content=true); lessons are also found by (language,
+number). Entries are evicted least recently used first once the cache grows
+past its size limit. Each entry keeps the ETag it was served with, so a
+revalidation is answered from memory too.
+
+Lessons do change after they are saved: the transliteration backfill rewrites
+their content and re-renders their snapshots, and admins delete them. Both go
+through crud.notify_lessons_changed, which NOTIFYs the changed lesson ids on
+commit; every worker LISTENs (LessonChangeListener) and drops those lessons, so
+the next read loads the new content under its new ETag. The TTL
+(LESSON_CACHE_TTL_SECONDS) only bounds staleness when a notification is missed,
+e.g. while a worker's listener is reconnecting.
+
+The same notifications carry the languages whose lessons were added, changed
+or deleted (crud.create_desi_lessons sends one for every insert), and the
+listener drops those languages from the per-language caches it is given: the
+lesson catalog summaries and the quiz distractor pools.
+"""
+import json
+
+import select
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.api import crud
+from app.services.lesson_catalog import lesson_catalog
+from app.services.quiz_generator import quiz_generator
+from app.utils.config import settings
+from app.utils.database import engine
+from app.utils.http_cache import make_etag
+from app.utils.logger import api_logger
+
+# Views of a lesson
+CONTENT = "content"  # DesiLessonResponse, as served by the lesson snapshot
+RECORD = "record"  # The stored lesson with its content rows
+
+
+def lesson_content_etag(lesson_id: int, content_hash: str) -> str:
+    """ETag of a lesson's stored snapshot"""
+    return make_etag(f"lesson-{lesson_id}-{content_hash[:32]}")
+
+
+class LessonCache:
+    def __init__(self, max_bytes: int, ttl_seconds: int, enabled: bool = True):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.enabled = enabled
+
+        self._lock = threading.Lock()
+        # (lesson id, view) -> (body, etag, expires at), least recently used first
+        self._entries: "OrderedDict[Tuple[int, str], Tuple[bytes, str, float]]" = OrderedDict()
+        self._total_bytes = 0
+        self._ids: Dict[Tuple[str, int], int] = {}  # (language, lesson number) -> lesson id
+        self._numbers: Dict[int, Tuple[str, int]] = {}  # lesson id -> (language, lesson number)
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def _remove_locked(self, key: Tuple[int, str]):
+        body, _, _ = self._entries.pop(key)
+        self._total_bytes -= len(body)
+        lesson_id = key[0]
+        if not any((lesson_id, view) in self._entries for view in (CONTENT, RECORD)):
+            number_key = self._numbers.pop(lesson_id, None)
+            if number_key is not None and self._ids.get(number_key) == lesson_id:
+                del self._ids[number_key]
+
+    def get(self, lesson_id: int, view: str = CONTENT) -> Optional[Tuple[bytes, str]]:
+        """(body, etag) of a cached lesson view"""
+        if not self.enabled:
+            return None
+        key = (lesson_id, view)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[2] <= time.monotonic():
+                self._remove_locked(key)
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0], entry[1]
+
+    def get_by_number(self, target_language: str, lesson_number: int, view: str = CONTENT) -> Optional[Tuple[bytes, str]]:
+        with self._lock:
+            lesson_id = self._ids.get((target_language, lesson_number))
+        if lesson_id is None:
+            if self.enabled:
+                with self._lock:
+                    self.misses += 1
+            return None
+        return self.get(lesson_id, view)
+
+    def put(
+        self, lesson_id: int, target_language: str, lesson_number: int,
+        body: bytes, etag: str, view: str = CONTENT
+    ):
+        if not self.enabled or len(body) > self.max_bytes:
+            return
+        key = (lesson_id, view)
+        with self._lock:
+            if key in self._entries:
+                self._remove_locked(key)
+            self._entries[key] = (body, etag, time.monotonic() + self.ttl_seconds)
+            self._total_bytes += len(body)
+            self._ids[(target_language, lesson_number)] = lesson_id
+            self._numbers[lesson_id] = (target_language, lesson_number)
+            while self._total_bytes > self.max_bytes:
+                self._remove_locked(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate(self, lesson_id: int):
+        """Drop every view of a lesson"""
+        with self._lock:
+            keys = [(lesson_id, view) for view in (CONTENT, RECORD) if (lesson_id, view) in self._entries]
+            for key in keys:
+                self._remove_locked(key)
+            if keys:
+                self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._ids.clear()
+            self._numbers.clear()
+            self._total_bytes = 0
+
+    def warm(self, db: Session, per_language: int) -> int:
+        """Load the rendered first lessons of every language; returns the number loaded"""
+        if not self.enabled or per_language <= 0:
+            return 0
+        rows = crud.get_first_lesson_snapshots(db, per_language)
+        for lesson_id, target_language, lesson_number, snapshot_json, content_hash in rows:
+            self.put(
+                lesson_id, target_language, lesson_number,
+                snapshot_json.encode("utf-8"), lesson_content_etag(lesson_id, content_hash)
+            )
+        api_logger.info(f"Lesson cache warmed with {len(rows)} lessons")
+        return len(rows)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            requests = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "lessons": len(self._numbers),
+                "size_bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / requests, 4) if requests else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations
+            }
+
+
+class LessonChangeListener:
+    """
+    Background thread that LISTENs for changed lessons and invalidates them in a cache
+
+    language_caches are per-language caches with an invalidate(language=None)
+    method; the languages named in a notification are dropped from each.
+    """
+
+    def __init__(
+        self, cache: LessonCache, language_caches: Iterable[Any] = (),
+        poll_seconds: float = 1.0, retry_seconds: float = 5.0
+    ):
+        self.cache = cache
+        self.language_caches = list(language_caches)
+        self.poll_seconds = poll_seconds
+        self.retry_seconds = retry_seconds
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        # Set while LISTENing
+        self.listening = threading.Event()
+
+    def start(self):
+        if self._thread is not None or not (self.cache.enabled or self.language_caches):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="lesson-change-listener", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.poll_seconds + 1)
+            self._thread = None
+
+    def handle(self, payload: str):
+        try:
+            change = json.loads(payload)
+            lesson_ids = [int(lesson_id) for lesson_id in change.get("ids", [])]
+            target_languages = [str(language) for language in change.get("languages", [])]
+        except (ValueError, TypeError, AttributeError):
+            api_logger.error(f"Ignoring malformed lesson change notification: {payload[:100]!r}")
+            return
+        for lesson_id in lesson_ids:
+            self.cache.invalidate(lesson_id)
+        for target_language in target_languages:
+            for language_cache in self.language_caches:
+                language_cache.invalidate(target_language)
+
+    def clear(self):
+        """Drop everything, after notifications may have been missed"""
+        self.cache.clear()
+        for language_cache in self.language_caches:
+            language_cache.invalidate()
+
+    def _run(self):
+        reconnecting = False
+        while not self._stop.is_set():
+            try:
+                self._listen(reconnecting)
+            except Exception as e:
+                api_logger.error(f"Lesson change listener failed, retrying in {self.retry_seconds:.0f}s: {str(e)}")
+                self._stop.wait(self.retry_seconds)
+            reconnecting = True
+
+    def _listen(self, reconnecting: bool):
+        # A dedicated connection outside the pool, in autocommit so notifications arrive
+        connection = engine.raw_connection()
+        dbapi_connection = connection.driver_connection
+        connection.detach()
+        try:
+            dbapi_connection.autocommit = True
+            with dbapi_connection.cursor() as cursor:
+                cursor.execute(f"LISTEN {crud.LESSON_CHANGES_CHANNEL}")
+            if reconnecting:
+                # Changes made while we weren't listening were missed
+                self.clear()
+            self.listening.set()
+
+            while not self._stop.is_set():
+                if select.select([dbapi_connection], [], [], self.poll_seconds) == ([], [], []):
+                    continue
+                dbapi_connection.poll()
+                while dbapi_connection.notifies:
+                    self.handle(dbapi_connection.notifies.pop(0).payload)
+        finally:
+            self.listening.clear()
+            connection.close()
+
+
+# Global lesson cache instance
+lesson_cache = LessonCache(
+    max_bytes=settings.LESSON_CACHE_MAX_MB * 1024 * 1024,
+    ttl_seconds=settings.LESSON_CACHE_TTL_SECONDS,
+    enabled=settings.LESSON_CACHE_ENABLED
+)
+
+# Keeps lesson_cache, the lesson catalog and the quiz pools in step with lesson
+# changes made by other workers, the generation worker and scripts
+lesson_change_listener = LessonChangeListener(lesson_cache, [lesson_catalog, quiz_generator])
@@ -0,0 +1,64 @@
+"""
+Per-worker cache of per-language lesson catalog summaries.
+
+The lesson count, the highest lesson number and the list of lesson numbers of
+a language come from a single aggregate query (crud.get_lesson_catalog_summary)
+and are kept in memory for /api/lessons/{language}/count and /next. Saving a
+lesson through lesson generation or deleting one through the admin API
+invalidates its language in the worker that handled the request at once; every
+other API worker drops it when the change notification arrives
+(lesson_cache.LessonChangeListener), wherever the lesson was saved. The TTL
+(LESSON_CATALOG_TTL_SECONDS) only bounds staleness when a notification is missed.
+"""
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api import crud
+from app.utils.config import settings
+
+
+class LessonCatalogSummary:
+    def __init__(self, total_lessons: int, max_lesson_number: Optional[int], lesson_numbers: List[int]):
+        self.total_lessons = total_lessons
+        self.max_lesson_number = max_lesson_number
+        self.lesson_numbers = lesson_numbers
+
+
+class LessonCatalog:
+    def __init__(self, ttl_seconds: int):
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        # language -> (expires at, summary)
+        self._summaries: Dict[str, Tuple[float, LessonCatalogSummary]] = {}
+        # Bumped on every invalidation, so a summary read before one isn't stored after it
+        self._generation = 0
+
+    async def get(self, db: AsyncSession, target_language: str) -> LessonCatalogSummary:
+        """Catalog summary of a language, cached per language"""
+        with self._lock:
+            cached = self._summaries.get(target_language)
+            if cached and cached[0] > time.monotonic():
+                return cached[1]
+            generation = self._generation
+
+        summary = LessonCatalogSummary(*await db.run_sync(crud.get_lesson_catalog_summary, target_language))
+        with self._lock:
+            if generation == self._generation:
+                self._summaries[target_language] = (time.monotonic() + self.ttl_seconds, summary)
+        return summary
+
+    def invalidate(self, target_language: Optional[str] = None):
+        """Drop cached summaries (all languages when none is given)"""
+        with self._lock:
+            self._generation += 1
+            if target_language is None:
+                self._summaries.clear()
+            else:
+                self._summaries.pop(target_language, None)
+
+
+# Global lesson catalog instance
+lesson_catalog = LessonCatalog(ttl_seconds=settings.LESSON_CATALOG_TTL_SECONDS)
@@ -0,0 +1,176 @@
+"""
+Lesson generation shared by the API routes and the background job worker
+"""
+from typing import Optional
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel
+from sqlalchemy.orm import Session
+
+from app.api import crud
+from app.models import schemas
+from app.services.enhanced_gemini_service import enhanced_gemini_service, EnhancedLearningData
+from app.services.gemini_service import gemini_service
+from app.services.job_queue import job_queue
+from app.services.lesson_audio import schedule_lesson_audio
+from app.services.lesson_catalog import lesson_catalog
+from app.services.lesson_parser import lesson_parser
+from app.services.quiz_generator import quiz_generator
+from app.utils.config import settings
+from app.utils.database import AnySession, run_in_session
+
+
+class EnhancedLessonRequest(BaseModel):
+    topic: str
+    language: str
+    difficulty: Optional[str] = "beginner"
+    save_to_database: Optional[bool] = True
+
+
+class EnhancedLessonResponse(BaseModel):
+    success: bool
+    data: Optional[EnhancedLearningData] = None
+    lesson_db_info: Optional[schemas.DesiLessonDB] = None
+    message: str
+
+
+async def local_quiz_builder(db: AnySession, target_language: str, num_questions: int):
+    """
+    Quiz builder for the Gemini services when LOCAL_QUIZ_GENERATION is on, else None.
+    Distractors come from the language's stored lessons, loaded before the Gemini call.
+    """
+    if not settings.LOCAL_QUIZ_GENERATION:
+        return None
+
+    pool_vocabulary, pool_sentences = await run_in_session(db, quiz_generator.get_distractor_pool, target_language)
+
+    def build(vocabulary, sentences):
+        return quiz_generator.build_quiz(
+            target_language=target_language,
+            vocabulary=vocabulary,
+            sentences=sentences,
+            distractor_vocabulary=pool_vocabulary,
+            distractor_sentences=pool_sentences,
+            num_questions=num_questions
+        )
+    return build
+
+
+async def generate_desi_lesson(
+    db: AnySession,
+    target_language: str,
+    lesson_topic: str,
+    save_to_db: bool = True
+) -> schemas.DesiLessonResponse:
+    """Generate a lesson with Gemini and optionally save it to the database"""
+    # Get lesson details from Lessons_title.txt
+    lesson_info = lesson_parser.get_lesson_by_title(lesson_topic)
+    difficulty = "beginner"  # Default difficulty level
+
+    lesson_response = await gemini_service.generate_desi_lesson(
+        target_language=target_language,
+        lesson_topic=lesson_topic,
+        theme=lesson_topic,  # Use topic as theme for Gemini
+        quiz_builder=await local_quiz_builder(db, target_language, num_questions=4)
+    )
+
+    if save_to_db:
+        db_lesson = await run_in_session(db, crud.create_desi_lesson, lesson_response, difficulty)
+        quiz_generator.invalidate(target_language)
+        lesson_catalog.invalidate(target_language)
+        await run_in_session(db, schedule_lesson_audio, db_lesson.id)
+
+    return lesson_response
+
+
+async def generate_enhanced_lesson(db: AnySession, request: EnhancedLessonRequest) -> EnhancedLessonResponse:
+    """
+    Generate enhanced learning data and optionally save it in the existing lesson format
+
+    Raises:
+        ValueError: For empty input or content Gemini could not produce
+    """
+    # Validate inputs
+    if not request.topic.strip():
+        raise ValueError("Topic cannot be empty")
+
+    if not request.language.strip():
+        raise ValueError("Language cannot be empty")
+
+    # Generate enhanced learning data
+    learning_data = await enhanced_gemini_service.fetch_learning_data(
+        topic=request.topic.strip(),
+        language=request.language.strip(),
+        quiz_builder=await local_quiz_builder(db, request.language.strip(), num_questions=5)
+    )
+
+    lesson_db_info = None
+
+    # Save to database if requested (default: True)
+    if request.save_to_database:
+        try:
+            # Transform enhanced data to existing database format
+            transformed_lesson = enhanced_gemini_service.transform_to_desi_lesson_format(
+                enhanced_data=learning_data,
+                topic=request.topic.strip(),
+                language=request.language.strip(),
+                difficulty=request.difficulty or "beginner"
+            )
+
+            # Save using existing CRUD function
+            db_lesson = await run_in_session(
+                db,
+                crud.create_desi_lesson,
+                lesson_data=transformed_lesson,
+                difficulty=request.difficulty or "beginner"
+            )
+            quiz_generator.invalidate(db_lesson.target_language)
+            lesson_catalog.invalidate(db_lesson.target_language)
+            await run_in_session(db, schedule_lesson_audio, db_lesson.id)
+
+            lesson_db_info = schemas.DesiLessonDB(
+                id=db_lesson.id,
+                title=db_lesson.title,
+                target_language=db_lesson.target_language,
+                difficulty=db_lesson.difficulty,
+                lesson_number=db_lesson.lesson_number,
+                created_at=db_lesson.created_at
+            )
+
+        except Exception as db_error:
+            # Log the database error for debugging
+            print(f"Database insertion error: {str(db_error)}")
+            import traceback
+            traceback.print_exc()
+            await run_in_session(db, Session.rollback)
+            # Continue without failing the entire request
+
+    success_message = f"Successfully generated enhanced lesson for '{request.topic}' in {request.language}"
+    if lesson_db_info:
+        success_message += f" and saved to database (ID: {lesson_db_info.id})"
+
+    return EnhancedLessonResponse(
+        success=True,
+        data=learning_data,
+        lesson_db_info=lesson_db_info,
+        message=success_message
+    )
+
+
+# Background job handlers - results are stored as the JSON the synchronous endpoints return
+
+@job_queue.handler("desi_lesson")
+async def run_desi_lesson_job(db: Session, payload: dict) -> dict:
+    lesson_response = await generate_desi_lesson(
+        db=db,
+        target_language=payload["target_language"],
+        lesson_topic=payload["lesson_topic"],
+        save_to_db=payload.get("save_to_db", True)
+    )
+    return jsonable_encoder(lesson_response)
+
+
+@job_queue.handler("enhanced_lesson")
+async def run_enhanced_lesson_job(db: Session, payload: dict) -> dict:
+    response = await generate_enhanced_lesson(db, EnhancedLessonRequest(**payload))
+    return jsonable_encoder(response)
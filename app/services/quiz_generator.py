@@ -0,0 +1,210 @@
+"""
+Offline quiz generation from stored lesson vocabulary and example sentences.
+
+Questions follow the same rule as the LLM prompt: learners read English and
+transliterations, so the native script never appears in questions or options.
+Distractors come from the same language's vocabulary in other lessons, which
+are loaded once per language and kept in memory until that language's lessons
+change (lesson_cache.LessonChangeListener).
+"""
+import random
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.models import models, schemas
+
+# (english, transliteration)
+QuizItem = Tuple[str, str]
+
+
+class QuizGenerator:
+    def __init__(self, options_per_question: int = 4, pool_ttl_seconds: int = 600):
+        self.options_per_question = options_per_question
+        self.pool_ttl_seconds = pool_ttl_seconds
+        # language -> (loaded_at, vocabulary items, sentence items)
+        self._pools: Dict[str, Tuple[float, List[QuizItem], List[QuizItem]]] = {}
+
+    def get_distractor_pool(self, db: Session, target_language: str) -> Tuple[List[QuizItem], List[QuizItem]]:
+        """Vocabulary and sentence (english, transliteration) pairs for a language, cached per language"""
+        cached = self._pools.get(target_language)
+        if cached and time.monotonic() - cached[0] < self.pool_ttl_seconds:
+            return cached[1], cached[2]
+
+        vocabulary = db.query(
+            models.DesiVocabulary.english,
+            models.DesiVocabulary.transliteration
+        ).join(models.DesiLesson).filter(
+            models.DesiLesson.target_language == target_language
+        ).distinct().all()
+
+        sentences = db.query(
+            models.DesiExampleSentence.english,
+            models.DesiExampleSentence.transliteration
+        ).join(models.DesiLesson).filter(
+            models.DesiLesson.target_language == target_language
+        ).distinct().all()
+
+        vocabulary_items = [(english, transliteration) for english, transliteration in vocabulary]
+        sentence_items = [(english, transliteration) for english, transliteration in sentences]
+        self._pools[target_language] = (time.monotonic(), vocabulary_items, sentence_items)
+        return vocabulary_items, sentence_items
+
+    def invalidate(self, target_language: Optional[str] = None):
+        """Drop cached distractor pools (all languages when none is given)"""
+        if target_language is None:
+            self._pools.clear()
+        else:
+            self._pools.pop(target_language, None)
+
+    def _pick_distractors(
+        self,
+        answer: str,
+        candidates: Sequence[str],
+        count: int,
+        rng: random.Random,
+        exclude: Sequence[str] = ()
+    ) -> List[str]:
+        """
+        Pick distinct distractors, preferring candidates close in length to the answer
+        so the correct option doesn't stand out
+        """
+        seen = {answer.strip().lower()} | {e.strip().lower() for e in exclude}
+        unique = []
+        for candidate in candidates:
+            key = candidate.strip().lower()
+            if key and key not in seen:
+                seen.add(key)
+                unique.append(candidate)
+
+        rng.shuffle(unique)
+        # Shuffling first keeps ties in random order; the jitter keeps quizzes varied
+        unique.sort(key=lambda c: abs(len(c) - len(answer)) * (1 + rng.random() * 0.5))
+        return unique[:count]
+
+    def _build_question(
+        self,
+        question: str,
+        answer: str,
+        lesson_candidates: Sequence[str],
+        pool_candidates: Sequence[str],
+        rng: random.Random
+    ) -> Optional[schemas.DesiQuizQuestion]:
+        needed = self.options_per_question - 1
+        # One distractor from the same lesson (same topic, so plausible), the rest
+        # from other lessons in the language; fall back to the lesson if the pool is small
+        distractors = self._pick_distractors(answer, lesson_candidates, 1, rng)
+        distractors += self._pick_distractors(answer, pool_candidates, needed - len(distractors), rng, exclude=distractors)
+        distractors += self._pick_distractors(answer, lesson_candidates, needed - len(distractors), rng, exclude=distractors)
+        if len(distractors) < needed:
+            return None
+
+        options = distractors + [answer]
+        rng.shuffle(options)
+        return schemas.DesiQuizQuestion(question=question, options=options, answer=answer)
+
+    def build_quiz(
+        self,
+        target_language: str,
+        vocabulary: Sequence[QuizItem],
+        sentences: Sequence[QuizItem] = (),
+        distractor_vocabulary: Sequence[QuizItem] = (),
+        distractor_sentences: Sequence[QuizItem] = (),
+        num_questions: int = 5,
+        seed: Optional[int] = None
+    ) -> List[schemas.DesiQuizQuestion]:
+        """
+        Build multiple-choice questions from lesson items
+
+        Args:
+            target_language: Language name used in question text
+            vocabulary: Lesson vocabulary as (english, transliteration)
+            sentences: Lesson example sentences as (english, transliteration)
+            distractor_vocabulary: Same-language vocabulary from other lessons
+            distractor_sentences: Same-language sentences from other lessons
+            num_questions: Number of questions to return (fewer if the lesson is too small)
+            seed: Seed for reproducible quizzes; a fresh quiz is drawn when omitted
+
+        Returns:
+            Quiz questions in the stored lesson quiz format
+        """
+        rng = random.Random(seed)
+        vocabulary = [item for item in vocabulary if item[0] and item[1]]
+        sentences = [item for item in sentences if item[0] and item[1]]
+
+        lesson_english = [english for english, _ in vocabulary]
+        lesson_transliterations = [transliteration for _, transliteration in vocabulary]
+        pool_english = [english for english, _ in distractor_vocabulary]
+        pool_transliterations = [transliteration for _, transliteration in distractor_vocabulary]
+        sentence_english = [english for english, _ in sentences]
+        pool_sentence_english = [english for english, _ in distractor_sentences]
+
+        # Candidate questions: meaning of a word, word for a meaning, meaning of a sentence
+        candidates = []
+        for index, (english, transliteration) in enumerate(vocabulary):
+            candidates.append((
+                ("vocabulary", index),
+                f"What does '{transliteration}' mean?",
+                english, lesson_english, pool_english
+            ))
+            candidates.append((
+                ("vocabulary", index),
+                f"How do you say '{english}' in {target_language}?",
+                transliteration, lesson_transliterations, pool_transliterations
+            ))
+        for index, (english, transliteration) in enumerate(sentences):
+            candidates.append((
+                ("sentence", index),
+                f"What does '{transliteration}' mean?",
+                english, sentence_english, pool_sentence_english
+            ))
+        rng.shuffle(candidates)
+
+        questions = []
+        asked_items = set()
+        for item_key, question, answer, lesson_candidates, pool_candidates in candidates:
+            if len(questions) >= num_questions:
+                break
+            # One question per item, whichever direction came first
+            if item_key in asked_items:
+                continue
+            built = self._build_question(question, answer, lesson_candidates, pool_candidates, rng)
+            if built is not None:
+                questions.append(built)
+                asked_items.add(item_key)
+
+        return questions
+
+    def build_quiz_for_lesson(
+        self,
+        db: Session,
+        lesson: models.DesiLesson,
+        num_questions: int = 5,
+        seed: Optional[int] = None
+    ) -> List[schemas.DesiQuizQuestion]:
+        """Build a fresh practice quiz for a stored lesson without any external calls"""
+        vocabulary = db.query(
+            models.DesiVocabulary.english,
+            models.DesiVocabulary.transliteration
+        ).filter(models.DesiVocabulary.lesson_id == lesson.id).all()
+
+        sentences = db.query(
+            models.DesiExampleSentence.english,
+            models.DesiExampleSentence.transliteration
+        ).filter(models.DesiExampleSentence.lesson_id == lesson.id).all()
+
+        pool_vocabulary, pool_sentences = self.get_distractor_pool(db, lesson.target_language)
+        return self.build_quiz(
+            target_language=lesson.target_language,
+            vocabulary=[tuple(row) for row in vocabulary],
+            sentences=[tuple(row) for row in sentences],
+            distractor_vocabulary=pool_vocabulary,
+            distractor_sentences=pool_sentences,
+            num_questions=num_questions,
+            seed=seed
+        )
+
+
+# Global quiz generator instance
+quiz_generator = QuizGenerator()
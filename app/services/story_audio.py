@@ -0,0 +1,238 @@
+"""
+Story narration audio.
+
+A story's translated_text is too long for a single TTS request, so it is split
+at sentence boundaries (sentences over STORY_AUDIO_MAX_CHUNK_CHARS are split
+further at commas or spaces), the chunks are synthesized concurrently on the
+shared TTS pool and joined into one MP3 track in story order. The track's
+manifest lists where each sentence starts and ends, for highlight-as-you-listen.
+
+Tracks are stored per story and voice under STORY_AUDIO_DIR:
+
+    <story_id>/<voice>_<rate>.mp3, <voice>_<rate>.json
+
+Only the voices configured for the story's language are accepted, and track
+names are reduced to [A-Za-z0-9-] before they become file names.
+
+A stored track is only reused while the story text it was rendered from is
+unchanged (the manifest keeps a hash of it).
+"""
+import hashlib
+import json
+import os
+import re
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from app.models.models import DesiStory
+from app.services.tts_service import tts_service
+from app.utils.audio import concatenate_mp3
+from app.utils.config import settings
+from app.utils.logger import api_logger
+
+MANIFEST_VERSION = 1
+
+# A sentence runs up to its terminator (Latin, Devanagari danda, Urdu full stop,
+# CJK) plus any closing quotes or brackets, or to the end of the paragraph
+_SENTENCE = re.compile(r'\S.*?(?:[.!?।॥۔。！？]+["\'”’»)\]]*(?=\s|$)|$)')
+_UNSAFE_NAME_CHARS = re.compile(r'[^A-Za-z0-9-]')
+
+
+def split_sentences(text: str) -> List[str]:
+    """Sentences of a story text in order; paragraph breaks always end a sentence"""
+    sentences = []
+    for paragraph in text.splitlines():
+        sentences.extend(sentence.strip() for sentence in _SENTENCE.findall(paragraph.strip()))
+    return [sentence for sentence in sentences if sentence]
+
+
+def split_long_sentence(sentence: str, max_chars: int) -> List[str]:
+    """Pieces of at most max_chars, cut after a comma or at a space where possible"""
+    pieces = []
+    while len(sentence) > max_chars:
+        window = sentence[:max_chars]
+        cut = max(window.rfind(", "), window.rfind("، "), window.rfind("; "))
+        cut = cut + 1 if cut > max_chars // 2 else window.rfind(" ")
+        if cut <= 0:
+            cut = max_chars
+        pieces.append(sentence[:cut].strip())
+        sentence = sentence[cut:].strip()
+    if sentence:
+        pieces.append(sentence)
+    return pieces
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()[:16]
+
+
+class StoryAudioStore:
+    def __init__(self, root_dir: str):
+        self.root_dir = Path(root_dir)
+
+    def track_name(self, voice_name: str, speaking_rate: float) -> str:
+        return f"{_UNSAFE_NAME_CHARS.sub('-', voice_name)}_{round(float(speaking_rate), 3):g}"
+
+    def _track_path(self, story_id: int, track: str, suffix: str) -> Path:
+        """Path of a track file, which must lie inside the story's directory"""
+        story_dir = (self.root_dir / str(int(story_id))).resolve()
+        path = (story_dir / f"{track}{suffix}").resolve()
+        if path.parent != story_dir:
+            raise ValueError(f"Invalid story audio track name: {track!r}")
+        return path
+
+    def audio_path(self, story_id: int, track: str) -> Path:
+        return self._track_path(story_id, track, ".mp3")
+
+    def manifest_path(self, story_id: int, track: str) -> Path:
+        return self._track_path(story_id, track, ".json")
+
+    def load_manifest(self, story_id: int, track: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self.manifest_path(story_id, track), 'r') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            api_logger.error(f"Unreadable story audio manifest {story_id}/{track}: {str(e)}")
+            return None
+
+    def save(self, story_id: int, track: str, audio: bytes, manifest: Dict[str, Any]):
+        """Write the audio, then the manifest, so a manifest never points at a missing or partial track"""
+        audio_path = self.audio_path(story_id, track)
+        manifest_path = self.manifest_path(story_id, track)
+        audio_path.parent.mkdir(parents=True, exist_ok=True)
+        temp_audio = audio_path.with_name(f"{audio_path.name}.tmp")
+        temp_audio.write_bytes(audio)
+        os.replace(temp_audio, audio_path)
+        temp_manifest = manifest_path.with_name(f"{manifest_path.name}.tmp")
+        with open(temp_manifest, 'w') as f:
+            json.dump(manifest, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(temp_manifest, manifest_path)
+
+
+class StoryNarration:
+    """
+    Narration of one story in one voice
+
+    Resolving the voice raises ValueError for a language TTS doesn't support
+    or a voice that isn't configured for the story's language, so callers can
+    reject the request before any audio is sent.
+    """
+
+    def __init__(
+        self,
+        story: DesiStory,
+        voice_name: Optional[str] = None,
+        speaker_name: Optional[str] = None,
+        speaking_rate: float = 0.9
+    ):
+        self.story_id = story.id
+        self.language = story.target_language
+        self.text = story.translated_text or ""
+        if voice_name and voice_name not in tts_service.get_language_voices(self.language):
+            raise ValueError(f"Voice '{voice_name}' is not available for {self.language}")
+        self.voice_name = tts_service.get_voice_name(self.language, voice_name, speaker_name)
+        self.speaking_rate = speaking_rate
+        self.track = story_audio_store.track_name(self.voice_name, speaking_rate)
+
+    def stored_manifest(self) -> Optional[Dict[str, Any]]:
+        """Manifest of the stored track, if it was rendered from the current story text"""
+        manifest = story_audio_store.load_manifest(self.story_id, self.track)
+        if (
+            manifest is None
+            or manifest.get("version") != MANIFEST_VERSION
+            or manifest.get("text_hash") != text_hash(self.text)
+            or not story_audio_store.audio_path(self.story_id, self.track).exists()
+        ):
+            return None
+        return manifest
+
+    def chunks(self) -> List[Tuple[int, str, str]]:
+        """(sentence index, sentence, chunk text) in story order"""
+        chunks = []
+        for index, sentence in enumerate(split_sentences(self.text)):
+            for piece in split_long_sentence(sentence, settings.STORY_AUDIO_MAX_CHUNK_CHARS):
+                chunks.append((index, sentence, piece))
+        return chunks
+
+    def iter_audio(self) -> Iterator[bytes]:
+        """
+        The narration as MP3 data, chunk by chunk in story order, as soon as each chunk is ready
+
+        Once every chunk has been synthesized the track and its manifest are
+        stored. A failed chunk is skipped (and logged) and the track isn't stored,
+        so the next request retries it.
+        """
+        chunks = self.chunks()
+        options = {"voice_name": self.voice_name, "speaking_rate": self.speaking_rate, "audio_format": "MP3"}
+        pending = tts_service.submit_synthesis([(piece, self.language, options) for _, _, piece in chunks])
+
+        output = bytearray()
+        sentences: List[Dict[str, Any]] = []
+        failed = 0
+        position_ms = 0.0
+        for (index, sentence, _), (future, position) in zip(chunks, pending):
+            try:
+                result = future.result()[position]
+                if not result["success"]:
+                    raise RuntimeError(result.get("error", "TTS synthesis failed"))
+                # Joining a single clip drops ID3/Xing frames and gives its duration
+                audio, [(_, duration_ms)] = concatenate_mp3([result["audio_bytes"]])
+            except Exception as e:
+                failed += 1
+                api_logger.error(f"Story {self.story_id} narration chunk failed (sentence {index}): {str(e)}")
+                continue
+
+            if sentences and sentences[-1]["index"] == index:
+                sentences[-1]["end_ms"] = int(round(position_ms + duration_ms))
+            else:
+                sentences.append({
+                    "index": index,
+                    "text": sentence,
+                    "start_ms": int(round(position_ms)),
+                    "end_ms": int(round(position_ms + duration_ms))
+                })
+            position_ms += duration_ms
+            output += audio
+            yield audio
+
+        if failed or not output:
+            return
+        manifest = {
+            "version": MANIFEST_VERSION,
+            "story_id": self.story_id,
+            "language": self.language,
+            "voice_name": self.voice_name,
+            "speaking_rate": self.speaking_rate,
+            "text_hash": text_hash(self.text),
+            "content_type": "audio/mpeg",
+            "size": len(output),
+            "duration_ms": int(round(position_ms)),
+            "etag": hashlib.sha256(output).hexdigest()[:32],
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "sentences": sentences
+        }
+        story_audio_store.save(self.story_id, self.track, bytes(output), manifest)
+
+    def render(self) -> Dict[str, Any]:
+        """
+        Manifest of the stored track, synthesizing and storing it first if needed
+
+        Raises:
+            RuntimeError: If some chunks couldn't be synthesized
+        """
+        manifest = self.stored_manifest()
+        if manifest is not None:
+            return manifest
+        for _ in self.iter_audio():
+            pass
+        manifest = self.stored_manifest()
+        if manifest is None:
+            raise RuntimeError(f"Narration for story {self.story_id} could not be synthesized completely")
+        return manifest
+
+
+# Global story audio store
+story_audio_store = StoryAudioStore(settings.STORY_AUDIO_DIR)
@@ -1,9 +1,9 @@
 import json
 from typing import Set, Optional
-from sqlalchemy.orm import Session
 from app.models.schemas import Language, CEFRLevel, StoryData, VocabularyWord, StoryGenerationRequest
 from app.services.gemini_service import gemini_service
 from app.api.story_crud import create_desi_story, find_similar_story
+from app.utils.database import AnySession, run_in_session
 
 class StoryService:
     def __init__(self):
@@ -31,7 +31,7 @@ class StoryService:
     async def generate_story(
         self, 
         request: StoryGenerationRequest, 
-        db: Optional[Session] = None,
+        db: Optional[AnySession] = None,
         user_id: Optional[int] = None,
         save_to_db: bool = True
     ) -> StoryData:
@@ -164,16 +164,18 @@ Return ONLY the JSON object."""
                         generation_prompt += f", Scenario: {request.scenario}"
                     
                     # Check if similar story already exists to avoid duplicates
-                    existing_story = find_similar_story(
-                        db, 
+                    existing_story = await run_in_session(
+                        db,
+                        find_similar_story,
                         str(request.language.value), 
                         str(request.level.value), 
                         request.scenario
                     )
                     
                     if not existing_story:
-                        db_story = create_desi_story(
-                            db=db,
+                        db_story = await run_in_session(
+                            db,
+                            create_desi_story,
                             story_data=story_data,
                             target_language=str(request.language.value),
                             cefr_level=str(request.level.value),
@@ -196,7 +198,7 @@ Return ONLY the JSON object."""
     async def generate_custom_story(
         self, 
         request: StoryGenerationRequest, 
-        db: Optional[Session] = None,
+        db: Optional[AnySession] = None,
         user_id: Optional[int] = None,
         save_to_db: bool = True
     ) -> StoryData:
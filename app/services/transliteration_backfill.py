@@ -0,0 +1,340 @@
+"""
+Backfill for missing transliterations in stored lessons and stories.
+
+Rows are read in primary-key order and grouped per language into batches, so a
+single Gemini prompt transliterates many items at once. Batches run concurrently
+under a request rate limit, results are written with one bulk UPDATE per page,
+and the primary key up to which every row was transliterated is checkpointed per
+target, so an interrupted run resumes where it stopped and the next run retries
+rows whose batch failed. Lessons whose content changed get their stored
+snapshot re-rendered in the same transaction.
+"""
+import asyncio
+import json
+import os
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import bindparam, func, null, or_, update
+from sqlalchemy.orm import Session
+
+from app.api import crud
+from app.models.models import (
+    DesiDialogue, DesiExampleSentence, DesiLesson, DesiShortStory,
+    DesiStory, DesiStoryVocabulary, DesiVocabulary
+)
+from app.models.schemas import Language
+from app.services.gemini_service import gemini_service
+from app.utils.logger import api_logger
+
+# Languages that need transliteration (non-Latin scripts)
+NON_LATIN_LANGUAGES = {
+    language.value for language in (
+        Language.Arabic, Language.Assamese, Language.Bengali, Language.Gujarati,
+        Language.Hindi, Language.Japanese, Language.Kannada, Language.Korean,
+        Language.Malayalam, Language.Mandarin, Language.Marathi, Language.Odia,
+        Language.Punjabi, Language.Russian, Language.Tamil, Language.Telugu,
+        Language.Thai, Language.Urdu
+    )
+}
+
+# (id, native script text, english meaning, language)
+BackfillItem = Tuple[int, str, Optional[str], str]
+
+
+class BackfillTarget:
+    """A table with a transliteration column and how to reach its source text and language"""
+
+    def __init__(
+        self, name: str, model, source_column, language_column, english_column=None,
+        joins: Iterable = (), lesson_id_column=None
+    ):
+        self.name = name
+        self.model = model
+        self.source_column = source_column
+        self.language_column = language_column
+        self.english_column = english_column
+        self.joins = list(joins)
+        # Set for lesson content, whose lessons' snapshots must follow the update
+        self.lesson_id_column = lesson_id_column
+
+    def fetch_missing(self, db: Session, after_id: int, limit: int) -> List[BackfillItem]:
+        """Next page of rows with an empty transliteration, in primary-key order"""
+        english = self.english_column if self.english_column is not None else null()
+        query = db.query(self.model.id, self.source_column, english, self.language_column)
+        for parent, onclause in self.joins:
+            query = query.join(parent, onclause)
+
+        transliteration = self.model.transliteration
+        rows = query.filter(
+            self.model.id > after_id,
+            or_(transliteration.is_(None), func.trim(transliteration) == ""),
+            self.source_column.isnot(None),
+            self.language_column.in_(NON_LATIN_LANGUAGES)
+        ).order_by(self.model.id).limit(limit).all()
+
+        return [tuple(row) for row in rows]
+
+    def write(self, db: Session, transliterations: Dict[int, str]):
+        """Bulk UPDATE the transliteration column by primary key"""
+        if not transliterations:
+            return
+        table = self.model.__table__
+        statement = update(table).where(
+            table.c.id == bindparam("row_id")
+        ).values(transliteration=bindparam("value"))
+        db.execute(statement, [
+            {"row_id": row_id, "value": value} for row_id, value in transliterations.items()
+        ])
+
+        if self.lesson_id_column is not None:
+            query = db.query(self.lesson_id_column).select_from(self.model)
+            for parent, onclause in self.joins:
+                query = query.join(parent, onclause)
+            lesson_ids = [row[0] for row in query.filter(self.model.id.in_(list(transliterations))).distinct()]
+            crud.refresh_lesson_snapshots(db, lesson_ids)
+
+
+TARGETS: Dict[str, BackfillTarget] = {
+    "story_vocabulary": BackfillTarget(
+        "story_vocabulary", DesiStoryVocabulary,
+        source_column=DesiStoryVocabulary.definition,
+        english_column=DesiStoryVocabulary.word,
+        language_column=DesiStory.target_language,
+        joins=[(DesiStory, DesiStoryVocabulary.story_id == DesiStory.id)]
+    ),
+    "stories": BackfillTarget(
+        "stories", DesiStory,
+        source_column=DesiStory.translated_text,
+        language_column=DesiStory.target_language
+    ),
+    "lesson_vocabulary": BackfillTarget(
+        "lesson_vocabulary", DesiVocabulary,
+        source_column=DesiVocabulary.target_language_script,
+        english_column=DesiVocabulary.english,
+        language_column=DesiLesson.target_language,
+        joins=[(DesiLesson, DesiVocabulary.lesson_id == DesiLesson.id)],
+        lesson_id_column=DesiVocabulary.lesson_id
+    ),
+    "lesson_sentences": BackfillTarget(
+        "lesson_sentences", DesiExampleSentence,
+        source_column=DesiExampleSentence.target_language_script,
+        english_column=DesiExampleSentence.english,
+        language_column=DesiLesson.target_language,
+        joins=[(DesiLesson, DesiExampleSentence.lesson_id == DesiLesson.id)],
+        lesson_id_column=DesiExampleSentence.lesson_id
+    ),
+    "lesson_dialogue": BackfillTarget(
+        "lesson_dialogue", DesiDialogue,
+        source_column=DesiDialogue.target_language_script,
+        english_column=DesiDialogue.english,
+        language_column=DesiLesson.target_language,
+        joins=[
+            (DesiShortStory, DesiDialogue.short_story_id == DesiShortStory.id),
+            (DesiLesson, DesiShortStory.lesson_id == DesiLesson.id)
+        ],
+        lesson_id_column=DesiShortStory.lesson_id
+    ),
+}
+
+
+class RateLimiter:
+    """Spaces out request starts to stay under a requests-per-minute budget"""
+
+    def __init__(self, requests_per_minute: int):
+        self.interval = 60.0 / requests_per_minute if requests_per_minute > 0 else 0.0
+        self._next_slot = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            now = time.monotonic()
+            wait = self._next_slot - now
+            self._next_slot = max(now, self._next_slot) + self.interval
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+class TransliterationBackfill:
+    def __init__(
+        self,
+        batch_size: int = 40,
+        max_batch_chars: int = 6000,
+        max_concurrency: int = 4,
+        requests_per_minute: int = 60,
+        checkpoint_path: Optional[str] = None,
+        max_output_tokens: int = 8192,
+        dry_run: bool = False
+    ):
+        self.batch_size = batch_size
+        self.max_batch_chars = max_batch_chars
+        self.max_concurrency = max_concurrency
+        self.rate_limiter = RateLimiter(requests_per_minute)
+        self.checkpoint_path = checkpoint_path
+        self.max_output_tokens = max_output_tokens
+        self.dry_run = dry_run
+
+    # Checkpoints
+
+    def load_checkpoint(self) -> Dict[str, int]:
+        if not self.checkpoint_path or not os.path.exists(self.checkpoint_path):
+            return {}
+        with open(self.checkpoint_path, 'r') as f:
+            return json.load(f)
+
+    def save_checkpoint(self, checkpoint: Dict[str, int]):
+        if not self.checkpoint_path or self.dry_run:
+            return
+        # Write then rename so an interrupted run never leaves a truncated file
+        temp_path = f"{self.checkpoint_path}.tmp"
+        with open(temp_path, 'w') as f:
+            json.dump(checkpoint, f, indent=2)
+        os.replace(temp_path, self.checkpoint_path)
+
+    # Batching and prompting
+
+    def make_batches(self, items: List[BackfillItem]) -> List[List[BackfillItem]]:
+        """Group items by language, capped by item count and total text size"""
+        by_language: Dict[str, List[BackfillItem]] = {}
+        for item in items:
+            by_language.setdefault(item[3], []).append(item)
+
+        batches = []
+        for language_items in by_language.values():
+            batch, batch_chars = [], 0
+            for item in language_items:
+                item_chars = len(item[1])
+                if batch and (len(batch) >= self.batch_size or batch_chars + item_chars > self.max_batch_chars):
+                    batches.append(batch)
+                    batch, batch_chars = [], 0
+                batch.append(item)
+                batch_chars += item_chars
+            if batch:
+                batches.append(batch)
+        return batches
+
+    def build_prompt(self, language: str, batch: List[BackfillItem]) -> str:
+        entries = []
+        for row_id, text, english, _ in batch:
+            entry = {"id": str(row_id), "text": text}
+            if english:
+                entry["english"] = english
+            entries.append(entry)
+
+        return f"""You are an expert linguist. Provide the phonetic transliteration in the Latin alphabet for each {language} text below.
+Keep the punctuation and paragraph structure of each text. The "english" field, when present, is only context.
+
+Items:
+{json.dumps(entries, indent=2, ensure_ascii=False)}
+
+IMPORTANT: Respond with ONLY valid JSON in this EXACT format, with one entry for every id:
+{{
+  "id1": "transliteration1",
+  "id2": "transliteration2"
+}}"""
+
+    def parse_response(self, response_text: str, batch: List[BackfillItem]) -> Dict[int, str]:
+        response_text = response_text.strip()
+
+        # Remove markdown code blocks if present
+        if response_text.startswith('```json'):
+            response_text = response_text.replace('```json', '').replace('```', '').strip()
+        elif response_text.startswith('```'):
+            response_text = response_text.replace('```', '').strip()
+
+        # Find JSON content between braces
+        start_idx = response_text.find('{')
+        end_idx = response_text.rfind('}')
+        if start_idx == -1 or end_idx == -1:
+            raise ValueError(f"No valid JSON found in response: {response_text[:200]}")
+
+        parsed = json.loads(response_text[start_idx:end_idx + 1])
+
+        # Only accept ids we asked about, with non-empty values
+        results = {}
+        for row_id, _, _, _ in batch:
+            value = parsed.get(str(row_id))
+            if isinstance(value, str) and value.strip():
+                results[row_id] = value.strip()
+        return results
+
+    async def transliterate_batch(self, batch: List[BackfillItem], semaphore: asyncio.Semaphore) -> Dict[int, str]:
+        """Transliterate one batch; a failed batch is logged and returns nothing"""
+        language = batch[0][3]
+        async with semaphore:
+            await self.rate_limiter.acquire()
+            try:
+                response_text = await gemini_service.generate_completion(
+                    self.build_prompt(language, batch),
+                    max_output_tokens=self.max_output_tokens
+                )
+                return self.parse_response(response_text, batch)
+            except Exception as e:
+                api_logger.error(f"Transliteration batch of {len(batch)} {language} items failed: {str(e)}")
+                return {}
+
+    # Running
+
+    async def backfill_target(self, db: Session, target: BackfillTarget, checkpoint: Dict[str, int]) -> Dict[str, Any]:
+        """Backfill one target page by page, resuming after the checkpointed primary key"""
+        stats = {"target": target.name, "processed": 0, "updated": 0, "failed": 0, "batches": 0}
+        last_id = checkpoint.get(target.name, 0)
+        # Once a row fails the checkpoint stays before it, so the next run retries it
+        stalled = False
+        # One page keeps every concurrent slot busy with a full batch
+        page_size = self.batch_size * self.max_concurrency
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        while True:
+            items = target.fetch_missing(db, last_id, page_size)
+            # Don't hold the read transaction open while waiting on Gemini
+            db.commit()
+            if not items:
+                break
+
+            batches = self.make_batches(items)
+            results = await asyncio.gather(*(self.transliterate_batch(batch, semaphore) for batch in batches))
+
+            transliterations: Dict[int, str] = {}
+            for result in results:
+                transliterations.update(result)
+
+            if not self.dry_run:
+                target.write(db, transliterations)
+                db.commit()
+
+            last_id = items[-1][0]
+            if not stalled:
+                stalled = self.advance_checkpoint(checkpoint, target.name, items, transliterations)
+                self.save_checkpoint(checkpoint)
+
+            stats["processed"] += len(items)
+            stats["updated"] += len(transliterations)
+            stats["failed"] += len(items) - len(transliterations)
+            stats["batches"] += len(batches)
+            api_logger.info(
+                f"{target.name}: up to id {last_id}, {stats['updated']} updated, {stats['failed']} failed"
+            )
+
+        return stats
+
+    def advance_checkpoint(
+        self, checkpoint: Dict[str, int], target_name: str,
+        items: List[BackfillItem], transliterations: Dict[int, str]
+    ) -> bool:
+        """Move the checkpoint past the leading run of transliterated items; True if one failed"""
+        for row_id, _, _, _ in items:
+            if row_id not in transliterations:
+                return True
+            checkpoint[target_name] = row_id
+        return False
+
+    async def run(self, db: Session, target_names: Optional[Iterable[str]] = None) -> List[Dict[str, Any]]:
+        """Backfill the given targets (all of them by default) and return per-target stats"""
+        names = list(target_names) if target_names else list(TARGETS)
+        unknown = [name for name in names if name not in TARGETS]
+        if unknown:
+            raise ValueError(f"Unknown backfill targets: {', '.join(unknown)}")
+
+        checkpoint = self.load_checkpoint()
+        return [await self.backfill_target(db, TARGETS[name], checkpoint) for name in names]
@@ -0,0 +1,275 @@
+"""
+Speech synthesis backends used by TTSService.
+
+TTSService resolves voices, parameters and caching; a backend only turns text
+(or an SSML document with <mark> tags) into audio bytes:
+
+- GoogleTTSBackend calls Google Cloud TTS. Credentials are loaded on the first
+  request, so the app imports and starts without config/google_tts.json.
+- LocalTTSBackend makes no network calls. It waits a configurable latency and
+  returns valid silent audio (MP3, WAV or Ogg Opus) as long as real speech of
+  the same text, so load tests and benchmarks exercise the real code paths
+  with realistic payload sizes.
+
+Select one with the TTS_BACKEND setting.
+"""
+import abc
+import io
+import random
+import re
+import struct
+import threading
+import time
+import wave
+from pathlib import Path
+from typing import Any, Dict, Tuple
+from xml.sax.saxutils import unescape
+
+from google.cloud import texttospeech, texttospeech_v1beta1
+from google.oauth2 import service_account
+
+from app.utils.config import settings
+
+
+class TTSBackend(abc.ABC):
+    """Interface for speech synthesis backends"""
+
+    name = "base"
+
+    @abc.abstractmethod
+    def synthesize(self, text: str, params: Dict[str, Any]) -> bytes:
+        """
+        Audio for plain text
+
+        params is the dict built by TTSService._resolve_synthesis (language_code,
+        voice_name, detected_gender, speaking_rate, pitch, volume_gain_db,
+        audio_encoding, sample_rate_hertz).
+        """
+
+    @abc.abstractmethod
+    def synthesize_marked(self, ssml: str, params: Dict[str, Any]) -> Tuple[bytes, Dict[str, float]]:
+        """
+        MP3 audio for an SSML document, plus the time in seconds of each <mark> by name
+        """
+
+
+class GoogleTTSBackend(TTSBackend):
+    name = "google"
+
+    def __init__(self, credentials_path: Path):
+        self.credentials_path = credentials_path
+        self._client = None
+        # v1beta1 client for SSML mark timepoints, created on first batched synthesis
+        self._batch_client = None
+        self._lock = threading.Lock()
+        self._credentials = None
+
+    def _get_credentials(self):
+        if self._credentials is None:
+            if not self.credentials_path.exists():
+                raise FileNotFoundError(f"Google TTS credentials file not found at {self.credentials_path}")
+            # Load credentials from the JSON file
+            self._credentials = service_account.Credentials.from_service_account_file(
+                str(self.credentials_path),
+                scopes=['https://www.googleapis.com/auth/cloud-platform']
+            )
+        return self._credentials
+
+    @property
+    def client(self) -> texttospeech.TextToSpeechClient:
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    try:
+                        self._client = texttospeech.TextToSpeechClient(credentials=self._get_credentials())
+                    except Exception as e:
+                        print(f"Error initializing TTS client: {e}")
+                        raise
+        return self._client
+
+    @property
+    def batch_client(self) -> texttospeech_v1beta1.TextToSpeechClient:
+        """v1beta1 client (the only API version that returns SSML mark timepoints)"""
+        if self._batch_client is None:
+            with self._lock:
+                if self._batch_client is None:
+                    self._batch_client = texttospeech_v1beta1.TextToSpeechClient(credentials=self._get_credentials())
+        return self._batch_client
+
+    def _voice_and_audio_config(self, tts_module, params: Dict[str, Any]):
+        """VoiceSelectionParams and AudioConfig for resolved parameters (tts_module is texttospeech or v1beta1)"""
+        voice = tts_module.VoiceSelectionParams(
+            language_code=params["language_code"],
+            name=params["voice_name"],
+            # Configure voice parameters with appropriate gender
+            ssml_gender=tts_module.SsmlVoiceGender[params["detected_gender"].upper()]
+        )
+        audio_config = tts_module.AudioConfig(
+            audio_encoding=tts_module.AudioEncoding[params["audio_encoding"]],
+            speaking_rate=params["speaking_rate"],
+            pitch=params["pitch"],
+            volume_gain_db=params["volume_gain_db"],
+            sample_rate_hertz=params["sample_rate_hertz"] or 0  # 0 = the voice's native rate
+        )
+        return voice, audio_config
+
+    def synthesize(self, text: str, params: Dict[str, Any]) -> bytes:
+        voice, audio_config = self._voice_and_audio_config(texttospeech, params)
+        return self.client.synthesize_speech(
+            input=texttospeech.SynthesisInput(text=text),
+            voice=voice,
+            audio_config=audio_config
+        ).audio_content
+
+    def synthesize_marked(self, ssml: str, params: Dict[str, Any]) -> Tuple[bytes, Dict[str, float]]:
+        voice, audio_config = self._voice_and_audio_config(texttospeech_v1beta1, params)
+        response = self.batch_client.synthesize_speech(request=texttospeech_v1beta1.SynthesizeSpeechRequest(
+            input=texttospeech_v1beta1.SynthesisInput(ssml=ssml),
+            voice=voice,
+            audio_config=audio_config,
+            enable_time_pointing=[texttospeech_v1beta1.SynthesizeSpeechRequest.TimepointType.SSML_MARK]
+        ))
+        marks = {timepoint.mark_name: timepoint.time_seconds for timepoint in response.timepoints}
+        return response.audio_content, marks
+
+
+# MPEG-2 Layer III sample rates and their header sample rate index
+_MP3_SAMPLE_RATE_INDEX = {22050: 0, 24000: 1, 16000: 2}
+_MP3_BITRATE_KBPS = 32  # What Google returns for Standard voices
+_OPUS_PACKET_BYTES = 60  # 20 ms at 24 kbps
+
+_SSML_TOKEN = re.compile(r'<mark\s+name="([^"]*)"\s*/>|<break\s+time="(\d+)ms"\s*/>|<[^>]+>|([^<]+)')
+
+
+def _ogg_crc_table():
+    table = []
+    for index in range(256):
+        crc = index << 24
+        for _ in range(8):
+            crc = (((crc << 1) ^ 0x04C11DB7) if crc & 0x80000000 else crc << 1) & 0xFFFFFFFF
+        table.append(crc)
+    return table
+
+
+_OGG_CRC_TABLE = _ogg_crc_table()
+
+
+def _ogg_crc(data: bytes) -> int:
+    """CRC-32 as used by Ogg pages (polynomial 0x04C11DB7, not reflected)"""
+    crc = 0
+    for byte in data:
+        crc = ((crc << 8) & 0xFFFFFFFF) ^ _OGG_CRC_TABLE[(crc >> 24) ^ byte]
+    return crc
+
+
+class LocalTTSBackend(TTSBackend):
+    """
+    Offline stand-in: silent audio with the duration of real speech, after a simulated request latency
+
+    Timing model: ms_per_char of speech per input character at speaking rate 1.0,
+    plus a short lead-in and tail. MP3 is 32 kbps mono MPEG-2 Layer III (16, 22.05
+    or 24 kHz; other rates use 24 kHz), like Google's Standard voices.
+    """
+
+    name = "local"
+
+    def __init__(self, latency_ms: float = 150.0, jitter: float = 0.2, ms_per_char: float = 80.0):
+        self.latency_ms = latency_ms
+        self.jitter = jitter
+        self.ms_per_char = ms_per_char
+
+    def _wait(self):
+        if self.latency_ms > 0:
+            spread = self.latency_ms * self.jitter
+            time.sleep(max(0.0, random.uniform(self.latency_ms - spread, self.latency_ms + spread)) / 1000)
+
+    def _speech_ms(self, text: str, params: Dict[str, Any]) -> float:
+        return len(text.strip()) * self.ms_per_char / params["speaking_rate"]
+
+    def synthesize(self, text: str, params: Dict[str, Any]) -> bytes:
+        self._wait()
+        duration_ms = 150 + self._speech_ms(text, params) + 150
+        if params["audio_encoding"] == "LINEAR16":
+            return self._wav(duration_ms, params["sample_rate_hertz"] or 24000)
+        if params["audio_encoding"] == "OGG_OPUS":
+            return self._ogg_opus(duration_ms, params["sample_rate_hertz"] or 48000)
+        return self._mp3(duration_ms, params["sample_rate_hertz"])
+
+    def synthesize_marked(self, ssml: str, params: Dict[str, Any]) -> Tuple[bytes, Dict[str, float]]:
+        self._wait()
+        frame_ms = self._mp3_frame(params["sample_rate_hertz"])[1]
+        marks = {}
+        position_ms = 0.0
+        for mark_name, break_ms, text in _SSML_TOKEN.findall(ssml):
+            if mark_name:
+                # Real timepoints are not frame aligned either
+                marks[mark_name] = position_ms / 1000
+            elif break_ms:
+                position_ms += int(break_ms)
+            elif text:
+                position_ms += self._speech_ms(unescape(text), params)
+        return self._mp3(position_ms + frame_ms, params["sample_rate_hertz"]), marks
+
+    def _mp3_frame(self, sample_rate_hertz: int) -> Tuple[bytes, float]:
+        sample_rate = sample_rate_hertz if sample_rate_hertz in _MP3_SAMPLE_RATE_INDEX else 24000
+        header = bytes([
+            0xFF,
+            0xF3,  # MPEG-2, Layer III, no CRC
+            (4 << 4) | (_MP3_SAMPLE_RATE_INDEX[sample_rate] << 2),  # 32 kbps
+            0xC0   # Mono
+        ])
+        frame_length = 72 * _MP3_BITRATE_KBPS * 1000 // sample_rate
+        # All-zero side info and main data decode as silence
+        return header + bytes(frame_length - 4), 576 * 1000 / sample_rate
+
+    def _mp3(self, duration_ms: float, sample_rate_hertz: int) -> bytes:
+        frame, frame_ms = self._mp3_frame(sample_rate_hertz)
+        return frame * max(1, int(round(duration_ms / frame_ms)))
+
+    def _wav(self, duration_ms: float, sample_rate: int) -> bytes:
+        buffer = io.BytesIO()
+        with wave.open(buffer, 'wb') as wav_file:
+            wav_file.setnchannels(1)
+            wav_file.setsampwidth(2)
+            wav_file.setframerate(sample_rate)
+            wav_file.writeframes(bytes(int(sample_rate * duration_ms / 1000) * 2))
+        return buffer.getvalue()
+
+    def _ogg_opus(self, duration_ms: float, sample_rate: int) -> bytes:
+        serial = random.getrandbits(32)
+        pages = []
+
+        def page(packets, granule, flags):
+            segments = bytearray()
+            for packet in packets:
+                segments += bytes([255] * (len(packet) // 255) + [len(packet) % 255])
+            header = struct.pack(
+                "<4sBBqIIIB", b"OggS", 0, flags, granule, serial, len(pages), 0, len(segments)
+            ) + bytes(segments)
+            body = header + b"".join(packets)
+            crc = _ogg_crc(body)
+            pages.append(body[:22] + struct.pack("<I", crc) + body[26:])
+
+        pre_skip = 312
+        page([b"OpusHead" + struct.pack("<BBHIhB", 1, 1, pre_skip, sample_rate, 0, 0)], 0, 0x02)
+        page([b"OpusTags" + struct.pack("<I", 5) + b"local" + struct.pack("<I", 0)], 0, 0)
+
+        # CELT fullband 20 ms mono frames (TOC 0xF8)
+        packet = b"\xF8" + bytes(_OPUS_PACKET_BYTES - 1)
+        packet_count = max(1, int(round(duration_ms / 20)))
+        per_page = 50  # 1 s of audio per page
+        for first in range(0, packet_count, per_page):
+            count = min(per_page, packet_count - first)
+            granule = pre_skip + (first + count) * 960  # Opus granules count 48 kHz samples
+            page([packet] * count, granule, 0x04 if first + count == packet_count else 0)
+        return b"".join(pages)
+
+
+def create_tts_backend(name: str) -> TTSBackend:
+    """Backend for the TTS_BACKEND setting"""
+    if name == "google":
+        # Path to the service account key file (updated for new project structure)
+        return GoogleTTSBackend(Path(__file__).parent.parent.parent / "config" / "google_tts.json")
+    if name == "local":
+        return LocalTTSBackend(latency_ms=settings.TTS_LOCAL_LATENCY_MS)
+    raise ValueError(f"Unknown TTS_BACKEND '{name}' (expected 'google' or 'local')")
@@ -0,0 +1,391 @@
+"""
+Content-addressed cache for synthesized speech.
+
+Audio is stored on disk under the sha256 of everything that affects the output
+(text, language code, voice, rate, pitch, gain, codec and sample rate), so the
+same word in the same voice is synthesized once and then served from disk for
+every learner.
+An in-memory index tracks entry sizes in LRU order and evicts the least recently
+used files once the store grows past its size limit.
+
+Several processes (uvicorn workers, the generation worker) can share the cache
+directory. Each keeps its own index, built from the directory at startup; a
+clip another process wrote since is found at its content-addressed path on an
+index miss and adopted, so it is synthesized only once across processes. The
+size limit is enforced by each process against the clips in its own index, so
+with N processes the directory can grow to about N × TTS_CACHE_MAX_MB between
+restarts (a restart rebuilds the index from the whole directory and evicts down
+to the limit); size TTS_CACHE_MAX_MB with that in mind. Concurrent requests for the
+same missing clip wait on a single synthesis instead of each calling Google TTS,
+including clips synthesized together in one batched request (get_or_create_many).
+"""
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+from app.utils.config import settings
+from app.utils.logger import api_logger
+
+
+def make_cache_key(
+    text: str,
+    language_code: str,
+    voice_name: str,
+    speaking_rate: float,
+    pitch: float,
+    volume_gain_db: float,
+    audio_format: str,
+    sample_rate_hertz: Optional[int] = None
+) -> str:
+    """Stable key for one synthesis; numbers are rounded so 0.8 and 0.80000001 share a clip"""
+    key_data = [
+        text,
+        language_code,
+        voice_name,
+        round(float(speaking_rate), 3),
+        round(float(pitch), 3),
+        round(float(volume_gain_db), 3),
+        audio_format.upper()
+    ]
+    if sample_rate_hertz:
+        # Only part of the key when set, so clips at the voice's native rate keep their keys
+        key_data.append(int(sample_rate_hertz))
+    return hashlib.sha256(json.dumps(key_data, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+
+class TTSCache:
+    def __init__(self, cache_dir: str, max_bytes: int, enabled: bool = True):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+
+        self._lock = threading.Lock()
+        # key -> (file name, size in bytes), least recently used first
+        self._index: "OrderedDict[str, Tuple[str, int]]" = OrderedDict()
+        self._total_bytes = 0
+        self._inflight: Dict[str, Future] = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.write_errors = 0
+
+        if self.enabled:
+            self._load_index()
+
+    def _path_for(self, file_name: str) -> Path:
+        # Two-level fan-out keeps directories small
+        return self.cache_dir / file_name[:2] / file_name
+
+    def _load_index(self):
+        """Rebuild the index from disk, oldest access first"""
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            entries = []
+            for path in self.cache_dir.glob("*/*"):
+                if path.is_file() and not path.name.endswith(".tmp"):
+                    stat = path.stat()
+                    entries.append((stat.st_mtime, path.name, stat.st_size))
+        except OSError as e:
+            api_logger.error(f"TTS cache disabled, cannot use {self.cache_dir}: {str(e)}")
+            self.enabled = False
+            return
+
+        for _, file_name, size in sorted(entries):
+            self._index[file_name.split(".")[0]] = (file_name, size)
+            self._total_bytes += size
+        self._evict_locked()
+
+    def _evict_locked(self):
+        while self._total_bytes > self.max_bytes and self._index:
+            _, (file_name, size) = self._index.popitem(last=False)
+            self._total_bytes -= size
+            self.evictions += 1
+            try:
+                self._path_for(file_name).unlink()
+            except FileNotFoundError:
+                pass
+
+    def _adopt(self, key: str, extension: str) -> Optional[Tuple[str, int]]:
+        """Index a clip another process stored since our index was built"""
+        file_name = f"{key}.{extension}"
+        try:
+            size = self._path_for(file_name).stat().st_size
+        except OSError:
+            return None
+        with self._lock:
+            entry = self._index.get(key)
+            if entry is None:
+                entry = (file_name, size)
+                self._index[key] = entry
+                self._total_bytes += size
+                self._evict_locked()
+                if key not in self._index:
+                    return None
+            self._index.move_to_end(key)
+            return entry
+
+    def _touch(self, key: str, extension: str) -> Optional[Path]:
+        """Mark an entry as recently used and return its file, or None if it isn't cached"""
+        with self._lock:
+            entry = self._index.get(key)
+            if entry is not None:
+                self._index.move_to_end(key)
+        if entry is None:
+            entry = self._adopt(key, extension)
+            if entry is None:
+                return None
+
+        path = self._path_for(entry[0])
+        try:
+            # mtime doubles as last access so LRU order survives restarts
+            os.utime(path)
+        except FileNotFoundError:
+            # Removed behind our back - forget it and treat as a miss
+            self._forget(key, entry)
+            return None
+        except OSError:
+            pass
+        return path
+
+    def _forget(self, key: str, entry: Tuple[str, int]):
+        with self._lock:
+            if self._index.get(key) == entry:
+                del self._index[key]
+                self._total_bytes -= entry[1]
+
+    def _read(self, key: str, extension: str) -> Optional[bytes]:
+        path = self._touch(key, extension)
+        if path is None:
+            return None
+        try:
+            return path.read_bytes()
+        except FileNotFoundError:
+            # Evicted between the index lookup and the read
+            return None
+
+    def _write(self, key: str, extension: str, data: bytes):
+        file_name = f"{key}.{extension}"
+        path = self._path_for(file_name)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            temp_path = path.with_name(f"{file_name}.{threading.get_ident()}.tmp")
+            temp_path.write_bytes(data)
+            os.replace(temp_path, path)
+        except OSError as e:
+            self.write_errors += 1
+            api_logger.error(f"TTS cache write failed for {file_name}: {str(e)}")
+            return
+
+        with self._lock:
+            previous = self._index.pop(key, None)
+            if previous is not None:
+                self._total_bytes -= previous[1]
+            self._index[key] = (file_name, len(data))
+            self._total_bytes += len(data)
+            self._evict_locked()
+
+    def get(self, key: str, extension: str) -> Optional[bytes]:
+        """Cached audio for the key, or None"""
+        if not self.enabled:
+            return None
+        data = self._read(key, extension)
+        with self._lock:
+            if data is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return data
+
+    def put(self, key: str, extension: str, data: bytes):
+        """Store audio produced outside get_or_create"""
+        if self.enabled:
+            self._write(key, extension, data)
+
+    def get_or_create(self, key: str, extension: str, producer: Callable[[], bytes]) -> Tuple[bytes, bool]:
+        """
+        Return cached audio for the key, synthesizing it with producer on a miss.
+        Only one producer runs per key at a time; concurrent callers share its result.
+
+        Returns:
+            (audio bytes, whether the synthesis was avoided)
+        """
+        if not self.enabled:
+            return producer(), False
+
+        data = self._read(key, extension)
+        if data is not None:
+            with self._lock:
+                self.hits += 1
+            return data, True
+
+        with self._lock:
+            future = self._inflight.get(key)
+            is_leader = future is None
+            if is_leader:
+                future = Future()
+                self._inflight[key] = future
+                self.misses += 1
+            else:
+                self.coalesced += 1
+
+        if not is_leader:
+            return future.result(), True
+
+        try:
+            # Another leader may have stored it between our read and taking the slot
+            data = self._read(key, extension)
+            if data is None:
+                data = producer()
+                self._write(key, extension, data)
+            future.set_result(data)
+            return data, False
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def get_or_create_many(
+        self,
+        keys: List[str],
+        extension: str,
+        producer: Callable[[List[str]], List[Union[bytes, BaseException]]]
+    ) -> Dict[str, Tuple[Future, bool]]:
+        """
+        get_or_create for several keys whose audio is produced together
+
+        Each distinct missing key that no other caller is producing is claimed
+        for this caller, and producer makes the audio for all of them in one
+        call; it returns one clip or exception per key, in order. Keys another
+        caller is already producing are waited on instead, so concurrent batches
+        (or a batch and single requests) never synthesize the same clip twice.
+
+        Returns:
+            {key: (future of the audio bytes, whether the synthesis was avoided)};
+            a future raises if its clip couldn't be produced
+        """
+        results: Dict[str, Tuple[Future, bool]] = {}
+        led: Dict[str, Future] = {}
+        for key in dict.fromkeys(keys):
+            data = self._read(key, extension) if self.enabled else None
+            with self._lock:
+                if data is not None:
+                    self.hits += 1
+                    future = Future()
+                    future.set_result(data)
+                    results[key] = (future, True)
+                elif not self.enabled:
+                    led[key] = Future()
+                elif key in self._inflight:
+                    self.coalesced += 1
+                    results[key] = (self._inflight[key], True)
+                else:
+                    self.misses += 1
+                    led[key] = self._inflight[key] = Future()
+        if not led:
+            return results
+
+        missing = []
+        try:
+            for key, future in led.items():
+                # Another leader may have stored it between our read and taking the slot
+                data = self._read(key, extension) if self.enabled else None
+                if data is None:
+                    missing.append(key)
+                else:
+                    future.set_result(data)
+            produced = producer(missing) if missing else []
+            if len(produced) != len(missing):
+                raise ValueError(f"Expected {len(missing)} clips, got {len(produced)}")
+            for key, data in zip(missing, produced):
+                if isinstance(data, BaseException):
+                    led[key].set_exception(data)
+                else:
+                    if self.enabled:
+                        self._write(key, extension, data)
+                    led[key].set_result(data)
+        except BaseException as e:
+            for future in led.values():
+                if not future.done():
+                    future.set_exception(e)
+            if not isinstance(e, Exception):
+                raise
+        finally:
+            if self.enabled:
+                with self._lock:
+                    for key, future in led.items():
+                        if self._inflight.get(key) is future:
+                            del self._inflight[key]
+
+        for key, future in led.items():
+            results[key] = (future, key not in missing)
+        return results
+
+    def get_or_create_path(
+        self,
+        key: str,
+        extension: str,
+        producer: Callable[[], bytes]
+    ) -> Tuple[Optional[Path], Optional[bytes], bool]:
+        """
+        Like get_or_create, but a cached clip is returned as its file path without reading it,
+        so it can be sent straight from disk.
+
+        Returns:
+            (file path or None, audio bytes when they were produced or the file isn't available, cache hit)
+        """
+        if self.enabled:
+            path = self._touch(key, extension)
+            if path is not None:
+                with self._lock:
+                    self.hits += 1
+                return path, None, True
+
+        data, cache_hit = self.get_or_create(key, extension, producer)
+        path = self._touch(key, extension) if self.enabled else None
+        return path, data, cache_hit
+
+    def clear(self):
+        """Remove every cached clip"""
+        with self._lock:
+            entries = list(self._index.values())
+            self._index.clear()
+            self._total_bytes = 0
+        for file_name, _ in entries:
+            try:
+                self._path_for(file_name).unlink()
+            except FileNotFoundError:
+                pass
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            requests = self.hits + self.misses + self.coalesced
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._index),
+                "size_bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "hit_rate": round((self.hits + self.coalesced) / requests, 4) if requests else 0.0,
+                "evictions": self.evictions,
+                "write_errors": self.write_errors,
+                "in_flight": len(self._inflight)
+            }
+
+
+# Global TTS cache instance
+tts_cache = TTSCache(
+    cache_dir=settings.TTS_CACHE_DIR,
+    max_bytes=settings.TTS_CACHE_MAX_MB * 1024 * 1024,
+    enabled=settings.TTS_CACHE_ENABLED
+)
@@ -1,15 +1,35 @@
-import os
 import base64
-import tempfile
-from typing import Optional, Dict, Any
-from google.cloud import texttospeech
-from google.oauth2 import service_account
-import json
-from pathlib import Path
+from typing import Optional, Dict, Any, Iterator, List, Tuple, Union
+from xml.sax.saxutils import escape
+from concurrent.futures import Future, ThreadPoolExecutor
+from app.utils.config import settings
+from app.services.tts_backends import create_tts_backend
+from app.services.tts_cache import tts_cache, make_cache_key
+from app.utils.audio import parse_mp3, slice_mp3
+from app.utils.logger import api_logger
+
+# Output formats: Google encoding, MIME type, file extension
+AUDIO_FORMATS = {
+    "MP3": ("MP3", "audio/mpeg", "mp3"),
+    "OGG_OPUS": ("OGG_OPUS", "audio/ogg", "ogg"),  # Opus in Ogg; a fraction of the size of MP3 for speech
+    "WAV": ("LINEAR16", "audio/wav", "wav")
+}
+AUDIO_FORMAT_ALIASES = {"OGG": "OGG_OPUS", "OPUS": "OGG_OPUS", "LINEAR16": "WAV"}
+
+# Google TTS has no bitrate setting; output size is set by codec and sample rate.
+# None keeps the voice's native rate (24 kHz for the Standard voices).
+QUALITY_SAMPLE_RATES = {
+    "low": 16000,  # Plenty for single spoken words on mobile data
+    "standard": None,
+    "high": 48000
+}
 
 class TTSService:
     def __init__(self):
-        self.client = self._initialize_client()
+        # Google TTS, or the offline stand-in for load tests (see app/services/tts_backends.py)
+        self.backend = create_tts_backend(settings.TTS_BACKEND)
+        # Shared pool bounding concurrent Google TTS calls from this worker
+        self.executor = ThreadPoolExecutor(max_workers=settings.TTS_CONCURRENCY, thread_name_prefix="tts")
         
         # Language mapping for South Asian languages with gender-specific voices
         self.language_mappings = {
@@ -139,33 +159,21 @@ class TTSService:
             "Yamini", "Yashoda", "Yogita", "Yukti", "Yuvika", "Yashika", "Yamuna", "Yami"
         }
     
-    def _initialize_client(self) -> texttospeech.TextToSpeechClient:
-        """Initialize Google Cloud TTS client with service account credentials"""
-        try:
-            # Path to the service account key file (updated for new project structure)
-            credentials_path = Path(__file__).parent.parent.parent / "config" / "google_tts.json"
-            
-            if not credentials_path.exists():
-                raise FileNotFoundError(f"Google TTS credentials file not found at {credentials_path}")
-            
-            # Load credentials from the JSON file
-            credentials = service_account.Credentials.from_service_account_file(
-                str(credentials_path),
-                scopes=['https://www.googleapis.com/auth/cloud-platform']
-            )
-            
-            # Initialize the client
-            client = texttospeech.TextToSpeechClient(credentials=credentials)
-            return client
-            
-        except Exception as e:
-            print(f"Error initializing TTS client: {e}")
-            raise
-    
     def get_supported_languages(self) -> Dict[str, Dict[str, Any]]:
         """Get all supported languages and their voice options"""
         return self.language_mappings
     
+    def get_language_voices(self, language: str) -> List[str]:
+        """Voices configured for a language, default first; empty for an unsupported language"""
+        lang_config = self.language_mappings.get(language)
+        if lang_config is None:
+            return []
+        voices = [lang_config["default_voice"]]
+        for voice in lang_config.get("female_voices", []) + lang_config.get("male_voices", []):
+            if voice not in voices:
+                voices.append(voice)
+        return voices
+    
     def is_fallback_language(self, language: str) -> bool:
         """Check if a language is using a fallback voice"""
         if language in self.language_mappings:
@@ -226,6 +234,190 @@ class TTSService:
             # Use default voice for neutral/unknown gender
             return lang_config["default_voice"]
     
+    def _resolve_synthesis(
+        self,
+        language: str,
+        voice_name: Optional[str],
+        speaker_name: Optional[str],
+        speaking_rate: float,
+        pitch: float,
+        volume_gain_db: float,
+        audio_format: str,
+        quality: Optional[str] = None,
+        sample_rate_hertz: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """Voice, clamped parameters and output format for a synthesis request"""
+        # Validate language
+        if language not in self.language_mappings:
+            raise ValueError(f"Language '{language}' is not supported. Available languages: {list(self.language_mappings.keys())}")
+        
+        lang_config = self.language_mappings[language]
+        
+        # Voice selection priority: explicit voice_name > speaker-based gender voice > default voice
+        if voice_name:
+            selected_voice = voice_name
+        elif speaker_name:
+            selected_voice = self.get_voice_for_speaker(speaker_name, language)
+        else:
+            selected_voice = lang_config["default_voice"]
+        
+        # Unknown formats fall back to MP3, as they always have
+        audio_format = audio_format.upper()
+        audio_format = AUDIO_FORMAT_ALIASES.get(audio_format, audio_format)
+        if audio_format not in AUDIO_FORMATS:
+            audio_format = "MP3"
+        audio_encoding, content_type, extension = AUDIO_FORMATS[audio_format]
+        
+        if sample_rate_hertz is None and quality is not None:
+            if quality.lower() not in QUALITY_SAMPLE_RATES:
+                raise ValueError(f"Quality '{quality}' is not supported. Available qualities: {list(QUALITY_SAMPLE_RATES.keys())}")
+            sample_rate_hertz = QUALITY_SAMPLE_RATES[quality.lower()]
+        if sample_rate_hertz is not None and not 8000 <= sample_rate_hertz <= 48000:
+            raise ValueError("sample_rate_hertz must be between 8000 and 48000")
+        
+        return {
+            "language_code": lang_config["language_code"],
+            "voice_name": selected_voice,
+            "detected_gender": self.detect_gender_from_name(speaker_name) if speaker_name else "neutral",
+            # Validate parameters
+            "speaking_rate": max(0.25, min(4.0, speaking_rate)),
+            "pitch": max(-20.0, min(20.0, pitch)),
+            "volume_gain_db": max(-96.0, min(16.0, volume_gain_db)),
+            "audio_format": audio_format,
+            "audio_encoding": audio_encoding,
+            "content_type": content_type,
+            "extension": extension,
+            "sample_rate_hertz": sample_rate_hertz
+        }
+    
+    def synthesize_speech_bytes(
+        self, 
+        text: str, 
+        language: str, 
+        voice_name: Optional[str] = None,
+        speaker_name: Optional[str] = None,
+        speaking_rate: float = 1.0,
+        pitch: float = 0.0,
+        volume_gain_db: float = 0.0,
+        audio_format: str = "MP3",
+        quality: Optional[str] = None,
+        sample_rate_hertz: Optional[int] = None,
+        as_file: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Synthesize speech from text and return the raw audio
+        
+        Same arguments as synthesize_speech. With as_file=True a cached clip is
+        returned as its file path without being read into memory ("audio_path");
+        otherwise, or when the clip isn't on disk, the bytes are in "audio_bytes".
+        
+        Returns:
+            Dictionary containing raw audio and metadata
+        """
+        try:
+            params = self._resolve_synthesis(
+                language, voice_name, speaker_name, speaking_rate, pitch, volume_gain_db,
+                audio_format, quality, sample_rate_hertz
+            )
+            
+            # Perform the text-to-speech request, unless this exact clip is already cached
+            cache_key = self._cache_key(text, params)
+            producer = lambda: self.backend.synthesize(text, params)
+            
+            audio_path = None
+            if as_file:
+                audio_path, audio_bytes, cache_hit = tts_cache.get_or_create_path(cache_key, params["extension"], producer)
+            else:
+                audio_bytes, cache_hit = tts_cache.get_or_create(cache_key, params["extension"], producer)
+            
+            result = self._synthesis_result(text, language, params, speaker_name, audio_bytes, cache_key, cache_hit)
+            result["audio_path"] = audio_path
+            return result
+            
+        except Exception as e:
+            return {
+                "success": False,
+                "error": str(e),
+                "language": language,
+                "text": text
+            }
+    
+    def get_voice_name(self, language: str, voice_name: Optional[str] = None, speaker_name: Optional[str] = None) -> str:
+        """
+        Voice a synthesis with these arguments would use
+        
+        Raises:
+            ValueError: If the language is not supported
+        """
+        return self._resolve_synthesis(language, voice_name, speaker_name, 1.0, 0.0, 0.0, "MP3")["voice_name"]
+    
+    def get_synthesis_key(
+        self,
+        text: str,
+        language: str,
+        voice_name: Optional[str] = None,
+        speaker_name: Optional[str] = None,
+        speaking_rate: float = 1.0,
+        pitch: float = 0.0,
+        volume_gain_db: float = 0.0,
+        audio_format: str = "MP3",
+        quality: Optional[str] = None,
+        sample_rate_hertz: Optional[int] = None
+    ) -> str:
+        """
+        Cache key the same arguments to synthesize_speech_bytes would use, without synthesizing
+
+        Raises:
+            ValueError: If the language, format or quality isn't supported
+        """
+        params = self._resolve_synthesis(
+            language, voice_name, speaker_name, speaking_rate, pitch, volume_gain_db,
+            audio_format, quality, sample_rate_hertz
+        )
+        return self._cache_key(text, params)
+
+    def _cache_key(self, text: str, params: Dict[str, Any]) -> str:
+        return make_cache_key(
+            text, params["language_code"], params["voice_name"],
+            params["speaking_rate"], params["pitch"], params["volume_gain_db"],
+            params["audio_format"], params["sample_rate_hertz"]
+        )
+    
+    def _synthesis_result(
+        self,
+        text: str,
+        language: str,
+        params: Dict[str, Any],
+        speaker_name: Optional[str],
+        audio_bytes: bytes,
+        cache_key: str,
+        cache_hit: bool
+    ) -> Dict[str, Any]:
+        parameters = {
+            "speaking_rate": params["speaking_rate"],
+            "pitch": params["pitch"],
+            "volume_gain_db": params["volume_gain_db"]
+        }
+        if params["sample_rate_hertz"]:
+            parameters["sample_rate_hertz"] = params["sample_rate_hertz"]
+        return {
+            "success": True,
+            "audio_bytes": audio_bytes,
+            "audio_path": None,
+            "cache_key": cache_key,
+            "content_type": params["content_type"],
+            "language": language,
+            "language_code": params["language_code"],
+            "voice_name": params["voice_name"],
+            "text": text,
+            "audio_format": params["audio_format"],
+            "file_extension": params["extension"],
+            "detected_gender": params["detected_gender"],
+            "speaker_name": speaker_name,
+            "cache_hit": cache_hit,
+            "parameters": parameters
+        }
+    
     def synthesize_speech(
         self, 
         text: str, 
@@ -235,10 +427,12 @@ class TTSService:
         speaking_rate: float = 1.0,
         pitch: float = 0.0,
         volume_gain_db: float = 0.0,
-        audio_format: str = "MP3"
+        audio_format: str = "MP3",
+        quality: Optional[str] = None,
+        sample_rate_hertz: Optional[int] = None
     ) -> Dict[str, Any]:
         """
-        Synthesize speech from text using Google Cloud TTS
+        Synthesize speech from text using Google Cloud TTS, base64 encoded for JSON responses
         
         Args:
             text: Text to convert to speech
@@ -248,110 +442,344 @@ class TTSService:
             speaking_rate: Speech rate (0.25 to 4.0)
             pitch: Voice pitch (-20.0 to 20.0)
             volume_gain_db: Volume gain (-96.0 to 16.0)
-            audio_format: Audio format ("MP3" or "WAV")
+            audio_format: Audio format ("MP3", "OGG_OPUS" or "WAV")
+            quality: "low", "standard" or "high" output sample rate preset (optional)
+            sample_rate_hertz: Explicit output sample rate, overrides quality (optional)
             
         Returns:
             Dictionary containing audio content and metadata
         """
+        result = self.synthesize_speech_bytes(
+            text=text,
+            language=language,
+            voice_name=voice_name,
+            speaker_name=speaker_name,
+            speaking_rate=speaking_rate,
+            pitch=pitch,
+            volume_gain_db=volume_gain_db,
+            audio_format=audio_format,
+            quality=quality,
+            sample_rate_hertz=sample_rate_hertz
+        )
+        if result["success"]:
+            # Encode audio content as base64 for JSON response
+            result["audio_content"] = base64.b64encode(result.pop("audio_bytes")).decode('utf-8')
+            del result["audio_path"]
+        return result
+    
+    # Silence between batched items; clips are cut in the middle of it
+    SSML_BATCH_BREAK_MS = 400
+    # Google TTS rejects input over 5000 bytes; leave room for the markup
+    SSML_BATCH_MAX_BYTES = 4500
+
+    def synthesize_speech_batch(
+        self,
+        texts: List[str],
+        language: str,
+        voice_name: Optional[str] = None,
+        speaker_name: Optional[str] = None,
+        speaking_rate: float = 1.0,
+        pitch: float = 0.0,
+        volume_gain_db: float = 0.0
+    ) -> List[Dict[str, Any]]:
+        """
+        Synthesize many short texts in the same voice with as few Google TTS calls as possible
+
+        Uncached texts are joined into one SSML document with a <mark> before each
+        item, synthesized as MP3 in a single request, and cut into per-item clips at
+        the returned mark timepoints. A text that occurs twice is synthesized once,
+        and texts another request is already synthesizing are waited for. Clips are
+        stored in the TTS cache under their normal keys, so later single-item
+        requests hit the cache. If a batch fails, or TTS_SSML_BATCHING is off, items
+        are synthesized one by one instead.
+
+        Returns:
+            One synthesize_speech_bytes-style result per text, in order
+        """
         try:
-            # Validate language
-            if language not in self.language_mappings:
-                raise ValueError(f"Language '{language}' is not supported. Available languages: {list(self.language_mappings.keys())}")
-            
-            lang_config = self.language_mappings[language]
-            language_code = lang_config["language_code"]
-            
-            # Voice selection priority: explicit voice_name > speaker-based gender voice > default voice
-            if voice_name:
-                selected_voice = voice_name
-            elif speaker_name:
-                selected_voice = self.get_voice_for_speaker(speaker_name, language)
-            else:
-                selected_voice = lang_config["default_voice"]
-            
-            # Validate parameters
-            speaking_rate = max(0.25, min(4.0, speaking_rate))
-            pitch = max(-20.0, min(20.0, pitch))
-            volume_gain_db = max(-96.0, min(16.0, volume_gain_db))
-            
-            # Configure synthesis input
-            synthesis_input = texttospeech.SynthesisInput(text=text)
-            
-            # Configure voice parameters with appropriate gender
-            detected_gender = "neutral"
-            ssml_gender = texttospeech.SsmlVoiceGender.NEUTRAL
-            
-            if speaker_name:
-                detected_gender = self.detect_gender_from_name(speaker_name)
-                if detected_gender == "male":
-                    ssml_gender = texttospeech.SsmlVoiceGender.MALE
-                elif detected_gender == "female":
-                    ssml_gender = texttospeech.SsmlVoiceGender.FEMALE
-            
-            voice = texttospeech.VoiceSelectionParams(
-                language_code=language_code,
-                name=selected_voice,
-                ssml_gender=ssml_gender
+            params = self._resolve_synthesis(
+                language, voice_name, speaker_name, speaking_rate, pitch, volume_gain_db, "MP3"
             )
-            
-            # Configure audio format
-            if audio_format.upper() == "WAV":
-                audio_config = texttospeech.AudioConfig(
-                    audio_encoding=texttospeech.AudioEncoding.LINEAR16,
-                    speaking_rate=speaking_rate,
-                    pitch=pitch,
-                    volume_gain_db=volume_gain_db
-                )
-                content_type = "audio/wav"
-            else:  # Default to MP3
-                audio_config = texttospeech.AudioConfig(
-                    audio_encoding=texttospeech.AudioEncoding.MP3,
+        except Exception as e:
+            return [{"success": False, "error": str(e), "language": language, "text": text} for text in texts]
+
+        if not settings.TTS_SSML_BATCHING:
+            return [
+                self.synthesize_speech_bytes(
+                    text=text,
+                    language=language,
+                    voice_name=voice_name,
+                    speaker_name=speaker_name,
                     speaking_rate=speaking_rate,
                     pitch=pitch,
                     volume_gain_db=volume_gain_db
                 )
-                content_type = "audio/mpeg"
-            
-            # Perform the text-to-speech request
-            response = self.client.synthesize_speech(
-                input=synthesis_input,
-                voice=voice,
-                audio_config=audio_config
+                for text in texts
+            ]
+
+        return self._synthesize_batch([(text, language, params, speaker_name) for text in texts])
+
+    def _synthesize_batch(self, items: List[Tuple[str, str, Dict[str, Any], Optional[str]]]) -> List[Dict[str, Any]]:
+        """
+        synthesize_speech_batch for (text, language, resolved params, speaker name) items
+
+        The items share a voice, rate, pitch and gain (speakers and languages may
+        differ). Each distinct uncached text is synthesized once, and texts another
+        request is already synthesizing are waited for (TTSCache.get_or_create_many).
+        """
+        if not items:
+            return []
+        params = items[0][2]
+        texts_by_key = {}
+        keys = []
+        for text, _, item_params, _ in items:
+            cache_key = self._cache_key(text, item_params)
+            keys.append(cache_key)
+            texts_by_key.setdefault(cache_key, text)
+
+        clips = tts_cache.get_or_create_many(
+            keys, params["extension"],
+            lambda missing: self._synthesize_clips([texts_by_key[cache_key] for cache_key in missing], params)
+        )
+
+        results = []
+        for (text, language, item_params, speaker_name), cache_key in zip(items, keys):
+            future, cache_hit = clips[cache_key]
+            try:
+                audio_bytes = future.result()
+            except Exception as e:
+                results.append({"success": False, "error": str(e), "language": language, "text": text})
+                continue
+            results.append(self._synthesis_result(text, language, item_params, speaker_name, audio_bytes, cache_key, cache_hit))
+        return results
+
+    def _synthesize_clips(self, texts: List[str], params: Dict[str, Any]) -> List[Union[bytes, Exception]]:
+        """
+        MP3 clips for distinct texts in as few requests as possible, one clip or exception per text
+
+        If a batch fails its texts are synthesized one by one instead.
+        """
+        clips: List[Union[bytes, Exception]] = []
+        for chunk in self._ssml_batches(texts):
+            try:
+                clips.extend(self._synthesize_marked(chunk, params))
+                continue
+            except Exception as e:
+                api_logger.warning(f"Batched TTS failed for {len(chunk)} items, synthesizing them one by one: {str(e)}")
+            for text in chunk:
+                try:
+                    clips.append(self.backend.synthesize(text, params))
+                except Exception as e:
+                    clips.append(e)
+        return clips
+
+    def _ssml_batches(self, texts: List[str]) -> List[List[str]]:
+        """Split texts into batches under the item and request size limits"""
+        batches = []
+        current, current_bytes = [], 0
+        for text in texts:
+            size = len(escape(text).encode('utf-8')) + 60  # Item text plus its mark and break
+            if current and (len(current) >= settings.TTS_SSML_BATCH_MAX_ITEMS or current_bytes + size > self.SSML_BATCH_MAX_BYTES):
+                batches.append(current)
+                current, current_bytes = [], 0
+            current.append(text)
+            current_bytes += size
+        if current:
+            batches.append(current)
+        return batches
+
+    def _synthesize_marked(self, texts: List[str], params: Dict[str, Any]) -> List[bytes]:
+        """
+        One SSML request for several texts, cut into per-text MP3 clips
+
+        Raises:
+            ValueError: If the response is missing mark timepoints or isn't parseable MP3
+        """
+        pause = f'<break time="{self.SSML_BATCH_BREAK_MS}ms"/>'
+        ssml = "<speak>" + pause + "".join(
+            f'<mark name="item{index}"/>{escape(text)}{pause}' for index, text in enumerate(texts)
+        ) + "</speak>"
+
+        audio, marks = self.backend.synthesize_marked(ssml, params)
+        starts = [marks.get(f"item{index}") for index in range(len(texts))]
+        if any(start is None for start in starts) or starts != sorted(starts):
+            raise ValueError(f"Expected {len(texts)} ordered mark timepoints, got {len(marks)}")
+        starts = [start * 1000.0 for start in starts]
+
+        info = parse_mp3(audio)
+        # Cut halfway through the pause before each item, so every clip starts and ends in silence
+        lead_ms = self.SSML_BATCH_BREAK_MS / 2
+        cuts = [max(0.0, start - lead_ms) for start in starts] + [None]
+        clips = [slice_mp3(audio, info, cuts[index], cuts[index + 1]) for index in range(len(texts))]
+        if not all(clips):
+            raise ValueError("Mark timepoints fall outside the synthesized audio")
+        return clips
+
+    def get_lesson_audio_items(self, lesson_data: Dict[str, Any]) -> List[Tuple[str, Dict[str, Any], str, Dict[str, Any]]]:
+        """
+        Lesson items that get audio, in lesson order
+        
+        Returns:
+            (section, item, native script text, synthesis options) tuples
+        """
+        items = []
+        for vocab_item in lesson_data.get("vocabulary") or []:
+            text = self._get_target_script(vocab_item)
+            if text:
+                items.append(("vocabulary", vocab_item, text, {"speaking_rate": 0.8}))  # Slower for vocabulary learning
+        
+        for sentence in lesson_data.get("example_sentences") or []:
+            text = self._get_target_script(sentence)
+            if text:
+                items.append(("example_sentences", sentence, text, {"speaking_rate": 0.9}))  # Slightly slower for sentences
+        
+        for dialogue_item in (lesson_data.get("short_story") or {}).get("dialogue") or []:
+            text = self._get_target_script(dialogue_item)
+            if text:
+                items.append(("story_dialogue", dialogue_item, text, {"speaker_name": dialogue_item.get("speaker", "")}))
+        return items
+    
+    # Options that make an item ineligible for SSML batching (batches are always default-rate MP3)
+    _UNBATCHABLE_OPTIONS = ("quality", "sample_rate_hertz")
+
+    def submit_synthesis(self, jobs: List[Tuple[str, str, Dict[str, Any]]]) -> List[Tuple[Future, int]]:
+        """
+        Start synthesizing (text, language, synthesize_speech_bytes options) jobs on the shared TTS thread pool
+
+        Short MP3 jobs that resolve to the same voice, rate, pitch and gain are
+        synthesized together (as by synthesize_speech_batch) when TTS_SSML_BATCHING
+        is on; the rest get one request each. Cached clips are answered from the cache
+        either way.
+
+        Returns:
+            For each job, in order, a future returning a list of results and the job's position in that list
+        """
+        groups: Dict[Tuple, List[Tuple[int, Dict[str, Any]]]] = {}
+        singles = []
+        for index, (text, language, options) in enumerate(jobs):
+            batchable = (
+                settings.TTS_SSML_BATCHING
+                and len(text) <= settings.TTS_SSML_BATCH_MAX_CHARS
+                and options.get("audio_format", "MP3").upper() == "MP3"
+                and not any(options.get(name) for name in self._UNBATCHABLE_OPTIONS)
             )
-            
-            # Encode audio content as base64 for JSON response
-            audio_base64 = base64.b64encode(response.audio_content).decode('utf-8')
-            
+            params = None
+            if batchable:
+                try:
+                    params = self._resolve_synthesis(
+                        language, options.get("voice_name"), options.get("speaker_name"),
+                        options.get("speaking_rate", 1.0), options.get("pitch", 0.0),
+                        options.get("volume_gain_db", 0.0), "MP3"
+                    )
+                except ValueError:
+                    pass  # Unsupported language: the single request reports it
+            if params is None:
+                singles.append(index)
+                continue
+            # Speakers that resolve to the same voice share a batch
+            voice_key = (params["language_code"], params["voice_name"], params["speaking_rate"], params["pitch"], params["volume_gain_db"])
+            groups.setdefault(voice_key, []).append((index, params))
+        for key in [key for key, members in groups.items() if len(members) == 1]:
+            singles.extend(index for index, _ in groups.pop(key))
+
+        pending: List[Optional[Tuple[Future, int]]] = [None] * len(jobs)
+        for members in groups.values():
+            items = [
+                (jobs[index][0], jobs[index][1], params, jobs[index][2].get("speaker_name"))
+                for index, params in members
+            ]
+            future = self.executor.submit(self._synthesize_batch, items)
+            for position, (index, _) in enumerate(members):
+                pending[index] = (future, position)
+        for index in singles:
+            future = self.executor.submit(
+                lambda job: [self.synthesize_speech_bytes(text=job[0], language=job[1], **job[2])], jobs[index]
+            )
+            pending[index] = (future, 0)
+        return pending
+
+    def synthesize_many(self, jobs: List[Tuple[str, str, Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """
+        Synthesize (text, language, options) jobs concurrently (see submit_synthesis)
+
+        Returns:
+            synthesize_speech_bytes results in job order
+        """
+        return [future.result()[position] for future, position in self.submit_synthesis(jobs)]
+
+    def iter_lesson_clips(self, lesson_data: Dict[str, Any], language: str) -> Iterator[Tuple[str, Dict[str, Any], str, Dict[str, Any]]]:
+        """
+        Synthesize raw audio for every lesson item concurrently (see submit_synthesis)
+
+        All requests are submitted up front; each item is yielded as soon as it and
+        every item before it are ready.
+
+        Yields:
+            (section, item, native script text, synthesize_speech_bytes result) tuples in lesson order
+        """
+        items = self.get_lesson_audio_items(lesson_data)
+        pending = self.submit_synthesis([(text, language, options) for _, _, text, options in items])
+        for (section, item, text, _), (future, position) in zip(items, pending):
+            yield section, item, text, future.result()[position]
+
+    def synthesize_lesson_clips(self, lesson_data: Dict[str, Any], language: str) -> List[Tuple[str, Dict[str, Any], str, Dict[str, Any]]]:
+        """
+        Synthesize raw audio for every lesson item (see iter_lesson_clips)
+
+        Returns:
+            (section, item, native script text, synthesize_speech_bytes result) tuples in lesson order
+        """
+        return list(self.iter_lesson_clips(lesson_data, language))
+
+    def lesson_audio_entry(
+        self,
+        section: str,
+        item: Dict[str, Any],
+        text: str,
+        audio: str,
+        content_type: str,
+        voice_name: Optional[str] = None,
+        detected_gender: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """One entry of a lesson audio response section"""
+        if section == "vocabulary":
             return {
-                "success": True,
-                "audio_content": audio_base64,
-                "content_type": content_type,
-                "language": language,
-                "language_code": language_code,
-                "voice_name": selected_voice,
-                "text": text,
-                "audio_format": audio_format.upper(),
-                "detected_gender": detected_gender,
-                "speaker_name": speaker_name,
-                "parameters": {
-                    "speaking_rate": speaking_rate,
-                    "pitch": pitch,
-                    "volume_gain_db": volume_gain_db
-                }
+                "word": item.get("english", ""),
+                "target_script": text,
+                "audio": audio,
+                "content_type": content_type
             }
-            
-        except Exception as e:
+        if section == "example_sentences":
             return {
-                "success": False,
-                "error": str(e),
-                "language": language,
-                "text": text
+                "english": item.get("english", ""),
+                "target_script": text,
+                "audio": audio,
+                "content_type": content_type
             }
+        return {
+            "speaker": item.get("speaker", ""),
+            "english": item.get("english", ""),
+            "target_script": text,
+            "audio": audio,
+            "content_type": content_type,
+            "voice_used": voice_name,
+            "detected_gender": detected_gender or "neutral"
+        }
+    
+    def lesson_audio_error(self, section: str, item: Dict[str, Any]) -> str:
+        if section == "vocabulary":
+            return f"Failed to generate audio for vocabulary: {item.get('english', '')}"
+        if section == "example_sentences":
+            return f"Failed to generate audio for sentence: {item.get('english', '')}"
+        return f"Failed to generate audio for dialogue: {item.get('speaker', '')}"
     
     def synthesize_lesson_audio(self, lesson_data: Dict[str, Any], language: str) -> Dict[str, Any]:
         """
         Generate audio for all components of a lesson
         
+        Items are synthesized concurrently on the shared TTS thread pool; results
+        keep the lesson order and a failed item doesn't stop the others.
+        
         Args:
             lesson_data: Complete lesson data from database
             language: Target language
@@ -368,66 +796,17 @@ class TTSService:
         }
         
         try:
-            # Generate audio for vocabulary items
-            if "vocabulary" in lesson_data:
-                for vocab_item in lesson_data["vocabulary"]:
-                    if "target_script" in vocab_item:
-                        audio_result = self.synthesize_speech(
-                            text=vocab_item["target_script"],
-                            language=language,
-                            speaking_rate=0.8  # Slower for vocabulary learning
-                        )
-                        if audio_result["success"]:
-                            audio_content["vocabulary"].append({
-                                "word": vocab_item.get("english", ""),
-                                "target_script": vocab_item["target_script"],
-                                "audio": audio_result["audio_content"],
-                                "content_type": audio_result["content_type"]
-                            })
-                        else:
-                            audio_content["errors"].append(f"Failed to generate audio for vocabulary: {vocab_item.get('english', '')}")
-            
-            # Generate audio for example sentences
-            if "example_sentences" in lesson_data:
-                for sentence in lesson_data["example_sentences"]:
-                    if "target_script" in sentence:
-                        audio_result = self.synthesize_speech(
-                            text=sentence["target_script"],
-                            language=language,
-                            speaking_rate=0.9  # Slightly slower for sentences
-                        )
-                        if audio_result["success"]:
-                            audio_content["example_sentences"].append({
-                                "english": sentence.get("english", ""),
-                                "target_script": sentence["target_script"],
-                                "audio": audio_result["audio_content"],
-                                "content_type": audio_result["content_type"]
-                            })
-                        else:
-                            audio_content["errors"].append(f"Failed to generate audio for sentence: {sentence.get('english', '')}")
-            
-            # Generate audio for story dialogue
-            if "short_story" in lesson_data and "dialogue" in lesson_data["short_story"]:
-                for dialogue_item in lesson_data["short_story"]["dialogue"]:
-                    if "target_script" in dialogue_item:
-                        speaker_name = dialogue_item.get("speaker", "")
-                        audio_result = self.synthesize_speech(
-                            text=dialogue_item["target_script"],
-                            language=language,
-                            speaker_name=speaker_name
-                        )
-                        if audio_result["success"]:
-                            audio_content["story_dialogue"].append({
-                                "speaker": speaker_name,
-                                "english": dialogue_item.get("english", ""),
-                                "target_script": dialogue_item["target_script"],
-                                "audio": audio_result["audio_content"],
-                                "content_type": audio_result["content_type"],
-                                "voice_used": audio_result["voice_name"],
-                                "detected_gender": audio_result.get("detected_gender", "neutral")
-                            })
-                        else:
-                            audio_content["errors"].append(f"Failed to generate audio for dialogue: {speaker_name}")
+            for section, item, text, audio_result in self.synthesize_lesson_clips(lesson_data, language):
+                if audio_result["success"]:
+                    audio_content[section].append(self.lesson_audio_entry(
+                        section, item, text,
+                        audio=base64.b64encode(audio_result["audio_bytes"]).decode('utf-8'),
+                        content_type=audio_result["content_type"],
+                        voice_name=audio_result["voice_name"],
+                        detected_gender=audio_result.get("detected_gender")
+                    ))
+                else:
+                    audio_content["errors"].append(self.lesson_audio_error(section, item))
             
             if audio_content["errors"]:
                 audio_content["success"] = False
@@ -438,5 +817,9 @@ class TTSService:
         
         return audio_content
 
+    def _get_target_script(self, item: Dict[str, Any]) -> str:
+        """Native script text of a lesson item (stored lessons use target_language_script)"""
+        return item.get("target_language_script") or item.get("target_script") or ""
+
 # Global TTS service instance
 tts_service = TTSService()
\ No newline at end of file
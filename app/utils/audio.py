@@ -0,0 +1,172 @@
+"""
+Minimal MP3 helpers for bundling and splitting TTS clips.
+
+MP3 is a sequence of self-contained frames, so clips with the same sample rate
+can be joined by concatenating their frames and cut at any frame boundary
+without re-encoding. Only what Google TTS produces is handled: MPEG 1/2/2.5
+Layer III, optionally wrapped in ID3 tags and led by a Xing/Info header frame.
+"""
+from typing import List, Optional, Tuple
+
+# Layer III bitrates in kbps by bitrate index
+_BITRATES_MPEG1 = [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320]
+_BITRATES_MPEG2 = [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160]
+
+# Sample rates by version bits (3 = MPEG1, 2 = MPEG2, 0 = MPEG2.5) and sample rate index
+_SAMPLE_RATES = {
+    3: [44100, 48000, 32000],
+    2: [22050, 24000, 16000],
+    0: [11025, 12000, 8000]
+}
+
+
+class MP3Info:
+    """Frame layout of an MP3 stream; frames are (offset, length) into the original bytes"""
+
+    def __init__(self, sample_rate: int, samples_per_frame: int, frames: List[Tuple[int, int]]):
+        self.sample_rate = sample_rate
+        self.samples_per_frame = samples_per_frame
+        self.frames = frames
+
+    @property
+    def frame_duration_ms(self) -> float:
+        return self.samples_per_frame * 1000.0 / self.sample_rate
+
+    @property
+    def duration_ms(self) -> float:
+        return len(self.frames) * self.frame_duration_ms
+
+
+def _skip_id3v2(data: bytes) -> int:
+    """Offset of the first byte after a leading ID3v2 tag (0 if there is none)"""
+    if len(data) < 10 or data[:3] != b"ID3":
+        return 0
+    # Tag size is a 28-bit "synchsafe" integer; the footer flag adds another 10 bytes
+    size = (data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9]
+    footer = 10 if data[5] & 0x10 else 0
+    return 10 + size + footer
+
+
+def _parse_header(data: bytes, offset: int) -> Optional[Tuple[int, int, int, int]]:
+    """(frame length, sample rate, samples per frame, version bits) for a Layer III header, else None"""
+    if offset + 4 > len(data):
+        return None
+    b1, b2 = data[offset + 1], data[offset + 2]
+    if data[offset] != 0xFF or (b1 & 0xE0) != 0xE0:
+        return None
+
+    version = (b1 >> 3) & 0x03
+    layer = (b1 >> 1) & 0x03
+    bitrate_index = b2 >> 4
+    sample_rate_index = (b2 >> 2) & 0x03
+    padding = (b2 >> 1) & 0x01
+    if version == 1 or layer != 1 or bitrate_index in (0, 15) or sample_rate_index == 3:
+        return None
+
+    sample_rate = _SAMPLE_RATES[version][sample_rate_index]
+    if version == 3:
+        bitrate = _BITRATES_MPEG1[bitrate_index] * 1000
+        samples_per_frame = 1152
+    else:
+        bitrate = _BITRATES_MPEG2[bitrate_index] * 1000
+        samples_per_frame = 576
+
+    frame_length = samples_per_frame // 8 * bitrate // sample_rate + padding
+    return frame_length, sample_rate, samples_per_frame, version
+
+
+def _is_vbr_header_frame(data: bytes, offset: int, version: int) -> bool:
+    """Xing/Info/VBRI frames carry metadata only and must not end up inside a joined stream"""
+    mono = (data[offset + 3] >> 6) == 3
+    if version == 3:
+        side_info = 17 if mono else 32
+    else:
+        side_info = 9 if mono else 17
+    tag_offset = offset + 4 + side_info
+    return (
+        data[tag_offset:tag_offset + 4] in (b"Xing", b"Info")
+        or data[offset + 36:offset + 40] == b"VBRI"
+    )
+
+
+def parse_mp3(data: bytes) -> MP3Info:
+    """
+    Locate the audio frames of an MP3 clip
+
+    Raises:
+        ValueError: If the data has no Layer III frames or mixes sample rates
+    """
+    end = len(data)
+    if end >= 128 and data[end - 128:end - 125] == b"TAG":
+        end -= 128  # ID3v1 tag
+
+    offset = _skip_id3v2(data)
+    frames = []
+    sample_rate = samples_per_frame = None
+    while offset < end:
+        header = _parse_header(data, offset)
+        if header is None:
+            # Resynchronise on the next frame sync (tolerates junk between frames)
+            offset += 1
+            continue
+
+        frame_length, frame_rate, frame_samples, version = header
+        if offset + frame_length > end:
+            break  # Truncated last frame
+        if sample_rate is None:
+            sample_rate, samples_per_frame = frame_rate, frame_samples
+            if _is_vbr_header_frame(data, offset, version):
+                offset += frame_length
+                continue
+        elif frame_rate != sample_rate:
+            raise ValueError("MP3 stream changes sample rate")
+
+        frames.append((offset, frame_length))
+        offset += frame_length
+
+    if not frames:
+        raise ValueError("No MP3 audio frames found")
+    return MP3Info(sample_rate, samples_per_frame, frames)
+
+
+def concatenate_mp3(clips: List[bytes]) -> Tuple[bytes, List[Tuple[float, float]]]:
+    """
+    Join MP3 clips frame by frame into one stream
+
+    Returns:
+        (joined MP3, (start_ms, end_ms) of each clip in the joined stream)
+
+    Raises:
+        ValueError: If a clip isn't MP3 or the clips use different sample rates
+    """
+    output = bytearray()
+    timings = []
+    position_ms = 0.0
+    sample_rate = None
+    for clip in clips:
+        info = parse_mp3(clip)
+        if sample_rate is None:
+            sample_rate = info.sample_rate
+        elif info.sample_rate != sample_rate:
+            raise ValueError(f"Cannot join MP3 clips at {sample_rate} Hz and {info.sample_rate} Hz")
+
+        for offset, length in info.frames:
+            output += clip[offset:offset + length]
+        timings.append((position_ms, position_ms + info.duration_ms))
+        position_ms += info.duration_ms
+
+    return bytes(output), timings
+
+
+def slice_mp3(data: bytes, info: MP3Info, start_ms: float, end_ms: Optional[float] = None) -> bytes:
+    """
+    Cut the frames starting in [start_ms, end_ms) out of a parsed MP3 stream
+
+    Cuts land on the nearest frame boundary (~24-26 ms). Layer III frames may borrow
+    bits from the previous frame, so the first frame of a cut can decode as a short
+    click; cut inside silence where that matters.
+    """
+    frame_ms = info.frame_duration_ms
+    first = max(0, int(round(start_ms / frame_ms)))
+    last = len(info.frames) if end_ms is None else min(len(info.frames), int(round(end_ms / frame_ms)))
+    return b"".join(data[offset:offset + length] for offset, length in info.frames[first:last])
@@ -23,7 +23,45 @@ class Settings(BaseSettings):
     PG_STATEMENT_TIMEOUT: int = 30000  # 30 seconds for statement timeout
     PG_ECHO_POOL: bool = False  # Set to True for connection pool debugging
     PG_ECHO_SQL: bool = False  # Set to True for SQL query debugging
-    
+
+    # Idempotency-Key handling for generation endpoints
+    IDEMPOTENCY_TTL_SECONDS: int = 86400  # Keep completed responses for 24 hours
+    IDEMPOTENCY_MAX_ENTRIES: int = 10000  # Upper bound on stored responses per worker
+
+    # Background generation jobs (see app/workers/generation_worker.py)
+    JOB_LEASE_SECONDS: int = 300  # A job still running after this long is assumed abandoned and reclaimed
+    JOB_MAX_ATTEMPTS: int = 3
+    JOB_RETRY_DELAY_SECONDS: int = 10  # Multiplied by the attempt number
+    JOB_POLL_INTERVAL_SECONDS: float = 1.0  # Worker queue polling and client long-poll interval
+    JOB_WORKER_CONCURRENCY: int = 4  # Jobs processed at once by each worker process
+    JOB_WAIT_MAX_SECONDS: int = 30  # Upper bound for GET /api/jobs/{id}?wait=
+    JOB_EVENTS_MAX_SECONDS: int = 300  # Upper bound for an SSE subscription
+
+    # Build lesson quizzes locally from the generated vocabulary instead of asking Gemini (saves tokens)
+    LOCAL_QUIZ_GENERATION: bool = False
+
+    # Content-addressed cache for synthesized speech (see app/services/tts_cache.py)
+    TTS_CACHE_ENABLED: bool = True
+    TTS_CACHE_DIR: str = "audio_cache/tts"
+    TTS_CACHE_MAX_MB: int = 2048  # Per process: least recently used clips are evicted past this size (see app/services/tts_cache.py)
+    LESSON_AUDIO_PRERENDER: bool = True  # Queue audio rendering when a lesson is created
+    LESSON_AUDIO_DIR: str = "audio_cache/lessons"  # Pre-rendered clips and manifests, one directory per lesson; share it between API and worker hosts (see app/services/lesson_audio.py)
+    TTS_CONCURRENCY: int = 8  # Parallel Google TTS requests per worker (lesson audio is synthesized concurrently)
+    TTS_BACKEND: str = "google"  # "google", or "local" for an offline stand-in that returns silent audio (load tests, benchmarks)
+    TTS_LOCAL_LATENCY_MS: int = 150  # Simulated request latency of the local backend
+    TTS_SSML_BATCHING: bool = True  # Synthesize short same-voice items in one SSML request, split on <mark> timepoints
+    TTS_SSML_BATCH_MAX_ITEMS: int = 25  # Items per batched request
+    TTS_SSML_BATCH_MAX_CHARS: int = 200  # Longer items are synthesized on their own
+    STORY_AUDIO_DIR: str = "audio_cache/stories"  # Story narration tracks and sentence manifests, per story and voice
+    STORY_AUDIO_MAX_CHUNK_CHARS: int = 1500  # Google TTS takes 5000 bytes per request; Indic scripts use 3 bytes per character
+
+    # Per-worker cache of rendered lesson responses (see app/services/lesson_cache.py)
+    LESSON_CACHE_ENABLED: bool = True
+    LESSON_CACHE_MAX_MB: int = 64  # Least recently used lessons are evicted past this size
+    LESSON_CACHE_TTL_SECONDS: int = 600  # Bounds staleness when a lesson change notification is missed
+    LESSON_CACHE_WARM_COUNT: int = 20  # Lessons per language loaded at startup (0 disables warm-up)
+    LESSON_CATALOG_TTL_SECONDS: int = 60  # Per-language lesson counts and numbers (see app/services/lesson_catalog.py)
+
     class Config:
         env_file = ".env"
         extra = "ignore"
@@ -53,9 +91,23 @@ class Settings(BaseSettings):
             'echo': self.PG_ECHO_SQL,
             'echo_pool': self.PG_ECHO_POOL,
             'connect_args': {
-                'options': f'-c statement_timeout={self.PG_STATEMENT_TIMEOUT}ms',
+                # Sessions in UTC: timestamps without time zone hold UTC, whatever the server's TimeZone
+                'options': f'-c statement_timeout={self.PG_STATEMENT_TIMEOUT}ms -c timezone=UTC',
+                'application_name': 'DesiLanguage-API'
+            }
+        }
+
+    @property
+    def get_async_pg_connection_params(self) -> dict:
+        """Connection parameters for the asyncpg engine (server settings instead of libpq options)"""
+        params = self.get_pg_connection_params
+        params['connect_args'] = {
+            'server_settings': {
+                'statement_timeout': str(self.PG_STATEMENT_TIMEOUT),
+                'timezone': 'UTC',
                 'application_name': 'DesiLanguage-API'
             }
         }
+        return params
 
 settings = Settings()
\ No newline at end of file
@@ -1,9 +1,13 @@
 from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 from sqlalchemy.pool import QueuePool
 from app.utils.config import settings
+from typing import Union
 import logging
+import re
 
 # Enhanced PostgreSQL database configuration with Oracle migration insights
 # Applying performance best practices learned from Oracle migration
@@ -63,17 +67,89 @@ SessionLocal = sessionmaker(
     expire_on_commit=False
 )
 
+# Async engine for async def routes: queries are awaited on asyncpg instead of
+# blocking the event loop. Same database and pool settings as the sync engine,
+# which the sync routes, scripts and the job worker keep using.
+async_pg_params = settings.get_async_pg_connection_params
+
+# libpq connection parameters asyncpg has no keyword for; certificate files
+# have to be passed as an ssl.SSLContext in connect_args instead
+_LIBPQ_ONLY_PARAMS = {
+    'sslcert', 'sslkey', 'sslrootcert', 'sslcrl', 'sslpassword', 'sslcompression',
+    'gssencmode', 'krbsrvname', 'keepalives', 'keepalives_idle', 'keepalives_interval',
+    'keepalives_count', 'tcp_user_timeout', 'client_encoding', 'requiressl'
+}
+
+def asyncpg_url_and_connect_args(db_url: str, connect_args: dict):
+    """
+    The database URL for asyncpg, with its libpq query parameters moved into connect_args
+
+    asyncpg takes the URL query as keyword arguments and rejects libpq's:
+    sslmode becomes ssl, connect_timeout becomes timeout, and application_name
+    and "-c name=value" options become server settings (connect_args wins over
+    the URL, as it does for psycopg2). Parameters asyncpg can't take are dropped
+    with a warning.
+    """
+    url = make_url(db_url).set(drivername="postgresql+asyncpg")
+    query = dict(url.query)
+    connect_args = dict(connect_args)
+    server_settings = dict(connect_args.get('server_settings', {}))
+
+    if 'sslmode' in query:
+        connect_args.setdefault('ssl', query.pop('sslmode'))
+    if 'connect_timeout' in query:
+        connect_args.setdefault('timeout', float(query.pop('connect_timeout')))
+    if 'application_name' in query:
+        server_settings.setdefault('application_name', query.pop('application_name'))
+    if 'options' in query:
+        for name, value in re.findall(r"-c\s*([\w.]+)=(\S+)", query.pop('options')):
+            server_settings.setdefault(name, value)
+
+    dropped = sorted(_LIBPQ_ONLY_PARAMS.intersection(query))
+    if dropped:
+        db_logger.warning(f"Ignoring database URL parameters asyncpg doesn't support: {', '.join(dropped)}")
+        for name in dropped:
+            del query[name]
+
+    connect_args['server_settings'] = server_settings
+    return url.set(query=query), connect_args
+
+async_db_url, async_connect_args = asyncpg_url_and_connect_args(settings.db_url, async_pg_params['connect_args'])
+
+async_engine = create_async_engine(
+    async_db_url,
+    pool_size=async_pg_params['pool_size'],
+    max_overflow=async_pg_params['max_overflow'],
+    pool_recycle=async_pg_params['pool_recycle'],
+    pool_pre_ping=async_pg_params['pool_pre_ping'],
+    pool_timeout=async_pg_params['pool_timeout'],
+    echo=async_pg_params['echo'],
+    echo_pool=async_pg_params['echo_pool'],
+    connect_args=async_connect_args,
+    execution_options={"isolation_level": "READ_COMMITTED"}
+)
+
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False
+)
+
 # Database connection pool monitoring (inspired by Oracle pool monitoring)
 def get_pool_status():
     """Get PostgreSQL connection pool status for monitoring"""
     try:
         pool = engine.pool
+        async_pool = async_engine.pool
         return {
             "status": "active",
             "pool_size": pool.size(),
             "checked_in": pool.checkedin(),
             "checked_out": pool.checkedout(),
             "overflow": pool.overflow(),
+            "async_checked_in": async_pool.checkedin(),
+            "async_checked_out": async_pool.checkedout(),
         }
     except Exception as e:
         return {
@@ -93,6 +169,31 @@ def get_db():
     finally:
         db.close()
 
+async def get_async_db():
+    """Dependency to get an async database session, for async def routes"""
+    async with AsyncSessionLocal() as db:
+        try:
+            yield db
+        except Exception as e:
+            db_logger.error(f"Database session error: {str(e)}")
+            await db.rollback()
+            raise
+
+# Services shared by async routes and the (sync) job worker and scripts take either
+AnySession = Union[Session, AsyncSession]
+
+async def run_in_session(db: AnySession, fn, *args, **kwargs):
+    """
+    Call fn(session, *args, **kwargs) written for a sync Session with either kind of session
+
+    With an AsyncSession, fn runs through AsyncSession.run_sync, so its queries
+    (lazy loads included) are awaited on asyncpg; a sync Session is passed as is.
+    Lets services shared with the job worker and scripts serve async routes.
+    """
+    if isinstance(db, AsyncSession):
+        return await db.run_sync(fn, *args, **kwargs)
+    return fn(db, *args, **kwargs)
+
 # Health check function for database connectivity
 def check_db_health():
     """Check database health and connectivity"""
@@ -132,6 +233,14 @@ def close_db():
     except Exception as e:
         db_logger.error(f"❌ Error closing database connections: {str(e)}")
 
+async def close_async_db():
+    """Clean shutdown of the async engine's connections"""
+    try:
+        await async_engine.dispose()
+        db_logger.info("✅ Async database connections closed successfully")
+    except Exception as e:
+        db_logger.error(f"❌ Error closing async database connections: {str(e)}")
+
 # Create declarative base
 Base = declarative_base()
 
@@ -139,10 +248,16 @@ Base = declarative_base()
 __all__ = [
     'engine', 
     'SessionLocal', 
+    'async_engine',
+    'AsyncSessionLocal',
     'Base', 
     'get_db', 
+    'get_async_db',
+    'AnySession',
+    'run_in_session',
     'get_pool_status', 
     'check_db_health',
     'init_db', 
-    'close_db'
+    'close_db',
+    'close_async_db'
 ]
\ No newline at end of file
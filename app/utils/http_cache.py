@@ -0,0 +1,168 @@
+"""
+Conditional and range responses for static-like content (audio clips and
+bundles, stored lessons and stories).
+
+Starlette's FileResponse doesn't handle If-None-Match or Range, so endpoints
+that serve audio build their responses here: a strong ETag the caller derives
+from whatever determines the content, 304 when the client already has it, and
+206 partial content for byte-range requests (seeking in an <audio> element).
+JSON reads use the same ETags so a client reopening a lesson revalidates it
+instead of downloading it again.
+"""
+import hashlib
+import re
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple, Union
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import FileResponse, JSONResponse
+
+# For URLs whose content can never change (the URL determines the content)
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# For URLs whose content may change: clients keep a copy but revalidate it (cheap with If-None-Match)
+REVALIDATE_CACHE_CONTROL = "public, no-cache"
+
+_RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def make_etag(value: str) -> str:
+    """Strong ETag header value for a content fingerprint"""
+    return f'"{value}"'
+
+
+def body_etag(body: bytes) -> str:
+    """Strong ETag for content that has no stored fingerprint: a hash of the exact bytes sent"""
+    return make_etag(hashlib.sha256(body).hexdigest()[:32])
+
+
+def encode_json(content: Any) -> bytes:
+    """JSON body exactly as FastAPI would send content from an endpoint"""
+    return JSONResponse(content=jsonable_encoder(content)).body
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Whether the request's If-None-Match covers the ETag (weak comparison, as RFC 9110 requires)"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    candidates = [candidate.strip() for candidate in header.split(",")]
+    return any(candidate.removeprefix("W/") == etag for candidate in candidates)
+
+
+def not_modified_response(etag: str, cache_control: str) -> Response:
+    """304 for a client that already holds the current version"""
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": cache_control})
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Inclusive (start, end) byte range for a Range header, or None to send the whole body
+
+    Only single ranges are served; multi-range requests get the full body, which
+    RFC 9110 allows.
+
+    Raises:
+        ValueError: If the range can't be satisfied (respond 416)
+    """
+    if not header:
+        return None
+    match = _RANGE_PATTERN.match(header.strip())
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            raise ValueError("Empty suffix range")
+        return max(0, size - length), size - 1
+
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise ValueError(f"Range starts past the end of {size} bytes")
+    return start, end
+
+
+def cached_content_response(
+    request: Request,
+    etag: str,
+    media_type: str,
+    cache_control: str,
+    path: Optional[Union[str, Path]] = None,
+    content: Optional[bytes] = None,
+    headers: Optional[Dict[str, str]] = None,
+    filename: Optional[str] = None
+) -> Response:
+    """
+    Serve a file or bytes with ETag/Cache-Control, answering 304 and Range requests
+
+    Exactly one of path or content must be given.
+    """
+    if etag_matches(request, etag):
+        return not_modified_response(etag, cache_control)
+
+    response_headers = dict(headers or {})
+    response_headers.update({
+        "ETag": etag,
+        "Cache-Control": cache_control,
+        "Accept-Ranges": "bytes"
+    })
+    if filename:
+        response_headers["Content-Disposition"] = f'attachment; filename="{filename}"'
+
+    size = Path(path).stat().st_size if path is not None else len(content)
+
+    # If-Range: only honour the range if the client's copy is still current
+    if_range = request.headers.get("if-range")
+    range_header = request.headers.get("range") if not if_range or if_range == etag else None
+    try:
+        byte_range = parse_range(range_header, size)
+    except ValueError:
+        response_headers["Content-Range"] = f"bytes */{size}"
+        return Response(status_code=416, headers=response_headers)
+
+    if byte_range is None:
+        if path is not None:
+            return FileResponse(path, media_type=media_type, headers=response_headers)
+        return Response(content=content, media_type=media_type, headers=response_headers)
+
+    start, end = byte_range
+    if path is not None:
+        with open(path, 'rb') as f:
+            f.seek(start)
+            body = f.read(end - start + 1)
+    else:
+        body = content[start:end + 1]
+    response_headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    return Response(content=body, status_code=206, media_type=media_type, headers=response_headers)
+
+
+def json_response(
+    request: Request,
+    body: bytes,
+    etag: Optional[str] = None,
+    cache_control: str = REVALIDATE_CACHE_CONTROL,
+    headers: Optional[Dict[str, str]] = None
+) -> Response:
+    """
+    Serve an encoded JSON body with its ETag, or 304
+
+    The default ETag is a hash of the body and the extra headers (pagination
+    cursors), which are also sent with a 304.
+    """
+    headers = dict(headers or {})
+    if etag is None:
+        etag = body_etag(body + "".join(f"\n{name}: {value}" for name, value in sorted(headers.items())).encode("utf-8"))
+    if etag_matches(request, etag):
+        response = not_modified_response(etag, cache_control)
+        response.headers.update(headers)
+        return response
+    headers.update({"ETag": etag, "Cache-Control": cache_control})
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -0,0 +1,179 @@
+"""
+Idempotency-Key support for expensive generation endpoints
+"""
+import asyncio
+import hashlib
+import json
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from fastapi import HTTPException, Response
+from fastapi.encoders import jsonable_encoder
+
+from app.utils.config import settings
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+MAX_KEY_LENGTH = 255
+
+
+@dataclass
+class _IdempotencyEntry:
+    fingerprint: str
+    future: asyncio.Future
+    expires_at: float
+
+
+class IdempotencyStore:
+    """
+    In-process store of responses keyed by (scope, Idempotency-Key).
+
+    - The first request for a key runs the producer and its result is kept for the TTL
+    - Duplicates arriving while the original is still running await the same result
+    - Completed duplicates get the stored result without running the producer again
+    - Failed requests are not stored, so a client retry runs the producer again
+    - Duplicates waiting on an original that gets cancelled run the producer themselves
+    """
+
+    def __init__(self, ttl_seconds: int = 86400, max_entries: int = 10000):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: Dict[str, _IdempotencyEntry] = {}
+
+    def _fingerprint(self, payload: Any) -> str:
+        """Hash the request payload so a key reused for a different request can be rejected"""
+        encoded = json.dumps(jsonable_encoder(payload), sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+    def _purge_expired(self):
+        """Drop expired entries and the oldest completed entries if the store is too large"""
+        now = time.monotonic()
+        expired = [
+            key for key, entry in self._entries.items()
+            if entry.future.done() and entry.expires_at <= now
+        ]
+        for key in expired:
+            del self._entries[key]
+
+        if len(self._entries) > self.max_entries:
+            # Dicts keep insertion order, so the first completed entries are the oldest
+            overflow = len(self._entries) - self.max_entries
+            oldest = [key for key, entry in self._entries.items() if entry.future.done()][:overflow]
+            for key in oldest:
+                del self._entries[key]
+
+    async def run(
+        self,
+        key: Optional[str],
+        scope: str,
+        payload: Any,
+        producer: Callable[[], Awaitable[Any]],
+        response: Optional[Response] = None
+    ) -> Any:
+        """
+        Run producer at most once per idempotency key
+
+        Args:
+            key: Value of the Idempotency-Key header (no de-duplication when missing)
+            scope: Endpoint name, so the same key can be used on different endpoints
+            payload: Request data used to detect a key reused with a different body
+            producer: Coroutine function doing the actual work
+            response: Outgoing response, marked with Idempotent-Replayed on duplicates
+
+        Returns:
+            The producer result, either fresh or replayed from the store
+        """
+        if not key:
+            return await producer()
+
+        if len(key) > MAX_KEY_LENGTH:
+            raise HTTPException(
+                status_code=400,
+                detail=f"{IDEMPOTENCY_HEADER} must be at most {MAX_KEY_LENGTH} characters"
+            )
+
+        entry_key = f"{scope}:{key}"
+        fingerprint = self._fingerprint(payload)
+
+        while True:
+            self._purge_expired()
+            entry = self._entries.get(entry_key)
+            if entry is None:
+                break
+
+            if entry.fingerprint != fingerprint:
+                raise HTTPException(
+                    status_code=422,
+                    detail=f"{IDEMPOTENCY_HEADER} was already used for a different request"
+                )
+            try:
+                # shield() so a disconnecting duplicate doesn't cancel the original request
+                result = await asyncio.shield(entry.future)
+            except asyncio.CancelledError:
+                if entry.future.cancelled() and not asyncio.current_task().cancelling():
+                    # The original request was cancelled, not this one: run the producer ourselves
+                    continue
+                raise
+            return self._mark_replayed(result, response)
+
+        future = asyncio.get_running_loop().create_future()
+        self._entries[entry_key] = _IdempotencyEntry(
+            fingerprint=fingerprint,
+            future=future,
+            expires_at=float("inf")
+        )
+
+        try:
+            result = await producer()
+        except BaseException as e:
+            # Don't keep failures: waiting duplicates see the same error, later retries start over
+            self._entries.pop(entry_key, None)
+            if isinstance(e, asyncio.CancelledError):
+                future.cancel()
+            else:
+                future.set_exception(e)
+                # Mark the exception as retrieved in case nobody was waiting on it
+                future.exception()
+            raise
+
+        future.set_result(result)
+        self._entries[entry_key].expires_at = time.monotonic() + self.ttl_seconds
+        return result
+
+    def _mark_replayed(self, result: Any, response: Optional[Response]) -> Any:
+        """
+        Add Idempotent-Replayed to a replayed result
+
+        FastAPI sends a Response returned by the producer (e.g. a 202 JSONResponse)
+        as is, ignoring the injected one, so such results are copied with the header;
+        the stored one is shared with the original request and other duplicates.
+        """
+        if isinstance(result, Response):
+            replayed = Response(
+                content=result.body,
+                status_code=result.status_code,
+                headers=dict(result.headers),
+                media_type=result.media_type
+            )
+            replayed.headers[REPLAYED_HEADER] = "true"
+            return replayed
+        if response is not None:
+            response.headers[REPLAYED_HEADER] = "true"
+        return result
+
+    def get_stats(self) -> Dict[str, int]:
+        """Get store size for monitoring"""
+        in_flight = sum(1 for entry in self._entries.values() if not entry.future.done())
+        return {
+            "entries": len(self._entries),
+            "in_flight": in_flight,
+            "completed": len(self._entries) - in_flight
+        }
+
+
+# Global idempotency store instance
+idempotency_store = IdempotencyStore(
+    ttl_seconds=settings.IDEMPOTENCY_TTL_SECONDS,
+    max_entries=settings.IDEMPOTENCY_MAX_ENTRIES
+)
@@ -0,0 +1,192 @@
+"""
+Keyset (cursor) pagination for list endpoints.
+
+OFFSET makes the database read and discard every row before the page, and
+pages shift when rows are inserted while a client pages through them. A
+keyset page instead continues from the sort key of the last row seen:
+
+    WHERE (created_at, id) < (:created_at, :id) ORDER BY created_at DESC, id DESC LIMIT n
+
+which an index on the sort key answers directly at any depth. The sort key
+always ends with the primary key so it is unique. NULL sort values (rows
+without a created_at, say) sort as larger than any other value, as PostgreSQL
+orders them by default, so its indexes still answer both directions. A row
+comparison involving NULL is never true, so when the leading sort column is
+nullable its NULLs are read as a separate range after (or before) the row
+comparison; each query stays a single index range. Only a nullable later
+column makes the seek spell the comparison out with IS NULL branches, which
+the index can't seek to.
+
+Cursors are opaque to clients (url-safe base64 of the sort key values, the
+direction and the sort they belong to) and are only valid with the same
+filters. List endpoints send them as X-Next-Cursor / X-Prev-Cursor headers, so
+their response bodies keep their shape; skip/limit (or page) still work.
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import Select, and_, false, or_, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Query
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+PREV_CURSOR_HEADER = "X-Prev-Cursor"
+
+_NEXT = "n"
+_PREV = "p"
+
+
+class CursorPage:
+    def __init__(self, items: List[Any], next_cursor: Optional[str], prev_cursor: Optional[str]):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+
+    def headers(self) -> Dict[str, str]:
+        headers = {}
+        if self.next_cursor:
+            headers[NEXT_CURSOR_HEADER] = self.next_cursor
+        if self.prev_cursor:
+            headers[PREV_CURSOR_HEADER] = self.prev_cursor
+        return headers
+
+
+class KeysetPaginator:
+    """
+    Pages of a query ordered by columns, all ascending or all descending
+
+    The last column must be the primary key (or otherwise unique).
+    """
+
+    def __init__(self, name: str, *columns, descending: bool = False):
+        self.name = name
+        self.columns = columns
+        self.descending = descending
+
+    def order_by(self, backwards: bool = False) -> list:
+        ascending = self.descending == backwards
+        return [column.asc().nulls_last() if ascending else column.desc().nulls_first() for column in self.columns]
+
+    def _nullable(self, column) -> bool:
+        return getattr(getattr(column, "expression", column), "nullable", True)
+
+    def _compare(self, columns, values: List[Any], upwards: bool):
+        key = tuple_(*columns)
+        return key > tuple_(*values) if upwards else key < tuple_(*values)
+
+    def _ranges(self, values: List[Any], upwards: bool) -> list:
+        """
+        Conditions for the rows past values, in the order the sort reaches them
+
+        Each one is a single index range, as long as only the leading column is nullable.
+        """
+        leading, rest = self.columns[0], self.columns[1:]
+        if any(self._nullable(column) for column in rest):
+            return [self._beyond(values, upwards)]
+        if not self._nullable(leading):
+            return [self._compare(self.columns, values, upwards)]
+
+        if values[0] is None:
+            # Within the NULLs, which sort after every value
+            within_nulls = and_(leading.is_(None), self._compare(rest, values[1:], upwards))
+            return [within_nulls] if upwards else [within_nulls, leading.isnot(None)]
+        # The row comparison leaves out rows whose leading value is NULL
+        past = self._compare(self.columns, values, upwards)
+        return [past, leading.is_(None)] if upwards else [past]
+
+    def _beyond(self, values: List[Any], upwards: bool):
+        """Rows whose sort key is past values, towards larger keys (NULL largest) or smaller ones"""
+        # Lexicographic comparison, built from the last column outwards
+        condition = None
+        for column, value in reversed(list(zip(self.columns, values))):
+            if value is None:
+                past = false() if upwards else column.isnot(None)
+                same = column.is_(None)
+            else:
+                past = column > value if upwards else column < value
+                if upwards and self._nullable(column):
+                    past = or_(past, column.is_(None))
+                same = column == value
+            condition = past if condition is None else or_(past, and_(same, condition))
+        return condition
+
+    def encode_cursor(self, item: Any, direction: str) -> str:
+        values = []
+        for column in self.columns:
+            value = getattr(item, column.key)
+            values.append(value.isoformat() if isinstance(value, datetime) else value)
+        data = json.dumps({"s": self.name, "d": direction, "k": values}, separators=(",", ":"))
+        return base64.urlsafe_b64encode(data.encode("utf-8")).decode("ascii").rstrip("=")
+
+    def decode_cursor(self, cursor: str) -> Tuple[List[Any], str]:
+        """Sort key values and direction of a cursor; 400 for a cursor this paginator didn't issue"""
+        try:
+            data = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+            if data["s"] != self.name or data["d"] not in (_NEXT, _PREV) or len(data["k"]) != len(self.columns):
+                raise ValueError("Cursor belongs to a different listing")
+            values = [
+                datetime.fromisoformat(value) if value is not None and column.type.python_type is datetime else value
+                for column, value in zip(self.columns, data["k"])
+            ]
+            return values, data["d"]
+        except (ValueError, KeyError, TypeError, NotImplementedError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    def cursors(self, items: List[Any], has_next: bool, has_previous: bool) -> Tuple[Optional[str], Optional[str]]:
+        """(next, prev) cursors around a page of items"""
+        if not items:
+            return None, None
+        return (
+            self.encode_cursor(items[-1], _NEXT) if has_next else None,
+            self.encode_cursor(items[0], _PREV) if has_previous else None
+        )
+
+    def _seek(self, query, cursor: Optional[str]):
+        """
+        Ordered queries for the rows after (or before) the cursor, read one after
+        the other until the page is full, plus the cursor's key and direction
+        """
+        values, direction = self.decode_cursor(cursor) if cursor else (None, _NEXT)
+        backwards = direction == _PREV
+        order_by = self.order_by(backwards)
+
+        if values is None:
+            return [query.order_by(*order_by)], values, backwards
+        # Moving towards larger keys: forwards through an ascending sort, or backwards through a descending one
+        ranges = self._ranges(values, upwards=self.descending == backwards)
+        return [query.filter(condition).order_by(*order_by) for condition in ranges], values, backwards
+
+    def _to_page(self, items: List[Any], limit: int, values: Optional[List[Any]], backwards: bool) -> CursorPage:
+        # One extra row tells whether there is another page in this direction
+        has_more = len(items) > limit
+        items = items[:limit]
+
+        if backwards:
+            items.reverse()
+            next_cursor, prev_cursor = self.cursors(items, has_next=True, has_previous=has_more)
+        else:
+            next_cursor, prev_cursor = self.cursors(items, has_next=has_more, has_previous=values is not None)
+        return CursorPage(items, next_cursor, prev_cursor)
+
+    def page(self, query: Query, limit: int, cursor: Optional[str] = None) -> CursorPage:
+        """The page after (or, for a prev cursor, before) the cursor; the first page without one"""
+        queries, values, backwards = self._seek(query, cursor)
+        items = []
+        for ranged in queries:
+            items.extend(ranged.limit(limit + 1 - len(items)).all())
+            if len(items) > limit:
+                break
+        return self._to_page(items, limit, values, backwards)
+
+    async def page_async(self, db: AsyncSession, statement: Select, limit: int, cursor: Optional[str] = None) -> CursorPage:
+        """page() for an AsyncSession and a select() of one entity"""
+        statements, values, backwards = self._seek(statement, cursor)
+        items = []
+        for ranged in statements:
+            items.extend((await db.scalars(ranged.limit(limit + 1 - len(items)))).all())
+            if len(items) > limit:
+                break
+        return self._to_page(items, limit, values, backwards)
@@ -0,0 +1,107 @@
+"""
+Generation worker process.
+
+Drains the generation_jobs queue independently of the API workers. Run as many
+processes as needed; jobs are claimed with FOR UPDATE SKIP LOCKED, so they
+never pick up the same job twice:
+
+    python -m app.workers.generation_worker --concurrency 4
+"""
+import argparse
+import asyncio
+import os
+import signal
+import socket
+import threading
+
+from app.utils.config import settings
+from app.utils.database import SessionLocal, close_db
+from app.utils.logger import api_logger
+from app.services.job_queue import job_queue
+from app.services.lesson_cache import lesson_change_listener
+# Importing the modules registers the lesson and lesson audio job handlers
+import app.services.lesson_generation  # noqa: F401
+import app.services.lesson_audio  # noqa: F401
+
+
+async def process_jobs(worker_id: str, poll_interval: float, stop_event: threading.Event):
+    """Claim and run jobs until asked to stop, sleeping while the queue is empty"""
+    while not stop_event.is_set():
+        job = None
+        db = SessionLocal()
+        try:
+            job = job_queue.claim_next(db, worker_id)
+            if job is not None:
+                api_logger.info(f"[{worker_id}] Running job {job.id} ({job.job_type}), attempt {job.attempts}")
+                await job_queue.run_job(db, job)
+                api_logger.info(f"[{worker_id}] Job {job.id} finished with status '{job.status}'")
+        except Exception as e:
+            api_logger.error(f"[{worker_id}] Worker error: {str(e)}")
+            db.rollback()
+        finally:
+            db.close()
+
+        if job is None:
+            # Queue empty (or the database unavailable): back off before polling again.
+            # Blocking is fine here - this loop belongs to this slot alone
+            stop_event.wait(poll_interval)
+
+
+def _run_slot(worker_id: str, poll_interval: float, stop_event: threading.Event):
+    # Each slot gets its own thread and event loop, so a handler making blocking
+    # client calls only holds up its own slot
+    asyncio.run(process_jobs(worker_id, poll_interval, stop_event))
+
+
+def run_worker(concurrency: int, poll_interval: float):
+    stop_event = threading.Event()
+
+    def request_stop(signum, frame):
+        api_logger.info("Stopping generation worker after in-progress jobs finish")
+        stop_event.set()
+
+    signal.signal(signal.SIGINT, request_stop)
+    signal.signal(signal.SIGTERM, request_stop)
+
+    base_id = f"{socket.gethostname()}:{os.getpid()}"
+    threads = [
+        threading.Thread(
+            target=_run_slot,
+            args=(f"{base_id}:{slot}", poll_interval, stop_event),
+            name=f"generation-worker-{slot}"
+        )
+        for slot in range(concurrency)
+    ]
+
+    api_logger.info(f"Generation worker {base_id} started with {concurrency} slot(s)")
+    # Keeps the quiz distractor pools in step with lessons saved elsewhere
+    lesson_change_listener.start()
+    for thread in threads:
+        thread.start()
+
+    # Wake up periodically so signals are handled promptly
+    while any(thread.is_alive() for thread in threads):
+        for thread in threads:
+            thread.join(timeout=0.5)
+
+    lesson_change_listener.stop()
+    close_db()
+    api_logger.info(f"Generation worker {base_id} stopped")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Process queued lesson generation jobs")
+    parser.add_argument(
+        "--concurrency", type=int, default=settings.JOB_WORKER_CONCURRENCY,
+        help="Number of jobs processed at the same time"
+    )
+    parser.add_argument(
+        "--poll-interval", type=float, default=settings.JOB_POLL_INTERVAL_SECONDS,
+        help="Seconds to wait before polling an empty queue again"
+    )
+    args = parser.parse_args()
+    run_worker(concurrency=max(1, args.concurrency), poll_interval=args.poll_interval)
+
+
+if __name__ == "__main__":
+    main()
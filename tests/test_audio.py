@@ -0,0 +1,88 @@
+import pytest
+
+from app.utils.audio import concatenate_mp3, parse_mp3, slice_mp3
+
+# MPEG1 Layer III, 128 kbps, 44.1 kHz, stereo: 417-byte frames of 1152 samples
+FRAME_LENGTH = 417
+FRAME_MS = 1152 * 1000 / 44100
+
+
+def frame(fill: int, sample_rate_index: int = 0) -> bytes:
+    header = bytes([0xFF, 0xFB, 0x90 | (sample_rate_index << 2), 0x44])
+    length = 1152 // 8 * 128000 // [44100, 48000, 32000][sample_rate_index]
+    return header + bytes([fill]) * (length - 4)
+
+
+def clip(*fills: int) -> bytes:
+    return b"".join(frame(fill) for fill in fills)
+
+
+def xing_frame() -> bytes:
+    data = bytearray(frame(0))
+    data[4 + 32:4 + 36] = b"Xing"
+    return bytes(data)
+
+
+def test_parse_finds_every_frame():
+    info = parse_mp3(clip(1, 2, 3))
+
+    assert info.sample_rate == 44100
+    assert info.frames == [(0, FRAME_LENGTH), (FRAME_LENGTH, FRAME_LENGTH), (2 * FRAME_LENGTH, FRAME_LENGTH)]
+    assert info.duration_ms == pytest.approx(3 * FRAME_MS)
+
+
+def test_parse_skips_tags_vbr_header_and_junk():
+    id3v2 = b"ID3\x03\x00\x00\x00\x00\x00\x05" + b"\x00" * 5
+    id3v1 = b"TAG" + b"\x00" * 125
+    data = id3v2 + xing_frame() + clip(1) + b"\x00\x01junk" + clip(2) + id3v1
+
+    info = parse_mp3(data)
+
+    assert [data[offset + 4] for offset, _ in info.frames] == [1, 2]
+
+
+def test_parse_drops_truncated_last_frame():
+    info = parse_mp3(clip(1, 2) + frame(3)[:100])
+    assert len(info.frames) == 2
+
+
+def test_parse_rejects_non_mp3():
+    with pytest.raises(ValueError):
+        parse_mp3(b"RIFF" + b"\x00" * 1000)
+
+
+def test_concatenate_joins_frames_and_reports_timings():
+    joined, timings = concatenate_mp3([xing_frame() + clip(1, 2), clip(3)])
+
+    assert joined == clip(1, 2, 3)
+    assert timings == [(0.0, pytest.approx(2 * FRAME_MS)), (pytest.approx(2 * FRAME_MS), pytest.approx(3 * FRAME_MS))]
+
+
+def test_concatenate_rejects_mixed_sample_rates():
+    with pytest.raises(ValueError):
+        concatenate_mp3([clip(1), frame(2, sample_rate_index=1)])
+
+
+def test_slice_cuts_on_frame_boundaries():
+    data = clip(1, 2, 3, 4, 5)
+    info = parse_mp3(data)
+
+    assert slice_mp3(data, info, FRAME_MS, 3 * FRAME_MS) == clip(2, 3)
+    assert slice_mp3(data, info, 3 * FRAME_MS) == clip(4, 5)
+
+
+def test_slice_rounds_to_the_nearest_boundary_and_clamps():
+    data = clip(1, 2, 3)
+    info = parse_mp3(data)
+
+    assert slice_mp3(data, info, 0.6 * FRAME_MS, 1.6 * FRAME_MS) == clip(2)
+    assert slice_mp3(data, info, -50, 10 * FRAME_MS) == data
+    assert slice_mp3(data, info, 2 * FRAME_MS, FRAME_MS) == b""
+
+
+def test_slices_of_a_joined_stream_give_back_the_clips():
+    clips = [clip(1, 2), clip(3), clip(4, 5, 6)]
+    joined, timings = concatenate_mp3(clips)
+    info = parse_mp3(joined)
+
+    assert [slice_mp3(joined, info, start, end) for start, end in timings] == clips
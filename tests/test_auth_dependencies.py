@@ -0,0 +1,70 @@
+import asyncio
+import uuid
+
+import httpx
+import pytest
+
+from app.auth.dependencies import create_access_token
+from app.models.models import User, UserRole
+from app.utils.database import get_db
+
+
+@pytest.fixture
+def user(db):
+    """A committed user, deleted afterwards"""
+    name = f"test-{uuid.uuid4().hex[:12]}"
+    user = User(email=f"{name}@example.com", username=name, hashed_password="x", role=UserRole.USER)
+    db.add(user)
+    db.commit()
+    yield user
+    db.delete(user)
+    db.commit()
+
+
+def get(url: str, user: User):
+    """GET through the app with a token for user; any sync session the request opens fails it"""
+    from app.main import app
+    from app.utils.database import async_engine
+
+    def no_sync_session():
+        raise AssertionError("async route opened a sync session")
+
+    async def send():
+        transport = httpx.ASGITransport(app=app)
+        try:
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                token = create_access_token({"sub": user.username, "user_id": user.id})
+                return await client.get(url, headers={"Authorization": f"Bearer {token}"})
+        finally:
+            # Pooled asyncpg connections belong to this event loop
+            await async_engine.dispose()
+
+    app.dependency_overrides[get_db] = no_sync_session
+    try:
+        return asyncio.run(send())
+    finally:
+        app.dependency_overrides.pop(get_db)
+
+
+def test_async_route_authenticates_on_its_own_session(user):
+    response = get("/api/translations/", user)
+
+    assert response.status_code == 200
+    assert response.json() == []
+
+
+def test_admin_routes_require_the_admin_role(db, user):
+    assert get("/admin/users", user).status_code == 403
+
+    user.role = UserRole.ADMIN
+    db.commit()
+    assert get("/admin/users", user).status_code == 200
+
+
+def test_inactive_and_unknown_users_are_rejected(db, user):
+    user.is_active = False
+    db.commit()
+    assert get("/api/translations/", user).status_code == 400
+
+    ghost = User(username=f"ghost-{uuid.uuid4().hex[:12]}", id=0)
+    assert get("/api/translations/", ghost).status_code == 401
@@ -0,0 +1,123 @@
+import pytest
+from starlette.requests import Request
+
+from app.utils.http_cache import (
+    REVALIDATE_CACHE_CONTROL, cached_content_response, etag_matches, json_response, make_etag, parse_range
+)
+from app.utils.pagination import NEXT_CURSOR_HEADER
+
+ETAG = make_etag("abc123")
+CONTENT = bytes(range(100))
+
+
+def request(**headers) -> Request:
+    return Request({
+        "type": "http",
+        "method": "GET",
+        "path": "/",
+        "query_string": b"",
+        "headers": [(name.replace("_", "-").encode(), value.encode()) for name, value in headers.items()]
+    })
+
+
+@pytest.mark.parametrize("header, expected", [
+    (None, None),
+    ("bytes=0-9", (0, 9)),
+    ("bytes=90-", (90, 99)),
+    ("bytes=-10", (90, 99)),
+    ("bytes=-500", (0, 99)),
+    ("bytes=50-500", (50, 99)),
+    ("bytes=0-1,5-9", None),
+    ("items=0-9", None),
+    ("bytes=-", None)
+])
+def test_parse_range(header, expected):
+    assert parse_range(header, 100) == expected
+
+
+@pytest.mark.parametrize("header", ["bytes=100-", "bytes=10-5", "bytes=-0"])
+def test_parse_unsatisfiable_range(header):
+    with pytest.raises(ValueError):
+        parse_range(header, 100)
+
+
+@pytest.mark.parametrize("header, matches", [
+    (None, False),
+    ('"other"', False),
+    (ETAG, True),
+    (f'"other", {ETAG}', True),
+    (f"W/{ETAG}", True),
+    ("*", True)
+])
+def test_etag_matches(header, matches):
+    headers = {"if_none_match": header} if header else {}
+    assert etag_matches(request(**headers), ETAG) is matches
+
+
+def serve(req, **source):
+    return cached_content_response(req, ETAG, "audio/mpeg", REVALIDATE_CACHE_CONTROL, **source)
+
+
+def test_full_content_with_validators():
+    response = serve(request(), content=CONTENT)
+
+    assert response.status_code == 200
+    assert response.body == CONTENT
+    assert response.headers["ETag"] == ETAG
+    assert response.headers["Accept-Ranges"] == "bytes"
+
+
+def test_current_etag_gets_304():
+    response = serve(request(if_none_match=ETAG), content=CONTENT)
+
+    assert response.status_code == 304
+    assert response.body == b""
+    assert response.headers["ETag"] == ETAG
+
+
+def test_range_of_bytes_and_file(tmp_path):
+    path = tmp_path / "clip.mp3"
+    path.write_bytes(CONTENT)
+
+    for source in ({"content": CONTENT}, {"path": path}):
+        response = serve(request(range="bytes=10-19"), **source)
+        assert response.status_code == 206
+        assert response.body == CONTENT[10:20]
+        assert response.headers["Content-Range"] == "bytes 10-19/100"
+
+
+def test_unsatisfiable_range_gets_416():
+    response = serve(request(range="bytes=200-"), content=CONTENT)
+
+    assert response.status_code == 416
+    assert response.headers["Content-Range"] == "bytes */100"
+
+
+def test_stale_if_range_gets_the_whole_body():
+    response = serve(request(range="bytes=0-9", if_range='"old"'), content=CONTENT)
+    assert response.status_code == 200
+    assert response.body == CONTENT
+
+    response = serve(request(range="bytes=0-9", if_range=ETAG), content=CONTENT)
+    assert response.status_code == 206
+
+
+def test_json_response_etag_covers_body_and_headers():
+    body = b'{"items":[1,2]}'
+    first = json_response(request(), body, headers={NEXT_CURSOR_HEADER: "a"})
+    other_cursor = json_response(request(), body, headers={NEXT_CURSOR_HEADER: "b"})
+
+    assert first.status_code == 200
+    assert first.body == body
+    assert first.headers["ETag"] != other_cursor.headers["ETag"]
+
+    revalidated = json_response(
+        request(if_none_match=first.headers["ETag"]), body, headers={NEXT_CURSOR_HEADER: "a"}
+    )
+    assert revalidated.status_code == 304
+    assert revalidated.headers[NEXT_CURSOR_HEADER] == "a"
+
+
+def test_json_response_uses_given_etag():
+    response = json_response(request(if_none_match=ETAG), b"{}", etag=ETAG)
+    assert response.status_code == 304
@@ -0,0 +1,159 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException, Response
+from fastapi.responses import JSONResponse
+
+from app.utils.idempotency import REPLAYED_HEADER, IdempotencyStore
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def counting_producer(result="generated", delay=0.0):
+    calls = []
+
+    async def produce():
+        calls.append(1)
+        await asyncio.sleep(delay)
+        return result
+
+    return produce, calls
+
+
+def test_without_key_always_runs_the_producer():
+    store = IdempotencyStore()
+    produce, calls = counting_producer()
+
+    async def scenario():
+        await store.run(None, "scope", {"a": 1}, produce)
+        await store.run(None, "scope", {"a": 1}, produce)
+
+    run(scenario())
+    assert len(calls) == 2
+
+
+def test_completed_duplicate_is_replayed_with_header():
+    store = IdempotencyStore()
+    produce, calls = counting_producer()
+
+    async def scenario():
+        first, second = Response(), Response()
+        results = [
+            await store.run("key", "scope", {"a": 1}, produce, first),
+            await store.run("key", "scope", {"a": 1}, produce, second)
+        ]
+        return results, first, second
+
+    results, first, second = run(scenario())
+    assert results == ["generated", "generated"]
+    assert len(calls) == 1
+    assert REPLAYED_HEADER not in first.headers
+    assert second.headers[REPLAYED_HEADER] == "true"
+
+
+def test_concurrent_duplicates_share_one_run():
+    store = IdempotencyStore()
+    produce, calls = counting_producer(delay=0.05)
+
+    async def scenario():
+        return await asyncio.gather(*(store.run("key", "scope", {"a": 1}, produce) for _ in range(5)))
+
+    assert run(scenario()) == ["generated"] * 5
+    assert len(calls) == 1
+
+
+def test_key_reused_for_different_payload_is_rejected():
+    store = IdempotencyStore()
+    produce, _ = counting_producer()
+
+    async def scenario():
+        await store.run("key", "scope", {"a": 1}, produce)
+        await store.run("key", "scope", {"a": 2}, produce)
+
+    with pytest.raises(HTTPException) as error:
+        run(scenario())
+    assert error.value.status_code == 422
+
+
+def test_same_key_in_different_scopes_is_independent():
+    store = IdempotencyStore()
+    produce, calls = counting_producer()
+
+    async def scenario():
+        await store.run("key", "lessons", {"a": 1}, produce)
+        await store.run("key", "stories", {"a": 2}, produce)
+
+    run(scenario())
+    assert len(calls) == 2
+
+
+def test_overlong_key_is_rejected():
+    store = IdempotencyStore()
+    produce, _ = counting_producer()
+    with pytest.raises(HTTPException) as error:
+        run(store.run("k" * 256, "scope", {}, produce))
+    assert error.value.status_code == 400
+
+
+def test_failures_are_not_stored():
+    store = IdempotencyStore()
+    attempts = []
+
+    async def flaky():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise RuntimeError("upstream failed")
+        return "generated"
+
+    async def scenario():
+        with pytest.raises(RuntimeError):
+            await store.run("key", "scope", {}, flaky)
+        return await store.run("key", "scope", {}, flaky)
+
+    assert run(scenario()) == "generated"
+    assert len(attempts) == 2
+
+
+def test_returned_response_is_replayed_as_a_copy_with_header():
+    store = IdempotencyStore()
+
+    async def accepted():
+        return JSONResponse(status_code=202, content={"job_id": 1})
+
+    async def scenario():
+        first = await store.run("key", "scope", {}, accepted)
+        second = await store.run("key", "scope", {}, accepted)
+        return first, second
+
+    first, second = run(scenario())
+    assert second is not first
+    assert second.status_code == 202
+    assert second.body == first.body
+    assert second.headers[REPLAYED_HEADER] == "true"
+    assert REPLAYED_HEADER not in first.headers
+
+
+def test_duplicate_of_cancelled_original_runs_the_producer():
+    store = IdempotencyStore()
+    started = asyncio.Event()
+    calls = []
+
+    async def produce():
+        calls.append(1)
+        if len(calls) == 1:
+            started.set()
+            await asyncio.sleep(10)
+        return "generated"
+
+    async def scenario():
+        original = asyncio.create_task(store.run("key", "scope", {}, produce))
+        await started.wait()
+        duplicate = asyncio.create_task(store.run("key", "scope", {}, produce))
+        await asyncio.sleep(0)
+        original.cancel()
+        return await duplicate
+
+    assert run(scenario()) == "generated"
+    assert len(calls) == 2
@@ -0,0 +1,132 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.models.models import GenerationJob
+from app.services.job_queue import FAILED, QUEUED, RUNNING, SUCCEEDED, JobQueue
+
+TEST_JOB_TYPE = "test_job"
+
+
+@pytest.fixture
+def queue(db):
+    """A short-lease queue on an otherwise idle generation_jobs table"""
+    now = datetime.now(timezone.utc)
+    runnable = db.query(GenerationJob).filter(
+        ((GenerationJob.status == QUEUED) & (GenerationJob.run_after <= now))
+        | ((GenerationJob.status == RUNNING) & (GenerationJob.locked_until < now))
+    ).count()
+    db.rollback()
+    if runnable:
+        pytest.skip("generation_jobs has runnable jobs; claiming would take them")
+
+    yield JobQueue(lease_seconds=1, max_attempts=2, retry_delay_seconds=0)
+
+    db.rollback()
+    db.query(GenerationJob).filter(GenerationJob.job_type.like(f"{TEST_JOB_TYPE}%")).delete(synchronize_session=False)
+    db.commit()
+
+
+@pytest.fixture
+def other_db(database_available):
+    from app.utils.database import SessionLocal
+    session = SessionLocal()
+    yield session
+    session.close()
+
+
+def expire_lease(db, job):
+    db.query(GenerationJob).filter(GenerationJob.id == job.id).update(
+        {"locked_until": datetime.now(timezone.utc) - timedelta(seconds=1)}, synchronize_session=False
+    )
+    db.commit()
+
+
+def test_claim_takes_queued_job_and_leases_it(db, queue):
+    job = queue.enqueue(db, TEST_JOB_TYPE, {"n": 1})
+
+    claimed = queue.claim_next(db, "worker-a")
+
+    assert claimed.id == job.id
+    assert claimed.status == RUNNING
+    assert claimed.attempts == 1
+    assert claimed.locked_by == "worker-a"
+    assert queue.claim_next(db, "worker-b") is None
+
+
+def test_expired_lease_is_reclaimed_and_late_result_dropped(db, other_db, queue):
+    job = queue.enqueue(db, TEST_JOB_TYPE, {})
+    first = queue.claim_next(db, "worker-a")
+    expire_lease(db, first)
+
+    second = queue.claim_next(other_db, "worker-b")
+    assert second.id == job.id
+    assert second.attempts == 2
+
+    assert queue.complete(db, first, "worker-a", {"by": "a"}) is False
+    assert queue.complete(other_db, second, "worker-b", {"by": "b"}) is True
+    final = queue.get_job(db, job.id)
+    assert final.status == SUCCEEDED
+    assert final.result == {"by": "b"}
+
+
+def test_fail_requeues_until_attempts_are_used(db, queue):
+    job = queue.enqueue(db, TEST_JOB_TYPE, {})
+
+    claimed = queue.claim_next(db, "worker-a")
+    assert queue.fail(db, claimed, "worker-a", "boom") is True
+    assert queue.get_job(db, job.id).status == QUEUED
+
+    claimed = queue.claim_next(db, "worker-a")
+    assert queue.fail(db, claimed, "worker-a", "boom again") is True
+    final = queue.get_job(db, job.id)
+    assert final.status == FAILED
+    assert final.error == "boom again"
+
+
+def test_abandoned_job_out_of_attempts_is_failed_not_reclaimed(db, queue):
+    job = queue.enqueue(db, TEST_JOB_TYPE, {})
+    for _ in range(2):
+        claimed = queue.claim_next(db, "worker-a")
+        expire_lease(db, claimed)
+
+    assert queue.claim_next(db, "worker-b") is None
+    final = queue.get_job(db, job.id)
+    assert final.status == FAILED
+    assert final.locked_by is None
+
+
+def test_running_job_keeps_its_lease(db, other_db, queue):
+    job = queue.enqueue(db, TEST_JOB_TYPE + "_slow", {})
+
+    @queue.handler(TEST_JOB_TYPE + "_slow")
+    async def slow(session, payload):
+        await asyncio.sleep(2.5)
+        return {"done": True}
+
+    async def scenario():
+        claimed = queue.claim_next(db, "worker-a")
+        running = asyncio.create_task(queue.run_job(db, claimed))
+        stolen = []
+        for _ in range(4):
+            await asyncio.sleep(0.5)
+            stolen.append(queue.claim_next(other_db, "worker-b"))
+        await running
+        return stolen
+
+    assert asyncio.run(scenario()) == [None] * 4
+    final = queue.get_job(db, job.id)
+    assert final.status == SUCCEEDED
+    assert final.attempts == 1
+
+
+def test_job_without_handler_fails_permanently(db, queue):
+    job = queue.enqueue(db, TEST_JOB_TYPE + "_unknown", {})
+    claimed = queue.claim_next(db, "worker-a")
+
+    asyncio.run(queue.run_job(db, claimed))
+
+    final = queue.get_job(db, job.id)
+    assert final.status == FAILED
+    assert final.attempts == 1
@@ -0,0 +1,143 @@
+import json
+import time
+
+import pytest
+from sqlalchemy import text
+
+from app.api import crud
+from app.services.lesson_cache import LessonCache, LessonChangeListener
+
+
+class FakeLanguageCache:
+    def __init__(self):
+        self.invalidated = []
+
+    def invalidate(self, target_language=None):
+        self.invalidated.append(target_language)
+
+
+def cached(cache: LessonCache, lesson_id: int, target_language: str = "Hindi"):
+    cache.put(lesson_id, target_language, lesson_id, b"{}", f'"etag-{lesson_id}"')
+
+
+def wait_for(condition, timeout: float = 5.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+@pytest.fixture
+def listening(database_available):
+    """Start a listener on a fresh cache; stopped afterwards"""
+    if not database_available:
+        pytest.skip("PostgreSQL is not available at DB_URL")
+    listeners = []
+
+    def start(cache: LessonCache, language_caches=()) -> LessonChangeListener:
+        listener = LessonChangeListener(cache, language_caches, poll_seconds=0.1, retry_seconds=0.1)
+        listener.start()
+        listeners.append(listener)
+        assert listener.listening.wait(5)
+        return listener
+
+    yield start
+    for listener in listeners:
+        listener.stop()
+
+
+def test_handle_drops_lessons_and_languages():
+    cache = LessonCache(max_bytes=1024, ttl_seconds=60)
+    catalog = FakeLanguageCache()
+    listener = LessonChangeListener(cache, [catalog])
+    cached(cache, 1)
+    cached(cache, 2)
+
+    listener.handle(json.dumps({"ids": [1], "languages": ["Hindi", "Tamil"]}))
+
+    assert cache.get(1) is None
+    assert cache.get(2) is not None
+    assert catalog.invalidated == ["Hindi", "Tamil"]
+
+
+@pytest.mark.parametrize("payload", ["1,2", "null", '{"ids": ["x"]}', '{"ids": 5}'])
+def test_handle_ignores_malformed_payloads(payload):
+    cache = LessonCache(max_bytes=1024, ttl_seconds=60)
+    cached(cache, 1)
+
+    LessonChangeListener(cache).handle(payload)
+
+    assert cache.get(1) is not None
+
+
+def test_clear_drops_every_language():
+    catalog = FakeLanguageCache()
+    LessonChangeListener(LessonCache(max_bytes=1024, ttl_seconds=60), [catalog]).clear()
+    assert catalog.invalidated == [None]
+
+
+def test_listener_runs_for_language_caches_when_the_lesson_cache_is_off():
+    listener = LessonChangeListener(LessonCache(max_bytes=1024, ttl_seconds=60, enabled=False))
+    listener.start()
+    assert listener._thread is None
+
+
+def test_inserted_lesson_languages_reach_other_workers(db, listening):
+    catalog = FakeLanguageCache()
+    listening(LessonCache(max_bytes=1024, ttl_seconds=60), [catalog])
+
+    # What create_desi_lessons sends for a new Hindi lesson
+    crud.notify_lessons_changed(db, [], ["Hindi"])
+    db.commit()
+
+    assert wait_for(lambda: catalog.invalidated == ["Hindi"])
+
+
+def test_notification_from_another_session_evicts_the_cached_lesson(db, listening):
+    cache = LessonCache(max_bytes=1024 * 1024, ttl_seconds=60)
+    listening(cache)
+    cached(cache, 1)
+    cached(cache, 2)
+
+    crud.notify_lessons_changed(db, [1])
+    db.commit()
+
+    assert wait_for(lambda: cache.get(1) is None)
+    assert cache.get(2) is not None
+
+
+def test_large_changes_are_sent_in_chunks(db, listening):
+    cache = LessonCache(max_bytes=1024 * 1024, ttl_seconds=60)
+    listening(cache)
+    for lesson_id in range(1, 1201):
+        cached(cache, lesson_id)
+
+    crud.notify_lessons_changed(db, range(1, 1201))
+    db.commit()
+
+    assert wait_for(lambda: cache.get_stats()["entries"] == 0)
+
+
+def test_cache_is_cleared_after_the_listener_reconnects(db, listening):
+    cache = LessonCache(max_bytes=1024 * 1024, ttl_seconds=60)
+    catalog = FakeLanguageCache()
+    listener = listening(cache, [catalog])
+    cached(cache, 1)
+
+    # Drop the listener's connection, as a database restart would
+    db.execute(text(
+        "SELECT pg_terminate_backend(pid) FROM pg_stat_activity "
+        "WHERE query = :query AND pid <> pg_backend_pid()"
+    ), {"query": f"LISTEN {crud.LESSON_CHANGES_CHANNEL}"})
+    db.commit()
+
+    assert wait_for(lambda: cache.get_stats()["entries"] == 0 and listener.listening.is_set())
+    assert catalog.invalidated == [None]
+
+    # Still listening afterwards
+    cached(cache, 2)
+    crud.notify_lessons_changed(db, [2])
+    db.commit()
+    assert wait_for(lambda: cache.get(2) is None)
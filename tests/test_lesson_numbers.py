@@ -0,0 +1,112 @@
+import importlib.util
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
+
+from app.api import crud
+from app.models.models import DesiLesson, LessonNumberCounter
+
+MIGRATION = Path(__file__).parent.parent / "alembic" / "versions" / "5d2f9a1c7e44_unique_lesson_numbers_and_counters.py"
+
+
+def load_migration():
+    spec = importlib.util.spec_from_file_location("renumber_migration", MIGRATION)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture
+def language(db):
+    """A language no lesson uses; its counter row is removed afterwards"""
+    from app.utils.database import SessionLocal
+    target_language = f"test-{uuid.uuid4().hex[:12]}"
+    yield target_language
+    cleanup = SessionLocal()
+    try:
+        cleanup.query(LessonNumberCounter).filter(LessonNumberCounter.target_language == target_language).delete()
+        cleanup.commit()
+    finally:
+        cleanup.close()
+
+
+def allocate(target_language: str, count: int) -> int:
+    from app.utils.database import SessionLocal
+    session = SessionLocal()
+    try:
+        first = crud.allocate_lesson_numbers(session, target_language, count)
+        session.commit()
+        return first
+    finally:
+        session.close()
+
+
+def test_concurrent_allocations_hand_out_every_number_once(language):
+    counts = [1, 3, 1, 2, 1, 1, 4, 1, 2, 1] * 3
+    with ThreadPoolExecutor(max_workers=6) as pool:
+        firsts = list(pool.map(lambda count: allocate(language, count), counts))
+
+    numbers = [first + offset for first, count in zip(firsts, counts) for offset in range(count)]
+    assert sorted(numbers) == list(range(1, sum(counts) + 1))
+
+
+def test_second_session_waits_for_the_first_to_commit(db, language):
+    assert crud.allocate_lesson_numbers(db, language, 2) == 1
+
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        second = pool.submit(allocate, language, 1)
+        try:
+            time.sleep(0.3)
+            # Queued on the counter row until the first transaction ends
+            waited = not second.done()
+        finally:
+            db.commit()
+        assert waited
+        assert second.result(timeout=5) == 3
+
+
+def test_rolled_back_allocation_is_handed_out_again(db, language):
+    assert crud.allocate_lesson_numbers(db, language) == 1
+    db.rollback()
+    assert allocate(language, 1) == 1
+
+
+def test_counter_starts_after_existing_lessons(db, language):
+    db.add(DesiLesson(title="t", target_language=language, difficulty="beginner", lesson_number=7))
+    db.flush()
+
+    assert crud.allocate_lesson_numbers(db, language) == 8
+
+
+def test_language_and_number_are_unique(db, language):
+    db.add_all([
+        DesiLesson(title="a", target_language=language, difficulty="beginner", lesson_number=1),
+        DesiLesson(title="b", target_language=language, difficulty="beginner", lesson_number=1)
+    ])
+    with pytest.raises(IntegrityError):
+        db.flush()
+
+
+def test_migration_moves_duplicate_numbers_past_the_highest(db):
+    db.execute(text(
+        "CREATE TEMP TABLE lessons_copy (id integer, target_language varchar(100), lesson_number integer) ON COMMIT DROP"
+    ))
+    rows = [
+        (1, "Hindi", 1), (2, "Hindi", 2), (3, "Hindi", 2), (4, "Hindi", 3), (5, "Hindi", 2),
+        (6, "Tamil", 1), (7, "Tamil", 1), (8, "Telugu", 4)
+    ]
+    db.execute(
+        text("INSERT INTO lessons_copy VALUES (:id, :language, :number)"),
+        [{"id": row_id, "language": language, "number": number} for row_id, language, number in rows]
+    )
+
+    db.execute(text(load_migration().RENUMBER_DUPLICATE_LESSONS.format(table="lessons_copy")))
+
+    numbers = dict(db.execute(text("SELECT id, lesson_number FROM lessons_copy")).all())
+    # The oldest copy keeps its number; later ones follow the language's highest, in id order
+    assert numbers == {1: 1, 2: 2, 3: 4, 4: 3, 5: 5, 6: 1, 7: 2, 8: 4}
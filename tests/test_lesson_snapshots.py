@@ -0,0 +1,62 @@
+import asyncio
+import hashlib
+import json
+
+import httpx
+import pytest
+
+from app.api import crud
+from app.models import models, schemas
+from app.services.lesson_cache import lesson_cache, lesson_content_etag
+
+
+def lesson_response(title="Greetings") -> schemas.DesiLessonResponse:
+    return schemas.DesiLessonResponse(desi_lesson={
+        "title": title,
+        "target_language": "Hindi",
+        "difficulty": "beginner",
+        "vocabulary": [{"english": "hello", "target_language_script": "नमस्ते", "transliteration": "namaste", "pronunciation": "nuh-mus-tay"}],
+        "example_sentences": [],
+        "short_story": {"title": "Hi", "dialogue": []},
+        "quiz": []
+    })
+
+
+def test_snapshot_is_canonical_json_and_hash_is_of_its_bytes():
+    snapshot, content_hash = crud.build_lesson_snapshot(lesson_response())
+
+    parsed = json.loads(snapshot)
+    assert snapshot == json.dumps(parsed, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    assert "नमस्ते" in snapshot
+    assert content_hash == hashlib.sha256(snapshot.encode("utf-8")).hexdigest()
+
+
+def test_hash_changes_with_content_only():
+    assert crud.build_lesson_snapshot(lesson_response()) == crud.build_lesson_snapshot(lesson_response())
+    assert crud.build_lesson_snapshot(lesson_response())[1] != crud.build_lesson_snapshot(lesson_response("Food"))[1]
+
+
+def test_lesson_read_serves_the_same_bytes_and_etag_as_a_fresh_render(db):
+    lesson = db.query(models.DesiLesson).options(*crud.LESSON_CONTENT_OPTIONS).order_by(models.DesiLesson.id).first()
+    if lesson is None:
+        pytest.skip("No lessons in the database")
+    expected_body, content_hash = crud.build_lesson_snapshot(crud.convert_db_lesson_to_response_format(lesson))
+    if lesson.content_hash is not None and lesson.content_hash != content_hash:
+        pytest.skip("Lesson snapshot is out of date; run backfill_lesson_snapshots.py --all")
+
+    from app.main import app
+
+    async def read():
+        lesson_cache.clear()
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            url = f"/api/lessons/{lesson.target_language}/{lesson.lesson_number}"
+            response = await client.get(url)
+            revalidated = await client.get(url, headers={"If-None-Match": response.headers["ETag"]})
+            return response, revalidated
+
+    response, revalidated = asyncio.run(read())
+    assert response.status_code == 200
+    assert response.content == expected_body.encode("utf-8")
+    assert response.headers["ETag"] == lesson_content_etag(lesson.id, content_hash)
+    assert revalidated.status_code == 304
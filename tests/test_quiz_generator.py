@@ -0,0 +1,119 @@
+import asyncio
+
+from app.services import lesson_generation
+from app.services.quiz_generator import QuizGenerator, quiz_generator
+
+VOCABULARY = [
+    ("water", "paani"),
+    ("food", "khaana"),
+    ("house", "ghar"),
+    ("book", "kitaab"),
+    ("friend", "dost")
+]
+SENTENCES = [
+    ("I drink water.", "Main paani peeta hoon."),
+    ("This is my house.", "Yeh mera ghar hai.")
+]
+POOL_VOCABULARY = [
+    ("tree", "ped"),
+    ("river", "nadi"),
+    ("school", "school"),
+    ("mother", "maa"),
+    ("water", "paani")
+]
+POOL_SENTENCES = [
+    ("The tree is tall.", "Ped lamba hai."),
+    ("My mother cooks.", "Meri maa khaana banati hai.")
+]
+
+
+def build(generator=None, **overrides):
+    arguments = dict(
+        target_language="Hindi",
+        vocabulary=VOCABULARY,
+        sentences=SENTENCES,
+        distractor_vocabulary=POOL_VOCABULARY,
+        distractor_sentences=POOL_SENTENCES,
+        num_questions=5,
+        seed=7
+    )
+    arguments.update(overrides)
+    return (generator or QuizGenerator()).build_quiz(**arguments)
+
+
+def test_questions_have_distinct_options_including_the_answer():
+    questions = build()
+
+    assert len(questions) == 5
+    for question in questions:
+        assert len(question.options) == 4
+        assert question.answer in question.options
+        assert len({option.lower() for option in question.options}) == 4
+
+
+def test_one_question_per_item():
+    questions = build(num_questions=10)
+
+    asked = set()
+    for question in questions:
+        item = next(
+            english for english, transliteration in VOCABULARY + SENTENCES
+            if f"'{english}'" in question.question or f"'{transliteration}'" in question.question
+        )
+        assert item not in asked
+        asked.add(item)
+
+
+def test_seed_makes_quizzes_reproducible():
+    first = [question.model_dump() for question in build(seed=3)]
+    again = [question.model_dump() for question in build(seed=3)]
+    other = [question.model_dump() for question in build(seed=4)]
+
+    assert first == again
+    assert first != other
+
+
+def test_items_without_transliteration_are_skipped():
+    questions = build(
+        vocabulary=[("water", ""), ("food", None)] + VOCABULARY[2:],
+        sentences=[],
+        num_questions=10
+    )
+
+    for question in questions:
+        assert "water" not in question.question and "food" not in question.question
+
+
+def test_lesson_too_small_for_options_gives_no_questions():
+    assert build(vocabulary=VOCABULARY[:2], sentences=[], distractor_vocabulary=[], distractor_sentences=[]) == []
+
+
+def test_distractors_come_from_the_pool_when_the_lesson_is_small():
+    questions = build(vocabulary=VOCABULARY[:2], sentences=[], num_questions=4)
+
+    assert questions
+    pool_options = {english for english, _ in POOL_VOCABULARY} | {transliteration for _, transliteration in POOL_VOCABULARY}
+    for question in questions:
+        assert pool_options & set(question.options)
+
+
+def test_options_per_question_is_configurable():
+    questions = build(generator=QuizGenerator(options_per_question=3))
+
+    assert questions
+    assert all(len(question.options) == 3 for question in questions)
+
+
+def test_local_quiz_builder_is_off_by_default(monkeypatch):
+    monkeypatch.setattr(lesson_generation.settings, "LOCAL_QUIZ_GENERATION", False)
+    assert asyncio.run(lesson_generation.local_quiz_builder(None, "Hindi", num_questions=4)) is None
+
+
+def test_local_quiz_builder_uses_stored_lessons_as_distractors(db, monkeypatch):
+    monkeypatch.setattr(lesson_generation.settings, "LOCAL_QUIZ_GENERATION", True)
+    quiz_generator.invalidate()
+    builder = asyncio.run(lesson_generation.local_quiz_builder(db, "Hindi", num_questions=4))
+
+    questions = builder(VOCABULARY, SENTENCES)
+    assert len(questions) == 4
+    assert all(question.answer in question.options for question in questions)
@@ -0,0 +1,49 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app.services.story_audio import StoryAudioStore, StoryNarration, split_long_sentence, split_sentences
+
+STORY = SimpleNamespace(id=1, target_language="Hindi", translated_text="राम घर गया। वह खुश था।")
+
+
+def test_split_sentences_keeps_terminators():
+    assert split_sentences(STORY.translated_text) == ["राम घर गया।", "वह खुश था।"]
+
+
+def test_split_long_sentence_prefers_commas():
+    assert split_long_sentence("one two three, four five six", 20) == ["one two three,", "four five six"]
+
+
+def test_configured_voice_is_accepted():
+    narration = StoryNarration(STORY, voice_name="hi-IN-Standard-B", speaking_rate=1.25)
+    assert narration.track == "hi-IN-Standard-B_1.25"
+
+
+@pytest.mark.parametrize("voice_name", ["../../../../tmp/pwn", "ta-IN-Standard-A", "hi-IN-Wavenet-Z"])
+def test_voice_not_configured_for_the_language_is_rejected(voice_name):
+    with pytest.raises(ValueError):
+        StoryNarration(STORY, voice_name=voice_name)
+
+
+def test_track_names_and_paths_stay_inside_the_store(tmp_path):
+    store = StoryAudioStore(str(tmp_path))
+
+    track = store.track_name("../../etc/passwd", 0.9)
+    assert "/" not in track and "." not in track.rsplit("_", 1)[0]
+    assert store.audio_path(1, track).parent == (tmp_path / "1").resolve()
+
+    for unsafe in ("../escape", "/tmp/escape", "nested/track"):
+        with pytest.raises(ValueError):
+            store.audio_path(1, unsafe)
+
+
+def test_save_writes_track_and_manifest(tmp_path):
+    store = StoryAudioStore(str(tmp_path))
+    track = store.track_name("hi-IN-Standard-A", 0.9)
+
+    store.save(1, track, b"mp3", {"version": 1})
+
+    assert store.audio_path(1, track).read_bytes() == b"mp3"
+    assert store.load_manifest(1, track) == {"version": 1}
+    assert sorted(path.name for path in (tmp_path / "1").iterdir()) == [f"{track}.json", f"{track}.mp3"]
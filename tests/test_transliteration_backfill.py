@@ -0,0 +1,107 @@
+import asyncio
+import json
+
+import pytest
+
+from app.services import transliteration_backfill
+from app.services.transliteration_backfill import NON_LATIN_LANGUAGES, TransliterationBackfill
+
+
+def item(row_id, text="नमस्ते", language="Hindi"):
+    return (row_id, text, None, language)
+
+
+class FakeTarget:
+    """Backfill target serving fixed pages of missing rows, recording what gets written"""
+
+    name = "fake"
+
+    def __init__(self, items):
+        self.items = items
+        self.written = {}
+
+    def fetch_missing(self, db, after_id, limit):
+        return [entry for entry in self.items if entry[0] > after_id][:limit]
+
+    def write(self, db, transliterations):
+        self.written.update(transliterations)
+
+
+class FakeSession:
+    def commit(self):
+        pass
+
+
+def test_language_names_match_stored_values():
+    assert "Mandarin Chinese" in NON_LATIN_LANGUAGES
+    assert "Mandarin" not in NON_LATIN_LANGUAGES
+    assert "Spanish" not in NON_LATIN_LANGUAGES
+
+
+def test_parse_response_keeps_requested_non_empty_ids():
+    backfill = TransliterationBackfill()
+    batch = [item(1), item(2), item(3)]
+    response = "```json\n" + json.dumps({"1": " namaste ", "2": "", "99": "extra"}) + "\n```"
+
+    assert backfill.parse_response(response, batch) == {1: "namaste"}
+
+
+def test_parse_response_without_json_raises():
+    with pytest.raises(ValueError):
+        TransliterationBackfill().parse_response("Sorry, I can't help with that.", [item(1)])
+
+
+def test_batches_split_by_language_count_and_size():
+    backfill = TransliterationBackfill(batch_size=2, max_batch_chars=10)
+    items = [item(1, "abc"), item(2, "abc", "Tamil"), item(3, "abc"), item(4, "abc"), item(5, "abcdefghi")]
+
+    batches = backfill.make_batches(items)
+
+    assert [[entry[0] for entry in batch] for batch in batches] == [[1, 3], [4], [5], [2]]
+    assert all(len({entry[3] for entry in batch}) == 1 for batch in batches)
+
+
+def test_checkpoint_stops_before_first_failed_row():
+    backfill = TransliterationBackfill()
+    checkpoint = {}
+    items = [item(3), item(5), item(8), item(9)]
+
+    stalled = backfill.advance_checkpoint(checkpoint, "fake", items, {3: "a", 5: "b", 9: "d"})
+
+    assert stalled is True
+    assert checkpoint == {"fake": 5}
+
+
+def test_run_resumes_from_checkpoint_and_retries_failed_rows(tmp_path, monkeypatch):
+    target = FakeTarget([item(row_id) for row_id in range(1, 9)])
+    monkeypatch.setitem(transliteration_backfill.TARGETS, "fake", target)
+    failing = {4}
+
+    class FakeGemini:
+        async def generate_completion(self, prompt, max_output_tokens):
+            entries = json.loads(prompt[prompt.index("["):prompt.rindex("]") + 1])
+            return json.dumps({
+                entry["id"]: f"t{entry['id']}" for entry in entries if int(entry["id"]) not in failing
+            })
+
+    monkeypatch.setattr(transliteration_backfill, "gemini_service", FakeGemini())
+    checkpoint_path = tmp_path / "checkpoint.json"
+
+    def run_backfill():
+        backfill = TransliterationBackfill(
+            batch_size=2, max_concurrency=1, requests_per_minute=0, checkpoint_path=str(checkpoint_path)
+        )
+        return asyncio.run(backfill.run(FakeSession(), ["fake"]))[0]
+
+    stats = run_backfill()
+    assert stats["updated"] == 7 and stats["failed"] == 1
+    # Later rows are written but the checkpoint waits before the failed one
+    assert json.loads(checkpoint_path.read_text()) == {"fake": 3}
+
+    # Rows already written no longer show up as missing; the failed one is retried
+    target.items = [item(4)]
+    failing.clear()
+    stats = run_backfill()
+    assert stats["updated"] == 1
+    assert target.written[4] == "t4"
+    assert json.loads(checkpoint_path.read_text()) == {"fake": 4}
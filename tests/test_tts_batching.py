@@ -0,0 +1,110 @@
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.services import tts_service as tts_service_module
+from app.services.tts_backends import LocalTTSBackend, TTSBackend
+from app.services.tts_cache import TTSCache
+from app.services.tts_service import TTSService
+
+WORDS = ["पानी", "खाना", "घर", "किताब"]
+
+
+class CountingBackend(LocalTTSBackend):
+    """Local backend recording every text it synthesizes"""
+
+    def __init__(self, fail_batches: bool = False):
+        super().__init__(latency_ms=50, jitter=0)
+        self.fail_batches = fail_batches
+        self.lock = threading.Lock()
+        self.texts = []
+        self.requests = 0
+
+    def synthesize(self, text, params):
+        with self.lock:
+            self.requests += 1
+            self.texts.append(text)
+        return super().synthesize(text, params)
+
+    def synthesize_marked(self, ssml, params):
+        with self.lock:
+            self.requests += 1
+            self.texts.extend(re.findall(r'<mark name="[^"]*"/>([^<]*)', ssml))
+        if self.fail_batches:
+            raise RuntimeError("no timepoints")
+        return super().synthesize_marked(ssml, params)
+
+
+@pytest.fixture
+def service(tmp_path, monkeypatch):
+    monkeypatch.setattr(tts_service_module.settings, "TTS_SSML_BATCHING", True)
+    monkeypatch.setattr(tts_service_module, "tts_cache", TTSCache(str(tmp_path), max_bytes=10 * 1024 * 1024))
+    service = TTSService()
+    service.backend = CountingBackend()
+    yield service
+    service.executor.shutdown()
+
+
+def test_batch_synthesizes_each_distinct_text_once(service):
+    results = service.synthesize_speech_batch(WORDS + WORDS[:2], "Hindi")
+
+    assert all(result["success"] for result in results)
+    assert [result["text"] for result in results] == WORDS + WORDS[:2]
+    assert results[0]["audio_bytes"] == results[4]["audio_bytes"]
+    assert sorted(service.backend.texts) == sorted(WORDS)
+    assert service.backend.requests == 1
+
+
+def test_concurrent_batches_share_syntheses(service):
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        batches = list(pool.map(lambda _: service.synthesize_speech_batch(WORDS, "Hindi"), range(4)))
+
+    assert all(result["success"] for batch in batches for result in batch)
+    assert sorted(service.backend.texts) == sorted(WORDS)
+
+
+def test_batch_and_single_request_share_a_synthesis(service):
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        batch = pool.submit(service.synthesize_speech_batch, WORDS, "Hindi")
+        single = pool.submit(service.synthesize_speech_bytes, WORDS[0], "Hindi")
+        assert single.result()["success"] and all(result["success"] for result in batch.result())
+
+    assert sorted(service.backend.texts) == sorted(WORDS)
+
+
+def test_failed_batch_falls_back_to_single_requests(service):
+    service.backend.fail_batches = True
+
+    results = service.synthesize_speech_batch(WORDS, "Hindi")
+
+    assert all(result["success"] and not result["cache_hit"] for result in results)
+    # The batch, then one request per word
+    assert service.backend.requests == 1 + len(WORDS)
+
+
+def test_speakers_with_the_same_voice_share_a_batch(service):
+    # Both names are detected as male, so both get the first male voice
+    jobs = [
+        (WORDS[0], "Hindi", {"speaker_name": "Raj"}),
+        (WORDS[1], "Hindi", {"speaker_name": "Ravi"}),
+        (WORDS[2], "Hindi", {"voice_name": "hi-IN-Standard-B"}),
+        (WORDS[3], "Hindi", {"speaker_name": "Priya"})
+    ]
+
+    results = service.synthesize_many(jobs)
+
+    assert [result["speaker_name"] for result in results] == ["Raj", "Ravi", None, "Priya"]
+    assert {result["voice_name"] for result in results[:3]} == {"hi-IN-Standard-B"}
+    # One batch for the three male items, one single request for Priya
+    assert service.backend.requests == 2
+
+
+def test_backend_must_implement_both_syntheses():
+    class PlainOnlyBackend(TTSBackend):
+        def synthesize(self, text, params):
+            return b""
+
+    with pytest.raises(TypeError, match="synthesize_marked"):
+        PlainOnlyBackend()
@@ -0,0 +1,173 @@
+import os
+import threading
+import time
+
+import pytest
+
+from app.services.tts_cache import TTSCache, make_cache_key
+
+KEY_ARGS = ("पानी", "hi-IN", "hi-IN-Standard-A", 0.8, 0.0, 0.0, "MP3")
+
+
+def key(letter: str) -> str:
+    return letter * 64
+
+
+def produce(data: bytes):
+    calls = []
+
+    def producer():
+        calls.append(data)
+        return data
+    return producer, calls
+
+
+def test_cache_key_is_stable_and_rounds_numbers():
+    assert make_cache_key(*KEY_ARGS) == make_cache_key(*KEY_ARGS)
+    assert make_cache_key(*KEY_ARGS) == make_cache_key("पानी", "hi-IN", "hi-IN-Standard-A", 0.80000001, 0, 0.0004, "mp3")
+    assert len(make_cache_key(*KEY_ARGS)) == 64
+
+
+@pytest.mark.parametrize("index, value", [(0, "पानी!"), (2, "hi-IN-Standard-B"), (3, 0.9), (6, "OGG_OPUS")])
+def test_cache_key_covers_every_output_parameter(index, value):
+    changed = list(KEY_ARGS)
+    changed[index] = value
+    assert make_cache_key(*changed) != make_cache_key(*KEY_ARGS)
+
+
+def test_sample_rate_only_changes_the_key_when_set():
+    assert make_cache_key(*KEY_ARGS, None) == make_cache_key(*KEY_ARGS)
+    assert make_cache_key(*KEY_ARGS, 16000) != make_cache_key(*KEY_ARGS)
+
+
+def test_least_recently_used_clip_is_evicted_first(tmp_path):
+    cache = TTSCache(str(tmp_path), max_bytes=10)
+    cache.get_or_create(key("a"), "mp3", lambda: b"a" * 4)
+    cache.get_or_create(key("b"), "mp3", lambda: b"b" * 4)
+    assert cache.get(key("a"), "mp3") == b"a" * 4  # a is now more recent than b
+
+    cache.get_or_create(key("c"), "mp3", lambda: b"c" * 4)
+
+    assert cache.get(key("b"), "mp3") is None
+    assert cache.get(key("a"), "mp3") == b"a" * 4
+    stats = cache.get_stats()
+    assert stats["evictions"] == 1 and stats["size_bytes"] == 8
+
+
+def test_index_is_rebuilt_on_restart_in_access_order(tmp_path):
+    cache = TTSCache(str(tmp_path), max_bytes=100)
+    for letter in "abc":
+        cache.get_or_create(key(letter), "mp3", lambda: b"x" * 4)
+    # Last access times as a long-running process would have left them: a is the most recent
+    now = time.time()
+    for offset, letter in enumerate("bca"):
+        os.utime(tmp_path / (letter * 2) / f"{key(letter)}.mp3", (now + offset, now + offset))
+    (tmp_path / "aa" / f"{key('a')}.mp3.123.tmp").write_bytes(b"partial")
+
+    restarted = TTSCache(str(tmp_path), max_bytes=8)
+
+    assert restarted.get_stats()["entries"] == 2
+    assert restarted.get(key("b"), "mp3") is None
+    assert restarted.get(key("a"), "mp3") == b"x" * 4
+
+
+def test_concurrent_misses_share_one_producer_call(tmp_path):
+    cache = TTSCache(str(tmp_path), max_bytes=1024)
+    calls = []
+
+    def slow_producer():
+        calls.append(1)
+        time.sleep(0.2)
+        return b"clip"
+
+    results = []
+
+    def request():
+        results.append(cache.get_or_create(key("a"), "mp3", slow_producer))
+
+    threads = [threading.Thread(target=request) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert sorted(results) == [(b"clip", False)] + [(b"clip", True)] * 7
+    assert cache.get_stats()["coalesced"] + cache.get_stats()["hits"] == 7
+
+
+def test_producer_error_reaches_waiters_and_is_not_cached(tmp_path):
+    cache = TTSCache(str(tmp_path), max_bytes=1024)
+    release = threading.Event()
+
+    def failing_producer():
+        release.wait(5)
+        raise RuntimeError("quota exceeded")
+
+    errors = []
+
+    def request():
+        try:
+            cache.get_or_create(key("a"), "mp3", failing_producer)
+        except RuntimeError as e:
+            errors.append(str(e))
+
+    leader = threading.Thread(target=request)
+    leader.start()
+    while not cache.get_stats()["in_flight"]:
+        time.sleep(0.01)
+    waiter = threading.Thread(target=request)
+    waiter.start()
+    while not cache.get_stats()["coalesced"]:
+        time.sleep(0.01)
+    release.set()
+    leader.join()
+    waiter.join()
+
+    assert errors == ["quota exceeded", "quota exceeded"]
+    assert cache.get_stats()["in_flight"] == 0
+    producer, calls = produce(b"clip")
+    assert cache.get_or_create(key("a"), "mp3", producer) == (b"clip", False)
+    assert calls == [b"clip"]
+
+
+def test_get_or_create_path_serves_the_file(tmp_path):
+    cache = TTSCache(str(tmp_path), max_bytes=1024)
+
+    path, data, cache_hit = cache.get_or_create_path(key("a"), "mp3", lambda: b"clip")
+    assert (data, cache_hit) == (b"clip", False) and path.read_bytes() == b"clip"
+
+    path, data, cache_hit = cache.get_or_create_path(key("a"), "mp3", lambda: b"other")
+    assert (data, cache_hit) == (None, True) and path.read_bytes() == b"clip"
+
+
+def test_disabled_cache_always_calls_the_producer(tmp_path):
+    cache = TTSCache(str(tmp_path), max_bytes=1024, enabled=False)
+    producer, calls = produce(b"clip")
+
+    assert cache.get_or_create(key("a"), "mp3", producer) == (b"clip", False)
+    assert cache.get_or_create(key("a"), "mp3", producer) == (b"clip", False)
+    assert len(calls) == 2 and not list(tmp_path.iterdir())
+
+
+def test_clip_written_by_another_process_is_adopted(tmp_path):
+    ours = TTSCache(str(tmp_path), max_bytes=1024)
+    theirs = TTSCache(str(tmp_path), max_bytes=1024)
+    theirs.get_or_create(key("a"), "mp3", lambda: b"clip")
+
+    producer, calls = produce(b"other")
+    assert ours.get_or_create(key("a"), "mp3", producer) == (b"clip", True)
+    assert calls == []
+    assert ours.get_stats()["entries"] == 1
+    assert ours.get_stats()["size_bytes"] == 4
+
+
+def test_adopted_clip_counts_towards_the_size_limit(tmp_path):
+    ours = TTSCache(str(tmp_path), max_bytes=10)
+    ours.get_or_create(key("a"), "mp3", lambda: b"x" * 6)
+    TTSCache(str(tmp_path), max_bytes=10).get_or_create(key("b"), "mp3", lambda: b"y" * 6)
+
+    assert ours.get(key("b"), "mp3") == b"y" * 6
+    # Adopting it pushed ours past its limit: the older clip went
+    assert ours.get_stats()["entries"] == 1
+    assert not (tmp_path / "aa" / f"{key('a')}.mp3").exists()
@@ -0,0 +1,303 @@
+import asyncio
+import base64
+import json
+from email.parser import BytesParser
+
+import httpx
+import pytest
+
+from app.services import tts_service as tts_service_module
+from app.services.lesson_audio import lesson_audio_store, prerender_lesson_audio
+from app.services.tts_backends import LocalTTSBackend
+from app.services.tts_cache import TTSCache
+from app.services.tts_service import tts_service
+from app.utils.audio import parse_mp3, slice_mp3
+
+SYNTHESIZE = "/api/tts/synthesize-audio"
+WORD = {"text": "नमस्ते", "language": "Hindi"}
+
+
+class Client:
+    """Synchronous requests against the app through httpx's ASGI transport (no server, no startup hooks)"""
+
+    def __init__(self, app):
+        self.app = app
+
+    def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        async def send():
+            transport = httpx.ASGITransport(app=self.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                return await client.request(method, url, **kwargs)
+        return asyncio.run(send())
+
+    def get(self, url: str, **kwargs) -> httpx.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> httpx.Response:
+        return self.request("POST", url, **kwargs)
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    """The app with an instant local TTS backend and its own TTS cache and lesson audio directory"""
+    monkeypatch.setattr(tts_service, "backend", LocalTTSBackend(latency_ms=0))
+    monkeypatch.setattr(tts_service_module, "tts_cache", TTSCache(str(tmp_path / "tts"), max_bytes=64 * 1024 * 1024))
+    monkeypatch.setattr(lesson_audio_store, "root_dir", tmp_path / "lessons")
+    from app.main import app
+    return Client(app)
+
+
+def prerender_lesson_audio_for(lesson_id: int):
+    from app.utils.database import SessionLocal
+    session = SessionLocal()
+    try:
+        return prerender_lesson_audio(session, lesson_id)
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def lesson_id(db):
+    from app.models.models import DesiLesson
+    lesson = db.query(DesiLesson).order_by(DesiLesson.id).first()
+    if lesson is None:
+        pytest.skip("No lessons in the database")
+    return lesson.id
+
+
+def test_synthesized_clip_is_cacheable_and_revalidated_without_synthesis(client):
+    response = client.get(SYNTHESIZE, params=WORD)
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "audio/mpeg"
+    assert "immutable" in response.headers["cache-control"]
+    assert response.headers["accept-ranges"] == "bytes"
+    assert response.headers["x-tts-cache"] == "MISS"
+    etag = response.headers["etag"]
+
+    tts_service.backend = None  # Any synthesis now fails
+    revalidated = client.get(SYNTHESIZE, params=WORD, headers={"If-None-Match": etag})
+    assert revalidated.status_code == 304
+    assert revalidated.content == b""
+    assert revalidated.headers["etag"] == etag
+
+
+def test_etag_follows_the_synthesis_parameters(client):
+    etag = client.get(SYNTHESIZE, params=WORD).headers["etag"]
+
+    assert client.get(SYNTHESIZE, params=WORD).headers["etag"] == etag
+    assert client.get(SYNTHESIZE, params={**WORD, "speaking_rate": 0.8}).headers["etag"] != etag
+    assert client.get(SYNTHESIZE, params={**WORD, "speaking_rate": 0.8}, headers={"If-None-Match": etag}).status_code == 200
+
+
+def test_range_request_gets_partial_content(client):
+    full = client.get(SYNTHESIZE, params=WORD).content
+
+    response = client.get(SYNTHESIZE, params=WORD, headers={"Range": "bytes=100-199"})
+    assert response.status_code == 206
+    assert response.content == full[100:200]
+    assert response.headers["content-range"] == f"bytes 100-199/{len(full)}"
+
+    suffix = client.get(SYNTHESIZE, params=WORD, headers={"Range": "bytes=-50"})
+    assert suffix.status_code == 206 and suffix.content == full[-50:]
+
+    unsatisfiable = client.get(SYNTHESIZE, params=WORD, headers={"Range": f"bytes={len(full)}-"})
+    assert unsatisfiable.status_code == 416
+
+
+def test_unsupported_language_is_400(client):
+    assert client.get(SYNTHESIZE, params={"text": "hi", "language": "Klingon"}).status_code == 400
+
+
+def test_bundle_file_revalidates_and_serves_ranges(client, lesson_id):
+    bundle = client.get(f"/api/tts/lesson-audio/{lesson_id}/bundle").json()
+    versioned = client.get(bundle["audio_url"])
+    assert versioned.status_code == 200
+    assert len(versioned.content) == bundle["size"]
+    assert "immutable" in versioned.headers["cache-control"]
+
+    url = f"/api/tts/lesson-audio/{lesson_id}/bundle.mp3"
+    unversioned = client.get(url)
+    assert "immutable" not in unversioned.headers["cache-control"]
+    assert client.get(url, headers={"If-None-Match": unversioned.headers["etag"]}).status_code == 304
+
+    partial = client.get(url, headers={"Range": "bytes=0-1023"})
+    assert partial.status_code == 206
+    assert partial.content == versioned.content[:1024]
+
+
+@pytest.mark.parametrize("accept, content_type, magic", [
+    ("audio/ogg", "audio/ogg", b"OggS"),
+    ("audio/wav;q=0.5, audio/ogg;q=0.9", "audio/ogg", b"OggS"),
+    ("audio/wav", "audio/wav", b"RIFF"),
+    ("audio/*, */*", "audio/mpeg", b"\xff"),
+    (None, "audio/mpeg", b"\xff")
+])
+def test_format_is_negotiated_from_accept(client, accept, content_type, magic):
+    response = client.get(SYNTHESIZE, params=WORD, headers={"Accept": accept} if accept else {})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == content_type
+    assert response.content.startswith(magic)
+    assert response.headers["vary"] == "Accept"
+
+
+def test_negotiated_formats_have_their_own_etags(client):
+    mp3 = client.get(SYNTHESIZE, params=WORD, headers={"Accept": "audio/mpeg"})
+    ogg = client.get(SYNTHESIZE, params=WORD, headers={"Accept": "audio/ogg"})
+    assert mp3.headers["etag"] != ogg.headers["etag"]
+
+    # An MP3 ETag doesn't validate the Ogg response
+    response = client.get(SYNTHESIZE, params=WORD, headers={"Accept": "audio/ogg", "If-None-Match": mp3.headers["etag"]})
+    assert response.status_code == 200
+    assert response.content.startswith(b"OggS")
+
+
+def test_explicit_format_wins_over_accept(client):
+    response = client.get(SYNTHESIZE, params={**WORD, "audio_format": "MP3"}, headers={"Accept": "audio/ogg"})
+
+    assert response.headers["content-type"] == "audio/mpeg"
+    assert "vary" not in response.headers
+
+
+def test_low_quality_is_smaller_and_cached_separately(client):
+    standard = client.get(SYNTHESIZE, params={**WORD, "audio_format": "WAV"})
+    low = client.get(SYNTHESIZE, params={**WORD, "audio_format": "WAV", "quality": "low"})
+
+    assert low.headers["etag"] != standard.headers["etag"]
+    assert len(low.content) < len(standard.content)
+    assert client.get(SYNTHESIZE, params={**WORD, "quality": "lossless"}).status_code == 400
+
+
+def ndjson(response: httpx.Response) -> list:
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+def test_stream_emits_one_record_per_clip_in_lesson_order(client, lesson_id):
+    response = client.get(f"/api/tts/lesson-audio/{lesson_id}/stream")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    records = ndjson(response)
+
+    header, clips, done = records[0], records[1:-1], records[-1]
+    assert header["type"] == "lesson" and header["source"] == "synthesized"
+    assert len(clips) == header["total"] > 0
+    assert [record["position"] for record in clips] == list(range(header["total"]))
+    assert all(record["type"] == "clip" and base64.b64decode(record["audio"]) for record in clips)
+    assert done == {"type": "done", "success": True, "errors": []}
+
+
+def test_stream_reads_prerendered_audio(client, lesson_id):
+    synthesized = ndjson(client.get(f"/api/tts/lesson-audio/{lesson_id}/stream"))
+    prerender_lesson_audio_for(lesson_id)
+
+    prerendered = ndjson(client.get(f"/api/tts/lesson-audio/{lesson_id}/stream"))
+
+    assert prerendered[0]["source"] == "prerendered"
+    assert [(record["section"], record["index"]) for record in prerendered[1:-1]] == \
+        [(record["section"], record["index"]) for record in synthesized[1:-1]]
+    assert prerendered[-1]["success"] is True
+
+
+def test_stream_of_a_missing_lesson_is_404(client, database_available):
+    if not database_available:
+        pytest.skip("PostgreSQL is not available at DB_URL")
+    assert client.get("/api/tts/lesson-audio/999999999/stream").status_code == 404
+
+
+BATCH_ITEMS = [
+    {"text": "पानी", "language": "Hindi"},
+    {"text": "खाना", "language": "Hindi", "speaker_name": "Raj"},
+    {"text": "hello", "language": "Klingon"},
+    {"text": "घर", "language": "Hindi", "speaking_rate": 0.8}
+]
+
+
+def multipart_parts(response: httpx.Response) -> list:
+    """(headers, body) of each part of a multipart/mixed response"""
+    message = BytesParser().parsebytes(
+        f"Content-Type: {response.headers['content-type']}\r\n\r\n".encode() + response.content
+    )
+    return [(dict(part.items()), part.get_payload(decode=True)) for part in message.get_payload()]
+
+
+def test_batch_returns_a_manifest_and_one_part_per_item(client):
+    response = client.post("/api/tts/batch", json={"items": BATCH_ITEMS})
+    assert response.status_code == 200
+    (manifest_headers, manifest_body), *audio_parts = multipart_parts(response)
+
+    manifest = json.loads(manifest_body)
+    assert manifest_headers["Content-ID"] == "<manifest>"
+    assert manifest["success"] is False
+    assert [entry["success"] for entry in manifest["items"]] == [True, True, False, True]
+    assert [headers["Content-ID"] for headers, _ in audio_parts] == ["<item-0>", "<item-1>", "<item-3>"]
+    for (headers, body), entry in zip(audio_parts, [manifest["items"][index] for index in (0, 1, 3)]):
+        assert len(body) == entry["size"] == int(headers["Content-Length"])
+        assert parse_mp3(body).frames
+
+    single = client.get(SYNTHESIZE, params=BATCH_ITEMS[0])
+    assert single.headers["x-tts-cache"] == "HIT"
+    assert single.content == audio_parts[0][1]
+
+
+def test_sprite_offsets_slice_out_each_item(client):
+    clips = [body for _, body in multipart_parts(client.post("/api/tts/batch", json={"items": BATCH_ITEMS}))[1:]]
+
+    response = client.post("/api/tts/batch", json={"items": BATCH_ITEMS, "response_format": "sprite"})
+    assert response.status_code == 200
+    (_, manifest_body), (sprite_headers, sprite) = multipart_parts(response)
+    manifest = json.loads(manifest_body)
+    assert sprite_headers["Content-Type"] == "audio/mpeg"
+
+    entries = [entry for entry in manifest["items"] if entry["success"]]
+    info = parse_mp3(sprite)
+    assert [slice_mp3(sprite, info, entry["start_ms"], entry["end_ms"]) for entry in entries] == clips
+    assert entries[-1]["end_ms"] == pytest.approx(info.duration_ms, abs=1)
+
+
+def test_batch_rejects_unknown_response_format(client):
+    assert client.post("/api/tts/batch", json={"items": BATCH_ITEMS, "response_format": "zip"}).status_code == 400
+
+
+def test_bundle_timings_slice_out_the_lesson_clips(client, lesson_id):
+    bundle = client.get(f"/api/tts/lesson-audio/{lesson_id}/bundle").json()
+    audio = client.get(bundle["audio_url"]).content
+    manifest = lesson_audio_store.load_manifest(lesson_id)
+
+    assert bundle["errors"] == [] and len(bundle["items"]) == len(manifest["items"])
+    info = parse_mp3(audio)
+    for item, entry in zip(bundle["items"], manifest["items"]):
+        clip = lesson_audio_store.clip_path(lesson_id, entry["file"]).read_bytes()
+        assert (item["section"], item["target_script"]) == (entry["section"], entry["target_script"])
+        assert slice_mp3(audio, info, item["start_ms"], item["end_ms"]) == clip
+
+
+def test_prerendered_lesson_with_a_missing_clip_is_rendered_again(client, lesson_id):
+    manifest = prerender_lesson_audio_for(lesson_id)
+    missing = lesson_audio_store.clip_path(lesson_id, manifest["items"][0]["file"])
+    # As when the worker that rendered it wrote to a disk this process doesn't see
+    missing.unlink()
+
+    response = client.post("/api/tts/lesson-audio", json={"lesson_id": lesson_id, "language": manifest["language"]})
+
+    assert response.status_code == 200 and response.json()["success"] is True
+    assert missing.is_file()
+
+
+def test_stream_synthesizes_when_prerendered_clips_are_missing(client, lesson_id):
+    manifest = prerender_lesson_audio_for(lesson_id)
+    lesson_audio_store.clip_path(lesson_id, manifest["items"][-1]["file"]).unlink()
+
+    records = ndjson(client.get(f"/api/tts/lesson-audio/{lesson_id}/stream"))
+
+    assert records[0]["source"] == "synthesized"
+    assert records[-1]["success"] is True
+
+
+def test_bundle_without_its_audio_file_is_rebuilt(client, lesson_id):
+    prerender_lesson_audio_for(lesson_id)
+    lesson_audio_store.bundle_path(lesson_id).unlink()
+
+    bundle = client.get(f"/api/tts/lesson-audio/{lesson_id}/bundle").json()
+
+    assert client.get(bundle["audio_url"]).status_code == 200
+    assert lesson_audio_store.bundle_path(lesson_id).stat().st_size == bundle["size"]